@@ -2,7 +2,8 @@
 캐릭터 관련 API 라우터 - CAVEDUCK 스타일 고급 캐릭터 생성
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, List, Optional
 import uuid
@@ -136,6 +137,15 @@ from app.services.character_service import (
     update_character_public_status, # 서비스 함수 임포트 추가
     increment_character_chat_count,
 )
+from app.services.search_service import uses_relevance_order
+from app.services.character_list_cache import (
+    decode_list_cursor,
+    encode_list_cursor,
+    get_cached_public_character_list,
+    invalidate_public_character_list_cache,
+    list_cache_params,
+    set_cached_public_character_list,
+)
 from app.services.quick_character_service import (
     generate_quick_character_draft,
     generate_quick_simulator_prompt,
@@ -150,6 +160,7 @@ from app.services.quick_character_service import (
     generate_quick_ending_draft,
     generate_quick_ending_epilogue,
 )
+from app.services.stage_graph import Stage, StageGraphError, clear_checkpoints, run_stage_graph
 from app.schemas.tag import CharacterTagsUpdate, TagResponse
 from app.models.tag import Tag, CharacterTag
 from app.models.story_extracted_character import StoryExtractedCharacter
@@ -354,55 +365,111 @@ async def _backfill_quick_create_30s_optional_fields(
             and len(dislikes) >= 3
         )
 
-    detail_personality = ""
-    detail_speech = ""
-    detail_interests: List[str] = []
-    detail_likes: List[str] = []
-    detail_dislikes: List[str] = []
-    detail_attempts = 0
+    def _parse_detail(out: Any) -> dict:
+        out = out if isinstance(out, dict) else {}
+        return {
+            "personality": str(out.get("personality") or "").strip(),
+            "speech_style": str(out.get("speech_style") or "").strip(),
+            "interests": [str(x or "").strip() for x in (out.get("interests") or []) if str(x or "").strip()][:3],
+            "likes": [str(x or "").strip() for x in (out.get("likes") or []) if str(x or "").strip()][:3],
+            "dislikes": [str(x or "").strip() for x in (out.get("dislikes") or []) if str(x or "").strip()][:3],
+        }
 
-    while detail_attempts < 3:
-        detail_attempts += 1
-        try:
-            out = await generate_quick_detail(
-                name=name,
-                description=description,
-                world_setting=str(world_setting or ""),
-                mode=character_type,
-                section_modes=None,
-                tags=tags or [],
-                ai_model=ai_model,
-            ) or {}
-            detail_personality = str(out.get("personality") or "").strip()
-            detail_speech = str(out.get("speech_style") or "").strip()
-            detail_interests = [str(x or "").strip() for x in (out.get("interests") or []) if str(x or "").strip()][:3]
-            detail_likes = [str(x or "").strip() for x in (out.get("likes") or []) if str(x or "").strip()][:3]
-            detail_dislikes = [str(x or "").strip() for x in (out.get("dislikes") or []) if str(x or "").strip()][:3]
-            if _is_complete_detail_payload(
-                detail_personality,
-                detail_speech,
-                detail_interests,
-                detail_likes,
-                detail_dislikes,
-            ):
-                break
+    # =========================
+    # 단계 그래프: 디테일 ∥ (엔딩 초안 → 에필로그)
+    # =========================
+    # - 디테일과 엔딩은 서로 독립이라 동시에 실행한다(후처리 완료 ≈ 더 긴 쪽).
+    # - 디테일: 불완전하면 최대 3회 시도, 마지막 부분 결과는 아래 deterministic fallback이 채운다.
+    # - 엔딩: 초안(제목/기본조건 필수) 최대 3회, 에필로그 최대 3회.
+    async def _stage_detail(_: dict) -> dict:
+        return _parse_detail(await generate_quick_detail(
+            name=name,
+            description=description,
+            world_setting=str(world_setting or ""),
+            mode=character_type,
+            section_modes=None,
+            tags=tags or [],
+            ai_model=ai_model,
+        ))
+
+    async def _stage_ending_draft(_: dict) -> dict:
+        d = await generate_quick_ending_draft(
+            name=name,
+            description=description,
+            world_setting=world_setting,
+            opening_intro=opening_intro or "",
+            opening_first_line=opening_first_line or "",
+            mode=character_type,
+            max_turns=max_turns,
+            min_turns=min_turns,
+            sim_variant=None,
+            sim_dating_elements=sim_dating_elements,
+            tags=tags or [],
+            ai_model=ai_model,
+        ) or {}
+        draft = {
+            "title": str(d.get("title") or "").strip()[:20],
+            "base_condition": str(d.get("base_condition") or "").strip()[:500],
+            "hint": str(d.get("hint") or "").strip()[:20],
+            "suggested_turn": int(d.get("suggested_turn") or 0),
+        }
+        if not draft["title"] or not draft["base_condition"]:
+            raise ValueError("ending_draft_incomplete")
+        return draft
+
+    async def _stage_ending_epilogue(dep: dict) -> str:
+        draft = dep["ending_draft"]
+        ep = await generate_quick_ending_epilogue(
+            name=name,
+            description=description,
+            world_setting=world_setting,
+            opening_intro=opening_intro or "",
+            opening_first_line=opening_first_line or "",
+            ending_title=draft["title"],
+            base_condition=draft["base_condition"],
+            hint=draft["hint"],
+            extra_conditions=[],
+            mode=character_type,
+            sim_variant=None,
+            sim_dating_elements=sim_dating_elements,
+            tags=tags or [],
+            ai_model=ai_model,
+        )
+        return str(ep or "").strip()
+
+    def _detail_complete(d: Any) -> bool:
+        return isinstance(d, dict) and _is_complete_detail_payload(
+            d["personality"], d["speech_style"], d["interests"], d["likes"], d["dislikes"]
+        )
+
+    stage_result = await run_stage_graph(
+        [
+            Stage("detail", _stage_detail, timeout=90, retries=2, required=False, accept=_detail_complete),
+            Stage("ending_draft", _stage_ending_draft, timeout=60, retries=2, required=False),
+            Stage(
+                "ending_epilogue", _stage_ending_epilogue, deps=("ending_draft",),
+                timeout=60, retries=2, required=False, accept=bool,
+            ),
+        ],
+        label="characters.quick-create-30s.bg_stages",
+    )
+    for stage_name, run in stage_result.runs.items():
+        if run.status in ("failed", "partial"):
             try:
                 logger.warning(
-                    "[characters.quick-create-30s][bg] detail incomplete "
-                    f"(attempt={detail_attempts}, p={bool(detail_personality)}, s={bool(detail_speech)}, "
-                    f"i={len(detail_interests)}, l={len(detail_likes)}, d={len(detail_dislikes)})"
-                )
-            except Exception:
-                pass
-        except Exception as e:
-            try:
-                logger.exception(
-                    "[characters.quick-create-30s][bg] detail generation failed "
-                    f"(attempt={detail_attempts}, non-fatal): {e}"
+                    f"[characters.quick-create-30s][bg] {stage_name} {run.status} "
+                    f"(attempts={run.attempts}, non-fatal): {run.error}"
                 )
             except Exception:
                 pass
 
+    detail = stage_result.value("detail") or _parse_detail({})
+    detail_personality = detail["personality"]
+    detail_speech = detail["speech_style"]
+    detail_interests = detail["interests"]
+    detail_likes = detail["likes"]
+    detail_dislikes = detail["dislikes"]
+
     # 30초 생성 누락 방지: 부분/실패 결과는 deterministic fallback으로 채운다.
     if not detail_personality:
         if character_type == "simulator":
@@ -444,66 +511,18 @@ async def _backfill_quick_create_30s_optional_fields(
         detail_speech = detail_speech[:2000].rstrip()
 
     endings: List[dict] = []
-    attempts = 0
-    while len(endings) < 1 and attempts < 3:
-        attempts += 1
-        try:
-            d = await generate_quick_ending_draft(
-                name=name,
-                description=description,
-                world_setting=world_setting,
-                opening_intro=opening_intro or "",
-                opening_first_line=opening_first_line or "",
-                mode=character_type,
-                max_turns=max_turns,
-                min_turns=min_turns,
-                sim_variant=None,
-                sim_dating_elements=sim_dating_elements,
-                tags=tags or [],
-                ai_model=ai_model,
-            ) or {}
-            title = str(d.get("title") or "").strip()[:20]
-            base_condition = str(d.get("base_condition") or "").strip()[:500]
-            hint = str(d.get("hint") or "").strip()[:20]
-            suggested_turn = int(d.get("suggested_turn") or 0)
-            if not title or not base_condition:
-                continue
-
-            ep = await generate_quick_ending_epilogue(
-                name=name,
-                description=description,
-                world_setting=world_setting,
-                opening_intro=opening_intro or "",
-                opening_first_line=opening_first_line or "",
-                ending_title=title,
-                base_condition=base_condition,
-                hint=hint,
-                extra_conditions=[],
-                mode=character_type,
-                sim_variant=None,
-                sim_dating_elements=sim_dating_elements,
-                tags=tags or [],
-                ai_model=ai_model,
-            )
-            ep = str(ep or "").strip()
-            if not ep:
-                continue
-
-            endings.append({
-                "id": f"end_qc_{uuid.uuid4().hex[:10]}",
-                "turn": max(0, suggested_turn),
-                "title": title,
-                "base_condition": base_condition,
-                "epilogue": ep[:1000],
-                "hint": hint,
-                "extra_conditions": [],
-            })
-        except Exception as e:
-            try:
-                logger.exception(f"[characters.quick-create-30s][bg] ending generation attempt failed (attempt={attempts}): {e}")
-            except Exception:
-                pass
-            continue
+    ending_draft = stage_result.value("ending_draft")
+    ending_epilogue = stage_result.value("ending_epilogue")
+    if ending_draft and ending_epilogue and stage_result.runs["ending_epilogue"].status != "partial":
+        endings.append({
+            "id": f"end_qc_{uuid.uuid4().hex[:10]}",
+            "turn": max(0, int(ending_draft.get("suggested_turn") or 0)),
+            "title": ending_draft["title"],
+            "base_condition": ending_draft["base_condition"],
+            "epilogue": ending_epilogue[:1000],
+            "hint": ending_draft["hint"],
+            "extra_conditions": [],
+        })
 
     async with AsyncSessionLocal() as bg_db:
         try:
@@ -915,27 +934,111 @@ async def quick_create_character_30s(
                     }
                 )
             return out
-        if character_type == "simulator":
-            world_setting = await generate_quick_simulator_prompt(
+        # =========================
+        # 2.5) 단계 그래프: 프롬프트 → (스탯 ∥ 오프닝 → 턴수별 사건)
+        # =========================
+        # - 스탯과 오프닝/사건은 world_setting만 있으면 서로 독립이라 동시에 실행한다(전체 ≈ 가장 긴 경로).
+        # - request_id가 있으면 단계 결과를 Redis에 체크포인트 → 같은 요청 재시도 시 성공한 단계는 건너뛴다.
+        # - 단계별 소요 시간은 `[perf] characters.quick-create-30s.stages` 로그로 남는다.
+        async def _stage_world(_: dict) -> str:
+            if character_type == "simulator":
+                return await generate_quick_simulator_prompt(
+                    name=name,
+                    description=description_for_generation,
+                    max_turns=max_turns,
+                    allow_infinite_mode=False,
+                    tags=tag_slugs,
+                    ai_model=ai_model,
+                    sim_variant=None,
+                    sim_dating_elements=sim_dating_elements,
+                    quick_30s_mode=True,
+                )
+            return await generate_quick_roleplay_prompt(
                 name=name,
                 description=description_for_generation,
                 max_turns=max_turns,
                 allow_infinite_mode=False,
                 tags=tag_slugs,
                 ai_model=ai_model,
-                sim_variant=None,
-                sim_dating_elements=sim_dating_elements,
                 quick_30s_mode=True,
             )
-            stats = await generate_quick_stat_draft(
+
+        async def _stage_stats(dep: dict) -> list:
+            # SSOT: quick_character_service.generate_quick_stat_draft (런타임 stat_state용 id 포함 포맷)
+            return await generate_quick_stat_draft(
+                name=name,
+                description=description_for_generation,
+                world_setting=str(dep["world"] or ""),
+                mode=character_type,
+                tags=tag_slugs,
+                ai_model=ai_model,
+            )
+
+        async def _stage_first_start(dep: dict) -> list:
+            intro0, first_line0 = await generate_quick_first_start(
+                name=name,
+                description=description_for_generation,
+                world_setting=str(dep["world"] or ""),
+                mode=character_type,
+                sim_variant=None,
+                sim_dating_elements=sim_dating_elements,
+                tags=tag_slugs,
+                ai_model=ai_model,
+            )
+            return [intro0, first_line0]
+
+        async def _stage_turn_events(dep: dict) -> list:
+            # ✅ 위저드와 논리 통일: 오프닝 직후 `quick-generate-turn-events`와 같은 "진행 가이드(사건)"를 넣는다.
+            intro0, first_line0 = (list(dep["first_start"] or []) + ["", ""])[:2]
+            return await generate_quick_turn_events(
                 name=name,
                 description=description_for_generation,
-                world_setting=world_setting,
+                world_setting=str(dep.get("world") or ""),
+                opening_intro=str(intro0 or ""),
+                opening_first_line=str(first_line0 or ""),
                 mode=character_type,
+                max_turns=max_turns,
+                sim_variant=None,
+                sim_dating_elements=sim_dating_elements,
                 tags=tag_slugs,
                 ai_model=ai_model,
             )
-            stats = _normalize_stats_for_start_set(stats or [])
+
+        stage_checkpoint_key = f"{idem_key}:stages" if idem_key else ""
+        try:
+            stage_result = await run_stage_graph(
+                [
+                    Stage("world", _stage_world, timeout=120),
+                    # 빈 결과/실패일 때만 스탯 단계 1회 재시도(위저드 공용 헬퍼와 같은 정책)
+                    Stage(
+                        "stats", _stage_stats, deps=("world",), timeout=60, retries=1, required=False,
+                        accept=lambda v: isinstance(v, list) and bool(v),
+                    ),
+                    Stage("first_start", _stage_first_start, deps=("world",), timeout=90),
+                    # 실패해도 전체 생성은 진행(운영/데모 안정)
+                    Stage("turn_events", _stage_turn_events, deps=("world", "first_start"), timeout=60, required=False),
+                ],
+                checkpoint_key=stage_checkpoint_key,
+                label="characters.quick-create-30s.stages",
+            )
+        except StageGraphError as e:
+            try:
+                logger.error(f"[characters.quick-create-30s] {e}")
+            except Exception:
+                pass
+            raise HTTPException(status_code=500, detail=f"quick_create_failed: {e.stage}_failed")
+
+        for stage_name in ("stats", "turn_events"):
+            run = stage_result.runs.get(stage_name)
+            if run is not None and not run.usable:
+                try:
+                    logger.warning(f"[characters.quick-create-30s] {stage_name} generation failed (non-fatal): {run.error}")
+                except Exception:
+                    pass
+
+        world_setting = stage_result.value("world", "")
+        stats = _normalize_stats_for_start_set(stage_result.value("stats", []) or [])
+        if character_type == "simulator":
             # ✅ 방어: 스탯 생성이 실패(빈 배열)하면 시뮬레이터 기본 스탯 폴백
             # - UI에서 !스탯 호출 시 "불러오지 못했습니다" 에러를 방지
             if not stats:
@@ -949,33 +1052,7 @@ async def quick_create_character_30s(
                     {"id": "progress", "label": "진행도", "base_value": 0, "min_value": 0, "max_value": 100},
                 ]
         else:
-            world_setting = await generate_quick_roleplay_prompt(
-                name=name,
-                description=description_for_generation,
-                max_turns=max_turns,
-                allow_infinite_mode=False,
-                tags=tag_slugs,
-                ai_model=ai_model,
-                quick_30s_mode=True,
-            )
             # ✅ 요구사항: RP도 최소 1개(호감도) 스탯은 포함한다.
-            # - 런타임 stat_state 주입/델타 반영을 위해 id 포함 포맷이 필요(SSOT: quick_character_service.generate_quick_stat_draft).
-            try:
-                stats = await generate_quick_stat_draft(
-                    name=name,
-                    description=description_for_generation,
-                    world_setting=world_setting,
-                    mode=character_type,
-                    tags=tag_slugs,
-                    ai_model=ai_model,
-                )
-                stats = _normalize_stats_for_start_set(stats or [])
-            except Exception as e:
-                try:
-                    logger.exception(f"[characters.quick-create-30s] roleplay stat generation failed (non-fatal): {e}")
-                except Exception:
-                    pass
-                stats = []
             # ✅ 최소 1개 보장(운영 안정): 모델 실패/빈 결과면 기본 호감도 1개
             if not stats:
                 stats = _normalize_stats_for_start_set(
@@ -997,46 +1074,12 @@ async def quick_create_character_30s(
         merged_personality = ""
         detail_speech = ""
 
-        intro, first_line = await generate_quick_first_start(
-            name=name,
-            description=description_for_generation,
-            world_setting=world_setting,
-            mode=character_type,
-            sim_variant=None,
-            sim_dating_elements=sim_dating_elements,
-            tags=tag_slugs,
-            ai_model=ai_model,
-        )
+        intro, first_line = (list(stage_result.value("first_start", []) or []) + ["", ""])[:2]
 
-        # =========================
-        # 2.6) 턴수별 사건(turn_events) 생성 (Best-effort)
-        # =========================
-        # ✅ 위저드와 논리 통일:
-        # - 위저드는 오프닝 생성 직후 `quick-generate-turn-events`로 turn_events를 채운다.
-        # - 30초 생성도 동일한 "진행 가이드(사건)"를 넣어 루프/정체를 완화한다.
-        # - 실패해도 전체 생성은 진행(운영/데모 안정).
         turn_events: List[dict] = []
-        try:
-            evs = await generate_quick_turn_events(
-                name=name,
-                description=description_for_generation,
-                world_setting=str(world_setting or ""),
-                opening_intro=str(intro or ""),
-                opening_first_line=str(first_line or ""),
-                mode=character_type,
-                max_turns=max_turns,
-                sim_variant=None,
-                sim_dating_elements=sim_dating_elements,
-                tags=tag_slugs,
-                ai_model=ai_model,
-            )
-            if isinstance(evs, list) and evs:
-                turn_events = evs[:20]
-        except Exception as e:
-            try:
-                logger.exception(f"[characters.quick-create-30s] turn_events generation failed (non-fatal): {e}")
-            except Exception:
-                pass
+        evs = stage_result.value("turn_events", [])
+        if isinstance(evs, list) and evs:
+            turn_events = evs[:20]
 
         # 엔딩은 백그라운드에서 생성한다.
         endings: List[dict] = []
@@ -1131,6 +1174,8 @@ async def quick_create_character_30s(
                     logger.warning(f"[characters.quick-create-30s] redis set failed (idem_key): {e}")
                 except Exception:
                     pass
+            # 저장까지 끝났으므로 단계 체크포인트는 더 필요 없다(재시도는 idem_key로 기존 캐릭터 반환).
+            await clear_checkpoints(stage_checkpoint_key)
 
         # 디테일/엔딩은 백그라운드 후처리(30초 성공 조건에서 제외)
         try:
@@ -1842,6 +1887,7 @@ async def set_character_tags(
         for t in tag_rows:
             await db.execute(insert(CharacterTag).values(character_id=character_id, tag_id=t.id))
     await db.commit()
+    await invalidate_public_character_list_cache()
 
     result = await db.execute(select(Tag).join(Tag.characters).where(Tag.characters.any(id=character_id)))
     return result.scalars().all()
@@ -1966,9 +2012,34 @@ async def get_characters(
     tags: Optional[str] = Query(None, description="필터 태그 목록(콤마 구분 slug)"),
     gender: Optional[str] = Query(None, description="성별 필터: all|male|female|other (태그 기반)"),
     only: Optional[str] = Query(None, description="origchat|regular"),
+    cursor: Optional[str] = Query(None, description="키셋 커서(이전 응답의 X-Next-Cursor 헤더). 지정 시 skip 무시"),
     db: AsyncSession = Depends(get_db)
 ):
-    """캐릭터 목록 조회"""
+    """
+    캐릭터 목록 조회
+
+    - 공개 목록(creator_id 없음)은 정규화된 필터/정렬/페이지 키로 직렬화된 응답을 캐시한다.
+    - 다음 페이지 커서는 `X-Next-Cursor` 응답 헤더로 내려준다(깊은 페이지는 skip 대신 cursor 사용).
+    """
+    tag_list = [s for s in (tags.split(',') if tags else []) if s]
+    cache_params = None
+    cursor_values = None
+    next_cursor: Optional[str] = None
+    if not creator_id:
+        try:
+            cursor_values = decode_list_cursor(cursor, sort)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="유효하지 않은 cursor입니다.")
+        cache_params = list_cache_params(
+            skip=skip, limit=limit, search=search, sort=sort, source_type=source_type,
+            tags=tag_list, gender=gender, only=only, cursor=cursor,
+        )
+        cached = await get_cached_public_character_list(cache_params)
+        if cached is not None:
+            body, next_cursor = cached
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+            return Response(content=body, media_type="application/json", headers=headers)
+
     if creator_id:
         # 특정 사용자의 캐릭터 조회
         characters = await get_characters_by_creator(
@@ -1988,10 +2059,15 @@ async def get_characters(
             search=search,
             sort=sort,
             source_type=source_type,
-            tags=[s for s in (tags.split(',') if tags else []) if s],
+            tags=tag_list,
             gender=gender,
             only=only,
+            cursor=cursor_values,
         )
+        # 커서는 방어 필터 전 원본 마지막 행 기준(필터로 빠진 행 때문에 페이지가 건너뛰지 않도록)
+        # - 관련도순(검색 + sort=relevance)은 키셋 커서 대상이 아니다(skip 사용).
+        if characters and len(characters) >= limit and not uses_relevance_order(search, sort):
+            next_cursor = encode_list_cursor(characters[-1], sort)
 
     # ✅ 방어적 2차 필터(중요: 비공개 누출 방지)
     # - 원작챗 캐릭터(origin_story_id가 있는 캐릭터)는 "원작 스토리"가 공개일 때만 공개 목록에 노출해야 한다.
@@ -2088,9 +2164,8 @@ async def get_characters(
                 except Exception:
                     pass
                 continue
-        return items
     else:
-        return [
+        items = [
             CharacterListResponse(
                 id=char.id,
                 creator_id=char.creator_id,
@@ -2118,6 +2193,13 @@ async def get_characters(
             ) for char in characters
         ]
 
+    if cache_params is None:
+        return items
+    body = json.dumps(jsonable_encoder(items), ensure_ascii=False)
+    await set_cached_public_character_list(cache_params, body, next_cursor)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.get("/my", response_model=List[CharacterListResponse])
 async def get_my_characters(
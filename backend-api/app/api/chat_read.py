@@ -4,7 +4,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_, String
+from sqlalchemy import select, update
 from sqlalchemy.sql import func
 import uuid
 
@@ -13,6 +13,7 @@ from app.core.database import get_db
 from app.models.user import User
 from app.models.chat_read_status import ChatRoomReadStatus
 from app.models.chat import ChatRoom
+from app.services import room_index
 
 router = APIRouter(prefix="/chat/read", tags=["chat-read"])
 
@@ -55,6 +56,7 @@ async def mark_room_as_read(
         db.add(new_status)
     
     await db.commit()
+    await room_index.mark_read(current_user.id, room_id)
     return {"success": True}
 
 
@@ -89,6 +91,7 @@ async def increment_unread(
         db.add(new_status)
     
     await db.commit()
+    await room_index.incr_unread(current_user.id, room_id)
     return {"success": True, "unread_count": status.unread_count if status else 1}
 
 
@@ -123,40 +126,60 @@ async def get_rooms_with_unread(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """채팅방 목록을 unread_count와 함께 조회"""
+    """
+    채팅방 목록을 unread_count와 함께 조회
+
+    - 순서/안읽음 수는 유저별 방 인덱스(app/services/room_index.py)에서 읽고, 방/캐릭터는 PK로만 조회한다.
+    - 인덱스를 못 읽으면(Redis 장애) DB에서 최근 방 + 읽음 상태를 따로 읽어 맞춘다.
+    """
     from sqlalchemy.orm import selectinload
-    from app.schemas.chat import ChatRoomResponse
-    
-    # 🔥 하이픈 제거하여 UUID 포맷 맞춰서 JOIN
-    from sqlalchemy import func as sql_func
-    
-    stmt = (
-        select(ChatRoom, ChatRoomReadStatus.unread_count)
-        .outerjoin(ChatRoomReadStatus, 
-            and_(
-                # 🔥 ChatRoom.id의 하이픈 제거하여 비교
-                sql_func.replace(sql_func.cast(ChatRoom.id, String), '-', '') == sql_func.cast(ChatRoomReadStatus.room_id, String),
-                ChatRoomReadStatus.user_id == current_user.id
+
+    limit = max(1, min(int(limit or 50), 200))
+    room_ids = await room_index.recent_room_ids(db, current_user.id, 0, limit - 1)
+
+    if room_ids is not None:
+        entries = {}
+        try:
+            entries = await room_index.room_entries(current_user.id, room_ids)
+        except Exception:
+            entries = {}
+        ids = [u for u in (room_index.to_uuid(r) for r in room_ids) if u is not None]
+        by_id = {}
+        if ids:
+            result = await db.execute(
+                select(ChatRoom)
+                .where(ChatRoom.id.in_(ids), ChatRoom.user_id == current_user.id)
+                .options(selectinload(ChatRoom.character))
             )
+            by_id = {str(r.id): r for r in result.scalars().all()}
+        stale = [r for r in room_ids if r not in by_id]
+        if stale:
+            await room_index.drop_rooms(current_user.id, stale)
+        rows = [(by_id[r], (entries.get(r) or {}).get("unread", 0)) for r in room_ids if r in by_id]
+    else:
+        result = await db.execute(
+            select(ChatRoom)
+            .where(ChatRoom.user_id == current_user.id)
+            .options(selectinload(ChatRoom.character))
+            .order_by(ChatRoom.updated_at.desc())
+            .limit(limit)
         )
-        .where(ChatRoom.user_id == current_user.id)
-        .options(selectinload(ChatRoom.character))
-        .order_by(ChatRoom.updated_at.desc())
-        .limit(limit)
-    )
-    
-    result = await db.execute(stmt)
-    rows = result.all()
-    
-    print(f"🔍 [GET_ROOMS] 조회된 방: {len(rows)}개")
+        rooms = result.scalars().all()
+        unread_by_room = {}
+        if rooms:
+            status_rows = await db.execute(
+                select(ChatRoomReadStatus.room_id, ChatRoomReadStatus.unread_count)
+                .where(
+                    ChatRoomReadStatus.user_id == current_user.id,
+                    ChatRoomReadStatus.room_id.in_([r.id for r in rooms]),
+                )
+            )
+            unread_by_room = {str(rid): cnt for rid, cnt in status_rows.all()}
+        rows = [(room, unread_by_room.get(str(room.id))) for room in rooms]
     
     # 결과를 딕셔너리 리스트로 변환
     rooms_with_unread = []
-    for idx, (room, unread_count) in enumerate(rows):
-        if idx < 5:  # 상위 5개만 로그
-            print(f"  🔍 방 {idx+1}: {room.character.name if room.character else 'Unknown'}, "
-                  f"room_id={str(room.id)[:8]}...{str(room.id)[-4:]}, unread_count={unread_count}")
-        
+    for room, unread_count in rows:
         room_dict = {
             "id": str(room.id),
             "user_id": str(room.user_id),
@@ -176,4 +199,3 @@ async def get_rooms_with_unread(
         rooms_with_unread.append(room_dict)
     
     return {"data": rooms_with_unread}
-
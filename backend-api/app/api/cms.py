@@ -35,6 +35,8 @@ from app.models.site_config import SiteConfig
 from app.models.character import Character
 from app.models.story import Story
 from app.schemas.cms import HomeBanner, HomeSlot, TagDisplayConfig, HomePopup, HomePopupItem, HomePopupConfig
+from app.services.character_list_cache import invalidate_public_character_list_cache
+from app.services.search_service import character_search_filter, story_search_filter, sql_name_match
 
 logger = logging.getLogger(__name__)
 
@@ -1097,6 +1099,7 @@ async def toggle_content_public(
             new_val = not bool(row.is_public)
             row.is_public = new_val
             await db.commit()
+            await invalidate_public_character_list_cache()
             return {"id": str(row.id), "type": "character", "name": row.name, "is_public": new_val}
         else:
             row = (await db.execute(select(Story).where(Story.id == uid))).scalar_one_or_none()
@@ -1105,6 +1108,7 @@ async def toggle_content_public(
             new_val = not bool(row.is_public)
             row.is_public = new_val
             await db.commit()
+            await invalidate_public_character_list_cache()
             stype = "origchat" if getattr(row, "is_origchat", False) else "webnovel"
             return {"id": str(row.id), "type": stype, "name": row.title, "is_public": new_val}
     except HTTPException:
@@ -1162,6 +1166,7 @@ async def set_content_public(
                 raise HTTPException(status_code=404, detail="캐릭터를 찾을 수 없습니다.")
             row.is_public = bool(target_public)
             await db.commit()
+            await invalidate_public_character_list_cache()
             return {"id": str(row.id), "type": "character", "name": row.name, "is_public": bool(row.is_public)}
         else:
             row = (await db.execute(select(Story).where(Story.id == uid))).scalar_one_or_none()
@@ -1169,6 +1174,7 @@ async def set_content_public(
                 raise HTTPException(status_code=404, detail="스토리를 찾을 수 없습니다.")
             row.is_public = bool(target_public)
             await db.commit()
+            await invalidate_public_character_list_cache()
             stype = "origchat" if getattr(row, "is_origchat", False) else "webnovel"
             return {"id": str(row.id), "type": stype, "name": row.title, "is_public": bool(row.is_public)}
     except HTTPException:
@@ -1205,9 +1211,12 @@ async def _query_characters(db, search_term, is_public, offset, limit):
     )
     count_q = select(sqlfunc.count()).select_from(Character).where(Character.origin_story_id == None)  # noqa: E711
 
-    if search_term:
-        base = base.where(Character.name.ilike(f"%{search_term}%"))
-        count_q = count_q.where(Character.name.ilike(f"%{search_term}%"))
+    search_clause, _ = await character_search_filter(
+        db, search_term, include_description=False, include_creator=False, include_tags=False
+    )
+    if search_clause is not None:
+        base = base.where(search_clause)
+        count_q = count_q.where(search_clause)
 
     pub_clause = _public_filter_clause(Character.is_public, is_public)
     if pub_clause is not None:
@@ -1248,9 +1257,10 @@ async def _query_stories(db, search_term, is_public, is_origchat: bool, offset,
     )
     count_q = select(sqlfunc.count()).select_from(Story).where(Story.is_origchat == is_origchat)
 
-    if search_term:
-        base = base.where(Story.title.ilike(f"%{search_term}%"))
-        count_q = count_q.where(Story.title.ilike(f"%{search_term}%"))
+    search_clause, _ = await story_search_filter(db, search_term, include_content=False)
+    if search_clause is not None:
+        base = base.where(search_clause)
+        count_q = count_q.where(search_clause)
 
     pub_clause = _public_filter_clause(Story.is_public, is_public)
     if pub_clause is not None:
@@ -1351,10 +1361,12 @@ async def _query_contents_all_unified(db: AsyncSession, search_term: str, is_pub
     where_story = ["1=1"]
     params = {"lim": int(limit), "off": int(offset)}
 
-    if search_term:
-        params["search"] = f"%{search_term}%"
-        where_char.append("c.name ILIKE :search")
-        where_story.append("s.title ILIKE :search")
+    char_match = await sql_name_match(db, "c", "character", params, search_term)
+    if char_match:
+        where_char.append(char_match)
+    story_match = await sql_name_match(db, "s", "story", params, search_term)
+    if story_match:
+        where_story.append(story_match)
 
     pub_val = str(is_public or "all").strip().lower()
     if pub_val in ("true", "false"):
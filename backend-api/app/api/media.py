@@ -5,12 +5,16 @@ from sqlalchemy import select, update, delete
 
 from app.core.database import get_db
 from app.core.security import get_current_active_user
+from app.core.rate_limit import rate_limit, concurrency_limit, query_model_of
 from app.models.user import User
 from app.models.media_asset import MediaAsset
 from app.schemas.media_asset import MediaAssetResponse, MediaAssetListResponse, MediaAssetCropRequest
 from app.core.paths import get_upload_dir
-from app.services.storage import get_storage
-import os, shutil, uuid, base64, requests, asyncio, logging, io
+from app.services.storage import get_storage_async, UploadTooLargeError
+from app.core.config import settings
+from app.core.http_fetch import fetch_bytes, post_json
+from app.core.llm_clients import get_gemini_client
+import os, shutil, uuid, base64, asyncio, logging, io
 from app.models.character import Character
 from app.models.story import Story
 
@@ -37,8 +41,7 @@ async def list_assets(
     items = [MediaAssetResponse.model_validate(r) for r in rows]
     if presign:
         try:
-            from app.services.storage import get_storage
-            storage = get_storage()
+            storage = await get_storage_async()
             for it in items:
                 # key 추출: public_base가 있으면 public_base 뒤 경로, 없으면 endpoint/bucket 뒤 경로
                 url = it.url or ""
@@ -55,7 +58,7 @@ async def list_assets(
                     if endpoint and bucket and url.startswith(prefix):
                         key = url[len(prefix):]
                 if key:
-                    ps = storage.generate_presigned_url(key, expires_in=expires_in)
+                    ps = await storage.generate_presigned_url_async(key, expires_in=expires_in)
                     if ps:
                         it.url = ps
         except Exception:
@@ -191,7 +194,7 @@ def _size_from_ratio(ratio: Optional[str]) -> str:
     }.get(m, '1024x1024')
 
 
-@router.post("/generate", response_model=MediaAssetListResponse)
+@router.post("/generate", response_model=MediaAssetListResponse, dependencies=[Depends(rate_limit("media", model_of=query_model_of)), Depends(concurrency_limit("media"))])
 async def generate_images_endpoint(
     entity_type: Optional[str] = Query(None),
     entity_id: Optional[str] = Query(None),
@@ -211,7 +214,7 @@ async def generate_images_endpoint(
     if not provider:
         raise HTTPException(status_code=400, detail="provider required")
 
-    storage = get_storage()
+    storage = await get_storage_async()
     created: List[MediaAsset] = []
 
     if provider == 'openai':
@@ -225,7 +228,7 @@ async def generate_images_endpoint(
             # DALL·E 3 / gpt-image-1는 n=1 제한이 있을 수 있어 1장씩 반복 호출
             total = max(1, int(count or 1))
             for _ in range(total):
-                resp = requests.post(endpoint, headers=headers, json={
+                resp = await post_json(endpoint, headers=headers, json={
                     'model': model or 'gpt-image-1',
                     'prompt': prompt,
                     'n': 1,
@@ -242,7 +245,7 @@ async def generate_images_endpoint(
                     url = it.get('url')
                     if b64:
                         raw = base64.b64decode(b64)
-                        asset_url = storage.save_bytes(raw, content_type="image/png", key_hint="gen.png")
+                        asset_url = await storage.save_bytes_async(raw, content_type="image/png", key_hint="gen.png")
                     elif url:
                         asset_url = url
                     else:
@@ -275,7 +278,11 @@ async def generate_images_endpoint(
         if not api_key:
             raise HTTPException(status_code=503, detail="GOOGLE_API_KEY or GEMINI_API_KEY not set")
 
-        client = google_genai.Client(api_key=api_key)
+        # 설정 키와 같으면 공유 클라이언트(커넥션 풀 재사용), 아니면 별도 키로 생성
+        if api_key == settings.GEMINI_API_KEY:
+            client = get_gemini_client()
+        else:
+            client = google_genai.Client(api_key=api_key)
         # NOTE:
         # - 기존 기본 모델명이 gemini-2.5-flash-image-preview 였으나, 현재는 gemini-2.5-flash-image 로 변경됨.
         # - 구형 문자열로 요청이 들어와도 서비스가 깨지지 않도록 방어적으로 매핑한다.
@@ -289,7 +296,8 @@ async def generate_images_endpoint(
             # count장 반복 생성 (각 요청 1개로 가정)
             total = max(1, int(count or 1))
             for _ in range(total):
-                resp = client.models.generate_content(
+                # 비동기 클라이언트(aio) 사용: 동기 호출은 이벤트 루프 전체를 멈춘다.
+                resp = await client.aio.models.generate_content(
                     model=use_model,
                     contents=[prompt],
                 )
@@ -324,7 +332,7 @@ async def generate_images_endpoint(
                             elif 'png' in mime_type:
                                 ext = '.png'
                         # 캐시 갱신을 위해 쿼리 파라미터로 짧은 버전 스탬프 추가
-                        asset_url = storage.save_bytes(raw, content_type=mime_type, key_hint=f"gen{ext}")
+                        asset_url = await storage.save_bytes_async(raw, content_type=mime_type, key_hint=f"gen{ext}")
                         try:
                             if asset_url and "?" not in asset_url:
                                 asset_url = f"{asset_url}?v={int(__import__('time').time())}"
@@ -418,7 +426,7 @@ async def generate_images_endpoint(
                     asset_url = None
                     # 가능하면 바이트로 내려받아 우리 스토리지에 저장 (안 되면 URL 그대로 저장)
                     try:
-                        r = requests.get(url, timeout=60)
+                        r = await fetch_bytes(url, timeout=60, raise_for_status=False)
                         if r.status_code >= 400:
                             raise Exception(f"download failed {r.status_code}")
                         raw = r.content
@@ -429,7 +437,7 @@ async def generate_images_endpoint(
                             ext = ".jpg"
                         elif "webp" in ct:
                             ext = ".webp"
-                        asset_url = storage.save_bytes(raw, content_type=content_type, key_hint=f"gen{ext}")
+                        asset_url = await storage.save_bytes_async(raw, content_type=content_type, key_hint=f"gen{ext}")
                     except Exception as e:
                         try:
                             logger.warning(f"fal image download failed, fallback to url: {e}")
@@ -633,21 +641,38 @@ async def detach_assets(
     return MediaAssetListResponse(items=[MediaAssetResponse.model_validate(r) for r in rows])
 
 
-@router.post("/upload", response_model=MediaAssetListResponse)
+@router.post("/upload", response_model=MediaAssetListResponse, dependencies=[Depends(rate_limit("media"))])
 async def upload_images(
     files: List[UploadFile] = File(...),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    storage = get_storage()
-    created: List[MediaAsset] = []
     for f in files:
         if not f.content_type or not f.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="이미지 파일만 업로드할 수 있습니다.")
+    storage = await get_storage_async()
+    # 파일별로 청크 스트리밍 저장(전체 버퍼링 없음), 여러 장은 동시 처리(동시성 상한 적용)
+    sem = asyncio.Semaphore(max(1, int(getattr(settings, "STORAGE_UPLOAD_CONCURRENCY", 4) or 1)))
+
+    async def _save_one(f: UploadFile) -> str:
         ext = os.path.splitext(f.filename or "")[1] or ".png"
-        # 메모리에 올려 저장(파일 크기가 큰 경우 스트리밍 업로드로 개선 가능)
-        buf = f.file.read()
-        url = storage.save_bytes(buf, content_type=f.content_type or "image/png", key_hint=f"upload{ext}")
+        async with sem:
+            return await storage.save_upload(f, content_type=f.content_type or "image/png", key_hint=f"upload{ext}")
+
+    # 한 장이라도 실패하면 나머지가 끝나길 기다렸다가, 이미 저장된 파일을 지우고 실패를 올린다(고아 객체 방지).
+    results = await asyncio.gather(*[_save_one(f) for f in files], return_exceptions=True)
+    failure = next((r for r in results if isinstance(r, BaseException)), None)
+    if failure is not None:
+        await asyncio.gather(
+            *[storage.delete_url_async(r) for r in results if isinstance(r, str)],
+            return_exceptions=True,
+        )
+        if isinstance(failure, UploadTooLargeError):
+            raise HTTPException(status_code=413, detail="이미지 파일 크기가 너무 큽니다.")
+        raise failure
+    urls = list(results)
+    created: List[MediaAsset] = []
+    for url in urls:
         asset = MediaAsset(
             id=str(uuid.uuid4()),
             user_id=str(current_user.id),
@@ -660,6 +685,44 @@ async def upload_images(
     return MediaAssetListResponse(items=[MediaAssetResponse.model_validate(a) for a in created])
 
 
+def _read_file_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _crop_to_png_bytes(raw: bytes, sx: int, sy: int, sw: int, sh: int) -> tuple[bytes, int, int]:
+    """원본 바이트를 (sx, sy, sw, sh)로 크롭해 PNG 바이트와 크기를 반환한다(동기, 스레드풀용)."""
+    from PIL import Image, ImageOps  # type: ignore
+
+    img = Image.open(io.BytesIO(raw))
+    try:
+        # EXIF 회전 보정 (가능한 경우)
+        img = ImageOps.exif_transpose(img)
+    except Exception:
+        pass
+
+    w, h = img.size
+
+    # clamp
+    sx = max(0, min(sx, max(0, w - 1)))
+    sy = max(0, min(sy, max(0, h - 1)))
+    sw = max(1, min(sw, max(1, w - sx)))
+    sh = max(1, min(sh, max(1, h - sy)))
+
+    cropped = img.crop((sx, sy, sx + sw, sy + sh))
+
+    # 저장: png(투명도 포함 가능)
+    if cropped.mode not in ("RGB", "RGBA"):
+        try:
+            cropped = cropped.convert("RGBA")
+        except Exception:
+            cropped = cropped.convert("RGB")
+
+    out = io.BytesIO()
+    cropped.save(out, format="PNG", optimize=True)
+    return out.getvalue(), int(cropped.width), int(cropped.height)
+
+
 @router.post("/assets/{asset_id}/crop", response_model=MediaAssetResponse)
 async def crop_media_asset(
     asset_id: str,
@@ -714,10 +777,9 @@ async def crop_media_asset(
             fp = os.path.join(get_upload_dir(), fname)
             if not os.path.exists(fp):
                 raise HTTPException(status_code=404, detail="source file not found")
-            with open(fp, "rb") as f:
-                raw = f.read()
+            raw = await asyncio.to_thread(_read_file_bytes, fp)
         elif src_url.startswith("http://") or src_url.startswith("https://"):
-            resp = requests.get(src_url, timeout=30)
+            resp = await fetch_bytes(src_url, timeout=30, raise_for_status=False)
             if resp.status_code >= 400:
                 raise HTTPException(status_code=502, detail=f"source download failed ({resp.status_code})")
             raw = resp.content
@@ -732,41 +794,11 @@ async def crop_media_asset(
     if not raw:
         raise HTTPException(status_code=500, detail="empty source image bytes")
 
-    # PIL 크롭
+    # PIL 크롭(CPU 작업 → 스레드풀)
     try:
-        from PIL import Image, ImageOps  # type: ignore
-
-        img = Image.open(io.BytesIO(raw))
-        try:
-            # EXIF 회전 보정 (가능한 경우)
-            img = ImageOps.exif_transpose(img)
-        except Exception:
-            pass
-
-        w, h = img.size
-        sx = int(payload.sx)
-        sy = int(payload.sy)
-        sw = int(payload.sw)
-        sh = int(payload.sh)
-
-        # clamp
-        sx = max(0, min(sx, max(0, w - 1)))
-        sy = max(0, min(sy, max(0, h - 1)))
-        sw = max(1, min(sw, max(1, w - sx)))
-        sh = max(1, min(sh, max(1, h - sy)))
-
-        cropped = img.crop((sx, sy, sx + sw, sy + sh))
-
-        # 저장: png(투명도 포함 가능)
-        if cropped.mode not in ("RGB", "RGBA"):
-            try:
-                cropped = cropped.convert("RGBA")
-            except Exception:
-                cropped = cropped.convert("RGB")
-
-        out = io.BytesIO()
-        cropped.save(out, format="PNG", optimize=True)
-        out_bytes = out.getvalue()
+        out_bytes, out_w, out_h = await asyncio.to_thread(
+            _crop_to_png_bytes, raw, int(payload.sx), int(payload.sy), int(payload.sw), int(payload.sh)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -775,14 +807,14 @@ async def crop_media_asset(
 
     # 새 asset 저장(원본 유지)
     try:
-        storage = get_storage()
-        new_url = storage.save_bytes(out_bytes, content_type="image/png", key_hint="crop.png")
+        storage = await get_storage_async()
+        new_url = await storage.save_bytes_async(out_bytes, content_type="image/png", key_hint="crop.png")
         new_asset = MediaAsset(
             id=str(uuid.uuid4()),
             user_id=str(current_user.id),
             url=new_url,
-            width=int(getattr(cropped, "width", 0) or 0) or None,
-            height=int(getattr(cropped, "height", 0) or 0) or None,
+            width=int(out_w or 0) or None,
+            height=int(out_h or 0) or None,
             status="ready",
             provider=row.provider,
             model=row.model,
@@ -18,11 +18,13 @@ from sqlalchemy import select, func, or_
 
 import uuid as _uuid_mod
 
-from app.core.database import get_db, AsyncSessionLocal
+from app.core.database import get_db
 from app.core.security import get_current_user, get_current_user_optional
 from app.models.user import User
 from app.models.chat import ChatRoom, ChatMessage
 from app.models.user_activity_log import UserActivityLog
+from app.services.metrics_service import labels_match, parse_label_key, read_counter_rollup, read_timing_rollup
+from app.services.activity_log_writer import enqueue_activity_log
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -130,38 +132,14 @@ def _viewer_key(request: Optional[Request], user: Optional[User]) -> str:
     return f"g:{h}"
 
 
-async def _scan_keys(pattern: str):
-    from app.core.database import redis_client
-    cursor = 0
-    while True:
-        cursor, keys = await redis_client.scan(cursor=cursor, match=pattern, count=200)
-        for k in keys:
-            yield k.decode("utf-8") if isinstance(k, (bytes, bytearray)) else str(k)
-        if cursor == 0:
-            break
+# AB 테스트 일별 롤업 해시: metrics:ab:rollup:{test}:{YYYYMMDD}  field="{variant}:{kind}"
+# - 롤업 도입 이전 날짜는 기존 개별 키(metrics:ab:{test}:{variant}:{day}:{kind})에만 데이터가 있다.
+#   도입일(_AB_ROLLUP_SINCE_KEY) 이전 날짜를 조회할 때만 구 형식을 SCAN으로 읽는다(보존기간 120일 후 제거 가능).
+_AB_ROLLUP_SINCE_KEY = "metrics:ab:rollup:since"
 
 
-def _labels_match(key: str, filters: Dict[str, Optional[str]]) -> bool:
-    # filters: {"story_id": "...", "room_id": "...", "mode": "..."}
-    for fk, fv in filters.items():
-        if not fv:
-            continue
-        needle = f"{fk}={fv}"
-        if needle not in key:
-            return False
-    return True
-
-
-async def _read_float(key: str) -> float:
-    from app.core.database import redis_client
-    v = await redis_client.get(key)
-    if v is None:
-        return 0.0
-    try:
-        s = v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else str(v)
-        return float(s)
-    except Exception:
-        return 0.0
+def _ab_rollup_key(test_key: str, day: str) -> str:
+    return f"metrics:ab:rollup:{test_key}:{day}"
 
 
 _UUID_SEG_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
@@ -376,28 +354,27 @@ async def metrics_summary(
     d = day or time.strftime("%Y%m%d")
     filters = {"story_id": story_id, "room_id": room_id, "mode": mode, "narrator": narrator}
 
-    # TTI 집계
-    timing_prefix = f"metrics:timing:origchat_tti_ms:{d}"
+    # TTI 집계(일별 롤업 해시 1회 조회)
     total_sum = 0.0
     total_cnt = 0.0
-    async for k in _scan_keys(timing_prefix + "*"):
-        if not _labels_match(k, filters):
-            continue
-        if k.endswith(":sum"):
-            total_sum += await _read_float(k)
-        elif k.endswith(":cnt"):
-            total_cnt += await _read_float(k)
+    try:
+        for lk, (s_ms, cnt) in (await read_timing_rollup("origchat_tti_ms", d)).items():
+            if not labels_match(lk, filters):
+                continue
+            total_sum += s_ms
+            total_cnt += cnt
+    except Exception as e:
+        logger.warning(f"[metrics.summary] timing read failed: {e}")
     tti_avg_ms = (total_sum / total_cnt) if total_cnt > 0 else 0.0
 
     # 카운터 집계 함수
     async def _sum_counters(name: str) -> int:
-        prefix = f"metrics:counter:{name}:{d}"
-        s = 0
-        async for ck in _scan_keys(prefix + "*"):
-            if not _labels_match(ck, filters):
-                continue
-            s += int(await _read_float(ck))
-        return s
+        try:
+            rollup = await read_counter_rollup(name, d)
+        except Exception as e:
+            logger.warning(f"[metrics.summary] counter read failed ({name}): {e}")
+            return 0
+        return sum(v for lk, v in rollup.items() if labels_match(lk, filters))
 
     choices = await _sum_counters("origchat_choices_requested")
     next_event = await _sum_counters("origchat_next_event")
@@ -416,6 +393,67 @@ async def metrics_summary(
     }
 
 
+@router.get("/llm-prompt-cache")
+async def llm_prompt_cache_stats(
+    day: Optional[str] = Query(None, description="YYYYMMDD, 기본: 오늘"),
+    current_user: User = Depends(get_current_user),
+):
+    """프로바이더 프롬프트 캐시 지표(관리자 전용): provider/model별 입력 토큰(cache_read/cache_write/uncached)과 적중률."""
+    _ensure_admin(current_user)
+    d = _parse_day_yyyymmdd(day or "") or time.strftime("%Y%m%d")
+    rows: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    def _row(labels: Dict[str, str]) -> Dict[str, int]:
+        return rows.setdefault(
+            (labels.get("provider", ""), labels.get("model", "")),
+            {"cache_read": 0, "cache_write": 0, "uncached": 0, "requests": 0, "hit_requests": 0},
+        )
+
+    try:
+        for lk, v in (await read_counter_rollup("llm_prompt_tokens", d)).items():
+            labels = parse_label_key(lk)
+            kind = labels.get("kind", "")
+            if kind in ("cache_read", "cache_write", "uncached"):
+                _row(labels)[kind] += int(v)
+        for lk, v in (await read_counter_rollup("llm_prompt_cache_requests", d)).items():
+            labels = parse_label_key(lk)
+            row = _row(labels)
+            row["requests"] += int(v)
+            if labels.get("hit") == "1":
+                row["hit_requests"] += int(v)
+    except Exception as e:
+        logger.warning(f"[metrics.llm_prompt_cache] read failed: {e}")
+
+    items = []
+    for (provider, model), row in sorted(rows.items()):
+        total_in = row["cache_read"] + row["cache_write"] + row["uncached"]
+        items.append({
+            "provider": provider,
+            "model": model,
+            **row,
+            "token_hit_rate": round(row["cache_read"] / total_in, 4) if total_in else 0.0,
+            "request_hit_rate": round(row["hit_requests"] / row["requests"], 4) if row["requests"] else 0.0,
+        })
+    return {"day": d, "items": items}
+
+
+@router.get("/db-pool")
+async def db_pool_stats(
+    reset: bool = Query(False, description="조회 후 누적 통계 초기화"),
+    current_user: User = Depends(get_current_user),
+):
+    """DB 커넥션 풀 사용량(관리자 전용, 워커 프로세스별): 라우트별 체크아웃/대기/점유 시간."""
+    _ensure_admin(current_user)
+    from app.core.database import engine
+    from app.core.db_pool_stats import pool_stats_snapshot, reset_pool_stats
+
+    snapshot = pool_stats_snapshot(engine.sync_engine)
+    snapshot["pid"] = os.getpid()
+    if reset:
+        reset_pool_stats()
+    return snapshot
+
+
 @router.get("/content-counts")
 async def get_content_counts(
     db: AsyncSession = Depends(get_db),
@@ -670,101 +708,85 @@ async def track_page_event(
 
     ttl_sec = 60 * 60 * 24 * 120  # 120d
 
+    visitor_id = ""
+    if payload.user_id:
+        visitor_id = f"u:{payload.user_id}"
+    elif payload.client_id:
+        visitor_id = f"c:{payload.client_id}"
+
+    meta_str = (payload.meta or "")[:500].strip() or None
+    ab_pairs: List[Tuple[str, str]] = []
+    if meta_str and is_page_event:
+        try:
+            meta_obj = json.loads(meta_str) if meta_str else {}
+            if isinstance(meta_obj, dict):
+                ab_pairs = [(str(mk), str(mv)) for mk, mv in meta_obj.items() if str(mk).startswith("ab_") and mv]
+        except Exception:
+            ab_pairs = []
+
+    # 이벤트 1건의 모든 Redis 쓰기(카운터/경로 집합/체류시간/HLL UV/AB 롤업 + TTL)를 파이프라인 1회 왕복으로 보낸다.
     try:
         from app.core.database import redis_client
 
+        pipe = redis_client.pipeline(transaction=False)
         event_counter_key = f"metrics:event:{ev}:{d}"
-        await redis_client.incr(event_counter_key)
-        try:
-            await redis_client.expire(event_counter_key, ttl_sec)
-        except Exception:
-            pass
+        pipe.incr(event_counter_key)
+        pipe.expire(event_counter_key, ttl_sec)
 
         if is_page_event:
-            await redis_client.sadd(paths_set_key, path_norm)
-            await redis_client.incr(counter_key)
-
-            if kind in ("leave", "exit"):
+            pipe.sadd(paths_set_key, path_norm)
+            pipe.incr(counter_key)
+            pipe.expire(paths_set_key, ttl_sec)
+            pipe.expire(counter_key, ttl_sec)
+            if kind in ("leave", "exit") and dur_sum_key:
                 try:
                     dur = int(payload.duration_ms or 0)
                 except Exception:
                     dur = 0
                 if dur > 0:
-                    await redis_client.incrby(dur_sum_key, dur)
+                    pipe.incrby(dur_sum_key, dur)
+                    pipe.expire(dur_sum_key, ttl_sec)
 
-        # best-effort TTL(과도한 메모리 증가 방지)
-        if is_page_event:
-            try:
-                await redis_client.expire(paths_set_key, ttl_sec)
-                await redis_client.expire(counter_key, ttl_sec)
-                if kind in ("leave", "exit") and dur_sum_key:
-                    await redis_client.expire(dur_sum_key, ttl_sec)
-            except Exception:
-                pass
-
-    except Exception as e:
-        try:
-            logger.warning(f"[metrics.page] track failed (ignored): {e}")
-        except Exception:
-            pass
-
-    # --- HLL UV (경로별 + 글로벌) ---
-    visitor_id = ""
-    if payload.user_id:
-        visitor_id = f"u:{payload.user_id}"
-    elif payload.client_id:
-        visitor_id = f"c:{payload.client_id}"
-
-    if visitor_id and ev == "page_view":
-        try:
-            from app.core.database import redis_client as _rc
+        # --- HLL UV (경로별 + 글로벌) ---
+        if visitor_id and ev == "page_view":
             hll_key = f"metrics:page:uv:{d}:{path_norm}"
             hll_global_key = f"metrics:page:uv_global:{d}"
-            await _rc.pfadd(hll_key, visitor_id)
-            await _rc.pfadd(hll_global_key, visitor_id)
-            try:
-                await _rc.expire(hll_key, ttl_sec)
-                await _rc.expire(hll_global_key, ttl_sec)
-            except Exception:
-                pass
-        except Exception:
-            pass
-
-    # --- AB 테스트 Redis 카운터 (best-effort) ---
-    meta_str = (payload.meta or "")[:500].strip() or None
-    if meta_str and is_page_event:
+            pipe.pfadd(hll_key, visitor_id)
+            pipe.pfadd(hll_global_key, visitor_id)
+            pipe.expire(hll_key, ttl_sec)
+            pipe.expire(hll_global_key, ttl_sec)
+
+        # --- AB 테스트 롤업 카운터 ---
+        for mk, mv in ab_pairs:
+            ab_key = _ab_rollup_key(mk, d)
+            pipe.hincrby(ab_key, f"{mv}:{kind}", 1)
+            pipe.expire(ab_key, ttl_sec)
+        if ab_pairs:
+            pipe.set(_AB_ROLLUP_SINCE_KEY, d, nx=True)
+
+        # 개별 명령 실패(타입 충돌 등)가 나머지 기록을 막지 않도록 한다.
+        await pipe.execute(raise_on_error=False)
+    except Exception as e:
         try:
-            meta_obj = json.loads(meta_str) if meta_str else {}
-            if isinstance(meta_obj, dict):
-                from app.core.database import redis_client as _rc2
-                for mk, mv in meta_obj.items():
-                    if str(mk).startswith("ab_") and mv:
-                        ab_key = f"metrics:ab:{mk}:{mv}:{d}:{kind}"
-                        await _rc2.incr(ab_key)
-                        try:
-                            await _rc2.expire(ab_key, ttl_sec)
-                        except Exception:
-                            pass
+            logger.warning(f"[metrics.page] track failed (ignored): {e}")
         except Exception:
             pass
 
     # --- DB 저장: 로그인 유저만 (best-effort) ---
+    # - 요청 경로에서는 버퍼에만 넣고, activity_log_writer가 주기적으로 bulk INSERT 한다.
     if payload.user_id:
         try:
-            uid = _uuid_mod.UUID(payload.user_id)
-            async with AsyncSessionLocal() as _db:
-                _db.add(UserActivityLog(
-                    user_id=uid,
-                    path=path_norm,
-                    path_raw=(payload.path or "")[:1000],
-                    page_group=_classify_page_group(path_norm),
-                    event=ev,
-                    duration_ms=int(payload.duration_ms or 0) or None,
-                    session_id=(payload.session_id or "")[:100] or None,
-                    client_id=(payload.client_id or "")[:100] or None,
-                    meta=meta_str,
-                ))
-                await _db.commit()
+            enqueue_activity_log(
+                user_id=_uuid_mod.UUID(payload.user_id),
+                path=path_norm,
+                path_raw=(payload.path or "")[:1000],
+                page_group=_classify_page_group(path_norm),
+                event=ev,
+                duration_ms=int(payload.duration_ms or 0) or None,
+                session_id=(payload.session_id or "")[:100] or None,
+                client_id=(payload.client_id or "")[:100] or None,
+                meta=meta_str,
+            )
         except Exception:
             pass
 
@@ -807,26 +829,42 @@ async def page_exit_summary(
         leave_dur_keys = [f"metrics:page:leave_dur_sum:{d}:{p}" for p in paths]
         exit_dur_keys = [f"metrics:page:exit_dur_sum:{d}:{p}" for p in paths]
 
-        views_raw = await redis_client.mget(view_keys) if view_keys else []
-        leaves_raw = await redis_client.mget(leave_keys) if leave_keys else []
-        exits_raw = await redis_client.mget(exit_keys) if exit_keys else []
-        leave_durs_raw = await redis_client.mget(leave_dur_keys) if leave_dur_keys else []
-        exit_durs_raw = await redis_client.mget(exit_dur_keys) if exit_dur_keys else []
-
         # --- UV: 경로별 HLL PFCOUNT ---
         uv_keys = [f"metrics:page:uv:{d}:{p}" for p in paths]
-        uv_raw = []
-        for uk in uv_keys:
-            try:
-                uv_raw.append(int(await redis_client.pfcount(uk) or 0))
-            except Exception:
-                uv_raw.append(0)
 
+        # 카운터 MGET 5회 + 경로별 PFCOUNT를 파이프라인 1회 왕복으로 읽는다(경로 수에 비례, 키스페이스 무관).
+        views_raw: List[Any] = []
+        leaves_raw: List[Any] = []
+        exits_raw: List[Any] = []
+        leave_durs_raw: List[Any] = []
+        exit_durs_raw: List[Any] = []
+        uv_raw: List[int] = []
         total_unique_visitors = 0
-        try:
-            total_unique_visitors = int(await redis_client.pfcount(f"metrics:page:uv_global:{d}") or 0)
-        except Exception:
-            pass
+        if paths:
+            pipe = redis_client.pipeline(transaction=False)
+            for keys in (view_keys, leave_keys, exit_keys, leave_dur_keys, exit_dur_keys):
+                pipe.mget(keys)
+            for uk in uv_keys:
+                pipe.pfcount(uk)
+            pipe.pfcount(f"metrics:page:uv_global:{d}")
+            res = await pipe.execute(raise_on_error=False)
+            views_raw, leaves_raw, exits_raw, leave_durs_raw, exit_durs_raw = [
+                (r if isinstance(r, list) else []) for r in res[:5]
+            ]
+            for r in res[5:-1]:
+                try:
+                    uv_raw.append(int(r or 0))
+                except Exception:
+                    uv_raw.append(0)
+            try:
+                total_unique_visitors = int(res[-1] or 0)
+            except Exception:
+                total_unique_visitors = 0
+        else:
+            try:
+                total_unique_visitors = int(await redis_client.pfcount(f"metrics:page:uv_global:{d}") or 0)
+            except Exception:
+                pass
 
         rows_all = []
         total_exits = 0
@@ -1177,12 +1215,29 @@ async def ab_summary(
     try:
         from app.core.database import redis_client
 
-        # ab_home:A:20260216:view, ab_home:A:20260216:exit, ...
-        # 변형 목록을 scan으로 찾기
-        prefix = f"metrics:ab:{test_key}:"
+        # 일별 롤업 해시: field="{variant}:{kind}"
         variants: Dict[str, Dict[str, int]] = {}
+        raw = await redis_client.hgetall(_ab_rollup_key(test_key, d)) or {}
+        for f, v in raw.items():
+            field = f.decode("utf-8") if isinstance(f, (bytes, bytearray)) else str(f)
+            variant, _, kind = field.rpartition(":")
+            if not variant:
+                continue
+            try:
+                cnt = int(v or 0)
+            except Exception:
+                cnt = 0
+            if variant not in variants:
+                variants[variant] = {"view": 0, "leave": 0, "exit": 0}
+            if kind in variants[variant]:
+                variants[variant][kind] += cnt
+
+        # 구 형식(롤업 도입 이전 날짜 전용)
+        since = await redis_client.get(_AB_ROLLUP_SINCE_KEY)
+        legacy = (not variants) and since is not None and d < str(since)
+        prefix = f"metrics:ab:{test_key}:"
         cursor = 0
-        while True:
+        while legacy:
             cursor, keys = await redis_client.scan(cursor, match=f"{prefix}*:{d}:*", count=200)
             for k in keys:
                 key_str = k.decode("utf-8") if isinstance(k, (bytes, bytearray)) else str(k)
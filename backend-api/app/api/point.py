@@ -42,7 +42,7 @@ async def get_point_balance(
         # 없으면 기본값 반환
         return UserPointResponse(
             user_id=str(current_user.id),
-            balance=0,
+            balance=balance,
             total_charged=0,
             total_used=0,
             last_charged_at=None
@@ -50,7 +50,8 @@ async def get_point_balance(
     
     return UserPointResponse(
         user_id=str(user_point.user_id),
-        balance=user_point.balance,
+        # 차감은 원장 writer가 늦게 반영하므로 잔액은 Redis 기준값을 쓴다.
+        balance=balance,
         total_charged=user_point.total_charged,
         total_used=user_point.total_used,
         last_charged_at=user_point.last_charged_at
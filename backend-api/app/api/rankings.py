@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, or_
 from sqlalchemy.orm import joinedload, selectinload
 from typing import Optional, List, Dict, Any
+from datetime import datetime
+import json
 
 from app.core.database import get_db
-from app.services.ranking_service import build_daily_ranking, persist_daily_ranking, today_kst
+from app.services.ranking_service import (
+    RANKING_KINDS,
+    build_daily_ranking,
+    daily_ranking_build_lock,
+    get_cached_daily_ranking,
+    load_daily_ranking_snapshot,
+    persist_daily_ranking,
+    set_cached_daily_ranking,
+    today_kst,
+)
 from app.models.story import Story
 from app.models.character import Character
 from app.services.start_sets_utils import extract_max_turns_from_start_sets
@@ -38,8 +50,45 @@ async def get_daily_rankings(
 ):
     """Return daily rankings enriched with display fields.
     If kind is omitted, returns all kinds with minimal fields.
+
+    - 해당 날짜의 스냅샷(daily_rankings)을 읽어 구성하고, 완성된 응답(JSON)을 캐시한다.
+    - 오늘 날짜인데 스냅샷이 없을 때만 실시간 계산으로 폴백한다(짧은 TTL로 캐시).
     """
-    data = await build_daily_ranking(db)
+    date_str = (date or "").strip() or today_kst()
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    k = (kind or "").strip().lower() or None
+    if k and k not in RANKING_KINDS:
+        return {"items": []}
+
+    cached = await get_cached_daily_ranking(date_str, k)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    async with daily_ranking_build_lock(date_str, k):
+        # 락 대기 중 다른 요청이 채웠으면 그대로 사용
+        cached = await get_cached_daily_ranking(date_str, k)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        payload, live = await _build_daily_payload(db, date_str, k)
+        body = json.dumps(jsonable_encoder(payload), ensure_ascii=False)
+        await set_cached_daily_ranking(date_str, k, body, live=live)
+    return Response(content=body, media_type="application/json")
+
+
+async def _build_daily_payload(db: AsyncSession, date_str: str, kind: Optional[str]) -> tuple[Dict[str, Any], bool]:
+    """(응답 payload, 실시간 계산 여부)"""
+    live = False
+    data = await load_daily_ranking_snapshot(db, date_str)
+    if data is None:
+        live = True
+        if date_str == today_kst():
+            data = await build_daily_ranking(db)
+        else:
+            # 과거 날짜는 재계산할 수 없다(스냅샷이 없으면 빈 랭킹)
+            data = {k: [] for k in RANKING_KINDS}
 
     async def enrich_story(items: List[Dict[str, Any]]):
         ids = [i["id"] for i in items]
@@ -56,6 +105,9 @@ async def get_daily_rankings(
             s = by_id.get(str(i["id"]))
             if not s:
                 continue
+            # 스냅샷 이후 비공개 전환된 작품은 노출하지 않는다.
+            if s.is_public is not True:
+                continue
             result.append({
                 "id": s.id,
                 "title": s.title,
@@ -91,6 +143,9 @@ async def get_daily_rankings(
             c = by_id.get(str(i["id"]))
             if not c:
                 continue
+            # 스냅샷 이후 비공개/비활성 전환된 캐릭터는 노출하지 않는다.
+            if c.is_public is not True or c.is_active is not True:
+                continue
             # ✅ 방어적 2차 필터(중요):
             # - 원작 스토리가 비공개면, 메인(랭킹)에서 원작챗 캐릭터가 노출되면 안 된다.
             # - build_daily_ranking에서 1차로 Story.is_public 필터를 걸었더라도,
@@ -160,18 +215,56 @@ async def get_daily_rankings(
             })
         return result
 
-    if kind:
-        k = (kind or "").lower()
-        if k == "story":
-            return {"items": await enrich_story(data.get("story", []))}
-        elif k == "origchat":
-            return {"items": await enrich_character(data.get("origchat", []))}
-        elif k == "character":
-            return {"items": await enrich_character(data.get("character", []))}
-        return {"items": []}
+    if kind == "story":
+        return {"items": await enrich_story(data.get("story", []))}, live
+    if kind in ("origchat", "character"):
+        return {"items": await enrich_character(data.get(kind, []))}, live
 
     # all kinds minimal
-    return data
+    if not live:
+        data = await _with_display_names(db, data)
+    return data, live
+
+
+async def _with_display_names(db: AsyncSession, data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """스냅샷(id/metric)에 build_daily_ranking과 같은 최소 표시 필드(title/name)를 붙인다.
+
+    - kind별 경로(enrich_story/enrich_character)와 같이, 스냅샷 이후 비공개/비활성 전환된 항목과
+      원작 스토리가 비공개인 캐릭터는 제외한다(조회 결과에 없으면 노출하지 않음).
+    """
+    story_ids = [i["id"] for i in data.get("story", [])]
+    char_ids = [i["id"] for k in ("origchat", "character") for i in data.get(k, [])]
+    titles: Dict[str, Any] = {}
+    names: Dict[str, Any] = {}
+    if story_ids:
+        rows = (await db.execute(
+            select(Story.id, Story.title)
+            .where(Story.id.in_(story_ids), Story.is_public == True)
+        )).all()
+        titles = {str(r[0]): r[1] for r in rows}
+    if char_ids:
+        rows = (await db.execute(
+            select(Character.id, Character.name)
+            .outerjoin(Story, Story.id == Character.origin_story_id)
+            .where(
+                Character.id.in_(char_ids),
+                Character.is_public == True,
+                Character.is_active == True,
+                or_(Character.origin_story_id.is_(None), Story.is_public == True),
+            )
+        )).all()
+        names = {str(r[0]): r[1] for r in rows}
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    out["story"] = [
+        {"id": i["id"], "metric": i["metric"], "title": titles[str(i["id"])]}
+        for i in data.get("story", []) if str(i["id"]) in titles
+    ]
+    for k in ("origchat", "character"):
+        out[k] = [
+            {"id": i["id"], "metric": i["metric"], "name": names[str(i["id"])]}
+            for i in data.get(k, []) if str(i["id"]) in names
+        ]
+    return out
 
 
 @router.post("/daily/snapshot")
@@ -13,6 +13,7 @@ import re
 
 from app.core.database import get_db
 from app.core.security import get_current_user, get_current_user_optional
+from app.core.rate_limit import rate_limit, concurrency_limit, acquire_slot, renew_slot, release_slot, rate_limit_subject
 from app.models.user import User
 from app.models.story import Story
 from app.models.story_extracted_character import StoryExtractedCharacter
@@ -351,6 +352,16 @@ async def get_storydive_slots(
     except Exception:
         starts_map = {sid: 0 for sid in story_ids}
 
+    # 2-1) 아직 DB에 반영되지 않은 조회수(카운터 버퍼: 상세 진입 + 회차 열람)
+    pending_views: dict[str, int] = {}
+    try:
+        from app.services.counter_buffer import CHAPTER_VIEW_BY_STORY, STORY_VIEW, pending_counts
+        for name in (STORY_VIEW, CHAPTER_VIEW_BY_STORY):
+            for sid, n in (await pending_counts(name, story_ids)).items():
+                pending_views[sid] = pending_views.get(sid, 0) + int(n)
+    except Exception:
+        pending_views = {}
+
     # 3) 평균조회수(총조회수/회차수) 계산 + 정렬
     def _make_item(s: Story, *, episode_count: int, chapter_views: int, origchat_starts: int) -> Optional[StoryDiveSlotItem]:
         """StoryDiveSlotItem 생성(방어적)."""
@@ -402,7 +413,8 @@ async def get_storydive_slots(
             continue
         sid_str = str(getattr(s, "id"))
         origchat_starts = int(starts_map.get(sid_str, 0) or 0)
-        it = _make_item(s, episode_count=episode_count, chapter_views=int(ch_views or 0), origchat_starts=origchat_starts)
+        chapter_views = int(ch_views or 0) + int(pending_views.get(sid_str, 0) or 0)
+        it = _make_item(s, episode_count=episode_count, chapter_views=chapter_views, origchat_starts=origchat_starts)
         if it:
             items.append(it)
 
@@ -868,7 +880,7 @@ async def pin_story_announcement(
     return {"announcements": _normalize_story_announcements(getattr(story, "announcements", None))}
 
 
-@router.post("/generate", response_model=StoryGenerationResponse)
+@router.post("/generate", response_model=StoryGenerationResponse, dependencies=[Depends(rate_limit("generation")), Depends(concurrency_limit("generation"))])
 async def generate_story(
     request: StoryGenerationRequest,
     current_user: User = Depends(get_current_user),
@@ -914,7 +926,98 @@ async def generate_story(
         raise HTTPException(status_code=500, detail=f"스토리 생성 실패: {str(e)}")
 
 
-@router.post("/generate/stream")
+# 생성 잡 SSE: 워커는 이벤트를 append만 하고, 구독자는 XREAD BLOCK으로 새 이벤트를 기다린다.
+_JOB_TERMINAL_EVENTS = {"final", "error", "cancelled"}
+_JOB_PREVIEW_MIN_CHARS = 200   # 프리뷰는 '최대 500자'이므로, 너무 늦게 나오지 않도록 임계값을 낮춰 조기 전송
+_JOB_PREVIEW_MAX_CHARS = 500
+_JOB_CANCEL_CHECK_INTERVAL_SEC = 0.5
+_JOB_SLOT_LEASE_SEC = 600
+_JOB_SLOT_RENEW_INTERVAL_SEC = 120  # 동시 생성 슬롯 임대 연장 주기(임대 기간보다 충분히 짧게)
+_JOB_SSE_BLOCK_MS = 10000
+
+
+def _sse_frame(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _job_event_stream(
+    request: Request,
+    job_service: JobService,
+    job_id: str,
+    last_event_id: Optional[str] = None,
+):
+    """
+    잡 이벤트 스트림 → 기존 SSE 프로토콜(meta/stage_start/stage_end/preview/episode/final/error).
+
+    - 각 프레임에 스트림 ID를 `id:`로 붙인다. 재연결 시 Last-Event-ID 이후부터 이어서 보낸다.
+    - delta 이벤트는 본문 오프셋(o)을 갖고 있어, 프리뷰로 이미 보낸 구간은 잘라내고 보낸다.
+    """
+    yield _sse_frame("meta", {"job_id": job_id, "queue_position": 0})
+
+    cursor = (last_event_id or "").strip() or "0"
+    # 재개 시에는 클라이언트가 가진 본문 길이를 모르므로, 첫 delta의 오프셋부터 이어 붙인다.
+    sent_len: Optional[int] = 0 if cursor == "0" else None
+    waited_ms = 0
+    try:
+        while True:
+            events = await job_service.read_events(job_id, cursor, block_ms=_JOB_SSE_BLOCK_MS)
+            if not events:
+                if await request.is_disconnected():
+                    return
+                waited_ms += _JOB_SSE_BLOCK_MS
+                if waited_ms >= settings.JOB_EXPIRATION_SECONDS * 1000 or not await job_service.get_job(job_id):
+                    # 잡이 만료/삭제됐거나 워커가 사라져 이벤트가 더 오지 않는 경우
+                    yield _sse_frame("error", {"message": "job expired"})
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            waited_ms = 0
+            for event_id, name, data in events:
+                cursor = event_id
+                if name == "delta":
+                    text = str(data.get("delta") or "")
+                    offset = int(data.get("o") or 0)
+                    if sent_len is None:
+                        sent_len = offset
+                    end = offset + len(text)
+                    if end <= sent_len:
+                        continue
+                    if offset < sent_len:
+                        text = text[sent_len - offset:]
+                    sent_len = end
+                    if text:
+                        yield _sse_frame("episode", {"delta": text}, event_id)
+                elif name == "preview":
+                    text = str(data.get("text") or "")
+                    yield _sse_frame("preview", {"text": text[:_JOB_PREVIEW_MAX_CHARS]}, event_id)
+                    if len(text) > _JOB_PREVIEW_MAX_CHARS:
+                        yield _sse_frame("episode", {"delta": text[_JOB_PREVIEW_MAX_CHARS:]}, event_id)
+                    sent_len = len(text)
+                elif name == "stage":
+                    yield _sse_frame("stage_start", {"label": data.get("label")}, event_id)
+                elif name == "title":
+                    yield _sse_frame("stage_end", {"name": "title_generation", "result": data.get("result")}, event_id)
+                elif name == "final":
+                    yield _sse_frame("final", data, event_id)
+                    return
+                elif name == "error":
+                    yield _sse_frame("error", {"message": data.get("message") or "generation failed"}, event_id)
+                    return
+                elif name == "cancelled":
+                    yield _sse_frame("error", {"message": "cancelled"}, event_id)
+                    return
+    except asyncio.CancelledError:
+        # Client disconnected
+        pass
+    except Exception as e:
+        try:
+            yield _sse_frame("error", {"message": f"Stream failed on the server: {str(e)}"})
+        except Exception:
+            pass
+
+
+@router.post("/generate/stream", dependencies=[Depends(rate_limit("generation"))])
 async def generate_story_stream(
     request: Request,
     background_tasks: BackgroundTasks,
@@ -926,20 +1029,34 @@ async def generate_story_stream(
     body = await request.json()
     job_id = str(uuid.uuid4())
 
+    # 유저별 동시 생성 수 제한: 생성은 응답 반환 뒤 백그라운드에서 이어지므로 슬롯은 워커가 끝날 때 반납한다.
+    slot_bucket = f"generation:{rate_limit_subject(request, current_user)}"
+    slot_limit = int(getattr(settings, "RATE_LIMIT_GENERATION_CONCURRENCY", 0) or 0)
+    slot_token = None
+    if bool(getattr(settings, "RATE_LIMIT_ENABLED", True)) and slot_limit > 0:
+        slot_token = await acquire_slot(slot_bucket, slot_limit, lease_seconds=_JOB_SLOT_LEASE_SEC)
+        if slot_token is None:
+            raise HTTPException(status_code=429, detail="TooManyConcurrentRequests")
+
+    # ✅ 구독 전에 잡 레코드를 만든다(상태 조회/취소가 곧바로 404 나지 않도록).
+    # - 레코드는 상태/단계/제목/최종 결과만 담는다. 본문은 이벤트 스트림(delta)에만 쌓인다.
+    # - 워커를 띄우기 전에 실패하면 슬롯을 바로 반납한다(임대 만료까지 묶이지 않도록).
+    try:
+        await job_service.create_job(job_id, {
+            "status": "queued",
+            "stage": "start",
+            "preview_sent": False,
+            "title": "생성 중...",
+            "final_result": None,
+            "error_message": None,
+            "cancelled": False,
+        })
+    except BaseException:
+        await release_slot(slot_bucket, slot_token)
+        raise
+
     async def run_generation_in_background():
         try:
-            initial_data = {
-                "status": "queued",
-                "stage": "start",
-                "content_so_far": "",
-                "preview_sent": False,
-                "title": "생성 중...",
-                "final_result": None,
-                "error_message": None,
-                "cancelled": False,
-            }
-            await job_service.create_job(job_id, initial_data)
-        
             # 실제 생성 로직
             await job_service.update_job(job_id, {"status": "running"})
             
@@ -950,7 +1067,12 @@ async def generate_story_stream(
             elif "gpt" in model_str: ai_model = "gpt"
             else: ai_model = "gemini"
 
-            full_content = ""
+            content_len = 0
+            finished = False
+            preview_sent = False
+            preview_buf: List[str] = []
+            next_cancel_check = 0.0
+            next_slot_renew = asyncio.get_running_loop().time() + _JOB_SLOT_RENEW_INTERVAL_SEC
             
             # keywords가 비어도 최소 프롬프트 기반으로 생성되도록 처리
             async for event_data in story_generation_service.generate_story_stream(
@@ -961,125 +1083,94 @@ async def generate_story_stream(
                 ai_model=ai_model,
                 ai_sub_model=model_str
             ):
-                # Check cancellation
-                state = await job_service.get_job(job_id)
-                if state and state.get("cancelled"):
-                    await job_service.update_job(job_id, {"status": "cancelled"})
-                    break
+                # Check cancellation (델타마다가 아니라 일정 간격으로만 확인)
+                now = asyncio.get_running_loop().time()
+                if now >= next_cancel_check:
+                    next_cancel_check = now + _JOB_CANCEL_CHECK_INTERVAL_SEC
+                    if await job_service.is_cancelled(job_id):
+                        await job_service.append_event(job_id, "cancelled", {})
+                        finished = True
+                        break
+                # 긴 생성 중 슬롯 임대가 만료되지 않도록 주기적으로 연장한다.
+                if slot_token and now >= next_slot_renew:
+                    next_slot_renew = now + _JOB_SLOT_RENEW_INTERVAL_SEC
+                    await renew_slot(slot_bucket, slot_token, lease_seconds=_JOB_SLOT_LEASE_SEC)
                 event_name = event_data.get("event")
                 data_payload = event_data.get("data", {})
                 
                 if event_name == "story_delta":
-                    full_content += data_payload.get("delta", "")
-                    updates = {"content_so_far": full_content}
-                    # preview_sent 플래그는 job_service 내부에서 관리되므로 직접 참조 대신 get_job 사용
-                    current_job_state = await job_service.get_job(job_id)
-                    # 프리뷰는 '최대 500자'이므로, 너무 늦게 나오지 않도록 임계값을 낮춰 조기 전송
-                    if current_job_state and not current_job_state.get("preview_sent") and len(full_content) >= 200:
-                        updates["preview_sent"] = True
-                    await job_service.update_job(job_id, updates)
+                    delta = data_payload.get("delta", "") or ""
+                    if not delta:
+                        continue
+                    await job_service.append_event(job_id, "delta", {"delta": delta, "o": content_len})
+                    content_len += len(delta)
+                    if not preview_sent:
+                        preview_buf.append(delta)
+                        if content_len >= _JOB_PREVIEW_MIN_CHARS:
+                            preview_sent = True
+                            await job_service.append_event(job_id, "preview", {"text": "".join(preview_buf)})
+                            preview_buf = []
+                            await job_service.update_job(job_id, {"preview_sent": True})
 
                 elif event_name == "stage_start":
-                    await job_service.update_job(job_id, {"stage": data_payload.get("label", "진행 중...")})
+                    label = data_payload.get("label", "진행 중...")
+                    await job_service.append_event(job_id, "stage", {"label": label})
+                    await job_service.update_job(job_id, {"stage": label})
 
                 elif event_name == "stage_end" and data_payload.get("name") == "title_generation":
-                    await job_service.update_job(job_id, {"title": data_payload.get("result", "무제")})
+                    title = data_payload.get("result", "무제")
+                    await job_service.append_event(job_id, "title", {"result": title})
+                    await job_service.update_job(job_id, {"title": title})
 
                 elif event_name == "final":
                     await job_service.update_job(job_id, {"status": "done", "final_result": data_payload})
+                    await job_service.append_event(job_id, "final", data_payload)
+                    finished = True
                 
                 elif event_name == "error":
                     raise Exception(data_payload.get("message", "Unknown generation error"))
 
+            if not finished:
+                # 종료 이벤트 없이 끝나면 구독자가 계속 기다리므로 에러로 닫는다.
+                raise Exception("generation ended without a final result")
+
         except Exception as e:
             # 백그라운드 작업에서 발생하는 모든 예외를 잡아서 Redis에 기록
             error_message = f"배경 생성 작업 실패: {str(e)}"
             try:
                 await job_service.update_job(job_id, {"status": "error", "error_message": error_message})
+                await job_service.append_event(job_id, "error", {"message": error_message})
             except:
                 # Redis 업데이트조차 실패하는 경우 (연결 문제 등)
                 # 이 경우는 어쩔 수 없이 클라이언트가 타임아웃 처리해야 함
                 pass
+        finally:
+            await release_slot(slot_bucket, slot_token)
 
     # 중요: StreamingResponse에서 BackgroundTasks는 응답 종료 후 실행되므로
     # 여기서는 즉시 비동기 작업을 시작해야 함
     asyncio.create_task(run_generation_in_background())
 
-    async def event_generator():
-        yield f'event: meta\n'
-        yield f'data: {{"job_id": "{job_id}", "queue_position": 0}}\n\n'
-        
-        last_content_len = 0
-        last_stage = None
-        last_title = None
-        preview_emitted = False
-
-        try:
-            while True:
-                job_state = await job_service.get_job(job_id)
-                if not job_state:
-                    # Job이 생성되기 전이거나 알 수 없는 이유로 사라짐
-                    await asyncio.sleep(0.5)
-                    continue
-                
-                if job_state.get("status") in ["done", "error", "cancelled"]:
-                    if job_state.get("status") == "error" and job_state.get("error_message"):
-                         yield f'event: error\n'
-                         yield f'data: {{"message": {json.dumps(job_state.get("error_message"))} }}\n\n'
-                    elif job_state.get("status") == "cancelled":
-                        yield f'event: error\n'
-                        yield f'data: {{"message": "cancelled"}}\n\n'
-                    elif job_state.get("final_result"):
-                        yield f'event: final\n'
-                        yield f'data: {json.dumps(job_state.get("final_result"))}\n\n'
-                    break
-
-                # Stage 변경 감지
-                current_stage = job_state.get("stage")
-                if current_stage is not None and current_stage != last_stage:
-                    last_stage = current_stage
-                    yield f'event: stage_start\n'
-                    yield f'data: {json.dumps({"label": last_stage})}\n\n'
-
-                # 제목 변경 감지
-                current_title = job_state.get("title")
-                if current_title is not None and current_title != last_title:
-                    last_title = current_title
-                    yield f'event: stage_end\n'
-                    yield f'data: {json.dumps({"name": "title_generation", "result": last_title})}\n\n'
-                
-                # 프리뷰 1회 전송
-                content = job_state.get("content_so_far", "")
-                if (not preview_emitted) and job_state.get("preview_sent"):
-                    # 500자보다 짧게 생성되더라도 preview_sent가 True이면 일단 보냄
-                    preview_content = content[:500]
-                    yield f'event: preview\n'
-                    yield f'data: {{"text": {json.dumps(preview_content)}}}\n\n'
-                    preview_emitted = True
-                    last_content_len = len(preview_content)
-
-                # 컨텐츠 델타 전송 (프리뷰 전/후 상관없이 즉시 스트리밍)
-                if len(content) > last_content_len:
-                    delta = content[last_content_len:]
-                    yield f'event: episode\n'
-                    yield f'data: {json.dumps({"delta": delta})}\n\n'
-                    last_content_len = len(content)
-                
-                await asyncio.sleep(0.2) # 폴링 간격 단축
-        except asyncio.CancelledError:
-            # Client disconnected
-            pass
-        except Exception as e:
-            # 폴링 루프 자체의 예외
-            try:
-                error_payload = json.dumps({"message": f"Stream polling failed on the server: {str(e)}"})
-                yield f'event: error\n'
-                yield f'data: {error_payload}\n\n'
-            except:
-                pass
+    return StreamingResponse(
+        _job_event_stream(request, job_service, job_id),
+        media_type="text/event-stream; charset=utf-8",
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
+    )
 
+@router.get("/generate/stream/{job_id}")
+async def resume_story_stream(
+    job_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="마지막으로 받은 이벤트 ID (Last-Event-ID 헤더 대체)"),
+    job_service: JobService = Depends(get_job_service),
+):
+    """생성 잡 SSE 재구독: Last-Event-ID(헤더 또는 쿼리) 이후 이벤트부터 이어서 보낸다."""
+    job = await job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    resume_from = request.headers.get("last-event-id") or last_event_id
     return StreamingResponse(
-        event_generator(),
+        _job_event_stream(request, job_service, job_id, resume_from),
         media_type="text/event-stream; charset=utf-8",
         headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
     )
@@ -1089,6 +1180,11 @@ async def get_job_status(job_id: str, job_service: JobService = Depends(get_job_
     job = await job_service.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    # 본문은 이벤트 스트림에만 있으므로, 기존 응답 형태(content_so_far)를 위해 조회 시에만 재구성한다.
+    try:
+        job["content_so_far"] = await job_service.get_content_so_far(job_id)
+    except Exception:
+        job.setdefault("content_so_far", "")
     return job
 
 @router.delete("/generate/stream/{job_id}")
@@ -22,6 +22,7 @@ from app.models.chapter_purchase import ChapterPurchase
 from app.models.user import User
 from app.schemas.story import ChapterCreate, ChapterUpdate, ChapterResponse
 from app.services.point_service import PointService
+from app.services.counter_buffer import add_chapter_view
 from app.models.subscription import UserSubscription, SubscriptionPlan
 
 logger = logging.getLogger(__name__)
@@ -136,12 +137,9 @@ async def get_chapter(
     ):
         raise HTTPException(status_code=403, detail="접근 권한이 없습니다")
     
-    # 조회수 증가(비차단)
+    # 조회수 증가(비차단): Redis 카운터 버퍼에만 누적, DB 반영은 counter_buffer flusher가 배치로 한다.
     try:
-        async def _inc():
-            await db.execute(update(StoryChapter).where(StoryChapter.id == chapter_id).values(view_count=StoryChapter.view_count + 1))
-            await db.commit()
-        background_tasks.add_task(_inc)
+        background_tasks.add_task(add_chapter_view, ch.story_id, chapter_id)
     except Exception:
         pass
     return ch
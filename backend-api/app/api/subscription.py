@@ -15,7 +15,7 @@ from app.core.database import get_db, get_redis
 from app.core.security import get_current_user
 from app.models.subscription import SubscriptionPlan, UserSubscription
 from app.models.user import User
-from app.services.point_service import PointService
+from app.services.point_service import PointService, invalidate_plan_cache
 
 logger = logging.getLogger(__name__)
 
@@ -155,6 +155,8 @@ async def subscribe(
         db.add(sub)
 
     await db.commit()
+    # 모델 할인/리필 배율 캐시(PointService) 무효화
+    await invalidate_plan_cache(uid)
 
     # 월 루비 지급
     ruby_granted = plan.monthly_ruby
@@ -65,6 +65,127 @@ class Settings(BaseSettings):
     
     JOB_EXPIRATION_SECONDS: int = 3600 # 1 hour
 
+    # LLM 프로바이더 공유 HTTP 커넥션 풀 (app/core/llm_clients.py)
+    # - 타임아웃 기본값은 SDK 기본(600s)과 동일하게 유지한다(httpx read timeout = 청크 간 대기).
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY_SEC: float = 120.0
+    LLM_HTTP_TIMEOUT_SEC: float = 600.0
+    LLM_HTTP_CONNECT_TIMEOUT_SEC: float = 10.0
+    LLM_HTTP2: bool = True
+    LLM_WARMUP_ON_STARTUP: bool = True
+
+    # 프로바이더 프롬프트 캐시 (app/services/llm_prompt_cache.py)
+    # - Claude: 시스템 프롬프트의 고정 prefix에 cache_control(ephemeral) 브레이크포인트
+    # - Gemini: 고정 prefix를 cachedContent로 만들어 워커 간 공유(TTL 동안 재사용)
+    # - MIN_CHARS 미만 prefix는 명시적 캐시를 쓰지 않는다(프로바이더 최소 토큰 미달).
+    LLM_PROMPT_CACHE_ENABLED: bool = True
+    LLM_PROMPT_CACHE_MIN_CHARS: int = 2000
+    GEMINI_CACHED_CONTENT_TTL_SEC: int = 900
+
+    # 외부 이미지/HTTP 페치 공유 풀 (app/core/http_fetch.py)
+    HTTP_FETCH_MAX_CONNECTIONS: int = 50
+    HTTP_FETCH_MAX_KEEPALIVE: int = 10
+    HTTP_FETCH_MAX_BYTES: int = 20 * 1024 * 1024  # 20MB
+
+    # 스토리지 업로드 (app/services/storage.py)
+    # - 업로드는 청크 단위로 읽어 저장한다(전체 버퍼링 금지). S3 멀티파트 파트 최소 크기는 5MB.
+    STORAGE_UPLOAD_CHUNK_BYTES: int = 1024 * 1024  # 1MB
+    STORAGE_MULTIPART_PART_BYTES: int = 8 * 1024 * 1024  # 8MB
+    STORAGE_UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024  # 20MB (0이면 무제한)
+    STORAGE_UPLOAD_CONCURRENCY: int = 4  # 다중 파일 업로드 동시 처리 수
+
+    # 일일 랭킹 응답 캐시 (app/services/ranking_service.py)
+    # - 스냅샷 기반 응답은 길게, 스냅샷이 없어 실시간 계산한 응답은 짧게 캐시한다.
+    # - 프로세스 로컬 캐시는 Redis 왕복까지 줄이기 위한 짧은 L1(스냅샷 갱신 반영 지연 상한).
+    RANKING_CACHE_TTL_SEC: int = 600
+    RANKING_LIVE_CACHE_TTL_SEC: int = 60
+    RANKING_LOCAL_CACHE_TTL_SEC: int = 15
+
+    # 공개 캐릭터 목록 응답 캐시 (app/services/character_list_cache.py)
+    CHARACTER_LIST_CACHE_TTL_SEC: int = 60
+    CHARACTER_LIST_LOCAL_CACHE_TTL_SEC: int = 5
+    CHARACTER_LIST_LOCAL_CACHE_MAX: int = 512
+
+    # 유저 활동 로그 버퍼 writer (app/services/activity_log_writer.py)
+    ACTIVITY_LOG_FLUSH_INTERVAL_MS: int = 1000
+    ACTIVITY_LOG_BATCH_SIZE: int = 200
+    ACTIVITY_LOG_MAX_BUFFER: int = 10000
+
+    # 인증 사용자(principal) 캐시 (app/services/user_principal_cache.py)
+    # - 0이면 비활성화(매 요청 DB 조회). 로컬 TTL은 다른 워커의 권한/비활성화 반영 지연 상한.
+    USER_PRINCIPAL_CACHE_TTL_SEC: int = 60
+    USER_PRINCIPAL_LOCAL_CACHE_TTL_SEC: int = 5
+    USER_PRINCIPAL_LOCAL_CACHE_MAX: int = 2048
+
+    # DB 커넥션 풀 계측 (app/core/db_pool_stats.py)
+    # - 커넥션을 이 시간 이상 쥐고 있던 라우트는 경고 로그를 남긴다(0이면 끔).
+    DB_POOL_SLOW_HOLD_MS: int = 5000
+
+    # 레이트 리밋 (app/core/rate_limit.py)
+    # - 분당 허용/버스트는 유저별(비로그인은 IP별) GCRA. 0이면 해당 제한을 끈다.
+    # - MODEL_PER_MIN은 모델별 전역 한도(프로바이더 쿼터 보호), CONCURRENCY는 유저별 동시 실행 수.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CHAT_PER_MIN: int = 30
+    RATE_LIMIT_CHAT_BURST: int = 10
+    RATE_LIMIT_GENERATION_PER_MIN: int = 10
+    RATE_LIMIT_GENERATION_BURST: int = 5
+    RATE_LIMIT_GENERATION_CONCURRENCY: int = 2
+    RATE_LIMIT_MEDIA_PER_MIN: int = 30
+    RATE_LIMIT_MEDIA_BURST: int = 10
+    RATE_LIMIT_MEDIA_CONCURRENCY: int = 2
+    RATE_LIMIT_MODEL_PER_MIN: int = 0
+
+    # 포인트 원장 write-behind writer (app/services/point_ledger.py)
+    # - Redis 원장 스트림을 이 주기/배치 크기로 DB에 반영한다(DB 잔액은 최대 한 주기 늦다).
+    # - CLAIM_IDLE_MS 이상 ACK되지 않은 항목(죽은 워커 몫)은 다른 워커가 가져가 반영한다.
+    POINT_LEDGER_FLUSH_INTERVAL_MS: int = 500
+    POINT_LEDGER_BATCH_SIZE: int = 500
+    POINT_LEDGER_CLAIM_IDLE_MS: int = 30000
+
+    # 채팅방 요약 워커 (app/services/room_summary_worker.py)
+    # - DEBOUNCE: 첫 이벤트 후 이만큼 모아서 실행(연속 턴 병합). LEASE: 한 방 요약 임대 시간(워커 장애 시 재실행까지).
+    # - CONCURRENCY: 프로세스당 동시에 요약하는 방 수. MAX_BATCH: 1회 요약에 넣는 최대 메시지 수.
+    SUMMARY_WORKER_CONCURRENCY: int = 2
+    SUMMARY_WORKER_DEBOUNCE_MS: int = 3000
+    SUMMARY_WORKER_LEASE_SEC: int = 180
+    SUMMARY_WORKER_POLL_MS: int = 1000
+    SUMMARY_MAX_BATCH_MESSAGES: int = 200
+
+    # 조회수/대화수 카운터 버퍼 flush 주기 (app/services/counter_buffer.py)
+    COUNTER_FLUSH_INTERVAL_MS: int = 5000
+    # 캐릭터 대화수를 실제 메시지 수로 재동기화하는 주기(0이면 끔). 메시지 삭제분이 이 주기 안에 반영된다.
+    COUNTER_CHAT_RESYNC_INTERVAL_SEC: int = 600
+
+    # 크리에이터 통계 롤업 잡 (app/services/creator_stats_rollup.py)
+    # - INTERVAL: 반영 주기. LAG: 현재 시각 - LAG 까지만 반영(늦게 커밋되는 메시지 대비).
+    # - BACKFILL_DAYS: 워터마크가 없을 때(첫 실행) 채우는 기간. RETENTION: 시간/일 버킷 보관 기간.
+    CREATOR_STATS_ROLLUP_INTERVAL_SEC: int = 60
+    CREATOR_STATS_ROLLUP_LAG_SEC: int = 60
+    CREATOR_STATS_BACKFILL_DAYS: int = 30
+    CREATOR_STATS_HOURLY_RETENTION_DAYS: int = 8
+    CREATOR_STATS_DAILY_RETENTION_DAYS: int = 400
+
+    # 유저별 채팅방 인덱스 (app/services/room_index.py)
+    # - TTL: 마지막 갱신 후 이 기간이 지나면 키가 만료되고 다음 조회에서 DB로 재구축한다.
+    # - MAX_ROOMS: 재구축 시 인덱스에 넣는 최근 방 수(그보다 오래된 방은 목록 끝에서 잘린다).
+    ROOM_INDEX_TTL_SEC: int = 7 * 86400
+    ROOM_INDEX_MAX_ROOMS: int = 2000
+
+    # 원작챗 배치 LLM 작업(회차 요약/등장인물 추출, app/services/batch_engine.py)
+    # - CONCURRENCY: 작업 하나가 동시에 보내는 LLM 호출 수(프로바이더 동시 한도에 맞춰 조정).
+    # - COMMIT_SIZE: 회차 요약 업서트를 이 개수마다 한 번에 커밋한다.
+    # - CURSOR_TTL: 중단된 작업의 진행 커서(완료 항목 결과) 보관 시간. 재실행 시 이어서 처리한다.
+    ORIGCHAT_BATCH_CONCURRENCY: int = 6
+    ORIGCHAT_BATCH_COMMIT_SIZE: int = 25
+    ORIGCHAT_BATCH_CURSOR_TTL_SEC: int = 86400
+
+    # ✅ 캐릭터 프롬프트 정적 구간 컴파일 캐시(프로세스 LRU)
+    # - 키에 캐릭터 버전(스냅샷 captured_at/updated_at)이 들어가므로 TTL은 메모리 회수용이다.
+    # - TTL 0이면 캐시하지 않는다(매 턴 컴파일).
+    CHARACTER_PROMPT_CACHE_TTL_SEC: int = 600
+    CHARACTER_PROMPT_CACHE_MAX: int = 1024
+
     # ✅ 원작챗(추출 캐릭터) 기본 대표 이미지 URL
     #
     # 의도/동작:
@@ -13,6 +13,7 @@ import ssl
 from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 from app.core.config import settings
+from app.core.db_pool_stats import InstrumentedAsyncQueuePool, install_pool_instrumentation
 
 
 # SQLite와 PostgreSQL 모두 지원하는 UUID 타입
@@ -126,10 +127,12 @@ else:
     # - pool_size: 기본 유지 커넥션 수 (SQLAlchemy 기본 5 → 3으로 축소)
     # - max_overflow: 피크 시 추가 허용 (SQLAlchemy 기본 10 → 2로 축소)
     # - 합계 최대 5개로 Supabase Free/Pro 한도 안에서 안정 운영
+    # - 풀 대기 시간 계측을 위해 AsyncAdaptedQueuePool(기본) 서브클래스를 쓴다(app/core/db_pool_stats.py).
     engine = create_async_engine(
         _engine_url,
         echo=settings.DEBUG,
         future=True,
+        poolclass=InstrumentedAsyncQueuePool,
         pool_pre_ping=True,
         pool_recycle=300,
         pool_size=3,
@@ -138,6 +141,9 @@ else:
         connect_args=_connect_args if _connect_args else None,
     )
 
+# 라우트별 커넥션 점유/대기 시간 계측 (GET /metrics/db-pool)
+install_pool_instrumentation(engine.sync_engine)
+
 # 세션 팩토리 생성
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -178,6 +184,18 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def release_connection(session: AsyncSession) -> None:
+    """
+    세션이 쥐고 있는 커넥션을 풀에 돌려준다(LLM 호출처럼 오래 기다리는 외부 작업 직전에 호출).
+
+    - 열린 트랜잭션이 있으면 commit 한다(지금까지의 변경은 확정된다).
+    - expire_on_commit=False라 이미 로드한 객체는 그대로 쓸 수 있고,
+      이후 DB 작업을 하면 풀에서 커넥션을 새로 받는다.
+    """
+    if session.in_transaction():
+        await session.commit()
+
+
 # Redis 클라이언트 의존성
 async def get_redis() -> redis.Redis:
     """Redis 클라이언트 의존성"""
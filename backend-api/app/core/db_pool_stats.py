@@ -0,0 +1,206 @@
+"""
+DB 커넥션 풀 사용량 계측
+
+의도/배경:
+- 운영 풀은 pool_size=3, max_overflow=2(합계 5)로 작다. 커넥션을 오래 쥐는 경로가 하나만 있어도
+  다른 엔드포인트가 pool_timeout으로 실패하므로, "누가 얼마나 오래 쥐는지"를 수치로 볼 수 있어야 한다.
+- 라우트별로 체크아웃 횟수 / 대기 시간(풀에서 받기까지) / 점유 시간(체크아웃~체크인)을 모은다.
+
+동작:
+- PoolRouteMiddleware가 요청 scope를 contextvar에 넣고, 체크아웃 시점의 라우트 경로를 라벨로 쓴다.
+  (StreamingResponse 워커처럼 요청에서 파생된 태스크도 contextvar를 그대로 물려받는다)
+- 요청 밖(백그라운드 태스크)은 pool_route("...")로 라벨을 직접 지정할 수 있다. 미지정이면 "-".
+- 점유 시간이 DB_POOL_SLOW_HOLD_MS 이상이면 경고 로그를 남긴다.
+
+주의:
+- 프로세스(워커)별 인메모리 통계다. 조회: GET /metrics/db-pool (관리자)
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_ROUTES = 300
+_OTHER_ROUTE = "(other)"
+
+_route_label_var: ContextVar[Optional[str]] = ContextVar("db_pool_route_label", default=None)
+_request_scope_var: ContextVar[Optional[Dict[str, Any]]] = ContextVar("db_pool_request_scope", default=None)
+
+_routes: Dict[str, Dict[str, float]] = {}
+_state: Dict[str, float] = {"checked_out": 0, "peak_checked_out": 0, "since": time.time()}
+
+
+def _current_route() -> str:
+    label = _route_label_var.get()
+    if label:
+        return label
+    scope = _request_scope_var.get()
+    if not scope:
+        return "-"
+    # 라우팅이 끝난 뒤에는 scope["route"]가 채워진다(경로 템플릿이라 카디널리티가 낮다).
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path") or "?"
+    method = str(scope.get("method") or "").upper()
+    return f"{method} {path}".strip()
+
+
+def _bucket(route: str) -> Dict[str, float]:
+    b = _routes.get(route)
+    if b is None:
+        if len(_routes) >= _MAX_ROUTES:
+            route = _OTHER_ROUTE
+            b = _routes.get(route)
+        if b is None:
+            b = {
+                "checkouts": 0,
+                "hold_ms_total": 0.0,
+                "hold_ms_max": 0.0,
+                "wait_ms_total": 0.0,
+                "wait_ms_max": 0.0,
+                "timeouts": 0,
+            }
+            _routes[route] = b
+    return b
+
+
+@contextmanager
+def pool_route(label: str) -> Iterator[None]:
+    """요청 밖 코드(워커/백그라운드)의 커넥션 사용에 라벨을 붙인다."""
+    token = _route_label_var.set(label)
+    try:
+        yield
+    finally:
+        _route_label_var.reset(token)
+
+
+class PoolRouteMiddleware:
+    """요청 scope를 contextvar에 넣는 ASGI 미들웨어(라우트별 풀 통계용)."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope_var.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope_var.reset(token)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """풀에서 커넥션을 받기까지의 대기 시간을 기록하는 AsyncAdaptedQueuePool."""
+
+    def _do_get(self):  # type: ignore[override]
+        started = time.perf_counter()
+        try:
+            rec = super()._do_get()
+        except PoolTimeoutError:
+            _record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        _record_wait(time.perf_counter() - started)
+        return rec
+
+
+def _record_wait(seconds: float, timed_out: bool = False) -> None:
+    try:
+        b = _bucket(_current_route())
+        ms = seconds * 1000.0
+        b["wait_ms_total"] += ms
+        if ms > b["wait_ms_max"]:
+            b["wait_ms_max"] = ms
+        if timed_out:
+            b["timeouts"] += 1
+            logger.warning(f"[db_pool] checkout timeout route={_current_route()} waited={int(ms)}ms")
+    except Exception:
+        pass
+
+
+def _on_checkout(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+    try:
+        connection_record.info["_pool_out_at"] = time.perf_counter()
+        connection_record.info["_pool_route"] = _current_route()
+        _state["checked_out"] += 1
+        if _state["checked_out"] > _state["peak_checked_out"]:
+            _state["peak_checked_out"] = _state["checked_out"]
+    except Exception:
+        pass
+
+
+def _on_checkin(dbapi_connection: Any, connection_record: Any) -> None:
+    try:
+        started = connection_record.info.pop("_pool_out_at", None)
+        route = connection_record.info.pop("_pool_route", None) or "-"
+        if started is None:
+            return
+        _state["checked_out"] = max(0, _state["checked_out"] - 1)
+        ms = (time.perf_counter() - started) * 1000.0
+        b = _bucket(route)
+        b["checkouts"] += 1
+        b["hold_ms_total"] += ms
+        if ms > b["hold_ms_max"]:
+            b["hold_ms_max"] = ms
+        slow_ms = int(getattr(settings, "DB_POOL_SLOW_HOLD_MS", 5000) or 0)
+        if slow_ms > 0 and ms >= slow_ms:
+            logger.warning(f"[db_pool] long connection hold route={route} held={int(ms)}ms")
+    except Exception:
+        pass
+
+
+def install_pool_instrumentation(sync_engine: Any) -> None:
+    """엔진(AsyncEngine.sync_engine)에 체크아웃/체크인 리스너를 건다."""
+    try:
+        event.listen(sync_engine, "checkout", _on_checkout)
+        event.listen(sync_engine, "checkin", _on_checkin)
+    except Exception as e:
+        logger.warning(f"[warn] db pool instrumentation install failed(계속 진행): {e}")
+
+
+def pool_stats_snapshot(sync_engine: Any) -> Dict[str, Any]:
+    """현재 풀 상태 + 라우트별 누적 통계(점유 시간 합 내림차순)."""
+    pool = getattr(sync_engine, "pool", None)
+    pool_info: Dict[str, Any] = {"class": type(pool).__name__ if pool is not None else None}
+    for name in ("size", "checkedout", "overflow", "checkedin"):
+        try:
+            pool_info[name] = getattr(pool, name)()
+        except Exception:
+            pass
+    routes = []
+    for route, b in _routes.items():
+        n = int(b["checkouts"]) or 0
+        routes.append({
+            "route": route,
+            "checkouts": n,
+            "hold_ms_total": int(b["hold_ms_total"]),
+            "hold_ms_avg": int(b["hold_ms_total"] / n) if n else 0,
+            "hold_ms_max": int(b["hold_ms_max"]),
+            "wait_ms_total": int(b["wait_ms_total"]),
+            "wait_ms_max": int(b["wait_ms_max"]),
+            "timeouts": int(b["timeouts"]),
+        })
+    routes.sort(key=lambda r: r["hold_ms_total"], reverse=True)
+    return {
+        "pool": pool_info,
+        "checked_out": int(_state["checked_out"]),
+        "peak_checked_out": int(_state["peak_checked_out"]),
+        "since": int(_state["since"]),
+        "routes": routes,
+    }
+
+
+def reset_pool_stats() -> None:
+    _routes.clear()
+    _state["peak_checked_out"] = _state["checked_out"]
+    _state["since"] = time.time()
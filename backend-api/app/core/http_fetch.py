@@ -0,0 +1,132 @@
+"""
+비동기 HTTP 페치 레이어 (이미지 다운로드/외부 API 호출)
+
+의도/배경:
+- async 핸들러 안에서 requests.get/post(동기)를 호출하면 uvicorn 이벤트 루프 전체가 멈추고,
+  같은 워커의 모든 채팅 스트림이 함께 대기한다.
+- 프로세스 공유 httpx.AsyncClient(커넥션 풀)로 요청하고, 응답 본문은 스트리밍으로 읽으면서
+  크기 상한(HTTP_FETCH_MAX_BYTES)을 넘으면 즉시 중단한다.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+class FetchTooLargeError(ValueError):
+    """응답 본문이 허용 크기를 넘었을 때."""
+
+
+class FetchedBytes:
+    """다운로드 결과(본문 + 상태/헤더). requests.Response에서 쓰던 속성만 제공한다."""
+
+    __slots__ = ("url", "status_code", "headers", "content")
+
+    def __init__(self, url: str, status_code: int, headers: httpx.Headers, content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def content_type(self) -> str:
+        return str(self.headers.get("Content-Type") or "").lower()
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise httpx.HTTPStatusError(
+                f"HTTP {self.status_code} for url {self.url}",
+                request=httpx.Request("GET", self.url),
+                response=httpx.Response(self.status_code, headers=self.headers),
+            )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """프로세스 공유 httpx.AsyncClient."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=int(settings.HTTP_FETCH_MAX_CONNECTIONS),
+                max_keepalive_connections=int(settings.HTTP_FETCH_MAX_KEEPALIVE),
+            ),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        try:
+            await _http_client.aclose()
+        except Exception:
+            pass
+    _http_client = None
+
+
+async def fetch_bytes(
+    url: str,
+    *,
+    timeout: float = 10.0,
+    max_bytes: Optional[int] = None,
+    headers: Optional[Dict[str, str]] = None,
+    raise_for_status: bool = True,
+) -> FetchedBytes:
+    """
+    URL 본문을 비동기 스트리밍으로 읽는다.
+
+    - max_bytes(기본 HTTP_FETCH_MAX_BYTES)를 넘으면 FetchTooLargeError
+    - raise_for_status=True면 4xx/5xx에서 httpx.HTTPStatusError
+    """
+    limit = int(max_bytes if max_bytes is not None else settings.HTTP_FETCH_MAX_BYTES)
+    client = get_http_client()
+    async with client.stream("GET", url, headers=headers, timeout=timeout) as resp:
+        if raise_for_status:
+            resp.raise_for_status()
+        try:
+            declared = int(resp.headers.get("Content-Length") or 0)
+        except Exception:
+            declared = 0
+        if limit > 0 and declared > limit:
+            raise FetchTooLargeError(f"response too large ({declared} > {limit} bytes): {url}")
+        chunks = []
+        total = 0
+        async for chunk in resp.aiter_bytes():
+            total += len(chunk)
+            if limit > 0 and total > limit:
+                raise FetchTooLargeError(f"response too large (> {limit} bytes): {url}")
+            chunks.append(chunk)
+        return FetchedBytes(str(resp.url), resp.status_code, resp.headers, b"".join(chunks))
+
+
+async def post_json(
+    url: str,
+    *,
+    json: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 60.0,
+) -> httpx.Response:
+    """JSON POST(공유 풀 사용). 상태 코드 검사는 호출자가 한다."""
+    client = get_http_client()
+    return await client.post(url, json=json, headers=headers, timeout=timeout)
+
+
+async def post_bytes(
+    url: str,
+    *,
+    data: bytes,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 60.0,
+) -> httpx.Response:
+    """바이너리 POST(공유 풀 사용). 상태 코드 검사는 호출자가 한다."""
+    client = get_http_client()
+    return await client.post(url, content=data, headers=headers, timeout=timeout)
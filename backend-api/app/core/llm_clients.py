@@ -0,0 +1,167 @@
+"""
+LLM 프로바이더 클라이언트 레지스트리 (OpenAI / Anthropic / Gemini)
+
+의도/배경:
+- 호출마다 AsyncOpenAI(...)를 새로 만들면 매 턴 TLS 핸드셰이크 + 커넥션 풀 생성 비용이
+  첫 토큰 지연(TTFT)에 그대로 더해진다.
+- 프로세스당 1개의 클라이언트를 공유하고, httpx 커넥션 풀(keep-alive, 가능하면 HTTP/2)을 재사용한다.
+- 풀 크기/keep-alive/타임아웃은 settings(LLM_HTTP_*)로 조정한다.
+
+사용:
+- get_openai_client() / get_anthropic_client() / get_gemini_client()
+- lifespan 시작 시 warmup_llm_clients(), 종료 시 close_llm_clients()
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[str, Any] = {}
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    """HTTP/2는 h2 패키지가 있을 때만 사용한다(없으면 HTTP/1.1 keep-alive로 폴백)."""
+    if not getattr(settings, "LLM_HTTP2", True):
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def _build_http_client(name: str) -> httpx.AsyncClient:
+    """프로바이더별 공유 httpx.AsyncClient(풀/keep-alive/타임아웃 적용)."""
+    existing = _http_clients.get(name)
+    if existing is not None and not existing.is_closed:
+        return existing
+    limits = httpx.Limits(
+        max_connections=int(settings.LLM_HTTP_MAX_CONNECTIONS),
+        max_keepalive_connections=int(settings.LLM_HTTP_MAX_KEEPALIVE),
+        keepalive_expiry=float(settings.LLM_HTTP_KEEPALIVE_EXPIRY_SEC),
+    )
+    timeout = httpx.Timeout(
+        float(settings.LLM_HTTP_TIMEOUT_SEC),
+        connect=float(settings.LLM_HTTP_CONNECT_TIMEOUT_SEC),
+    )
+    http_client = httpx.AsyncClient(http2=_http2_available(), limits=limits, timeout=timeout)
+    _http_clients[name] = http_client
+    return http_client
+
+
+def get_openai_client():
+    """공유 AsyncOpenAI 클라이언트."""
+    c = _clients.get("openai")
+    if c is None:
+        from openai import AsyncOpenAI
+        c = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=_build_http_client("openai"),
+            timeout=float(settings.LLM_HTTP_TIMEOUT_SEC),
+        )
+        _clients["openai"] = c
+    return c
+
+
+def get_anthropic_client():
+    """공유 AsyncAnthropic 클라이언트."""
+    c = _clients.get("anthropic")
+    if c is None:
+        import anthropic
+        c = anthropic.AsyncAnthropic(
+            api_key=settings.CLAUDE_API_KEY,
+            http_client=_build_http_client("anthropic"),
+            timeout=float(settings.LLM_HTTP_TIMEOUT_SEC),
+        )
+        _clients["anthropic"] = c
+    return c
+
+
+def get_gemini_client():
+    """
+    공유 google-genai 클라이언트.
+
+    - google-genai는 내부에서 자체 httpx 클라이언트를 관리하므로, 풀 설정은
+      HttpOptions(async_client_args)를 지원하는 SDK 버전에서만 전달한다.
+    """
+    c = _clients.get("gemini")
+    if c is None:
+        from google import genai
+        from google.genai import types as genai_types
+        timeout_ms = int(float(settings.LLM_HTTP_TIMEOUT_SEC) * 1000)
+        http_options = None
+        try:
+            http_options = genai_types.HttpOptions(
+                timeout=timeout_ms,
+                async_client_args={
+                    "http2": _http2_available(),
+                    "limits": httpx.Limits(
+                        max_connections=int(settings.LLM_HTTP_MAX_CONNECTIONS),
+                        max_keepalive_connections=int(settings.LLM_HTTP_MAX_KEEPALIVE),
+                        keepalive_expiry=float(settings.LLM_HTTP_KEEPALIVE_EXPIRY_SEC),
+                    ),
+                },
+            )
+        except Exception:
+            # 구버전 SDK: async_client_args 미지원 → 타임아웃만 적용
+            try:
+                http_options = genai_types.HttpOptions(timeout=timeout_ms)
+            except Exception:
+                http_options = None
+        if http_options is not None:
+            c = genai.Client(api_key=settings.GEMINI_API_KEY, http_options=http_options)
+        else:
+            c = genai.Client(api_key=settings.GEMINI_API_KEY)
+        _clients["gemini"] = c
+    return c
+
+
+async def _warm_http(name: str, url: str) -> None:
+    """TLS/HTTP 커넥션을 미리 열어 풀에 올려둔다(응답 코드는 무시)."""
+    http_client = _http_clients.get(name)
+    if http_client is None or http_client.is_closed:
+        return
+    try:
+        await http_client.get(url, timeout=float(settings.LLM_HTTP_CONNECT_TIMEOUT_SEC))
+    except Exception as e:
+        logger.debug(f"[llm_clients] warmup {name} failed (ignored): {e}")
+
+
+async def warmup_llm_clients() -> None:
+    """
+    lifespan 시작 시 호출: 키가 설정된 프로바이더의 클라이언트를 만들고 커넥션을 미리 연다.
+    실패해도 서비스 부팅에는 영향이 없다.
+    """
+    tasks = []
+    try:
+        if settings.OPENAI_API_KEY:
+            get_openai_client()
+            tasks.append(_warm_http("openai", "https://api.openai.com/v1/models"))
+        if settings.CLAUDE_API_KEY:
+            get_anthropic_client()
+            tasks.append(_warm_http("anthropic", "https://api.anthropic.com/v1/models"))
+        if settings.GEMINI_API_KEY:
+            get_gemini_client()
+    except Exception as e:
+        logger.warning(f"[llm_clients] client init failed: {e}")
+    if tasks and getattr(settings, "LLM_WARMUP_ON_STARTUP", True):
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def close_llm_clients() -> None:
+    """lifespan 종료 시 공유 커넥션 풀을 닫는다."""
+    for name, http_client in list(_http_clients.items()):
+        try:
+            await http_client.aclose()
+        except Exception:
+            pass
+        _http_clients.pop(name, None)
+    _clients.clear()
+
@@ -1,73 +1,291 @@
 """
-간단한 Redis 큐 유틸리티 (유저별 대기열)
+Redis 생성 작업 큐 (유저별 대기열 + 유저 간 공정 분배)
+
+구조:
+- 유저별 대기열: ZSET `q:storygen:{user_id}` (member=job_id, score=전역 시퀀스)
+  → 순번 조회는 ZRANK(O(log n)), 헤드 조회는 ZRANGE 0 0.
+- 유저 순환 목록: ZSET `q:storygen:users` (member=user_id, score=차례가 돌아오는 시퀀스)
+  → claim_next_job은 가장 앞 유저의 헤드 작업을 꺼내고, 남은 작업이 있으면 그 유저를 맨 뒤로 보낸다
+    (라운드로빈 공정 분배: 한 유저가 작업을 많이 쌓아도 다른 유저가 굶지 않는다).
+- 작업 데이터: HASH `q:job:{job_id}` (payload 필드는 각각 JSON, 메타 필드는 `__` 접두어)
+  → 부분 갱신은 필드 단위 HSET(전체 GET/SET 없음).
+- 임대(visibility timeout): ZSET `q:storygen:leases` (member=job_id, score=만료 ms)
+  → 워커는 renew_job_lease로 연장, 끝나면 ack_job. 만료된 임대는 requeue_expired_jobs가 원래 자리로 되돌린다.
+
+원자성:
+- 헤드 pop/claim/payload 패치/만료 재적재는 Lua 스크립트(register_script → EVALSHA)로 실행한다.
+- claim/requeue 스크립트는 유저/작업 키를 접두어로 조립한다(단일 Redis 전제, 클러스터 미지원).
 """
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 import json
+import time
 from app.core.database import redis_client
+from app.core.redis_scripts import register_script
+
+
+_QUEUE_PREFIX = "q:storygen:"
+_JOB_PREFIX = "q:job:"
+_USERS_KEY = "q:storygen:users"
+_LEASES_KEY = "q:storygen:leases"
+_SEQ_KEY = "q:storygen:seq"
+
+_META_USER = "__user"
+_META_SEQ = "__seq"
+_META_LEASED_AT = "__leased_at"
+
+DEFAULT_LEASE_SECONDS = 120
 
 
 def _user_queue_key(user_id: str) -> str:
-    return f"q:storygen:{user_id}"
+    return f"{_QUEUE_PREFIX}{user_id}"
 
 
 def _job_key(job_id: str) -> str:
-    return f"q:job:{job_id}"
+    return f"{_JOB_PREFIX}{job_id}"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# ---- Lua 스크립트 ----
+
+# KEYS: user_q, users, seq, job / ARGV: job_id, user_id, ttl, field1, value1, ...
+_ENQUEUE_LUA = """
+local seq = redis.call('INCR', KEYS[3])
+redis.call('ZADD', KEYS[1], seq, ARGV[1])
+redis.call('ZADD', KEYS[2], 'NX', seq, ARGV[2])
+redis.call('DEL', KEYS[4])
+redis.call('HSET', KEYS[4], '__user', ARGV[2], '__seq', seq)
+for i = 4, #ARGV, 2 do
+    redis.call('HSET', KEYS[4], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[4], tonumber(ARGV[3]))
+return seq
+"""
+
+# KEYS: user_q, users / ARGV: job_id, user_id
+_POP_IF_HEAD_LUA = """
+local head = redis.call('ZRANGE', KEYS[1], 0, 0)
+if #head == 0 or head[1] ~= ARGV[1] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+if redis.call('ZCARD', KEYS[1]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+# KEYS: user_q, users, leases, job / ARGV: job_id, user_id
+_REMOVE_LUA = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+redis.call('DEL', KEYS[4])
+if redis.call('ZCARD', KEYS[1]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+# KEYS: job / ARGV: ttl, field1, value1, ...
+_PATCH_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+return 1
+"""
+
+# KEYS: users, leases, seq / ARGV: queue_prefix, job_prefix, now_ms, lease_ms
+_CLAIM_LUA = """
+for _ = 1, 32 do
+    local head = redis.call('ZRANGE', KEYS[1], 0, 0)
+    if #head == 0 then
+        return false
+    end
+    local user = head[1]
+    local qkey = ARGV[1] .. user
+    local popped = redis.call('ZPOPMIN', qkey)
+    if #popped == 0 then
+        redis.call('ZREM', KEYS[1], user)
+    else
+        local job = popped[1]
+        if redis.call('ZCARD', qkey) > 0 then
+            redis.call('ZADD', KEYS[1], redis.call('INCR', KEYS[3]), user)
+        else
+            redis.call('ZREM', KEYS[1], user)
+        end
+        local jkey = ARGV[2] .. job
+        if redis.call('EXISTS', jkey) == 1 then
+            redis.call('ZADD', KEYS[2], tonumber(ARGV[3]) + tonumber(ARGV[4]), job)
+            redis.call('HSET', jkey, '__leased_at', ARGV[3])
+            return {user, job}
+        end
+    end
+end
+return false
+"""
+
+# KEYS: leases / ARGV: job_id, deadline_ms
+_RENEW_LUA = """
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('ZADD', KEYS[1], 'XX', tonumber(ARGV[2]), ARGV[1])
+    return 1
+end
+return 0
+"""
+
+# KEYS: leases, users / ARGV: now_ms, queue_prefix, job_prefix, limit
+_REQUEUE_EXPIRED_LUA = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[4]))
+local n = 0
+for _, job in ipairs(expired) do
+    redis.call('ZREM', KEYS[1], job)
+    local jkey = ARGV[3] .. job
+    local meta = redis.call('HMGET', jkey, '__user', '__seq')
+    if meta[1] and meta[2] then
+        redis.call('ZADD', ARGV[2] .. meta[1], tonumber(meta[2]), job)
+        redis.call('ZADD', KEYS[2], 'NX', tonumber(meta[2]), meta[1])
+        redis.call('HDEL', jkey, '__leased_at')
+        n = n + 1
+    end
+end
+return n
+"""
+
+# 모듈 로드 시 등록해 둬야 lifespan의 preload_redis_scripts()가 미리 적재한다.
+_ENQUEUE = register_script("queue:enqueue", _ENQUEUE_LUA)
+_POP_IF_HEAD = register_script("queue:pop_if_head", _POP_IF_HEAD_LUA)
+_REMOVE = register_script("queue:remove", _REMOVE_LUA)
+_PATCH = register_script("queue:patch", _PATCH_LUA)
+_CLAIM = register_script("queue:claim", _CLAIM_LUA)
+_RENEW = register_script("queue:renew", _RENEW_LUA)
+_REQUEUE_EXPIRED = register_script("queue:requeue_expired", _REQUEUE_EXPIRED_LUA)
+
+
+def _encode_fields(payload: Dict[str, Any]) -> List[str]:
+    args: List[str] = []
+    for k, v in (payload or {}).items():
+        key = str(k)
+        if key.startswith("__"):
+            continue
+        args.extend([key, json.dumps(v, ensure_ascii=False)])
+    return args
 
 
-async def enqueue_user_job(user_id: str, job_id: str, payload: dict, ttl: int = 3600) -> None:
-    await redis_client.rpush(_user_queue_key(user_id), job_id)
-    await redis_client.set(_job_key(job_id), json.dumps(payload, ensure_ascii=False), ex=ttl)
+# ---- 생산자/조회 API ----
+
+async def enqueue_user_job(user_id: str, job_id: str, payload: dict, ttl: int = 3600) -> int:
+    """유저 대기열 끝에 작업을 넣는다. 반환: 전역 시퀀스 번호"""
+    seq = await _ENQUEUE(
+        keys=[_user_queue_key(user_id), _USERS_KEY, _SEQ_KEY, _job_key(job_id)],
+        args=[job_id, user_id, int(ttl), *_encode_fields(payload)],
+    )
+    return int(seq or 0)
 
 
 async def remove_job(user_id: str, job_id: str) -> None:
     try:
-        await redis_client.lrem(_user_queue_key(user_id), 0, job_id)
-        await redis_client.delete(_job_key(job_id))
+        await _REMOVE(
+            keys=[_user_queue_key(user_id), _USERS_KEY, _LEASES_KEY, _job_key(job_id)],
+            args=[job_id, user_id],
+        )
     except Exception:
         pass
 
 
 async def get_position(user_id: str, job_id: str) -> Optional[int]:
-    lst = await redis_client.lrange(_user_queue_key(user_id), 0, -1)
-    try:
-        idx = lst.index(job_id)
-        return idx  # 0-based
-    except ValueError:
-        return None
+    """유저 대기열 내 순번(0-based). 대기열에 없으면 None"""
+    rank = await redis_client.zrank(_user_queue_key(user_id), job_id)
+    return int(rank) if rank is not None else None
+
+
+async def get_queue_length(user_id: str) -> int:
+    return int(await redis_client.zcard(_user_queue_key(user_id)) or 0)
 
 
 async def is_head(user_id: str, job_id: str) -> bool:
-    head = await redis_client.lindex(_user_queue_key(user_id), 0)
-    return head == job_id
+    head = await redis_client.zrange(_user_queue_key(user_id), 0, 0)
+    return bool(head) and head[0] == job_id
 
 
 async def pop_if_head(user_id: str, job_id: str) -> bool:
-    # 원자적 보장은 약하지만, 단일 소비자 기준으로 충분
-    if await is_head(user_id, job_id):
-        await redis_client.lpop(_user_queue_key(user_id))
-        return True
-    return False
+    """job_id가 유저 대기열 헤드일 때만 원자적으로 꺼낸다."""
+    res = await _POP_IF_HEAD(
+        keys=[_user_queue_key(user_id), _USERS_KEY],
+        args=[job_id, user_id],
+    )
+    return int(res or 0) == 1
 
 
 async def get_job_payload(job_id: str) -> Optional[dict]:
-    raw = await redis_client.get(_job_key(job_id))
+    raw = await redis_client.hgetall(_job_key(job_id))
     if not raw:
         return None
-    try:
-        return json.loads(raw)
-    except Exception:
+    out: Dict[str, Any] = {}
+    for k, v in raw.items():
+        if str(k).startswith("__"):
+            continue
+        try:
+            out[k] = json.loads(v)
+        except Exception:
+            out[k] = v
+    return out
+
+
+async def update_job_payload(job_id: str, patch: dict, ttl: int = 3600) -> bool:
+    """payload 필드 부분 갱신(원자적, 작업이 없으면 False)."""
+    fields = _encode_fields(patch)
+    res = await _PATCH(keys=[_job_key(job_id)], args=[int(ttl), *fields])
+    return int(res or 0) == 1
+
+
+# ---- 워커 API (공정 분배 + 임대) ----
+
+async def claim_next_job(lease_seconds: int = DEFAULT_LEASE_SECONDS) -> Optional[Tuple[str, str]]:
+    """
+    다음 작업을 임대한다(유저 간 라운드로빈).
+
+    반환: (user_id, job_id) 또는 None(대기 작업 없음)
+    - 임대가 만료되기 전에 renew_job_lease로 연장하고, 끝나면 ack_job을 호출해야 한다.
+    """
+    res = await _CLAIM(
+        keys=[_USERS_KEY, _LEASES_KEY, _SEQ_KEY],
+        args=[_QUEUE_PREFIX, _JOB_PREFIX, _now_ms(), int(lease_seconds) * 1000],
+    )
+    if not res:
         return None
+    return str(res[0]), str(res[1])
+
+
+async def renew_job_lease(job_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> bool:
+    """임대 연장. 이미 만료되어 재적재된 작업이면 False(워커는 작업을 중단해야 한다)."""
+    res = await _RENEW(
+        keys=[_LEASES_KEY],
+        args=[job_id, _now_ms() + int(lease_seconds) * 1000],
+    )
+    return int(res or 0) == 1
 
 
-async def update_job_payload(job_id: str, patch: dict) -> bool:
-    data = await get_job_payload(job_id)
-    if not data:
-        return False
-    data.update(patch or {})
-    await redis_client.set(_job_key(job_id), json.dumps(data, ensure_ascii=False), ex=3600)
-    return True
+async def ack_job(job_id: str) -> None:
+    """작업 완료: 임대와 작업 데이터를 지운다."""
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.zrem(_LEASES_KEY, job_id)
+    pipe.delete(_job_key(job_id))
+    await pipe.execute()
 
 
+async def requeue_expired_jobs(limit: int = 100) -> int:
+    """임대가 만료된 작업을 원래 순번으로 유저 대기열에 되돌린다. 반환: 되돌린 개수"""
+    res = await _REQUEUE_EXPIRED(
+        keys=[_LEASES_KEY, _USERS_KEY],
+        args=[_now_ms(), _QUEUE_PREFIX, _JOB_PREFIX, int(limit)],
+    )
+    return int(res or 0)
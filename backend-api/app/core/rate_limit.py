@@ -1,56 +1,285 @@
 """
-간단한 Redis 기반 레이트 리밋/동시성 제한 유틸리티
+Redis 기반 레이트 리밋/동시성 제한 유틸리티
+
+- 레이트 리밋: GCRA(토큰 버킷과 동치). 버킷별로 "이론적 도착 시각(TAT)" 하나만 저장한다.
+  고정 윈도우처럼 경계에서 2배 버스트가 생기지 않고, burst/분당 허용량을 따로 줄 수 있다.
+- 동시성 제한: 임대(lease) 세마포어. ZSET에 토큰을 만료 시각과 함께 넣고, 만료된 토큰은 자동으로 회수한다
+  (워커가 죽어 release를 못 해도 슬롯이 영구히 새지 않는다).
+- 검사 1회 = Lua 스크립트 1회(Redis 1 RTT). 여러 버킷(유저별 + 모델별)도 한 번에 all-or-nothing으로 검사한다.
+- Redis 장애 시에는 제한을 적용하지 않는다(가용성 우선).
+
+FastAPI 사용:
+    @router.post("/message", dependencies=[Depends(rate_limit("chat", model_of=preferred_model_of))])
 """
 
 from __future__ import annotations
 
-from typing import Tuple
-import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+import logging
+import math
+import uuid
+from fastapi import Depends, HTTPException, Request
+
+from app.core.config import settings
 from app.core.database import redis_client
+from app.core.redis_scripts import register_script
+from app.core.security import get_current_user_optional
+
+logger = logging.getLogger(__name__)
+
+
+# KEYS: 버킷들 / ARGV: (emission_ms, burst) * n
+# 반환: {허용(1/0), 남은 횟수(최소값), 재시도까지 ms}
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local new_tats = {}
+local remaining = -1
+for i, key in ipairs(KEYS) do
+    local emission = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local tat = tonumber(redis.call('GET', key) or now)
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + emission
+    local allow_at = new_tat - emission * burst
+    if now < allow_at then
+        return {0, 0, allow_at - now}
+    end
+    new_tats[i] = new_tat
+    local left = math.floor((now - allow_at) / emission)
+    if remaining < 0 or left < remaining then
+        remaining = left
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, new_tats[i], 'PX', math.max(1, new_tats[i] - now))
+end
+return {1, remaining, 0}
+"""
+
+# KEYS: 세마포어 ZSET / ARGV: token, limit, lease_ms
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+local deadline = now + tonumber(ARGV[3])
+redis.call('ZADD', KEYS[1], deadline, ARGV[1])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+# KEYS: 세마포어 ZSET / ARGV: token, lease_ms
+_RENEW_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', now + tonumber(ARGV[2]), ARGV[1])
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+# 모듈 로드 시 등록해 둬야 lifespan의 preload_redis_scripts()가 미리 적재한다.
+_GCRA = register_script("rate_limit:gcra", _GCRA_LUA)
+_ACQUIRE = register_script("rate_limit:acquire", _ACQUIRE_LUA)
+_RENEW = register_script("rate_limit:renew", _RENEW_LUA)
+
+
+async def consume_tokens(limits: List[Tuple[str, int, int, int]]) -> Tuple[bool, int, float]:
+    """
+    GCRA 검사(모든 버킷이 허용할 때만 소비).
+
+    limits: [(버킷, 허용 횟수, 기간 초, burst), ...]
+    반환: (허용 여부, 남은 횟수, 재시도까지 초)
+    """
+    keys: List[str] = []
+    args: List[int] = []
+    for bucket, max_requests, period_seconds, burst in limits:
+        if max_requests <= 0 or period_seconds <= 0:
+            continue
+        keys.append(f"rl:gcra:{bucket}")
+        args.extend([max(1, int(period_seconds * 1000 / max_requests)), max(1, int(burst or 1))])
+    if not keys:
+        return (True, -1, 0.0)
+    try:
+        res = await _GCRA(keys=keys, args=args)
+        return (int(res[0]) == 1, int(res[1]), int(res[2]) / 1000.0)
+    except Exception as e:
+        logger.warning(f"[rate_limit] redis check failed, allowing: {e}")
+        return (True, -1, 0.0)
 
 
 async def check_rate_limit(bucket: str, max_requests: int, window_seconds: int = 60) -> tuple[bool, int]:
     """
-    고정 윈도우 방식 레이트리밋.
+    window_seconds 동안 max_requests회(버스트도 max_requests) 허용.
     반환: (허용 여부, 남은 횟수)
     """
-    now = int(time.time())
-    window = now // window_seconds
-    key = f"rl:{bucket}:{window}"
-    # INCR 및 만료 설정
-    try:
-        count = await redis_client.incr(key)
-        if count == 1:
-            await redis_client.expire(key, window_seconds)
-        remaining = max(0, max_requests - count)
-        return (count <= max_requests, remaining)
-    except Exception:
-        # Redis 장애 시 리밋을 우회(가용성 우선)
-        return (True, max_requests)
+    allowed, remaining, _retry = await consume_tokens([(bucket, max_requests, window_seconds, max_requests)])
+    return (allowed, remaining if remaining >= 0 else max_requests)
 
 
-async def increment_active(bucket: str, max_active: int) -> bool:
-    """동시성 카운터 증가. 초과 시 false 반환하고 롤백."""
-    key = f"act:{bucket}"
+async def acquire_slot(bucket: str, max_active: int, lease_seconds: int = 600) -> Optional[str]:
+    """동시성 슬롯 임대. 성공 시 토큰, 초과 시 None(Redis 장애 시에는 빈 토큰으로 허용)."""
+    token = uuid.uuid4().hex
     try:
-        val = await redis_client.incr(key)
-        # 보호용 만료(유실 방지)
-        await redis_client.expire(key, 3600)
-        if val > max_active:
-            # 롤백
-            await redis_client.decr(key)
-            return False
+        ok = await _ACQUIRE(
+            keys=[f"act:{bucket}"], args=[token, int(max_active), int(lease_seconds) * 1000]
+        )
+        return token if int(ok or 0) == 1 else None
+    except Exception as e:
+        logger.warning(f"[rate_limit] slot acquire failed, allowing: {e}")
+        return ""
+
+
+async def renew_slot(bucket: str, token: str, lease_seconds: int = 600) -> bool:
+    """임대 연장(긴 작업 중간에 호출). 이미 만료되어 회수됐으면 False."""
+    if not token:
         return True
+    try:
+        ok = await _RENEW(keys=[f"act:{bucket}"], args=[token, int(lease_seconds) * 1000])
+        return int(ok or 0) == 1
     except Exception:
-        # 장애 시 제한 미적용(가용성 우선)
         return True
 
 
+async def release_slot(bucket: str, token: Optional[str]) -> None:
+    if not token:
+        return
+    try:
+        await redis_client.zrem(f"act:{bucket}", token)
+    except Exception:
+        pass
+
+
+@asynccontextmanager
+async def leased_slot(bucket: str, max_active: int, lease_seconds: int = 600) -> AsyncIterator[None]:
+    """동시성 제한 구간. 슬롯이 없으면 429."""
+    token = await acquire_slot(bucket, max_active, lease_seconds)
+    if token is None:
+        raise HTTPException(status_code=429, detail="TooManyConcurrentRequests")
+    try:
+        yield
+    finally:
+        await release_slot(bucket, token)
+
+
+async def increment_active(bucket: str, max_active: int) -> bool:
+    """(호환) 동시성 카운터 증가. 초과 시 False. 해제는 decrement_active."""
+    return (await acquire_slot(f"legacy:{bucket}", max_active, 3600)) is not None
+
+
 async def decrement_active(bucket: str) -> None:
-    key = f"act:{bucket}"
+    """(호환) 가장 오래된 슬롯 하나를 반납한다."""
     try:
-        await redis_client.decr(key)
+        await redis_client.zpopmin(f"act:legacy:{bucket}", 1)
     except Exception:
         pass
 
 
+# ---- FastAPI 의존성 ----
+
+# scope별 (분당 허용, burst) 설정 이름
+_SCOPE_SETTINGS = {
+    "chat": ("RATE_LIMIT_CHAT_PER_MIN", "RATE_LIMIT_CHAT_BURST"),
+    "generation": ("RATE_LIMIT_GENERATION_PER_MIN", "RATE_LIMIT_GENERATION_BURST"),
+    "media": ("RATE_LIMIT_MEDIA_PER_MIN", "RATE_LIMIT_MEDIA_BURST"),
+}
+
+
+def preferred_model_of(request: Request, user: Any) -> Optional[str]:
+    """채팅: 유저가 선택한 세부 모델."""
+    return str(getattr(user, "preferred_sub_model", "") or "").strip() or None
+
+
+def query_model_of(request: Request, user: Any) -> Optional[str]:
+    """이미지 생성 등: 쿼리 파라미터 model."""
+    return str(request.query_params.get("model") or "").strip() or None
+
+
+def _client_ip(request: Request) -> str:
+    fwd = str(request.headers.get("x-forwarded-for") or "").split(",")[0].strip()
+    if fwd:
+        return fwd
+    return str(getattr(getattr(request, "client", None), "host", "") or "unknown")
+
+
+def rate_limit_subject(request: Request, user: Any) -> str:
+    """제한 주체: 로그인 유저는 유저 ID, 비로그인은 클라이언트 IP."""
+    uid = getattr(user, "id", None)
+    return f"u:{uid}" if uid else f"ip:{_client_ip(request)}"
+
+
+def rate_limit(
+    scope: str,
+    *,
+    model_of: Optional[Callable[[Request, Any], Optional[str]]] = None,
+):
+    """
+    엔드포인트 의존성 팩토리: 유저별(비로그인은 IP별) + 모델별(전역) GCRA를 한 번에 검사한다.
+
+    - 한도는 settings(RATE_LIMIT_{SCOPE}_PER_MIN/BURST, RATE_LIMIT_MODEL_PER_MIN)에서 읽는다. 0이면 해당 제한 끔.
+    - 초과 시 429 + Retry-After.
+    """
+    per_min_name, burst_name = _SCOPE_SETTINGS.get(scope, ("", ""))
+
+    async def _dependency(
+        request: Request,
+        current_user: Any = Depends(get_current_user_optional),
+    ) -> None:
+        if not bool(getattr(settings, "RATE_LIMIT_ENABLED", True)):
+            return
+        per_min = int(getattr(settings, per_min_name, 0) or 0) if per_min_name else 0
+        burst = int(getattr(settings, burst_name, 0) or 0) if burst_name else 0
+        limits: List[Tuple[str, int, int, int]] = []
+        if per_min > 0:
+            who = rate_limit_subject(request, current_user)
+            limits.append((f"{scope}:{who}", per_min, 60, burst or per_min))
+        model_per_min = int(getattr(settings, "RATE_LIMIT_MODEL_PER_MIN", 0) or 0)
+        if model_of is not None and model_per_min > 0:
+            try:
+                model = model_of(request, current_user)
+            except Exception:
+                model = None
+            if model:
+                limits.append((f"model:{model}", model_per_min, 60, model_per_min))
+        if not limits:
+            return
+        allowed, _remaining, retry_after = await consume_tokens(limits)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="TooManyRequests",
+                headers={"Retry-After": str(max(1, int(math.ceil(retry_after))))},
+            )
+
+    return _dependency
+
+
+def concurrency_limit(scope: str, *, lease_seconds: int = 600):
+    """
+    엔드포인트 의존성 팩토리: 유저별 동시 실행 수 제한(RATE_LIMIT_{SCOPE}_CONCURRENCY, 0이면 끔).
+
+    주의: yield 의존성은 핸들러가 끝나면 해제된다. StreamingResponse처럼 핸들러 반환 뒤에도
+    작업이 이어지는 엔드포인트는 acquire_slot/release_slot을 작업 코드에서 직접 호출한다.
+    """
+
+    async def _dependency(
+        request: Request,
+        current_user: Any = Depends(get_current_user_optional),
+    ) -> AsyncIterator[None]:
+        limit = int(getattr(settings, f"RATE_LIMIT_{scope.upper()}_CONCURRENCY", 0) or 0)
+        if not bool(getattr(settings, "RATE_LIMIT_ENABLED", True)) or limit <= 0:
+            yield
+            return
+        who = rate_limit_subject(request, current_user)
+        async with leased_slot(f"{scope}:{who}", limit, lease_seconds):
+            yield
+
+    return _dependency
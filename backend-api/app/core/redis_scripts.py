@@ -0,0 +1,45 @@
+"""
+Redis Lua 스크립트 레지스트리
+
+- 스크립트는 이름으로 한 번만 등록하고, 호출은 EVALSHA로 한다(매 호출 소스 전송 없음).
+  서버에 스크립트가 없으면(NOSCRIPT: 재시작/FLUSH) redis-py가 SCRIPT LOAD 후 재시도한다.
+- preload_redis_scripts(): lifespan 시작 시 등록된 스크립트를 미리 SCRIPT LOAD 해 첫 호출의 왕복을 없앤다.
+
+사용:
+    _USE = register_script("points:use", LUA_SOURCE)
+    await _USE(keys=[...], args=[...])                 # 기본 redis_client
+    await _USE(keys=[...], args=[...], client=redis)  # 다른 클라이언트(같은 서버)
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict
+
+from app.core.database import redis_client
+
+logger = logging.getLogger(__name__)
+
+_registry: Dict[str, Any] = {}
+
+
+def register_script(name: str, source: str) -> Any:
+    """이름으로 스크립트를 등록(중복 등록 시 기존 객체 반환)."""
+    script = _registry.get(name)
+    if script is None:
+        script = redis_client.register_script(source)
+        _registry[name] = script
+    return script
+
+
+async def preload_redis_scripts() -> int:
+    """등록된 스크립트를 서버에 미리 적재한다. 반환: 적재한 개수"""
+    loaded = 0
+    for name, script in list(_registry.items()):
+        try:
+            sha = await redis_client.script_load(script.script)
+            script.sha = sha
+            loaded += 1
+        except Exception as e:
+            logger.warning(f"[redis_scripts] preload failed ({name}): {e}")
+    return loaded
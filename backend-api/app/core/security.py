@@ -8,10 +8,8 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
 from app.models.user import User
 
 
@@ -73,7 +71,6 @@ def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
 ) -> User:
     """현재 사용자 가져오기"""
     credentials_exception = HTTPException(
@@ -95,9 +92,9 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    # 데이터베이스에서 사용자 조회
-    from app.services.user_service import get_user_by_id
-    user = await get_user_by_id(db, user_id)
+    # 사용자 조회 (principal 캐시 → DB)
+    from app.services.user_principal_cache import resolve_user
+    user = await resolve_user(user_id)
     if user is None:
         raise credentials_exception
     
@@ -154,7 +151,6 @@ def verify_password_reset_token(token: str) -> Optional[str]:
 
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
-    db: AsyncSession = Depends(get_db)
 ) -> Optional[User]:
     """
     현재 사용자를 가져오지만, 필수는 아닙니다.
@@ -177,8 +173,8 @@ async def get_current_user_optional(
         return None
     
     # 순환 참조 방지를 위해 함수 내에서 임포트
-    from app.services.user_service import get_user_by_id
-    user = await get_user_by_id(db, user_id)
+    from app.services.user_principal_cache import resolve_user
+    user = await resolve_user(user_id)
     
     return user
 
@@ -17,6 +17,7 @@ import os
 import asyncio
 from app.core.config import settings
 from app.core.database import engine, Base
+from app.core.db_pool_stats import PoolRouteMiddleware
 from app.core.paths import get_upload_dir
 from sqlalchemy import text, select
 
@@ -293,9 +294,102 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"[warn] 구독 플랜 시드 실패(계속 진행): {e}")
 
+    # ✅ LLM 프로바이더 클라이언트 워밍업(공유 커넥션 풀 + TLS 선연결)
+    # - 첫 채팅 턴의 TTFT에 커넥션 수립 비용이 섞이지 않도록 한다. 실패해도 계속 진행.
+    try:
+        from app.core.llm_clients import warmup_llm_clients
+        await warmup_llm_clients()
+        logger.info("🤖 LLM 클라이언트 워밍업 완료")
+    except Exception as e:
+        logger.warning(f"[warn] LLM 클라이언트 워밍업 실패(계속 진행): {e}")
+
+    # ✅ 유저 활동 로그 버퍼 writer(페이지 이벤트 → 주기적 bulk INSERT)
+    try:
+        from app.services.activity_log_writer import start_activity_log_writer
+        await start_activity_log_writer()
+    except Exception as e:
+        logger.warning(f"[warn] 활동 로그 writer 시작 실패(계속 진행): {e}")
+
+    # ✅ 포인트 원장 write-behind writer(Redis 원장 스트림 → 주기적 배치 반영)
+    try:
+        from app.services.point_ledger import start_point_ledger_writer
+        await start_point_ledger_writer()
+    except Exception as e:
+        logger.warning(f"[warn] 포인트 원장 writer 시작 실패(계속 진행): {e}")
+
+    # ✅ 채팅방 요약 워커(메시지 추가 이벤트 → 룸 단위 병합 → 증분 요약)
+    try:
+        from app.services.room_summary_worker import start_room_summary_worker
+        await start_room_summary_worker()
+    except Exception as e:
+        logger.warning(f"[warn] 요약 워커 시작 실패(계속 진행): {e}")
+
+    # ✅ 조회수/대화수 카운터 버퍼 flusher(Redis 해시 → 주기적 배치 UPDATE)
+    try:
+        from app.services.counter_buffer import start_counter_flusher
+        await start_counter_flusher()
+    except Exception as e:
+        logger.warning(f"[warn] 카운터 버퍼 flusher 시작 실패(계속 진행): {e}")
+
+    # ✅ 크리에이터 통계 롤업 잡(프로필 대시보드는 롤업 테이블만 읽는다)
+    try:
+        from app.services.creator_stats_rollup import start_creator_stats_rollup
+        await start_creator_stats_rollup()
+    except Exception as e:
+        logger.warning(f"[warn] 통계 롤업 잡 시작 실패(계속 진행): {e}")
+
+    # ✅ Redis Lua 스크립트 선적재(첫 호출부터 EVALSHA)
+    try:
+        # 스크립트는 모듈 로드 시 등록되므로, 선적재 전에 스크립트를 가진 모듈을 모두 불러 둔다.
+        import app.core.queue  # noqa: F401 (스크립트 등록)
+        import app.core.rate_limit  # noqa: F401
+        import app.services.point_service  # noqa: F401
+        import app.services.point_ledger  # noqa: F401
+        import app.services.counter_buffer  # noqa: F401
+        import app.services.room_index  # noqa: F401
+        import app.services.room_summary_worker  # noqa: F401
+        import app.services.creator_stats_rollup  # noqa: F401
+        from app.core.redis_scripts import preload_redis_scripts
+        loaded = await preload_redis_scripts()
+        logger.info(f"📜 Redis 스크립트 선적재 완료 ({loaded}개)")
+    except Exception as e:
+        logger.warning(f"[warn] Redis 스크립트 선적재 실패(계속 진행): {e}")
+
     yield
     
     # 종료 시
+    try:
+        from app.services.activity_log_writer import stop_activity_log_writer
+        await stop_activity_log_writer()
+    except Exception as e:
+        logger.warning(f"[warn] 활동 로그 flush 실패: {e}")
+    try:
+        from app.services.room_summary_worker import stop_room_summary_worker
+        await stop_room_summary_worker()
+    except Exception:
+        pass
+    try:
+        from app.services.point_ledger import stop_point_ledger_writer
+        await stop_point_ledger_writer()
+    except Exception as e:
+        logger.warning(f"[warn] 포인트 원장 flush 실패: {e}")
+    try:
+        from app.services.counter_buffer import stop_counter_flusher
+        await stop_counter_flusher()
+    except Exception as e:
+        logger.warning(f"[warn] 카운터 버퍼 flush 실패: {e}")
+    try:
+        from app.services.creator_stats_rollup import stop_creator_stats_rollup
+        await stop_creator_stats_rollup()
+    except Exception as e:
+        logger.warning(f"[warn] 통계 롤업 잡 종료 실패: {e}")
+    try:
+        from app.core.llm_clients import close_llm_clients
+        from app.core.http_fetch import close_http_client
+        await close_llm_clients()
+        await close_http_client()
+    except Exception:
+        pass
     logger.info("👋 AI 캐릭터 챗 플랫폼 종료")
 
 
@@ -309,6 +403,8 @@ app = FastAPI(
     openapi_url="/openapi.json" if settings.ENVIRONMENT == "development" else None,
     lifespan=lifespan
 )
+# DB 커넥션 풀 라우트별 계측(요청 scope → contextvar). 조회: GET /metrics/db-pool
+app.add_middleware(PoolRouteMiddleware)
 UPLOAD_DIR = get_upload_dir()
 app.mount("/static", StaticFiles(directory=UPLOAD_DIR), name="static")
 # CORS 미들웨어 설정
@@ -346,6 +442,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 목록 API 키셋 페이지네이션 커서(/characters/)
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Dev-only CORS safety net:
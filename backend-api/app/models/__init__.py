@@ -31,6 +31,7 @@ from .storydive_session import StoryDiveSession
 from .user_activity_log import UserActivityLog
 from .chapter_purchase import ChapterPurchase
 from .subscription import SubscriptionPlan, UserSubscription
+from .creator_stats import CreatorStatsRollup, CharacterStatsRollup, StatsRollupState
 
 __all__ = [
     "User",
@@ -63,5 +64,8 @@ __all__ = [
     "ChapterPurchase",
     "SubscriptionPlan",
     "UserSubscription",
+    "CreatorStatsRollup",
+    "CharacterStatsRollup",
+    "StatsRollupState",
 ]
 
@@ -2,7 +2,7 @@
 채팅 모델
 """
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, func, Boolean
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, func, Boolean, Index
 from sqlalchemy.orm import relationship
 import uuid
 
@@ -50,6 +50,13 @@ class ChatMessage(Base):
     # 관계 설정
     chat_room = relationship("ChatRoom", back_populates="messages")
 
+    # 최근 N개/커서 이전 조회(키셋 페이지네이션)용 복합 인덱스
+    __table_args__ = (
+        Index("ix_chat_messages_room_created_id", "chat_room_id", "created_at", "id"),
+        # 통계 롤업 잡(creator_stats_rollup)의 워터마크 이후 구간 조회
+        Index("ix_chat_messages_created_at", "created_at"),
+    )
+
     def __repr__(self):
         return f"<ChatMessage(id={self.id}, chat_room_id={self.chat_room_id}, sender_type={self.sender_type})>"
 
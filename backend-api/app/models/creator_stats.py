@@ -0,0 +1,53 @@
+"""
+크리에이터 통계 롤업 모델 — 프로필 대시보드(get_stats_*) 전용
+
+- 시간/일 버킷별 메시지 수 + 고유 대화 유저 HLL 스케치(app/services/hll_sketch.py).
+- app/services/creator_stats_rollup.py가 chat_messages를 워터마크 이후 구간만 읽어 증분 반영한다.
+- bucket_start는 UTC naive(시 단위는 정시, 일 단위는 자정).
+"""
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base, UUID
+
+# 버킷 단위
+GRAIN_HOUR = "h"
+GRAIN_DAY = "d"
+
+
+class CreatorStatsRollup(Base):
+    """크리에이터(캐릭터 생성자) 단위 롤업"""
+    __tablename__ = "creator_stats_rollups"
+
+    creator_id = Column(UUID(), primary_key=True)
+    grain = Column(String(1), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    messages = Column(Integer, default=0, nullable=False)
+    chatters_hll = Column(LargeBinary, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class CharacterStatsRollup(Base):
+    """캐릭터 단위 롤업(상위 캐릭터 집계용, creator_id는 반영 시점 값)"""
+    __tablename__ = "character_stats_rollups"
+
+    character_id = Column(UUID(), primary_key=True)
+    grain = Column(String(1), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    creator_id = Column(UUID(), nullable=False)
+    messages = Column(Integer, default=0, nullable=False)
+    chatters_hll = Column(LargeBinary, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_character_stats_rollups_creator", "creator_id", "grain", "bucket_start"),
+    )
+
+
+class StatsRollupState(Base):
+    """롤업 워터마크(이 시각 이전 메시지는 반영 완료). 롤업 행과 같은 트랜잭션으로 갱신한다."""
+    __tablename__ = "stats_rollup_state"
+
+    name = Column(String(50), primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,148 @@
+"""
+유저 활동 로그(UserActivityLog) 버퍼 writer
+
+의도/배경:
+- 페이지 이벤트 수집(`POST /metrics/traffic/page-event`)은 QPS가 가장 높은 엔드포인트 중 하나인데,
+  이벤트마다 세션을 열고 1행 INSERT + COMMIT을 하면 DB 커넥션 풀(작음)과 응답 지연을 모두 잡아먹는다.
+- 요청 경로에서는 메모리 버퍼에 넣기만 하고, 백그라운드 태스크가 일정 주기(ACTIVITY_LOG_FLUSH_INTERVAL_MS)
+  또는 일정 행 수(ACTIVITY_LOG_BATCH_SIZE)마다 한 번에 bulk INSERT 한다.
+
+주의:
+- 베스트-에포트 로그다. 프로세스가 비정상 종료되면 버퍼에 남은 행은 유실될 수 있다(정상 종료 시 flush).
+- 버퍼 상한(ACTIVITY_LOG_MAX_BUFFER)을 넘으면 새 행은 버린다(DB 장애 시 메모리 폭주 방지).
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user_activity_log import UserActivityLog
+
+logger = logging.getLogger(__name__)
+
+_buffer: List[Dict[str, Any]] = []
+_wakeup: Optional[asyncio.Event] = None
+_flusher: Optional[asyncio.Task] = None
+_dropped = 0
+
+
+def _batch_size() -> int:
+    return max(1, int(getattr(settings, "ACTIVITY_LOG_BATCH_SIZE", 200) or 1))
+
+
+def _ensure_flusher() -> None:
+    """첫 enqueue 시(또는 lifespan 시작 시) 백그라운드 flush 태스크를 띄운다."""
+    global _flusher, _wakeup
+    if _flusher is not None and not _flusher.done():
+        return
+    loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    _flusher = loop.create_task(_flush_loop())
+
+
+def enqueue_activity_log(
+    *,
+    user_id: uuid.UUID,
+    path: str,
+    path_raw: Optional[str],
+    page_group: str,
+    event: str,
+    duration_ms: Optional[int],
+    session_id: Optional[str],
+    client_id: Optional[str],
+    meta: Optional[str],
+) -> None:
+    """활동 로그 1행을 버퍼에 넣는다(DB 왕복 없음)."""
+    global _dropped
+    if len(_buffer) >= int(getattr(settings, "ACTIVITY_LOG_MAX_BUFFER", 10000) or 0):
+        _dropped += 1
+        if _dropped % 1000 == 1:
+            logger.warning(f"[activity_log] buffer full, dropping rows (dropped={_dropped})")
+        return
+    _buffer.append({
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "path": path,
+        "path_raw": path_raw,
+        "page_group": page_group,
+        "event": event,
+        "duration_ms": duration_ms,
+        "session_id": session_id,
+        "client_id": client_id,
+        "meta": meta,
+        # flush 시각이 아니라 이벤트 수신 시각을 남긴다.
+        "created_at": datetime.now(timezone.utc),
+    })
+    try:
+        _ensure_flusher()
+        if len(_buffer) >= _batch_size() and _wakeup is not None:
+            _wakeup.set()
+    except RuntimeError:
+        # 이벤트 루프 밖(테스트/스크립트): 다음 flush 때 처리
+        pass
+
+
+async def _write_batch(rows: List[Dict[str, Any]]) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(UserActivityLog), rows)
+        await db.commit()
+
+
+async def flush_activity_logs() -> int:
+    """버퍼를 비운다. 기록한 행 수를 반환한다(실패한 배치는 버린다: 베스트-에포트)."""
+    written = 0
+    size = _batch_size()
+    while _buffer:
+        rows = _buffer[:size]
+        del _buffer[:size]
+        try:
+            await _write_batch(rows)
+            written += len(rows)
+        except Exception as e:
+            logger.warning(f"[activity_log] bulk insert failed, dropped {len(rows)} rows: {e}")
+    return written
+
+
+async def _flush_loop() -> None:
+    interval = max(0.05, float(getattr(settings, "ACTIVITY_LOG_FLUSH_INTERVAL_MS", 1000) or 1000) / 1000.0)
+    while True:
+        try:
+            if _wakeup is not None:
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+                _wakeup.clear()
+            else:
+                await asyncio.sleep(interval)
+            if _buffer:
+                await flush_activity_logs()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[activity_log] flush loop error (continuing): {e}")
+
+
+async def start_activity_log_writer() -> None:
+    """lifespan 시작 시 호출."""
+    _ensure_flusher()
+
+
+async def stop_activity_log_writer() -> None:
+    """lifespan 종료 시 호출: flush 태스크를 멈추고 남은 버퍼를 기록한다."""
+    global _flusher
+    task = _flusher
+    _flusher = None
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+    await flush_activity_logs()
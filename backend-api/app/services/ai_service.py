@@ -3,12 +3,20 @@ AI 모델과의 상호작용을 담당하는 서비스
 - 현재는 Gemini, Claude, OpenAI 모델을 지원 (향후 확장 가능)
 - 각 모델의 응답을 일관된 형식으로 반환하는 것을 목표로 함
 """
-from google import genai
 from google.genai import types as genai_types
-import anthropic  # Claude API 라이브러리
 from typing import Literal, Optional, AsyncGenerator, Callable, Awaitable
 from app.core.config import settings
-from .vision_service import stage1_keywords_from_image_url, stage1_keywords_from_image_url as _stage1, _http_get_bytes
+from app.core.llm_clients import get_openai_client, get_anthropic_client, get_gemini_client
+from .vision_service import stage1_keywords_from_image_url_async, _http_get_bytes_async
+from app.core.http_fetch import fetch_bytes
+from app.services.llm_prompt_cache import (
+    claude_system_blocks,
+    gemini_cached_content,
+    invalidate_gemini_cached_content,
+    prompt_cache_enabled,
+    record_claude_usage,
+    record_gemini_usage,
+)
 import mimetypes
 import logging
 import imghdr
@@ -137,8 +145,10 @@ def _format_history_block(history: object, *, max_items: int = 20, max_chars: in
         return ""
 
  # --- Gemini AI 설정 ---
-_gemini_client = genai.Client(api_key=settings.GEMINI_API_KEY)
-claude_client = anthropic.AsyncAnthropic(api_key=settings.CLAUDE_API_KEY)
+# ✅ 프로바이더 클라이언트는 레지스트리(app/core/llm_clients.py)에서 공유 인스턴스를 받아 쓴다.
+# - 호출마다 클라이언트를 만들면 매 턴 TLS 핸드셰이크/커넥션 풀 생성 비용이 TTFT에 더해진다.
+_gemini_client = get_gemini_client()
+claude_client = get_anthropic_client()
 
 def _make_thinking_config(budget: int = 1024):
     """SDK 버전에 관계없이 ThinkingConfig 생성 (필드명 호환).
@@ -256,9 +266,8 @@ def _parse_user_intent(user_hint: str) -> dict:
 
 
 # OpenAI 설정
-from openai import AsyncOpenAI
 import openai
-client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+client = get_openai_client()
 
 
 # -------------------------------
@@ -273,29 +282,37 @@ DEFAULT_SAFETY_OPEN = [
     {"category": "HARM_CATEGORY_VIOLENCE", "threshold": "BLOCK_NONE"},
 ]
 
+def _image_average_hash(bytes_data: bytes, hash_size: int = 8) -> str:
+    """경량 average hash(Vision 캐시 키). CPU 작업이므로 asyncio.to_thread로 호출한다."""
+    img = Image.open(BytesIO(bytes_data)).convert('L').resize((hash_size, hash_size), Image.BILINEAR)
+    pixels = list(img.getdata())
+    avg = sum(pixels) / len(pixels)
+    bits = ''.join('1' if p > avg else '0' for p in pixels)
+    return hex(int(bits, 2))[2:].rjust((hash_size*hash_size)//4, '0')
+
+def _decode_image(bytes_data: bytes) -> "Image.Image":
+    """바이트를 PIL 이미지로 완전히 디코드한다(Image.open은 지연 로드라 load()까지 해야 실제 디코드가 끝난다).
+    CPU 작업이므로 asyncio.to_thread로 호출한다."""
+    img = Image.open(BytesIO(bytes_data))
+    img.load()
+    return img
+
 async def tag_image_keywords(image_url: str, model: str = 'claude') -> dict:
     """
     강화된 이미지 태깅: Claude Vision 우선 사용으로 더 정확한 분석
     """
     try:
-        import requests
         import base64
         import json
         
-        # 이미지 다운로드 및 base64 인코딩 + MIME 탐지
-        response = requests.get(image_url, timeout=10)
+        # 이미지 다운로드 및 base64 인코딩 + MIME 탐지 (비동기: 이벤트 루프 블로킹 방지)
+        response = await fetch_bytes(image_url, timeout=10, raise_for_status=False)
         img_bytes = response.content
 
         # --- pHash 캐시 조회(경량 average hash) ---
         try:
             from app.core.database import redis_client as _redis
-            def _avg_hash(bytes_data: bytes, hash_size: int = 8) -> str:
-                img = Image.open(BytesIO(bytes_data)).convert('L').resize((hash_size, hash_size), Image.BILINEAR)
-                pixels = list(img.getdata())
-                avg = sum(pixels) / len(pixels)
-                bits = ''.join('1' if p > avg else '0' for p in pixels)
-                return hex(int(bits, 2))[2:].rjust((hash_size*hash_size)//4, '0')
-            ahash = _avg_hash(img_bytes)
+            ahash = await asyncio.to_thread(_image_average_hash, img_bytes)
             cache_key = f"vision:ahash:{ahash}:tags"
             # URL 기반 키(쿼리 제거)
             cache_key_url = None
@@ -399,15 +416,13 @@ async def tag_image_keywords(image_url: str, model: str = 'claude') -> dict:
         try:
             import google.generativeai as genai
             import os
-            from PIL import Image
-            from io import BytesIO
             
             genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
             
-            img = Image.open(BytesIO(response.content))
+            img = await asyncio.to_thread(_decode_image, img_bytes)
             mm_model = genai.GenerativeModel('gemini-2.5-pro')
             
-            response = mm_model.generate_content([prompt, img])
+            response = await mm_model.generate_content_async([prompt, img])
             txt = response.text
             
             if '```json' in txt:
@@ -448,24 +463,17 @@ async def extract_image_narrative_context(image_url: str, model: str = 'claude')
     tone: {mood_words, pace}
     """
     try:
-        import requests
         import base64
         import json
         
-        # 이미지 다운로드 및 base64 인코딩 + MIME 탐지
-        response = requests.get(image_url, timeout=10)
+        # 이미지 다운로드 및 base64 인코딩 + MIME 탐지 (비동기: 이벤트 루프 블로킹 방지)
+        response = await fetch_bytes(image_url, timeout=10, raise_for_status=False)
         img_bytes = response.content
 
         # --- pHash 캐시 조회(컨텍스트) ---
         try:
             from app.core.database import redis_client as _redis
-            def _avg_hash(bytes_data: bytes, hash_size: int = 8) -> str:
-                img = Image.open(BytesIO(bytes_data)).convert('L').resize((hash_size, hash_size), Image.BILINEAR)
-                pixels = list(img.getdata())
-                avg = sum(pixels) / len(pixels)
-                bits = ''.join('1' if p > avg else '0' for p in pixels)
-                return hex(int(bits, 2))[2:].rjust((hash_size*hash_size)//4, '0')
-            ahash = _avg_hash(img_bytes)
+            ahash = await asyncio.to_thread(_image_average_hash, img_bytes)
             cache_key = f"vision:ahash:{ahash}:ctx"
             cached = await _redis.get(cache_key)
             if cached:
@@ -577,11 +585,10 @@ async def analyze_image_tags_and_context(image_url: str, model: str = 'claude')
             pass
 
         logging.info("Vision combine: start (unified tags+context)")
-        import requests, base64, json
-        # 이미지 다운로드 및 MIME 추정
-        resp = requests.get(image_url, timeout=10)
+        import base64, json
+        # 이미지 다운로드 및 MIME 추정 (비동기 스트리밍 + 크기 상한)
         # ✅ 방어: 4xx/5xx면 즉시 실패 처리(HTML/에러 바디를 이미지로 오인 방지)
-        resp.raise_for_status()
+        resp = await fetch_bytes(image_url, timeout=10, raise_for_status=True)
         img_bytes = resp.content
         ct = (resp.headers.get('Content-Type') or '').lower()
         if ct.startswith('image/'):
@@ -656,13 +663,11 @@ async def analyze_image_tags_and_context(image_url: str, model: str = 'claude')
 
         if data is None:
             try:
-                from PIL import Image
-                from io import BytesIO
                 import google.generativeai as genai
                 import os
                 genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
 
-                img = Image.open(BytesIO(img_bytes))
+                img = await asyncio.to_thread(_decode_image, img_bytes)
                 # 모델 힌트가 들어와도 안전하게 기본값 사용
                 gm = genai.GenerativeModel('gemini-2.5-pro')
                 generation_config = genai.types.GenerationConfig(
@@ -994,7 +999,7 @@ async def write_story_from_image_grounded(image_url: str, user_hint: str = "", p
     t0 = time.time()
     
     # Stage-1 lightweight grounding (fallback-friendly)
-    kw2, caption = stage1_keywords_from_image_url(image_url)
+    kw2, caption = await stage1_keywords_from_image_url_async(image_url)
     t1 = time.time()
     logging.info(f"[PERF] Stage-1 grounding: {(t1-t0)*1000:.0f}ms")
     
@@ -1049,7 +1054,8 @@ async def write_story_from_image_grounded(image_url: str, user_hint: str = "", p
     # OCR로 숫자/단위만 보강(없는 경우에만)
     try:
         if not numeric_phrases:
-            more = _extract_numeric_phrases_ocr_bytes(_http_get_bytes(image_url))
+            raw = await _http_get_bytes_async(image_url)
+            more = await asyncio.to_thread(_extract_numeric_phrases_ocr_bytes, raw)
             numeric_phrases = more[:2] if more else []
     except Exception:
         pass
@@ -1256,7 +1262,7 @@ async def write_story_from_image_grounded(image_url: str, user_hint: str = "", p
     async def _claude_mm(url: str) -> str:
         try:
             # 이미지를 직접 다운로드하여 base64로 인코딩
-            img_bytes = _http_get_bytes(url)
+            img_bytes = await _http_get_bytes_async(url)
             # MIME 타입 추정: URL 확장자 → 실패 시 바이너리 시그니처로 보강
             mime, _ = mimetypes.guess_type(url)
             if not mime:
@@ -1384,7 +1390,8 @@ async def get_gemini_completion(
     prompt: str,
     temperature: float = 0.7,
     max_tokens: int = 1024,
-    model: str= 'gemini-2.5-pro'
+    model: str= 'gemini-2.5-pro',
+    cached_content: str | None = None,
 ) -> str:
     """
     주어진 프롬프트로 Google Gemini 모델을 호출하여 응답을 반환합니다.
@@ -1393,6 +1400,7 @@ async def get_gemini_completion(
         prompt: AI 모델에게 전달할 프롬프트 문자열.
         temperature: 응답의 창의성 수준 (0.0 ~ 1.0).
         max_tokens: 최대 토큰 수.
+        cached_content: 고정 prefix cachedContent 핸들(llm_prompt_cache). 있으면 prompt는 가변 suffix만 담는다.
 
     Returns:
         AI 모델이 생성한 텍스트 응답.
@@ -1433,6 +1441,8 @@ async def get_gemini_completion(
                 _gc_kwargs["thinkingConfig"] = _tc
         if _AFC_DISABLED:
             _gc_kwargs["automaticFunctionCalling"] = _AFC_DISABLED
+        if cached_content:
+            _gc_kwargs["cachedContent"] = cached_content
         generation_config = genai_types.GenerateContentConfig(**_gc_kwargs)
         if _is_thinking:
             logger.info(f"[ai] gemini thinkingConfig={_tc} maxOutputTokens={max_tokens}")
@@ -1442,6 +1452,7 @@ async def get_gemini_completion(
             contents=prompt,
             config=generation_config,
         )
+        record_gemini_usage(model_norm, getattr(response, "usage_metadata", None))
 
         # 안전한 텍스트 추출:
         # - 일부 Gemini 응답에서 response.text 는 "일부 파트만" 포함하거나, 중간에서 끊긴 텍스트를 반환하는 케이스가 있어
@@ -1563,10 +1574,13 @@ async def get_gemini_completion(
                         except Exception:
                             pass
                         try:
-                            generation_config_retry = genai_types.GenerateContentConfig(
+                            _retry_kwargs = dict(
                                 temperature=temperature,
                                 maxOutputTokens=retry_max_tokens,
                             )
+                            if cached_content:
+                                _retry_kwargs["cachedContent"] = cached_content
+                            generation_config_retry = genai_types.GenerateContentConfig(**_retry_kwargs)
                             response_retry = await _gemini_client.aio.models.generate_content(
                                 model=model,
                                 contents=prompt,
@@ -1610,6 +1624,9 @@ async def get_gemini_completion(
                 return response2.text
         except Exception:
             pass
+        # cachedContent 호출이면 prompt에 고정 prefix가 없다 → 다른 모델로 넘기지 않고 호출부(캐시 없는 경로)에 맡긴다.
+        if cached_content:
+            raise ValueError("gemini_cached_content_empty_response")
         # 최종 폴백: 다른 모델 시도(가능한 키가 있을 때)
         try:
             if settings.OPENAI_API_KEY:
@@ -1695,8 +1712,14 @@ async def get_gemini_completion_json(
         raise ValueError(f"AI 모델 호출에 실패했습니다: {str(e)}")
 
 
-async def get_gemini_completion_stream(prompt: str, temperature: float = 0.7, max_tokens: int = 1024, model: str = 'gemini-1.5-pro'):
-    """Gemini 모델의 스트리밍 응답을 비동기 제너레이터로 반환합니다."""
+async def get_gemini_completion_stream(
+    prompt: str,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    model: str = 'gemini-1.5-pro',
+    cached_content: str | None = None,
+):
+    """Gemini 모델의 스트리밍 응답을 비동기 제너레이터로 반환합니다. (cached_content: get_gemini_completion 참고)"""
     try:
         try:
             model_norm = (model or "").strip()
@@ -1714,6 +1737,8 @@ async def get_gemini_completion_stream(prompt: str, temperature: float = 0.7, ma
                 _gc_kwargs["thinkingConfig"] = _tc
         if _AFC_DISABLED:
             _gc_kwargs["automaticFunctionCalling"] = _AFC_DISABLED
+        if cached_content:
+            _gc_kwargs["cachedContent"] = cached_content
         config = genai_types.GenerateContentConfig(**_gc_kwargs)
         if _is_thinking:
             logger.info(f"[ai] gemini_stream thinkingConfig={_tc} maxOutputTokens={max_tokens}")
@@ -1722,7 +1747,10 @@ async def get_gemini_completion_stream(prompt: str, temperature: float = 0.7, ma
             contents=prompt,
             config=config,
         )
+        usage_metadata = None
         async for chunk in response_stream:
+            # usage_metadata는 마지막 청크 값이 최종 집계다.
+            usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
             # ✅ 신 SDK: part.thought 가 정확하게 표시됨 → thinking 누출 방지
             try:
                 if not chunk.candidates or not chunk.candidates[0].content:
@@ -1738,6 +1766,7 @@ async def get_gemini_completion_stream(prompt: str, temperature: float = 0.7, ma
                     yield part.text
             except (IndexError, AttributeError, TypeError):
                 continue
+        record_gemini_usage(model_norm, usage_metadata)
     except Exception as e:
         try:
             logger.error(f"Gemini Stream API 호출 중 오류 발생: {e}")
@@ -1753,10 +1782,12 @@ async def get_claude_completion(
     image_base64: str | None = None,
     image_mime: str | None = None,
     system_prompt: str | None = None,
+    system_prefix: str | None = None,
 ) -> str:
     """
     주어진 프롬프트로 Anthropic Claude 모델을 호출하여 응답을 반환합니다.
     이미지가 있을 경우 Vision 기능을 사용합니다.
+    system_prefix: system 앞에 붙는 고정 구간. 충분히 길면 cache_control 브레이크포인트를 둔다.
     """
     try:
         # ✅ system prompt(우선순위 높음) 분리 지원
@@ -1792,8 +1823,11 @@ async def get_claude_completion(
             "temperature": temperature,
             "messages": [{"role": "user", "content": content}],
         }
-        if sys_text:
-            kwargs["system"] = sys_text
+        if system_prefix and prompt_cache_enabled(system_prefix):
+            kwargs["system"] = claude_system_blocks(system_prefix, sys_text)
+        elif system_prefix or sys_text:
+            # sys_text는 strip되어 앞쪽 구분 개행이 없으므로, 캐시 블록 분리와 같은 경계로 이어 붙인다.
+            kwargs["system"] = "\n\n".join(p for p in ((system_prefix or "").strip(), sys_text) if p)
 
         # ✅ 실제 호출(시도) 로그: Anthropic SDK가 내부적으로 https://api.anthropic.com/v1/messages 를 호출한다.
         # - 프롬프트/대사 내용은 절대 로그에 남기지 않는다.
@@ -1804,6 +1838,7 @@ async def get_claude_completion(
             pass
 
         message = await claude_client.messages.create(**kwargs)
+        record_claude_usage(model, getattr(message, "usage", None))
 
         def _join_claude_text_blocks(blocks) -> str:
             parts: list[str] = []
@@ -1887,8 +1922,9 @@ async def get_claude_completion_stream(
     max_tokens: int = 1024,
     model: str = CLAUDE_MODEL_PRIMARY,
     system_prompt: str | None = None,
+    system_prefix: str | None = None,
 ):
-    """Claude 모델의 스트리밍 응답을 비동기 제너레이터로 반환합니다."""
+    """Claude 모델의 스트리밍 응답을 비동기 제너레이터로 반환합니다. (system_prefix: get_claude_completion 참고)"""
     try:
         try:
             sys_text = (system_prompt or "").strip()
@@ -1901,12 +1937,20 @@ async def get_claude_completion_stream(
             "temperature": temperature,
             "messages": [{"role": "user", "content": prompt}],
         }
-        if sys_text:
-            kwargs["system"] = sys_text
+        if system_prefix and prompt_cache_enabled(system_prefix):
+            kwargs["system"] = claude_system_blocks(system_prefix, sys_text)
+        elif system_prefix or sys_text:
+            # sys_text는 strip되어 앞쪽 구분 개행이 없으므로, 캐시 블록 분리와 같은 경계로 이어 붙인다.
+            kwargs["system"] = "\n\n".join(p for p in ((system_prefix or "").strip(), sys_text) if p)
 
         async with claude_client.messages.stream(**kwargs) as stream:
             async for text in stream.text_stream:
                 yield text
+            try:
+                final_message = await stream.get_final_message()
+                record_claude_usage(model, getattr(final_message, "usage", None))
+            except Exception:
+                pass
     except Exception as e:
         try:
             logger.error(f"Claude Stream API 호출 중 오류 발생: {e}")
@@ -1925,8 +1969,7 @@ async def get_openai_completion(
     주어진 프롬프트로 OpenAI 모델을 호출하여 응답을 반환합니다.
     """
     try:
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        client = get_openai_client()
         # ✅ 실제 호출(시도) 로그: OpenAI는 모델에 따라 responses/chat.completions로 분기된다.
         # - 프롬프트/대사 내용은 절대 로그에 남기지 않는다.
         try:
@@ -2280,8 +2323,7 @@ async def get_openai_completion_stream(
 ):
     """OpenAI 모델의 스트리밍 응답을 비동기 제너레이터로 반환합니다."""
     try:
-        from openai import AsyncOpenAI
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        client = get_openai_client()
 
         def _supports_responses_api(_client: object) -> bool:
             """현재 설치된 OpenAI Python SDK가 Responses API 스트리밍을 지원하는지 확인한다."""
@@ -2605,8 +2647,15 @@ async def get_ai_chat_response(
     temperature: float = 0.7,
     stream: bool = False,
     on_chunk: Optional[Callable[[str], Awaitable[None]]] = None,
+    character_prompt_prefix: str = "",
 ) -> str:
-    """사용자가 선택한 모델로 AI 응답 생성"""
+    """
+    사용자가 선택한 모델로 AI 응답 생성
+
+    character_prompt_prefix: 턴 사이에 바뀌지 않는 캐릭터 프롬프트 앞부분(선택).
+    - 실제 시스템 프롬프트는 prefix + character_prompt 이다.
+    - prefix를 따로 받으면 프로바이더 프롬프트 캐시(Claude cache_control / Gemini cachedContent)를 건다.
+    """
     # temperature 방어적 정규화: 0~1
     try:
         t = float(temperature)
@@ -2683,8 +2732,10 @@ async def get_ai_chat_response(
     # ✅ 프롬프트 구성(중요)
     # - Gemini는 단일 prompt 문자열로 호출하므로 기존처럼 합친 full_prompt를 유지한다.
     # - Claude/GPT는 system(developer)/user 역할 분리로 "캐릭터/규칙" 우선순위를 높인다.
+    # - 고정 prefix(character_prompt_prefix)는 항상 맨 앞에 둔다(프롬프트 캐시는 앞부분 일치로만 적중).
     user_prompt = f"{history_block}{intent_block}{length_block}\n\n사용자 메시지: {user_message}\n\n위 설정에 맞게 자연스럽게 응답하세요 (라벨 없이):"
-    full_prompt = f"{character_prompt}{user_prompt}"
+    static_prefix = character_prompt_prefix or ""
+    full_prompt = f"{static_prefix}{character_prompt}{user_prompt}"
 
     # 응답 길이 선호도 → 최대 토큰 비율 조정 (중간 기준 1.0)
     #
@@ -2772,6 +2823,46 @@ async def get_ai_chat_response(
                 logger.info(f"[ai] http_call provider=gemini sdk=google-generativeai call=generate_content_async model={model_name} max_tokens={max_tokens} temp={t}")
         except Exception:
             pass
+        # ✅ 고정 prefix cachedContent(있을 때만): 요청에는 가변 suffix만 보낸다.
+        # - 핸들이 아직 없으면(생성 중/미지원) 아래 기존 경로(전체 프롬프트)로 보낸다.
+        # - 캐시 경로가 실패하면 핸들을 버리고 기존 경로로 다시 보낸다(스트림이 이미 나간 경우 제외).
+        gemini_cache_handle = None
+        if static_prefix:
+            try:
+                gemini_cache_handle = await gemini_cached_content(model_name, static_prefix)
+            except Exception:
+                gemini_cache_handle = None
+        if gemini_cache_handle:
+            suffix_prompt = f"{character_prompt}{user_prompt}"
+            try:
+                if stream:
+                    streamed_text = await _collect_stream_response(
+                        get_gemini_completion_stream(
+                            suffix_prompt,
+                            temperature=t,
+                            max_tokens=max_tokens,
+                            model=model_name,
+                            cached_content=gemini_cache_handle,
+                        )
+                    )
+                    if streamed_text:
+                        return streamed_text
+                    raise ValueError("empty_stream_response")
+                return await get_gemini_completion(
+                    suffix_prompt,
+                    temperature=t,
+                    model=model_name,
+                    max_tokens=max_tokens,
+                    cached_content=gemini_cache_handle,
+                )
+            except Exception as cache_err:
+                invalidate_gemini_cached_content(model_name, static_prefix)
+                try:
+                    logger.warning(f"[ai] gemini cachedContent path failed -> uncached model={model_name} err={cache_err}")
+                except Exception:
+                    pass
+                if stream_chunk_count:
+                    raise
         if stream:
             try:
                 streamed_text = await _collect_stream_response(
@@ -2855,6 +2946,7 @@ async def get_ai_chat_response(
                     model=model_name,
                     max_tokens=max_tokens,
                     system_prompt=character_prompt,
+                    system_prefix=static_prefix,
                 )
             )
         return await get_claude_completion(
@@ -2863,6 +2955,7 @@ async def get_ai_chat_response(
             model=model_name,
             max_tokens=max_tokens,
             system_prompt=character_prompt,
+            system_prefix=static_prefix,
         )
         
     elif preferred_model == 'gpt':
@@ -2894,7 +2987,7 @@ async def get_ai_chat_response(
                     temperature=t,
                     model=model_name,
                     max_tokens=max_tokens,
-                    system_prompt=character_prompt,
+                    system_prompt=f"{static_prefix}{character_prompt}",
                 )
             )
         return await get_openai_completion(
@@ -2902,7 +2995,7 @@ async def get_ai_chat_response(
             temperature=t,
             model=model_name,
             max_tokens=max_tokens,
-            system_prompt=character_prompt,
+            system_prompt=f"{static_prefix}{character_prompt}",
         )
         
     else:  # argo (기본값)
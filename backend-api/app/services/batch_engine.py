@@ -0,0 +1,176 @@
+"""
+배치 LLM 작업 실행기 (원작챗 회차 요약/등장인물 추출용)
+
+의도/배경:
+- ensure_episode_summaries / extract_characters_from_story는 회차·윈도우마다 LLM 호출을 하나씩 await 했다.
+  200화짜리 작품을 가져오면 원작챗이 쓸 수 있게 될 때까지 수 분이 걸린다.
+- 항목(회차/윈도우)끼리는 서로 독립이므로, 프로바이더가 허용하는 동시성만큼 펼쳐 실행하고
+  순서가 필요한 후처리(누적 요약, 캐릭터 집계)는 결과를 모은 뒤 원래 순서로 접는다(map → reduce).
+
+동작:
+- run_batch(items, worker, concurrency=N): 최대 N개를 동시에 실행하고, 결과를 입력 순서대로 돌려준다.
+  - 항목 실패는 BatchOutcome.error로 남기고 나머지는 계속한다.
+  - is_fatal(exc)이 True인 예외(예: 크레딧 부족)는 남은 항목을 취소하고 그대로 올린다.
+  - should_cancel()이 True면 남은 항목을 취소하고 BatchCancelled를 올린다(항목 시작 직전에 확인).
+  - on_outcome(outcome)은 완료 순서대로 하나씩(동시 실행 없이) 호출된다 → 진행률/점진 커밋에 사용.
+    on_outcome이 예외를 올리면 후처리가 어긋난 것이므로 남은 항목을 취소하고 그 예외를 그대로 올린다
+    (진행률 기록처럼 실패해도 되는 작업은 on_outcome 안에서 직접 삼킨다).
+
+진행 커서(선택):
+- ProgressCursor를 넘기면 성공한 항목 값을 Redis 해시(field=항목 키, JSON)에 저장한다(None은 저장하지 않음 → 다음 실행에서 재시도).
+  중단된 실행을 같은 커서로 다시 돌리면 저장된 항목은 LLM을 다시 부르지 않는다(cached=True).
+- 항목 키에 입력 내용 해시를 넣어, 본문이 바뀐 항목은 자동으로 다시 계산되게 한다(item_key()).
+- 후처리까지 끝나면 clear()로 지운다. Redis 장애 시 커서 없이 동작한다.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_CURSOR_TTL_SEC = 86400
+
+
+class BatchCancelled(Exception):
+    """should_cancel()로 중단됨."""
+
+
+@dataclass
+class BatchOutcome:
+    index: int
+    value: Any = None
+    error: str = ""
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def item_key(prefix: Any, text: str) -> str:
+    """커서 필드 키: '<prefix>:<본문 해시 12자>'."""
+    digest = hashlib.sha1((text or "").encode("utf-8")).hexdigest()[:12]
+    return f"{prefix}:{digest}"
+
+
+class ProgressCursor:
+    """Redis 해시 기반 진행 커서(항목 키 → JSON 값)."""
+
+    def __init__(self, key: str, ttl: int = _CURSOR_TTL_SEC):
+        self.key = key
+        self.ttl = max(60, int(ttl or _CURSOR_TTL_SEC))
+
+    async def load(self) -> Dict[str, Any]:
+        try:
+            from app.core.database import redis_client
+            raw = await redis_client.hgetall(self.key)
+        except Exception as e:
+            logger.debug(f"[batch] cursor load failed key={self.key}: {e}")
+            return {}
+        out: Dict[str, Any] = {}
+        for field, payload in (raw or {}).items():
+            try:
+                out[str(field)] = json.loads(payload)
+            except Exception:
+                continue
+        return out
+
+    async def save(self, field: str, value: Any) -> None:
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except Exception:
+            return
+        try:
+            from app.core.database import redis_client
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hset(self.key, field, payload)
+            pipe.expire(self.key, self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"[batch] cursor save failed key={self.key} field={field}: {e}")
+
+    async def clear(self) -> None:
+        try:
+            from app.core.database import redis_client
+            await redis_client.delete(self.key)
+        except Exception:
+            pass
+
+
+async def run_batch(
+    items: Sequence[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    *,
+    concurrency: int,
+    cursor: Optional[ProgressCursor] = None,
+    keys: Optional[Sequence[str]] = None,
+    on_outcome: Optional[Callable[[BatchOutcome], Awaitable[None]]] = None,
+    should_cancel: Optional[Callable[[], Awaitable[bool]]] = None,
+    is_fatal: Optional[Callable[[BaseException], bool]] = None,
+    label: str = "batch",
+) -> List[BatchOutcome]:
+    """
+    items를 최대 concurrency개씩 동시에 worker로 처리한다. 반환은 입력 순서의 BatchOutcome 목록.
+    - cursor/keys(항목별 커서 필드, items와 같은 길이)가 있으면 저장된 항목은 건너뛰고, 성공 값은 저장한다.
+    """
+    n = len(items)
+    outcomes: List[BatchOutcome] = [BatchOutcome(index=i) for i in range(n)]
+    if n == 0:
+        return outcomes
+    use_cursor = cursor is not None and keys is not None and len(keys) == n
+    saved = await cursor.load() if use_cursor else {}
+    sem = asyncio.Semaphore(max(1, int(concurrency or 1)))
+    t0 = time.perf_counter()
+
+    async def _one(i: int) -> BatchOutcome:
+        out = outcomes[i]
+        if use_cursor and keys[i] in saved:
+            out.value, out.cached = saved[keys[i]], True
+            return out
+        async with sem:
+            if should_cancel is not None and await should_cancel():
+                raise BatchCancelled()
+            try:
+                out.value = await worker(items[i])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if is_fatal is not None and is_fatal(e):
+                    raise
+                out.error = (str(e) or type(e).__name__)[:800]
+                return out
+        if use_cursor and out.value is not None:
+            await cursor.save(keys[i], out.value)
+        return out
+
+    tasks = [asyncio.ensure_future(_one(i)) for i in range(n)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            out = await fut
+            if on_outcome is not None:
+                try:
+                    await on_outcome(out)
+                except Exception as e:
+                    logger.warning(f"[batch] {label} on_outcome failed idx={out.index}: {e}")
+                    raise
+    except BaseException:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        try:
+            ok = sum(1 for o in outcomes if o.ok and not o.cached)
+            cached = sum(1 for o in outcomes if o.cached)
+            failed = sum(1 for o in outcomes if o.error)
+            ms = int((time.perf_counter() - t0) * 1000)
+            logger.info(f"[perf] {label} items={n} ok={ok} cached={cached} failed={failed} concurrency={concurrency} total={ms}ms")
+        except Exception:
+            pass
+    return outcomes
@@ -0,0 +1,258 @@
+"""
+공개 캐릭터 목록(`GET /characters/`) 응답 캐시 + 키셋 커서
+
+의도/배경:
+- 탐색 탭 목록은 스토리 outer join + 태그 EXISTS 서브쿼리 + OFFSET 페이지네이션에,
+  응답 직전 방어 쿼리와 행별 Pydantic 직렬화까지 매 요청 반복한다.
+- 정규화된 필터/정렬/페이지를 키로, 직렬화가 끝난 응답(JSON)을 캐시한다(L1: 프로세스, L2: Redis).
+
+무효화:
+- 캐시 키에 "세대 번호"(Redis `characters:list:gen`)를 넣고, 캐릭터/태그/스토리 공개 상태가 바뀌면
+  invalidate_public_character_list_cache()로 세대를 올린다(SCAN/패턴 삭제 없음, 이전 세대는 TTL로 소멸).
+- 다른 워커는 세대 번호 L1(CHARACTER_LIST_LOCAL_CACHE_TTL_SEC) 만료 후 새 세대를 읽는다.
+- 채팅수/좋아요수 변화(정렬 순서)는 무효화하지 않고 TTL(CHARACTER_LIST_CACHE_TTL_SEC)로 반영한다.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.search_service import SORT_RELEVANCE, uses_relevance_order
+
+logger = logging.getLogger(__name__)
+
+_GEN_KEY = "characters:list:gen"
+
+_local_payloads: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_local_gen: Optional[Tuple[float, int]] = None
+
+
+# ---- 정규화 ----
+
+def normalize_list_sort(sort: Optional[str]) -> str:
+    """정렬 파라미터 별칭을 views|likes|recent로 정규화한다(get_public_characters와 동일 규칙)."""
+    s = (sort or "").strip().lower()
+    if s in ["views", "view", "조회수", "chats", "chat_count"]:
+        return "views"
+    if s in ["recent", "latest", "최신", "created_at"]:
+        return "recent"
+    return "likes"
+
+
+def _normalize_only(only: Optional[str]) -> str:
+    k = (only or "").strip().lower()
+    if k in ["origchat", "original_chat", "origin"]:
+        return "origchat"
+    if k in ["regular", "normal", "characterchat", "characters"]:
+        return "regular"
+    return ""
+
+
+def _normalize_gender(gender: Optional[str]) -> str:
+    g = (gender or "").strip().lower()
+    if g in ["male", "m", "남성"]:
+        return "male"
+    if g in ["female", "f", "여성"]:
+        return "female"
+    if g in ["other", "etc", "그외", "기타"]:
+        return "other"
+    return ""
+
+
+def _normalize_tags(tags: Optional[List[str]]) -> List[str]:
+    out = set()
+    for t in tags or []:
+        s = str(t or "").strip()
+        if s.startswith("#"):
+            s = s.lstrip("#").strip()
+        if s:
+            out.add(s)
+    return sorted(out)
+
+
+def list_cache_params(
+    *,
+    skip: int,
+    limit: int,
+    search: Optional[str],
+    sort: Optional[str],
+    source_type: Optional[str],
+    tags: Optional[List[str]],
+    gender: Optional[str],
+    only: Optional[str],
+    cursor: Optional[str],
+) -> Dict[str, Any]:
+    """같은 결과를 내는 요청이 같은 키가 되도록 파라미터를 정규화한다."""
+    return {
+        "skip": 0 if cursor else int(skip or 0),
+        "limit": int(limit or 0),
+        # ILIKE 검색이므로 대소문자는 결과에 영향이 없다.
+        "search": (search or "").strip().lower(),
+        # 관련도순은 likes와 결과 순서가 다르므로 별도 키로 둔다.
+        "sort": SORT_RELEVANCE if uses_relevance_order(search, sort) else normalize_list_sort(sort),
+        "source_type": (source_type or "").strip(),
+        "tags": _normalize_tags(tags),
+        "gender": _normalize_gender(gender),
+        "only": _normalize_only(only),
+        "cursor": cursor or "",
+    }
+
+
+# ---- 키셋 커서 ----
+
+def encode_list_cursor(character: Any, sort: Optional[str]) -> Optional[str]:
+    """마지막 행의 정렬 키로 다음 페이지 커서를 만든다(urlsafe base64 JSON)."""
+    try:
+        created_at = getattr(character, "created_at", None)
+        payload = {
+            "s": normalize_list_sort(sort),
+            "c": int(getattr(character, "chat_count", 0) or 0),
+            "l": int(getattr(character, "like_count", 0) or 0),
+            "t": created_at.isoformat() if created_at else None,
+            "i": str(character.id),
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    except Exception:
+        return None
+
+
+def decode_list_cursor(cursor: Optional[str], sort: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    커서를 해석한다. 형식이 잘못됐거나 다른 정렬용 커서면 ValueError.
+
+    반환: {"chat_count", "like_count", "created_at", "id"}
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if data.get("s") != normalize_list_sort(sort):
+            raise ValueError("cursor sort mismatch")
+        created_at = datetime.fromisoformat(data["t"]) if data.get("t") else None
+        if created_at is None:
+            raise ValueError("cursor without created_at")
+        return {
+            "chat_count": int(data.get("c") or 0),
+            "like_count": int(data.get("l") or 0),
+            "created_at": created_at,
+            "id": str(data["i"]),
+        }
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}")
+
+
+# ---- 캐시 ----
+
+async def _current_generation() -> int:
+    global _local_gen
+    now = time.monotonic()
+    if _local_gen is not None and _local_gen[0] > now:
+        return _local_gen[1]
+    gen = 0
+    try:
+        from app.core.database import redis_client
+        raw = await redis_client.get(_GEN_KEY)
+        gen = int(raw or 0)
+    except Exception:
+        # Redis 장애 시에는 마지막으로 알던 세대를 유지한다.
+        if _local_gen is not None:
+            gen = _local_gen[1]
+    ttl = int(getattr(settings, "CHARACTER_LIST_LOCAL_CACHE_TTL_SEC", 5) or 0)
+    _local_gen = (now + ttl, gen)
+    return gen
+
+
+def _cache_key(gen: int, params: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    return f"characters:list:v{gen}:{digest}"
+
+
+def _pack(body: str, next_cursor: Optional[str]) -> str:
+    # 커서는 base64라 개행이 없으므로 "커서\n본문" 형태로 붙여 저장한다(본문 재파싱 없이 분리).
+    return f"{next_cursor or ''}\n{body}"
+
+
+def _unpack(value: str) -> Tuple[str, Optional[str]]:
+    head, _, body = value.partition("\n")
+    return body, (head or None)
+
+
+async def get_cached_public_character_list(params: Dict[str, Any]) -> Optional[Tuple[str, Optional[str]]]:
+    """캐시 히트 시 (JSON 본문, 다음 커서)"""
+    gen = await _current_generation()
+    key = _cache_key(gen, params)
+    hit = _local_payloads.get(key)
+    if hit is not None:
+        if hit[0] > time.monotonic():
+            _local_payloads.move_to_end(key)
+            return _unpack(hit[1])
+        _local_payloads.pop(key, None)
+    try:
+        from app.core.database import redis_client
+        raw = await redis_client.get(key)
+    except Exception:
+        raw = None
+    if raw is None:
+        return None
+    _remember_local(key, raw)
+    return _unpack(raw)
+
+
+async def set_cached_public_character_list(params: Dict[str, Any], body: str, next_cursor: Optional[str]) -> None:
+    ttl = int(getattr(settings, "CHARACTER_LIST_CACHE_TTL_SEC", 60) or 0)
+    if ttl <= 0:
+        return
+    gen = await _current_generation()
+    key = _cache_key(gen, params)
+    value = _pack(body, next_cursor)
+    _remember_local(key, value)
+    try:
+        from app.core.database import redis_client
+        await redis_client.setex(key, ttl, value)
+    except Exception:
+        pass
+
+
+def _remember_local(key: str, value: str) -> None:
+    ttl = min(
+        int(getattr(settings, "CHARACTER_LIST_LOCAL_CACHE_TTL_SEC", 5) or 0),
+        int(getattr(settings, "CHARACTER_LIST_CACHE_TTL_SEC", 60) or 0),
+    )
+    if ttl <= 0:
+        return
+    _local_payloads[key] = (time.monotonic() + ttl, value)
+    _local_payloads.move_to_end(key)
+    max_items = int(getattr(settings, "CHARACTER_LIST_LOCAL_CACHE_MAX", 512) or 0)
+    while len(_local_payloads) > max(0, max_items):
+        _local_payloads.popitem(last=False)
+
+
+async def invalidate_public_character_list_cache() -> None:
+    """
+    공개 목록 캐시 무효화(세대 증가).
+
+    호출 지점: 캐릭터 생성/수정/삭제/공개 전환, 태그 변경, 스토리 공개 전환/삭제.
+    실패해도 본 작업에는 영향이 없다(최대 TTL만큼 이전 목록이 보일 수 있음).
+    """
+    global _local_gen
+    _local_payloads.clear()
+    try:
+        from app.core.database import redis_client
+        gen = int(await redis_client.incr(_GEN_KEY))
+        ttl = int(getattr(settings, "CHARACTER_LIST_LOCAL_CACHE_TTL_SEC", 5) or 0)
+        _local_gen = (time.monotonic() + ttl, gen)
+    except Exception as e:
+        _local_gen = None
+        logger.warning(f"[characters] list cache invalidate failed: {e}")
@@ -0,0 +1,76 @@
+"""
+캐릭터 프롬프트 컴파일 결과(정적 구간) 캐시 — 채팅 턴(`_send_message_turn`) 전용
+
+의도/배경:
+- 매 턴 캐릭터 시스템 프롬프트를 처음부터 다시 만든다: 모드 지침 블록, 토큰 렌더링(_render_prompt_tokens),
+  오프닝 start_set 탐색, 설정메모 정규화, 예시 대화 렌더링. 이 부분은 턴 사이에 바뀌지 않는다.
+- 컴파일 결과(렌더링된 정적 블록 + 조회용 인덱스 + 트리거 매처)를 프로세스 LRU에 둔다.
+  턴마다는 캐시 조회 후 동적 꼬리(페르소나/기억노트/설정메모 적용분/스탯/턴 사건)만 만든다.
+
+키:
+- (character_id, 버전, opening_id, 토큰 치환 사용자명)
+- 버전: 방 캐릭터 스냅샷이 있으면 스냅샷 captured_at(불변), 없으면 character.updated_at(+예시 대화 수).
+  캐릭터가 수정되면 버전이 바뀌므로 별도 무효화가 필요 없다(이전 항목은 LRU/TTL로 밀려난다).
+
+주의:
+- 캐시된 객체는 여러 요청이 공유한다. 인덱스(dict/list)를 수정하지 말 것.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.trigger_matcher import TriggerMatcher
+
+
+@dataclass
+class CompiledCharacterPrompt:
+    """캐릭터 프롬프트 정적 구간 + 턴 처리용 인덱스."""
+
+    # 기본 정보/세계관/출력 규칙/모드 지침/오프닝 말투 고정
+    head: str = ""
+    # 호감도/도입부/예시 대화
+    lore: str = ""
+    # 공통 대화 지침(+커스텀 모드 강제 블록)
+    closing: str = ""
+    opening_id: str = ""
+    # 오프닝에 해당하는 start_set(없으면 None)
+    start_set: Optional[Dict[str, Any]] = None
+    # about_turn → 사건(같은 턴에 여러 개면 첫 번째)
+    turn_events: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    # 정규화된 설정메모: {id, detail, triggers, targets, triggers_lc, targets_lc}
+    memos: List[Dict[str, Any]] = field(default_factory=list)
+    memo_by_id: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # 설정메모 트리거 Aho–Corasick 매처(memo id 반환)
+    memo_matcher: Optional[TriggerMatcher] = None
+
+
+_local: "OrderedDict[Tuple[str, ...], Tuple[float, CompiledCharacterPrompt]]" = OrderedDict()
+
+
+def prompt_cache_key(character_id: Any, version: Any, opening_id: str, user_name: str) -> Tuple[str, ...]:
+    return (str(character_id), str(version), str(opening_id or ""), str(user_name or ""))
+
+
+def get_compiled_prompt(key: Tuple[str, ...]) -> Optional[CompiledCharacterPrompt]:
+    hit = _local.get(key)
+    if hit is None:
+        return None
+    if hit[0] <= time.monotonic():
+        _local.pop(key, None)
+        return None
+    _local.move_to_end(key)
+    return hit[1]
+
+
+def put_compiled_prompt(key: Tuple[str, ...], compiled: CompiledCharacterPrompt) -> None:
+    ttl = int(getattr(settings, "CHARACTER_PROMPT_CACHE_TTL_SEC", 600) or 0)
+    if ttl <= 0:
+        return
+    _local[key] = (time.monotonic() + ttl, compiled)
+    _local.move_to_end(key)
+    max_items = int(getattr(settings, "CHARACTER_PROMPT_CACHE_MAX", 1024) or 0)
+    while len(_local) > max(0, max_items):
+        _local.popitem(last=False)
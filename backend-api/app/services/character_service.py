@@ -12,13 +12,15 @@ import json
 from app.models.character import Character, CharacterSetting, CharacterExampleDialogue
 from app.models.chat import ChatRoom, ChatMessage, ChatMessageEdit
 from app.models.tag import Tag, CharacterTag
-from app.models.user import User
 from app.models.like import CharacterLike
 from app.models.comment import CharacterComment
 from app.models.memory_note import MemoryNote
 from app.models.bookmark import CharacterBookmark
 from app.models.story import Story
 from app.models.story_extracted_character import StoryExtractedCharacter
+from app.services.character_list_cache import normalize_list_sort, invalidate_public_character_list_cache
+from app.services.search_service import character_search_filter, uses_relevance_order
+from app.services.counter_buffer import CHARACTER_CHAT, add_character_chats, discard_pending
 from app.schemas import (
     CharacterCreate, 
     CharacterUpdate, 
@@ -173,6 +175,7 @@ async def create_advanced_character(
     db.add(advanced_setting)
     
     await db.commit()
+    await invalidate_public_character_list_cache()
     
     # 완전한 캐릭터 정보 반환
     return await get_advanced_character_by_id(db, character.id)
@@ -264,6 +267,7 @@ async def update_advanced_character(
             delete(CharacterExampleDialogue)
             .where(CharacterExampleDialogue.character_id == character_id)
         )
+        await _touch_character(db, character_id)
         
         # 새로운 예시 대화 추가
         for dialogue in character_data.example_dialogues.dialogues:
@@ -276,10 +280,22 @@ async def update_advanced_character(
             db.add(example_dialogue)
     
     await db.commit()
+    await invalidate_public_character_list_cache()
     
     return await get_advanced_character_by_id(db, character_id)
 
 
+async def _touch_character(db: AsyncSession, character_id: uuid.UUID) -> None:
+    """캐릭터 버전(updated_at)을 올린다.
+    - 예시 대화처럼 characters 행 밖의 데이터만 바뀌어도 컴파일 프롬프트 캐시(버전=updated_at)가 무효화되게 한다.
+    """
+    await db.execute(
+        update(Character)
+        .where(Character.id == character_id)
+        .values(updated_at=func.now())
+    )
+
+
 async def get_advanced_character_by_id(db: AsyncSession, character_id: uuid.UUID) -> Optional[Character]:
     """고급 캐릭터 상세 정보 조회 (예시 대화 포함)"""
     result = await db.execute(
@@ -357,6 +373,7 @@ async def add_character_example_dialogue(
         order_index=order_index
     )
     db.add(dialogue)
+    await _touch_character(db, character_id)
     await db.commit()
     await db.refresh(dialogue)
     return dialogue
@@ -367,10 +384,15 @@ async def delete_character_example_dialogue(
     dialogue_id: uuid.UUID
 ) -> bool:
     """캐릭터 예시 대화 삭제"""
+    character_id = await db.scalar(
+        select(CharacterExampleDialogue.character_id).where(CharacterExampleDialogue.id == dialogue_id)
+    )
     result = await db.execute(
         delete(CharacterExampleDialogue)
         .where(CharacterExampleDialogue.id == dialogue_id)
     )
+    if character_id:
+        await _touch_character(db, character_id)
     await db.commit()
     return result.rowcount > 0
 
@@ -408,6 +430,7 @@ async def create_character(
     character_id = character.id
 
     await db.commit()
+    await invalidate_public_character_list_cache()
     
     # 커밋 후에는 인스턴스가 만료되므로, 관계가 로드된 새 인스턴스를 다시 가져옵니다.
     created_character = await get_character_by_id(db=db, character_id=character_id)
@@ -451,27 +474,9 @@ async def get_characters_by_creator(
     if not include_private:
         query = query.where(Character.is_public == True)
     
-    if search:
-        raw = search.strip()
-        if raw:
-            tag_search = raw.lstrip("#").strip() or raw
-            creator_search = raw.lstrip("@").strip() or raw
-            name_like = f"%{raw}%"
-            creator_like = f"%{creator_search}%"
-            tag_like = f"%{tag_search}%"
-            query = query.where(
-                or_(
-                    Character.name.ilike(name_like),
-                    Character.description.ilike(name_like),
-                    Character.creator.has(User.username.ilike(creator_like)),
-                    Character.tags.any(
-                        or_(
-                            Tag.slug.ilike(tag_like),
-                            Tag.name.ilike(tag_like)
-                        )
-                    )
-                )
-            )
+    search_clause, _ = await character_search_filter(db, search)
+    if search_clause is not None:
+        query = query.where(search_clause)
 
     # 원작챗/일반 필터
     if only:
@@ -501,8 +506,14 @@ async def get_public_characters(
     tags: Optional[list[str]] = None,
     gender: Optional[str] = None,
     only: Optional[str] = None,
+    cursor: Optional[Dict[str, Any]] = None,
 ) -> List[Character]:
-    """공개 캐릭터 목록 조회"""
+    """
+    공개 캐릭터 목록 조회
+
+    - cursor(character_list_cache.decode_list_cursor 결과)가 있으면 skip 대신 키셋으로 다음 페이지를 읽는다.
+    - 검색어가 있고 sort가 없으면 관련도순(search_service)으로 정렬하고 skip 페이지네이션을 쓴다.
+    """
     query = (
         select(Character)
         .options(
@@ -519,27 +530,9 @@ async def get_public_characters(
         .where(or_(Character.origin_story_id.is_(None), Story.is_public == True))
     )
     
-    if search:
-        raw = search.strip()
-        if raw:
-            tag_search = raw.lstrip("#").strip() or raw
-            creator_search = raw.lstrip("@").strip() or raw
-            name_like = f"%{raw}%"
-            creator_like = f"%{creator_search}%"
-            tag_like = f"%{tag_search}%"
-            query = query.where(
-                or_(
-                    Character.name.ilike(name_like),
-                    Character.description.ilike(name_like),
-                    Character.creator.has(User.username.ilike(creator_like)),
-                    Character.tags.any(
-                        or_(
-                            Tag.slug.ilike(tag_like),
-                            Tag.name.ilike(tag_like)
-                        )
-                    )
-                )
-            )
+    search_clause, search_rank = await character_search_filter(db, search)
+    if search_clause is not None:
+        query = query.where(search_clause)
 
     # 출처 유형 필터 (예: ORIGINAL, IMPORTED)
     if source_type:
@@ -640,26 +633,41 @@ async def get_public_characters(
             query = query.where(Character.tags.any(Tag.slug == s))
 
     # 정렬 옵션
-    order_sort = (sort or "").lower() if sort else None
-    if order_sort in ["views", "view", "조회수", "chats", "chat_count"]:
+    # - 키셋 페이지네이션을 위해 마지막에 id를 붙여 정렬을 결정적으로 만든다.
+    order_sort = normalize_list_sort(sort)
+    if order_sort == "views":
         # 조회수 개념: 채팅 수 기준 내림차순, 동률 시 좋아요/최신순 보조 정렬
-        query = query.order_by(
-            Character.chat_count.desc(),
-            Character.like_count.desc(),
-            Character.created_at.desc(),
-        )
-    elif order_sort in ["likes", "like", "좋아요"]:
-        query = query.order_by(
-            Character.like_count.desc(),
-            Character.created_at.desc(),
-        )
-    elif order_sort in ["recent", "latest", "최신", "created_at"]:
-        query = query.order_by(Character.created_at.desc())
+        sort_cols = [
+            (Character.chat_count, "chat_count"),
+            (Character.like_count, "like_count"),
+            (Character.created_at, "created_at"),
+            (Character.id, "id"),
+        ]
+    elif order_sort == "recent":
+        sort_cols = [(Character.created_at, "created_at"), (Character.id, "id")]
     else:
-        # 기본 정렬: 좋아요 내림차순, 최신순
-        query = query.order_by(Character.like_count.desc(), Character.created_at.desc())
-
-    query = query.offset(skip).limit(limit)
+        # 기본 정렬(likes): 좋아요 내림차순, 최신순
+        sort_cols = [
+            (Character.like_count, "like_count"),
+            (Character.created_at, "created_at"),
+            (Character.id, "id"),
+        ]
+    if search_rank is not None and uses_relevance_order(search, sort):
+        # 검색 + sort=relevance: 관련도순(동률은 기본 정렬). 관련도 정렬은 키셋 커서를 쓰지 않는다.
+        query = query.order_by(search_rank.desc(), *[col.desc() for col, _ in sort_cols])
+        cursor = None
+    else:
+        query = query.order_by(*[col.desc() for col, _ in sort_cols])
+
+    if cursor:
+        # (a, b, c) < (a0, b0, c0) 를 DESC 기준으로 풀어쓴다(복합 인덱스/DB 무관하게 동작).
+        ors = []
+        for i, (col, name) in enumerate(sort_cols):
+            eqs = [prev_col == cursor[prev_name] for prev_col, prev_name in sort_cols[:i]]
+            ors.append(and_(*eqs, col < cursor[name]))
+        query = query.where(or_(*ors)).limit(limit)
+    else:
+        query = query.offset(skip).limit(limit)
     
     result = await db.execute(query)
     return result.scalars().all()
@@ -684,6 +692,7 @@ async def update_character(
             .values(**update_data)
         )
         await db.commit()
+        await invalidate_public_character_list_cache()
     
     return await get_character_by_id(db, character_id)
 
@@ -700,6 +709,7 @@ async def update_character_public_status(
         .values(is_public=is_public)
     )
     await db.commit()
+    await invalidate_public_character_list_cache()
     return await get_character_by_id(db, character_id)
 
 
@@ -774,6 +784,7 @@ async def delete_character(db: AsyncSession, character_id: uuid.UUID) -> bool:
         delete(Character).where(Character.id == character_id)
     )
     await db.commit()
+    await invalidate_public_character_list_cache()
     return (getattr(result, "rowcount", 0) or 0) > 0
 
 
@@ -881,14 +892,9 @@ async def is_character_liked_by_user(db: AsyncSession, character_id: uuid.UUID,
 
 
 async def increment_character_chat_count(db: AsyncSession, character_id: uuid.UUID) -> bool:
-    """캐릭터 채팅 수 증가"""
-    result = await db.execute(
-        update(Character)
-        .where(Character.id == character_id)
-        .values(chat_count=Character.chat_count + 1)
-    )
-    await db.commit()
-    return result.rowcount > 0
+    """캐릭터 채팅 수 증가(카운터 버퍼에 누적, DB 반영은 counter_buffer flusher)"""
+    await add_character_chats(character_id, 1)
+    return True
 
 async def get_real_message_count(db: AsyncSession, character_id: uuid.UUID) -> int:
     """해당 캐릭터와 연결된 모든 메시지 수 실시간 계산"""
@@ -901,6 +907,8 @@ async def get_real_message_count(db: AsyncSession, character_id: uuid.UUID) -> i
 
 async def sync_character_chat_count(db: AsyncSession, character_id: uuid.UUID) -> bool:
     """캐릭터 대화수를 실제 메시지 수와 동기화"""
+    # 실제 값으로 덮어쓰므로 버퍼에 쌓인 미반영 증가분은 버린다(이중 집계 방지).
+    await discard_pending(CHARACTER_CHAT, character_id)
     real_count = await get_real_message_count(db, character_id)
     result = await db.execute(
         update(Character)
@@ -922,6 +930,8 @@ async def get_real_message_count(db: AsyncSession, character_id: uuid.UUID) -> i
 
 async def sync_character_chat_count(db: AsyncSession, character_id: uuid.UUID) -> bool:
     """캐릭터 대화수를 실제 메시지 수와 동기화"""
+    # 실제 값으로 덮어쓰므로 버퍼에 쌓인 미반영 증가분은 버린다(이중 집계 방지).
+    await discard_pending(CHARACTER_CHAT, character_id)
     real_count = await get_real_message_count(db, character_id)
     result = await db.execute(
         update(Character)
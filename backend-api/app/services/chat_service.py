@@ -3,9 +3,10 @@
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, update, delete, func, and_, or_
 from sqlalchemy.orm import selectinload, joinedload
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from datetime import datetime
 import uuid
 try:
     from app.core.logger import logger
@@ -17,6 +18,7 @@ from app.models.chat import ChatRoom, ChatMessage, ChatMessageEdit
 from app.models.user import User
 from app.models.character import Character
 from app.schemas.chat import ChatMessageResponse
+from app.services import room_index
 
 async def get_or_create_chat_room(
     db: AsyncSession, user_id: uuid.UUID, character_id: uuid.UUID
@@ -44,6 +46,7 @@ async def get_or_create_chat_room(
         db.add(chat_room)
         await db.commit()
         await db.refresh(chat_room)
+        await room_index.record_room_created(user_id, chat_room.id, character_id, chat_room.created_at)
     
     # character 관계를 별도로 로드
     if not hasattr(chat_room, 'character') or chat_room.character is None:
@@ -88,6 +91,7 @@ async def create_chat_room(
     db.add(chat_room)
     await db.commit()
     await db.refresh(chat_room)
+    await room_index.record_room_created(user_id, chat_room.id, character_id, chat_room.created_at)
     # ✅ commit 이후 expire 방지: 응답 직렬화 단계에서 lazy load가 발생하지 않도록 캐릭터를 refresh
     try:
         await db.refresh(character)
@@ -141,6 +145,8 @@ async def save_message(
     auto_commit:
     - True(기본): 기존 동작 유지(함수 내부 commit/refresh)
     - False: 호출자가 트랜잭션 경계를 관리(함수 내부 flush만 수행)
+      이 경우 방 인덱스 갱신도 하지 않으므로, 호출자가 커밋 후 record_saved_messages를 호출한다
+      (롤백될 수 있는 메시지가 목록 순서/마지막 메시지에 먼저 반영되지 않게).
     """
     chat_message = ChatMessage(
         chat_room_id=chat_room_id,
@@ -159,7 +165,18 @@ async def save_message(
     else:
         await db.flush()
     await db.refresh(chat_message)
+    if auto_commit:
+        # 유저별 방 인덱스(최근 활동 순서/마지막 메시지) 갱신 — 실패해도 저장은 그대로
+        await room_index.record_message(db, chat_room_id, sender_type, content, chat_message.created_at)
     return chat_message
+
+
+async def record_saved_messages(db: AsyncSession, messages: List[Optional[ChatMessage]]) -> None:
+    """save_message(auto_commit=False)로 저장한 메시지를 커밋 후 방 인덱스에 반영한다(저장 순서대로)."""
+    for m in messages:
+        if m is None:
+            continue
+        await room_index.record_message(db, m.chat_room_id, m.sender_type, m.content, m.created_at)
 
 async def get_messages_by_room_id(
     db: AsyncSession, chat_room_id: uuid.UUID, skip: int = 0, limit: int = 100
@@ -168,22 +185,136 @@ async def get_messages_by_room_id(
     result = await db.execute(
         select(ChatMessage)
         .where(ChatMessage.chat_room_id == chat_room_id)
-        .order_by(ChatMessage.created_at.asc())
+        .order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
         .offset(skip)
         .limit(limit)
     )
     return result.scalars().all()
 
+async def get_recent_messages_by_room_id(
+    db: AsyncSession,
+    chat_room_id: uuid.UUID,
+    limit: int = 50,
+    *,
+    before_id: Optional[uuid.UUID] = None,
+    skip_from_latest: int = 0,
+    sender_types: Optional[List[str]] = None,
+) -> List[ChatMessage]:
+    """
+    채팅방의 "마지막 N개" 메시지를 시간순(ASC)으로 반환한다.
+
+    의도/배경:
+    - 기존에는 COUNT(*) 후 offset(count - N)으로 "마지막 N개"를 잘라왔는데,
+      방이 길어질수록 COUNT + OFFSET 스캔 비용이 선형으로 증가한다.
+    - (chat_room_id, created_at, id) 복합 인덱스를 역순으로 타고 limit만큼만 읽으므로
+      방 길이와 무관하게 일정한 비용으로 최근 히스토리를 가져온다.
+
+    before_id:
+    - 지정 시 해당 메시지보다 "이전" 메시지만 반환한다(키셋 커서, 무한 스크롤용).
+    - 커서 메시지가 없거나 다른 방의 메시지면 빈 목록을 반환한다.
+    skip_from_latest:
+    - 레거시 tail 페이지네이션 호환(최신에서의 오프셋). 페이지가 얕을 때만 사용한다.
+    sender_types:
+    - 지정 시 해당 발신자 타입의 메시지만 대상으로 한다(예: 마지막 AI 메시지 1개).
+    """
+    try:
+        limit = int(limit or 0)
+    except Exception:
+        limit = 0
+    if limit <= 0:
+        return []
+
+    stmt = select(ChatMessage).where(ChatMessage.chat_room_id == chat_room_id)
+    if sender_types:
+        stmt = stmt.where(ChatMessage.sender_type.in_(list(sender_types)))
+    if before_id is not None:
+        cursor_row = (await db.execute(
+            select(ChatMessage.created_at, ChatMessage.id).where(
+                ChatMessage.id == before_id,
+                ChatMessage.chat_room_id == chat_room_id,
+            )
+        )).first()
+        if not cursor_row:
+            return []
+        cursor_created_at, cursor_id = cursor_row
+        stmt = stmt.where(
+            or_(
+                ChatMessage.created_at < cursor_created_at,
+                and_(ChatMessage.created_at == cursor_created_at, ChatMessage.id < cursor_id),
+            )
+        )
+    stmt = stmt.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+    if skip_from_latest and int(skip_from_latest) > 0:
+        stmt = stmt.offset(int(skip_from_latest))
+    result = await db.execute(stmt.limit(limit))
+    rows = list(result.scalars().all())
+    rows.reverse()
+    return rows
+
+
+async def get_overflow_messages_after(
+    db: AsyncSession,
+    chat_room_id: uuid.UUID,
+    *,
+    keep_latest: int,
+    after: Optional[Tuple[datetime, uuid.UUID]] = None,
+    limit: int = 200,
+) -> List[ChatMessage]:
+    """
+    최근 keep_latest개 바깥(overflow)으로 밀려난 메시지 중 커서(after) 이후의 것을 시간순(ASC)으로 반환한다.
+
+    - 요약 워커용. 경계(최신순 keep_latest번째 다음 메시지)는 역순 인덱스로 OFFSET keep_latest만 읽고,
+      이후 구간은 (created_at, id) 키셋으로 읽는다 → COUNT(*)/긴 OFFSET 없이 방 길이와 무관한 비용.
+    - after: 마지막으로 요약에 반영한 메시지의 (created_at, id). None이면 처음부터.
+    """
+    try:
+        keep_latest = max(0, int(keep_latest or 0))
+        limit = int(limit or 0)
+    except Exception:
+        return []
+    if limit <= 0:
+        return []
+
+    boundary = (await db.execute(
+        select(ChatMessage.created_at, ChatMessage.id)
+        .where(ChatMessage.chat_room_id == chat_room_id)
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        .offset(keep_latest)
+        .limit(1)
+    )).first()
+    if not boundary:
+        return []
+    boundary_at, boundary_id = boundary
+
+    stmt = select(ChatMessage).where(
+        ChatMessage.chat_room_id == chat_room_id,
+        or_(
+            ChatMessage.created_at < boundary_at,
+            and_(ChatMessage.created_at == boundary_at, ChatMessage.id <= boundary_id),
+        ),
+    )
+    if after is not None:
+        after_at, after_id = after
+        stmt = stmt.where(
+            or_(
+                ChatMessage.created_at > after_at,
+                and_(ChatMessage.created_at == after_at, ChatMessage.id > after_id),
+            )
+        )
+    stmt = stmt.order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).limit(limit)
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+
 async def get_message_count_by_room_id(
     db: AsyncSession, chat_room_id: uuid.UUID
 ) -> int:
     """
     채팅방의 총 메시지 개수를 조회한다.
 
-    의도/배경(최소 수정·최대 안전):
-    - 일반 캐릭터챗에서 "최근 N개 히스토리"를 모델 프롬프트로 전달하려면,
-      order_by(created_at.asc()) + offset/limit 조합으로 "마지막 N개"를 가져와야 한다.
-    - 따라서 먼저 전체 개수를 조회하고(skip = max(0, count - N)) 방식으로 슬라이싱한다.
+    주의:
+    - "최근 N개 히스토리"가 필요하면 COUNT + offset 대신
+      get_recent_messages_by_room_id(키셋/역순 인덱스)를 사용한다.
     """
     result = await db.execute(
         select(func.count(ChatMessage.id)).where(ChatMessage.chat_room_id == chat_room_id)
@@ -211,7 +342,20 @@ async def update_message_content(db: AsyncSession, message_id: uuid.UUID, conten
     await db.execute(update(ChatMessage).where(ChatMessage.id == message_id).values(content=content))
     await db.commit()
     res = await db.execute(select(ChatMessage).where(ChatMessage.id == message_id))
-    return res.scalar_one()
+    updated = res.scalar_one()
+    # 방의 최신 메시지를 고쳤다면 방 인덱스의 마지막 메시지 요약도 갱신한다(원래 created_at 유지 → 순서는 그대로)
+    try:
+        latest_id = (await db.execute(
+            select(ChatMessage.id)
+            .where(ChatMessage.chat_room_id == updated.chat_room_id)
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(1)
+        )).scalar_one_or_none()
+        if latest_id == updated.id:
+            await room_index.record_message(db, updated.chat_room_id, updated.sender_type, updated.content, updated.created_at)
+    except Exception:
+        pass
+    return updated
 
 
 async def apply_feedback(db: AsyncSession, message_id: uuid.UUID, upvote: bool) -> ChatMessage:
@@ -272,10 +416,20 @@ async def delete_all_messages_in_room(
     db: AsyncSession, room_id: uuid.UUID
 ) -> None:
     """채팅방의 모든 메시지 삭제"""
+    owner, character_id, room_created_at = (await db.execute(
+        select(ChatRoom.user_id, ChatRoom.character_id, ChatRoom.created_at).where(ChatRoom.id == room_id)
+    )).first() or (None, None, None)
     await db.execute(
         delete(ChatMessage).where(ChatMessage.chat_room_id == room_id)
     )
     await db.commit()
+    # 방 인덱스 초기화: 지운 메시지 요약/engaged 표시를 없애고 메시지 없는 새 방처럼 다시 올린다
+    if owner is not None:
+        await room_index.drop_rooms(owner, [room_id])
+        await room_index.record_room_created(owner, room_id, character_id, room_created_at)
+    # 줄어든 대화수는 카운터 버퍼의 재동기화 주기에 반영된다
+    from app.services.counter_buffer import mark_character_chat_stale
+    await mark_character_chat_stale(character_id)
 
 
 # (핀 고정 기능 제거됨 - 로컬 저장소 기반 UI 고정 사용)
@@ -284,6 +438,9 @@ async def delete_chat_room(
     db: AsyncSession, room_id: uuid.UUID
 ) -> None:
     """채팅방 삭제 (연관된 메시지도 함께 삭제)"""
+    owner, character_id = (await db.execute(
+        select(ChatRoom.user_id, ChatRoom.character_id).where(ChatRoom.id == room_id)
+    )).first() or (None, None)
     # 먼저 메시지 삭제
     await db.execute(
         delete(ChatMessage).where(ChatMessage.chat_room_id == room_id)
@@ -293,3 +450,7 @@ async def delete_chat_room(
         delete(ChatRoom).where(ChatRoom.id == room_id)
     )
     await db.commit() 
+    if owner is not None:
+        await room_index.drop_rooms(owner, [room_id])
+    from app.services.counter_buffer import mark_character_chat_stale
+    await mark_character_chat_stale(character_id)
@@ -0,0 +1,336 @@
+"""
+조회수/대화수 카운터 버퍼 (Redis 해시 누적 → 주기적 배치 UPDATE)
+
+의도/배경:
+- 회차 열람(get_chapter), 작품 상세 진입(increment_story_view_count), 채팅 턴(sync_character_chat_count)마다
+  요청 세션으로 `UPDATE ... SET x = x + 1` + COMMIT을 하고 있었다.
+  인기 행은 행 잠금 경합 지점이 되고, 조회 1회가 작은 커넥션 풀(3+2)의 커넥션 1개를 잡는다.
+- 요청 경로는 Redis HINCRBY 1회만 하고(DB 없음), flusher가 주기(COUNTER_FLUSH_INTERVAL_MS)마다
+  테이블별로 executemany UPDATE 1회 + COMMIT 1회로 반영한다.
+
+구조:
+- 미반영 해시 `counters:pending:{name}` (field=entity id, value=delta)
+- flush: take 스크립트가 pending을 `counters:flushing:{name}`으로 RENAME(원자적) → DB 반영 → flushing DEL.
+  반영 중 들어온 증가분은 새 pending에 쌓인다.
+- flusher는 프로세스마다 돌지만 락(`counters:flush_lock`)을 잡은 하나만 실제로 반영한다.
+- 읽기 경로(get_story_total_views, storydive 슬롯 등)는 pending + flushing을 더해 DB 값과 합친다(pending_counts).
+
+대화수 재동기화(self-heal):
+- 증가분만 더하면 메시지 삭제(방 삭제/대화 초기화 등)가 chat_count에 반영되지 않는다.
+- 대화수가 바뀐 캐릭터(add_character_chats)와 메시지가 삭제된 캐릭터(mark_character_chat_stale)를
+  `counters:resync:character_chat` 집합에 모아 두고, flush 락을 잡은 프로세스가
+  COUNTER_CHAT_RESYNC_INTERVAL_SEC마다 실제 메시지 수(− 아직 미반영 증가분)로 덮어쓴다.
+  (매 턴 COUNT를 하던 기존 sync_character_chat_count 대신, 캐릭터당 주기 1회의 COUNT로 수렴시킨다)
+
+주의:
+- DB 커밋 후 flushing DEL 전에 프로세스가 죽으면 그 배치는 다음 flush에서 한 번 더 반영된다(최대 1주기분 과다 집계).
+  조회수/대화수는 베스트-에포트 지표라 이 쪽(유실보다 중복)을 택한다.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, redis_client
+from app.core.db_pool_stats import pool_route
+from app.core.redis_scripts import register_script
+
+logger = logging.getLogger(__name__)
+
+STORY_VIEW = "story_view"
+CHAPTER_VIEW = "chapter_view"
+# 회차 조회수의 작품별 합(읽기 경로용 파생 해시, DB에는 반영하지 않는다)
+CHAPTER_VIEW_BY_STORY = "chapter_view_by_story"
+CHARACTER_CHAT = "character_chat"
+
+# DB에 반영하는 카운터(반영 순서)
+_TARGETS: Tuple[str, ...] = (STORY_VIEW, CHAPTER_VIEW, CHARACTER_CHAT)
+# 함께 take/DEL 하는 파생 해시
+_AUX: Dict[str, List[str]] = {CHAPTER_VIEW: [CHAPTER_VIEW_BY_STORY]}
+
+_LOCK_KEY = "counters:flush_lock"
+_RESYNC_KEY = "counters:resync:character_chat"
+_RESYNC_DUE_KEY = "counters:resync_due"
+_RESYNC_BATCH = 200
+_OWNER = f"{socket.gethostname()}-{os.getpid()}"
+
+_flusher: Optional[asyncio.Task] = None
+
+
+def _pending_key(name: str) -> str:
+    return f"counters:pending:{name}"
+
+
+def _flushing_key(name: str) -> str:
+    return f"counters:flushing:{name}"
+
+
+# KEYS: (pending, flushing) * n — 첫 쌍이 반영 대상, 나머지는 파생 해시
+# 이전 배치(flushing)가 남아 있으면 그것을 다시 돌려준다(커밋 실패 재시도). 없으면 pending을 모두 RENAME.
+_TAKE = register_script("counters:take", """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    for i = 1, #KEYS, 2 do
+        if redis.call('EXISTS', KEYS[i]) == 1 then
+            redis.call('RENAME', KEYS[i], KEYS[i + 1])
+        end
+    end
+end
+return redis.call('HGETALL', KEYS[2])
+""")
+
+# KEYS: 락 / ARGV: owner
+_RELEASE = register_script("counters:release", """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+async def add_story_view(story_id: Any) -> None:
+    """작품 상세 진입 1회."""
+    try:
+        await redis_client.hincrby(_pending_key(STORY_VIEW), str(story_id), 1)
+    except Exception as e:
+        logger.warning(f"[counter_buffer] story view incr failed story={story_id}: {e}")
+
+
+async def add_chapter_view(story_id: Any, chapter_id: Any) -> None:
+    """회차 열람 1회(회차 + 작품별 회차 합 파생 해시)."""
+    try:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hincrby(_pending_key(CHAPTER_VIEW), str(chapter_id), 1)
+        pipe.hincrby(_pending_key(CHAPTER_VIEW_BY_STORY), str(story_id), 1)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"[counter_buffer] chapter view incr failed chapter={chapter_id}: {e}")
+
+
+async def add_character_chats(character_id: Any, count: int = 1) -> None:
+    """캐릭터 대화수(=메시지 수) 증가."""
+    if int(count or 0) <= 0:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hincrby(_pending_key(CHARACTER_CHAT), str(character_id), int(count))
+        pipe.sadd(_RESYNC_KEY, str(character_id))
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"[counter_buffer] chat count incr failed character={character_id}: {e}")
+
+
+async def mark_character_chat_stale(character_id: Any) -> None:
+    """메시지가 삭제되어 대화수가 줄어야 하는 캐릭터를 재동기화 대상에 올린다."""
+    if not character_id:
+        return
+    try:
+        await redis_client.sadd(_RESYNC_KEY, str(character_id))
+    except Exception as e:
+        logger.debug(f"[counter_buffer] resync mark failed character={character_id}: {e}")
+
+
+async def pending_counts(name: str, ids: Iterable[Any]) -> Dict[str, int]:
+    """아직 DB에 반영되지 않은 증가분(pending + flushing). 실패 시 빈 dict."""
+    keys = [str(i) for i in ids if i]
+    if not keys:
+        return {}
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hmget(_pending_key(name), keys)
+        pipe.hmget(_flushing_key(name), keys)
+        pending, flushing = await pipe.execute()
+    except Exception as e:
+        logger.debug(f"[counter_buffer] pending read failed ({name}): {e}")
+        return {}
+    out: Dict[str, int] = {}
+    for k, a, b in zip(keys, pending or [], flushing or []):
+        try:
+            n = int(a or 0) + int(b or 0)
+        except Exception:
+            n = 0
+        if n:
+            out[k] = n
+    return out
+
+
+async def discard_pending(name: str, entity_id: Any) -> None:
+    """
+    미반영 증가분을 버린다: 카운터를 실제 값으로 재계산해 덮어쓰기 직전에 호출(sync_character_chat_count).
+    (flushing은 이미 반영 중인 배치라 건드리지 않는다)
+    """
+    try:
+        await redis_client.hdel(_pending_key(name), str(entity_id))
+    except Exception:
+        pass
+
+
+def _target_column(name: str):
+    """카운터 → (테이블, 컬럼명)."""
+    from app.models.character import Character
+    from app.models.story import Story
+    from app.models.story_chapter import StoryChapter
+
+    return {
+        STORY_VIEW: (Story.__table__, "view_count"),
+        CHAPTER_VIEW: (StoryChapter.__table__, "view_count"),
+        CHARACTER_CHAT: (Character.__table__, "chat_count"),
+    }[name]
+
+
+async def _apply(name: str, deltas: List[Tuple[Any, int]]) -> None:
+    """name 카운터 증가분을 executemany UPDATE 1회로 반영한다(id 정렬: 잠금 순서 고정)."""
+    table, column = _target_column(name)
+    col = table.c[column]
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_id", type_=table.c.id.type))
+        .values({column: func.coalesce(col, 0) + bindparam("b_delta")})
+    )
+    params = [{"b_id": eid, "b_delta": d} for eid, d in sorted(deltas, key=lambda x: str(x[0]))]
+    async with AsyncSessionLocal() as db:
+        await db.execute(stmt, params)
+        await db.commit()
+
+
+async def _resync_character_chats() -> int:
+    """
+    재동기화 대상 캐릭터의 chat_count를 실제 메시지 수로 덮어쓴다(배치당 COUNT 1회 + executemany UPDATE 1회).
+    - 아직 반영되지 않은 증가분(pending/flushing)은 이후 flush가 더하므로 실제 수에서 빼고 쓴다.
+    """
+    from app.models.character import Character
+    from app.models.chat import ChatMessage, ChatRoom
+
+    raw = await redis_client.spop(_RESYNC_KEY, _RESYNC_BATCH)
+    ids: List[uuid.UUID] = []
+    for v in raw or []:
+        try:
+            ids.append(uuid.UUID(str(v)))
+        except Exception:
+            continue
+    if not ids:
+        return 0
+    try:
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(ChatRoom.character_id, func.count(ChatMessage.id))
+                .join(ChatMessage, ChatMessage.chat_room_id == ChatRoom.id)
+                .where(ChatRoom.character_id.in_(ids))
+                .group_by(ChatRoom.character_id)
+            )
+            real = {str(cid): int(n or 0) for cid, n in rows.all()}
+            # COUNT 이후에 읽어야 COUNT에 포함된 메시지의 증가분까지 빠진다
+            pending = await pending_counts(CHARACTER_CHAT, ids)
+            table = Character.__table__
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam("b_id", type_=table.c.id.type))
+                .values(chat_count=bindparam("b_count"))
+            )
+            params = [
+                {"b_id": cid, "b_count": max(0, real.get(str(cid), 0) - pending.get(str(cid), 0))}
+                for cid in sorted(ids, key=str)
+            ]
+            await db.execute(stmt, params)
+            await db.commit()
+    except Exception:
+        # 실패한 대상은 다음 주기에 다시 시도한다
+        try:
+            await redis_client.sadd(_RESYNC_KEY, *[str(i) for i in ids])
+        except Exception:
+            pass
+        raise
+    return len(ids)
+
+
+async def _flush_one(name: str) -> int:
+    keys: List[str] = [_pending_key(name), _flushing_key(name)]
+    for aux in _AUX.get(name, []):
+        keys.extend([_pending_key(aux), _flushing_key(aux)])
+    raw = await _TAKE(keys=keys)
+    raw = list(raw or [])
+    deltas: List[Tuple[Any, int]] = []
+    for i in range(0, len(raw) - 1, 2):
+        try:
+            d = int(raw[i + 1])
+            if d:
+                deltas.append((uuid.UUID(str(raw[i])), d))
+        except Exception:
+            continue
+    if deltas:
+        with pool_route("counter_buffer"):
+            await _apply(name, deltas)
+    await redis_client.delete(*keys[1::2])
+    return len(deltas)
+
+
+async def flush_counters() -> int:
+    """모든 카운터를 반영한다(락을 못 잡으면 다른 프로세스가 반영 중 → 건너뜀). 반영한 행 수를 반환한다."""
+    interval_ms = int(getattr(settings, "COUNTER_FLUSH_INTERVAL_MS", 5000) or 5000)
+    lease_ms = max(30000, interval_ms * 6)
+    if not await redis_client.set(_LOCK_KEY, _OWNER, px=lease_ms, nx=True):
+        return 0
+    rows = 0
+    try:
+        for name in _TARGETS:
+            try:
+                rows += await _flush_one(name)
+            except Exception as e:
+                # 실패한 배치는 flushing 키에 남아 다음 주기에 그대로 다시 반영된다.
+                logger.warning(f"[counter_buffer] flush failed ({name}): {e}")
+        resync_sec = int(getattr(settings, "COUNTER_CHAT_RESYNC_INTERVAL_SEC", 600) or 0)
+        if resync_sec > 0:
+            try:
+                if await redis_client.set(_RESYNC_DUE_KEY, _OWNER, ex=resync_sec, nx=True):
+                    with pool_route("counter_buffer"):
+                        # 한 주기에 최대 10배치까지(남은 대상은 다음 주기로)
+                        for _ in range(10):
+                            if await _resync_character_chats() < _RESYNC_BATCH:
+                                break
+            except Exception as e:
+                logger.warning(f"[counter_buffer] chat count resync failed: {e}")
+    finally:
+        try:
+            await _RELEASE(keys=[_LOCK_KEY], args=[_OWNER])
+        except Exception:
+            pass
+    return rows
+
+
+async def _flush_loop() -> None:
+    interval = max(0.5, float(getattr(settings, "COUNTER_FLUSH_INTERVAL_MS", 5000) or 5000) / 1000.0)
+    while True:
+        try:
+            await asyncio.sleep(interval)
+            await flush_counters()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[counter_buffer] flush loop error (continuing): {e}")
+
+
+async def start_counter_flusher() -> None:
+    """lifespan 시작 시 호출."""
+    global _flusher
+    if _flusher is not None and not _flusher.done():
+        return
+    _flusher = asyncio.get_running_loop().create_task(_flush_loop())
+
+
+async def stop_counter_flusher() -> None:
+    """lifespan 종료 시 호출: 루프를 멈추고 남은 증가분을 반영한다."""
+    global _flusher
+    task = _flusher
+    _flusher = None
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+    await flush_counters()
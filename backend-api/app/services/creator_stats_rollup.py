@@ -0,0 +1,322 @@
+"""
+크리에이터 통계 롤업 잡 (chat_messages → creator/character 시간·일 롤업)
+
+의도/배경:
+- 프로필 대시보드(get_stats_overview / get_stats_timeseries / get_stats_top_characters)가
+  조회마다 chat_messages → chat_rooms → characters 조인으로 최근 30일 원본 메시지를 훑고 있었다.
+  (가장 큰 테이블을 대시보드 로드마다 스캔)
+- 이 잡이 주기(CREATOR_STATS_ROLLUP_INTERVAL_SEC)마다 "워터마크 이후 새 메시지"만 읽어
+  creator_stats_rollups / character_stats_rollups(시간·일 버킷)에 더한다.
+  통계 API는 롤업 테이블만 읽으므로 응답 시간이 메시지 양과 무관해진다.
+
+동작:
+- 구간은 한 시간 버킷을 넘지 않게 자른다(버킷 계산이 DB 방언과 무관, chat_messages.created_at 인덱스 범위 조회).
+- 구간 1개 = 트랜잭션 1개: 롤업 행 갱신 + 워터마크 이동을 함께 커밋한다(실패 시 통째로 재시도, 중복 집계 없음).
+- 고유 대화 유저는 버킷마다 HLL 스케치로 저장하고 읽을 때 병합한다(hll_sketch.py, 오차 ≈2%).
+- 처음 실행(워터마크 없음)은 CREATOR_STATS_BACKFILL_DAYS 전부터 채운다. 1회 실행당 최대 구간 수를 제한해
+  백필이 여러 주기에 나눠 진행된다.
+- 프로세스마다 루프가 돌지만 락(`stats_rollup:lock`)을 잡은 하나만 실제로 반영한다.
+  락 임대는 구간마다 연장하고(연장 실패 = 락 상실 → 중단), 구간 트랜잭션은 워터마크 행을 잠근 채
+  워터마크가 구간 시작과 같은지 다시 확인한다(임대 만료 후 다른 프로세스가 이어받아도 중복 집계 없음).
+
+주의:
+- 현재 시각 - CREATOR_STATS_ROLLUP_LAG_SEC 까지만 반영한다(커밋이 늦게 보이는 메시지 대비).
+  그보다 오래 열린 트랜잭션으로 저장된 메시지는 롤업에서 빠질 수 있다(베스트-에포트 지표).
+- creator_id는 반영 시점의 캐릭터 소유자 기준이다.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, delete, func, case, and_
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, redis_client
+from app.core.db_pool_stats import pool_route
+from app.core.redis_scripts import register_script
+from app.models.character import Character
+from app.models.chat import ChatRoom, ChatMessage
+from app.models.creator_stats import (
+    GRAIN_DAY,
+    GRAIN_HOUR,
+    CharacterStatsRollup,
+    CreatorStatsRollup,
+    StatsRollupState,
+)
+from app.services.hll_sketch import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+_STATE_NAME = "creator_stats"
+_LOCK_KEY = "stats_rollup:lock"
+_OWNER = f"{socket.gethostname()}-{os.getpid()}"
+# 1회 실행당 처리하는 최대 구간(=시간) 수: 백필을 여러 주기로 나눈다.
+_MAX_WINDOWS_PER_RUN = 48
+# IN 목록 크기
+_CHUNK = 500
+_PRUNE_EVERY_SEC = 3600
+
+_worker: Optional[asyncio.Task] = None
+_last_prune = 0.0
+
+# KEYS: 락 / ARGV: owner
+_RELEASE = register_script("stats_rollup:release", """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+# KEYS: 락 / ARGV: owner, lease_ms
+_RENEW = register_script("stats_rollup:renew", """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""")
+
+
+def _naive(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=None) if getattr(dt, "tzinfo", None) is not None else dt
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class _Bucket:
+    __slots__ = ("creator_id", "messages", "hll")
+
+    def __init__(self, creator_id: Any = None):
+        self.creator_id = creator_id
+        self.messages = 0
+        self.hll = HyperLogLog()
+
+
+async def _read_window(db, start: datetime, end: datetime) -> Tuple[Dict[Any, _Bucket], Dict[Any, _Bucket]]:
+    """[start, end) 메시지를 (캐릭터, 대화 유저) 단위로 집계해 캐릭터/크리에이터 버킷으로 묶는다."""
+    res = await db.execute(
+        select(
+            Character.id,
+            Character.creator_id,
+            ChatRoom.user_id,
+            func.count(ChatMessage.id),
+            func.coalesce(func.sum(case((ChatMessage.sender_type == 'user', 1), else_=0)), 0),
+        )
+        .select_from(ChatMessage)
+        .join(ChatRoom, ChatMessage.chat_room_id == ChatRoom.id)
+        .join(Character, Character.id == ChatRoom.character_id)
+        .where(ChatMessage.created_at >= start, ChatMessage.created_at < end)
+        .group_by(Character.id, Character.creator_id, ChatRoom.user_id)
+    )
+    by_char: Dict[Any, _Bucket] = {}
+    by_creator: Dict[Any, _Bucket] = {}
+    for cid, creator_id, chatter_id, n_msgs, n_user_msgs in res.all():
+        if creator_id is None:
+            continue
+        cb = by_char.get(cid)
+        if cb is None:
+            cb = by_char[cid] = _Bucket(creator_id)
+        ub = by_creator.get(creator_id)
+        if ub is None:
+            ub = by_creator[creator_id] = _Bucket(creator_id)
+        n = int(n_msgs or 0)
+        cb.messages += n
+        ub.messages += n
+        # 기존 통계와 동일: 유저가 보낸 메시지가 있어야 "대화한 유저"로 센다.
+        if int(n_user_msgs or 0) > 0 and chatter_id is not None:
+            cb.hll.add(chatter_id)
+            ub.hll.add(chatter_id)
+    return by_char, by_creator
+
+
+async def _upsert(db, model, key_col, buckets: Dict[Any, _Bucket], grain: str, bucket_start: datetime) -> None:
+    """버킷 증분을 롤업 행에 더한다(없으면 생성). 단일 작성자(락 보유)라 읽고-쓰기로 충분하다."""
+    keys = list(buckets.keys())
+    for i in range(0, len(keys), _CHUNK):
+        chunk = keys[i:i + _CHUNK]
+        existing = (await db.execute(
+            select(model).where(
+                key_col.in_(chunk),
+                model.grain == grain,
+                model.bucket_start == bucket_start,
+            )
+        )).scalars().all()
+        found = {getattr(row, key_col.key): row for row in existing}
+        for k in chunk:
+            b = buckets[k]
+            row = found.get(k)
+            if row is None:
+                fields = {
+                    key_col.key: k,
+                    "grain": grain,
+                    "bucket_start": bucket_start,
+                    "messages": b.messages,
+                    "chatters_hll": b.hll.to_bytes(),
+                }
+                if model is CharacterStatsRollup:
+                    fields["creator_id"] = b.creator_id
+                db.add(model(**fields))
+                continue
+            row.messages = int(row.messages or 0) + b.messages
+            if not b.hll.is_empty():
+                merged = HyperLogLog.from_bytes(row.chatters_hll)
+                merged.merge(b.hll)
+                row.chatters_hll = merged.to_bytes()
+            if model is CharacterStatsRollup and b.creator_id is not None:
+                row.creator_id = b.creator_id
+
+
+async def _rollup_window(start: datetime, end: datetime) -> bool:
+    """
+    한 시간 버킷 안의 구간 [start, end)를 반영하고 워터마크를 end로 옮긴다(한 트랜잭션).
+    반환: 반영 여부(워터마크가 이미 start가 아니면 다른 작성자가 반영한 것 → False)
+    """
+    hour = floor_hour(start)
+    day = floor_day(start)
+    async with AsyncSessionLocal() as db:
+        # 워터마크 행을 잠그고 재확인(_upsert는 읽고-쓰기라 두 작성자가 겹치면 중복 집계된다)
+        state = (await db.execute(
+            select(StatsRollupState).where(StatsRollupState.name == _STATE_NAME).with_for_update()
+        )).scalar_one_or_none()
+        if state is not None and state.watermark is not None and _naive(state.watermark) != start:
+            await db.rollback()
+            return False
+        by_char, by_creator = await _read_window(db, start, end)
+        if by_char:
+            for grain, bucket_start in ((GRAIN_HOUR, hour), (GRAIN_DAY, day)):
+                await _upsert(db, CharacterStatsRollup, CharacterStatsRollup.character_id, by_char, grain, bucket_start)
+                await _upsert(db, CreatorStatsRollup, CreatorStatsRollup.creator_id, by_creator, grain, bucket_start)
+        if state is None:
+            db.add(StatsRollupState(name=_STATE_NAME, watermark=end))
+        else:
+            state.watermark = end
+        await db.commit()
+    return True
+
+
+async def _load_watermark() -> datetime:
+    async with AsyncSessionLocal() as db:
+        state = await db.get(StatsRollupState, _STATE_NAME)
+        if state is not None and state.watermark is not None:
+            return _naive(state.watermark)
+    days = max(1, int(getattr(settings, "CREATOR_STATS_BACKFILL_DAYS", 30) or 30))
+    return floor_day(datetime.utcnow() - timedelta(days=days))
+
+
+async def _prune() -> None:
+    """보관 기간이 지난 버킷을 지운다(시간 버킷은 짧게, 일 버킷은 길게)."""
+    now = datetime.utcnow()
+    hour_days = max(2, int(getattr(settings, "CREATOR_STATS_HOURLY_RETENTION_DAYS", 8) or 8))
+    day_days = max(31, int(getattr(settings, "CREATOR_STATS_DAILY_RETENTION_DAYS", 400) or 400))
+    async with AsyncSessionLocal() as db:
+        for model in (CreatorStatsRollup, CharacterStatsRollup):
+            await db.execute(delete(model).where(and_(
+                model.grain == GRAIN_HOUR, model.bucket_start < floor_hour(now - timedelta(days=hour_days))
+            )))
+            await db.execute(delete(model).where(and_(
+                model.grain == GRAIN_DAY, model.bucket_start < floor_day(now - timedelta(days=day_days))
+            )))
+        await db.commit()
+
+
+async def run_creator_stats_rollup() -> int:
+    """
+    워터마크부터 (현재 - LAG)까지 반영한다(락을 못 잡으면 다른 프로세스가 반영 중 → 건너뜀).
+    반환: 처리한 구간 수
+    """
+    global _last_prune
+    interval = int(getattr(settings, "CREATOR_STATS_ROLLUP_INTERVAL_SEC", 60) or 60)
+    lease_ms = max(120000, interval * 5 * 1000)
+    if not await redis_client.set(_LOCK_KEY, _OWNER, px=lease_ms, nx=True):
+        return 0
+    windows = 0
+    try:
+        with pool_route("creator_stats_rollup"):
+            lag = max(0, int(getattr(settings, "CREATOR_STATS_ROLLUP_LAG_SEC", 60) or 0))
+            cutoff = datetime.utcnow() - timedelta(seconds=lag)
+            wm = await _load_watermark()
+            while wm < cutoff and windows < _MAX_WINDOWS_PER_RUN:
+                # 긴 백필이 임대 시간을 넘지 않도록 구간마다 연장한다(이미 빼앗겼으면 중단).
+                if not int(await _RENEW(keys=[_LOCK_KEY], args=[_OWNER, lease_ms]) or 0):
+                    logger.warning("[creator_stats] rollup lock lost, stopping this run")
+                    break
+                end = min(floor_hour(wm) + timedelta(hours=1), cutoff)
+                if not await _rollup_window(wm, end):
+                    logger.warning(f"[creator_stats] watermark moved past {wm.isoformat()} by another writer, stopping this run")
+                    break
+                wm = end
+                windows += 1
+            if time.monotonic() - _last_prune >= _PRUNE_EVERY_SEC:
+                _last_prune = time.monotonic()
+                try:
+                    await _prune()
+                except Exception as e:
+                    logger.warning(f"[creator_stats] prune failed: {e}")
+    finally:
+        try:
+            await _RELEASE(keys=[_LOCK_KEY], args=[_OWNER])
+        except Exception:
+            pass
+    return windows
+
+
+async def _loop() -> None:
+    interval = max(5, int(getattr(settings, "CREATOR_STATS_ROLLUP_INTERVAL_SEC", 60) or 60))
+    while True:
+        try:
+            done = await run_creator_stats_rollup()
+            # 백필 중(한도까지 처리)이면 바로 이어서 진행한다.
+            if done < _MAX_WINDOWS_PER_RUN:
+                await asyncio.sleep(interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[creator_stats] rollup error (continuing): {e}")
+            await asyncio.sleep(interval)
+
+
+async def start_creator_stats_rollup() -> None:
+    """lifespan 시작 시 호출."""
+    global _worker
+    if _worker is not None and not _worker.done():
+        return
+    _worker = asyncio.get_running_loop().create_task(_loop())
+
+
+async def stop_creator_stats_rollup() -> None:
+    """lifespan 종료 시 호출(진행 중 구간은 커밋 전이면 롤백되고 다음 실행에서 다시 처리된다)."""
+    global _worker
+    task = _worker
+    _worker = None
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
+async def read_creator_buckets(
+    db, creator_id: Any, grain: str, since: datetime
+) -> List[Tuple[datetime, int, Optional[bytes]]]:
+    """통계 API용: 크리에이터 롤업 (bucket_start, messages, chatters_hll) 목록."""
+    res = await db.execute(
+        select(CreatorStatsRollup.bucket_start, CreatorStatsRollup.messages, CreatorStatsRollup.chatters_hll)
+        .where(
+            CreatorStatsRollup.creator_id == creator_id,
+            CreatorStatsRollup.grain == grain,
+            CreatorStatsRollup.bucket_start >= since,
+        )
+        .order_by(CreatorStatsRollup.bucket_start)
+    )
+    return [(t, int(n or 0), h) for t, n, h in res.all()]
@@ -15,6 +15,7 @@ from app.models.agent_content import AgentContent
 from app.models.chat_read_status import ChatRoomReadStatus
 from app.services import chat_service
 from app.services import ai_service
+from app.services import room_index
 
 
 async def trigger_character_reactions_with_rooms(
@@ -201,6 +202,7 @@ async def generate_reaction_message(
     print(f"🔥 [FeedReaction] About to commit for room {room.id}...")
     await db_session.commit()
     print(f"✅ [FeedReaction] DB commit successful for room {room.id}.")
+    await room_index.incr_unread(room.user_id, room.id)
     
     # 🆕 커밋 후 실제 DB 값 확인
     verify_result = await db_session.execute(
@@ -0,0 +1,86 @@
+"""
+HyperLogLog 스케치 (고유 사용자 수 근사) — 통계 롤업(creator_stats_rollup) 전용
+
+의도/배경:
+- "기간 내 고유 대화 유저 수"는 버킷별 카운트를 단순 합산할 수 없다(같은 유저가 여러 시간/캐릭터에 걸침).
+- 버킷마다 HLL 레지스터를 저장해 두면 임의의 기간/캐릭터 묶음을 레지스터 max 병합만으로 합칠 수 있다.
+
+형식:
+- 정밀도 p=11 → 레지스터 2048개(1바이트씩), 표준 오차 ≈ 1.04/sqrt(2048) ≈ 2.3%.
+- 저장은 zlib 압축 바이트(대부분 0인 작은 버킷은 수십 바이트). 비어 있으면 None.
+- 해시는 blake2b 64비트(프로세스/재시작과 무관하게 같은 값 → 나중에 병합해도 일관).
+"""
+
+import hashlib
+import math
+import zlib
+from typing import Any, Iterable, Optional
+
+P = 11
+M = 1 << P
+_HASH_BITS = 64
+_ALPHA = 0.7213 / (1 + 1.079 / M)
+
+
+class HyperLogLog:
+    """레지스터 배열 하나. add/merge/count만 지원한다."""
+
+    __slots__ = ("registers",)
+
+    def __init__(self, registers: Optional[bytearray] = None):
+        self.registers = registers if registers is not None and len(registers) == M else bytearray(M)
+
+    def add(self, value: Any) -> None:
+        x = int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+        idx = x >> (_HASH_BITS - P)
+        w = x & ((1 << (_HASH_BITS - P)) - 1)
+        rank = (_HASH_BITS - P) - w.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def update(self, values: Iterable[Any]) -> None:
+        for v in values:
+            self.add(v)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        regs, o = self.registers, other.registers
+        for i in range(M):
+            if o[i] > regs[i]:
+                regs[i] = o[i]
+
+    def count(self) -> int:
+        regs = self.registers
+        zeros = regs.count(0)
+        if zeros == M:
+            return 0
+        est = _ALPHA * M * M / sum(2.0 ** -r for r in regs)
+        # 소수 구간: linear counting이 더 정확하다.
+        if est <= 2.5 * M and zeros:
+            est = M * math.log(M / zeros)
+        return int(round(est))
+
+    def is_empty(self) -> bool:
+        return not any(self.registers)
+
+    def to_bytes(self) -> Optional[bytes]:
+        if self.is_empty():
+            return None
+        return zlib.compress(bytes(self.registers), 6)
+
+    @classmethod
+    def from_bytes(cls, raw: Optional[bytes]) -> "HyperLogLog":
+        if not raw:
+            return cls()
+        try:
+            return cls(bytearray(zlib.decompress(bytes(raw))))
+        except Exception:
+            return cls()
+
+
+def merged_count(raws: Iterable[Optional[bytes]]) -> int:
+    """저장된 스케치 여러 개를 병합한 고유 수."""
+    acc = HyperLogLog()
+    for raw in raws:
+        if raw:
+            acc.merge(HyperLogLog.from_bytes(raw))
+    return acc.count()
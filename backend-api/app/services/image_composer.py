@@ -4,10 +4,11 @@
 """
 import io
 import os
+import asyncio
 import logging
 from typing import Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont
-import aiohttp
+from app.core.http_fetch import fetch_bytes
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -109,6 +110,22 @@ class ImageComposer:
         try:
             # 1. 원본 이미지 다운로드
             image_bytes = await self._download_image(image_url)
+            # 2~8. PIL 합성은 CPU 작업이므로 스레드풀에서 실행(이벤트 루프 블로킹 방지)
+            return await asyncio.to_thread(
+                self._compose_letterbox_sync, image_bytes, subtitle, subtitle_position
+            )
+        except Exception as e:
+            logger.error(f"Image composition failed: {e}")
+            raise
+
+    def _compose_letterbox_sync(
+        self,
+        image_bytes: bytes,
+        subtitle: str,
+        subtitle_position: str = "bottom"
+    ) -> ComposedImage:
+        """compose_with_letterbox의 PIL 처리부(동기)."""
+        try:
             original = Image.open(io.BytesIO(image_bytes))
             
             # 2. RGB로 변환 (투명도 제거)
@@ -207,12 +224,11 @@ class ImageComposer:
             y += line_height
         
     async def _download_image(self, url: str) -> bytes:
-        """이미지 다운로드"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-                if resp.status >= 400:
-                    raise ValueError(f"Failed to download image: HTTP {resp.status}")
-                return await resp.read()
+        """이미지 다운로드(공유 커넥션 풀 + 크기 상한)"""
+        res = await fetch_bytes(url, timeout=30, raise_for_status=False)
+        if res.status_code >= 400:
+            raise ValueError(f"Failed to download image: HTTP {res.status_code}")
+        return res.content
                 
     def create_story_card(
         self,
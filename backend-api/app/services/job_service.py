@@ -1,5 +1,5 @@
 import json
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 from redis.asyncio import Redis
 from app.core.config import settings
 from fastapi import Depends
@@ -13,6 +13,9 @@ class JobService:
     def _get_job_key(self, job_id: str) -> str:
         return f"story:job:{job_id}"
 
+    def _get_events_key(self, job_id: str) -> str:
+        return f"story:job:{job_id}:events"
+
     async def create_job(self, job_id: str, initial_data: Dict[str, Any]) -> None:
         job_key = self._get_job_key(job_id)
         await self.redis.set(job_key, json.dumps(initial_data), ex=settings.JOB_EXPIRATION_SECONDS)
@@ -44,11 +47,74 @@ class JobService:
 
     async def delete_job(self, job_id: str) -> None:
         job_key = self._get_job_key(job_id)
-        await self.redis.delete(job_key)
+        await self.redis.delete(job_key, self._get_events_key(job_id))
 
     async def cancel_job(self, job_id: str) -> Dict[str, Any] | None:
         """Mark job as cancelled. Worker should stop promptly."""
-        return await self.update_job(job_id, {"status": "cancelled", "cancelled": True})
+        state = await self.update_job(job_id, {"status": "cancelled", "cancelled": True})
+        if state is not None:
+            # 구독 중인 SSE가 워커를 기다리지 않고 바로 끝나도록 종료 이벤트도 남긴다(중복 종료 이벤트는 무해).
+            try:
+                await self.append_event(job_id, "cancelled", {})
+            except Exception:
+                pass
+        return state
+
+    # ---- 이벤트 버스 (Redis Stream) ----
+    #
+    # - 생성 워커는 이벤트를 append만 한다(delta는 증분 텍스트만, 누적 본문을 다시 직렬화하지 않음).
+    # - SSE는 XREAD BLOCK으로 새 이벤트를 기다리고, 스트림 ID를 SSE `id:`로 내보내 Last-Event-ID 재개를 지원한다.
+    # - 잡 레코드(story:job:{id})는 상태/단계/제목/최종 결과만 담는 작은 JSON으로 유지한다.
+
+    async def append_event(self, job_id: str, event: str, data: Dict[str, Any]) -> str:
+        """이벤트 1건을 스트림에 추가하고 스트림 ID를 반환한다."""
+        events_key = self._get_events_key(job_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xadd(events_key, {"e": event, "d": json.dumps(data, ensure_ascii=False)})
+        pipe.expire(events_key, settings.JOB_EXPIRATION_SECONDS)
+        res = await pipe.execute()
+        return str(res[0])
+
+    async def read_events(
+        self,
+        job_id: str,
+        last_id: str = "0",
+        *,
+        block_ms: int = 10000,
+        count: int = 200,
+    ) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        last_id 이후 이벤트를 읽는다. 없으면 block_ms 동안 대기한다.
+
+        반환: [(stream_id, event, data), ...] (타임아웃이면 빈 리스트)
+        """
+        res = await self.redis.xread({self._get_events_key(job_id): last_id or "0"}, count=count, block=block_ms)
+        out: List[Tuple[str, str, Dict[str, Any]]] = []
+        for _stream, entries in res or []:
+            for entry_id, fields in entries:
+                try:
+                    data = json.loads(fields.get("d") or "{}")
+                except Exception:
+                    data = {}
+                out.append((str(entry_id), str(fields.get("e") or ""), data))
+        return out
+
+    async def get_content_so_far(self, job_id: str) -> str:
+        """누적 본문을 delta 이벤트로부터 재구성한다(상태 조회 호환용, 요청 시에만)."""
+        parts: List[str] = []
+        entries = await self.redis.xrange(self._get_events_key(job_id))
+        for _entry_id, fields in entries or []:
+            if fields.get("e") != "delta":
+                continue
+            try:
+                parts.append(str(json.loads(fields.get("d") or "{}").get("delta") or ""))
+            except Exception:
+                continue
+        return "".join(parts)
+
+    async def is_cancelled(self, job_id: str) -> bool:
+        state = await self.get_job(job_id)
+        return bool(state and state.get("cancelled"))
 
 job_service: JobService | None = None
 
@@ -0,0 +1,207 @@
+"""
+LLM 프로바이더 프롬프트 캐시 (Claude cache_control / Gemini cachedContent) + 캐시 적중 토큰 메트릭
+
+의도/배경:
+- 채팅 턴마다 캐릭터 시스템 프롬프트(수천 토큰)를 통째로 다시 보낸다.
+  프로바이더 프롬프트 캐시는 "요청 앞부분이 이전 요청과 바이트 단위로 같을 때"만 적중하므로,
+  호출부가 고정 prefix(캐릭터 정적 구간/규칙)와 가변 suffix(페르소나/기억/설정메모/스탯/사건/히스토리)를 나눠 넘긴다.
+
+프로바이더별:
+- Claude: system을 [고정 prefix(cache_control=ephemeral), 가변 suffix] 2블록으로 보낸다(claude_system_blocks).
+- Gemini: 고정 prefix를 system_instruction으로 가진 cachedContent를 만들어 두고,
+  요청에는 cachedContent 핸들 + 가변 suffix만 보낸다(gemini_cached_content).
+  - 핸들은 Redis(`llm:gemini_cache:{sha}`)로 워커 간 공유한다. 없으면 백그라운드에서 만들고
+    이번 요청은 캐시 없이(전체 프롬프트) 보낸다 → 캐시 생성 왕복이 TTFT에 더해지지 않는다.
+  - 생성 실패(최소 토큰 미달/모델 미지원)는 같은 TTL 동안 다시 시도하지 않는다.
+
+메트릭(metrics_service 일별 롤업, 베스트-에포트):
+- llm_prompt_tokens{provider, model, kind}: kind = cache_read | cache_write | uncached (토큰 수 누적)
+- llm_prompt_cache_requests{provider, model, hit}: 요청 수(hit=1: 캐시 읽기 토큰 > 0)
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_GEMINI_CACHE_KEY_PREFIX = "llm:gemini_cache:"
+_GEMINI_CACHE_LOCK_SUFFIX = ":creating"
+_GEMINI_NEGATIVE = "-"
+# 만료 직전 핸들로 요청하지 않도록 여유를 둔다.
+_GEMINI_TTL_MARGIN_SEC = 60
+
+# sha → (로컬 만료 시각, 핸들 또는 _GEMINI_NEGATIVE)
+_gemini_local: Dict[str, Tuple[float, str]] = {}
+_background: Set[asyncio.Task] = set()
+
+
+def prompt_cache_enabled(prefix: Optional[str]) -> bool:
+    if not getattr(settings, "LLM_PROMPT_CACHE_ENABLED", True):
+        return False
+    try:
+        return len(prefix or "") >= int(getattr(settings, "LLM_PROMPT_CACHE_MIN_CHARS", 2000) or 0)
+    except Exception:
+        return False
+
+
+def _spawn(coro) -> None:
+    try:
+        task = asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        coro.close()
+        return
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+# ---------------------------------------------------------------------------
+# Claude
+# ---------------------------------------------------------------------------
+def claude_system_blocks(prefix: str, suffix: str) -> List[Dict[str, Any]]:
+    """system 파라미터용 블록: 고정 prefix 끝에 캐시 브레이크포인트를 둔다."""
+    blocks: List[Dict[str, Any]] = [
+        {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}
+    ]
+    if suffix and suffix.strip():
+        blocks.append({"type": "text", "text": suffix})
+    return blocks
+
+
+# ---------------------------------------------------------------------------
+# Gemini cachedContent
+# ---------------------------------------------------------------------------
+def _gemini_sha(model: str, prefix: str) -> str:
+    return hashlib.sha256(f"{model}\x00{prefix}".encode("utf-8")).hexdigest()
+
+
+def _gemini_ttl() -> int:
+    return max(120, int(getattr(settings, "GEMINI_CACHED_CONTENT_TTL_SEC", 900) or 900))
+
+
+async def _create_gemini_cache(model: str, prefix: str, sha: str) -> None:
+    from app.core.database import redis_client
+    from app.core.llm_clients import get_gemini_client
+    from google.genai import types as genai_types
+
+    ttl = _gemini_ttl()
+    key = f"{_GEMINI_CACHE_KEY_PREFIX}{sha}"
+    try:
+        cache = await get_gemini_client().aio.caches.create(
+            model=model,
+            config=genai_types.CreateCachedContentConfig(
+                system_instruction=prefix,
+                ttl=f"{ttl}s",
+                display_name=f"chat-prefix-{sha[:12]}",
+            ),
+        )
+        name = str(getattr(cache, "name", "") or "")
+        if not name:
+            raise ValueError("empty cache name")
+        hold = ttl - _GEMINI_TTL_MARGIN_SEC
+        _gemini_local[sha] = (time.monotonic() + hold, name)
+        await redis_client.set(key, name, ex=hold)
+    except Exception as e:
+        logger.info(f"[prompt_cache] gemini cachedContent create skipped model={model}: {e}")
+        _gemini_local[sha] = (time.monotonic() + ttl, _GEMINI_NEGATIVE)
+        try:
+            await redis_client.set(key, _GEMINI_NEGATIVE, ex=ttl)
+        except Exception:
+            pass
+    finally:
+        try:
+            await redis_client.delete(key + _GEMINI_CACHE_LOCK_SUFFIX)
+        except Exception:
+            pass
+
+
+async def gemini_cached_content(model: str, prefix: str) -> Optional[str]:
+    """
+    prefix에 해당하는 cachedContent 핸들(없으면 None).
+    - 없으면 한 워커만(SET NX) 백그라운드로 만든다. 이번 호출은 None → 호출부는 캐시 없이 보낸다.
+    """
+    if not model or not prompt_cache_enabled(prefix):
+        return None
+    sha = _gemini_sha(model, prefix)
+    hit = _gemini_local.get(sha)
+    if hit is not None and hit[0] > time.monotonic():
+        return None if hit[1] == _GEMINI_NEGATIVE else hit[1]
+    try:
+        from app.core.database import redis_client
+        key = f"{_GEMINI_CACHE_KEY_PREFIX}{sha}"
+        name = await redis_client.get(key)
+        if name:
+            ttl_left = await redis_client.ttl(key)
+            _gemini_local[sha] = (time.monotonic() + max(1, int(ttl_left or 1)), str(name))
+            return None if name == _GEMINI_NEGATIVE else str(name)
+        if await redis_client.set(key + _GEMINI_CACHE_LOCK_SUFFIX, "1", ex=30, nx=True):
+            _spawn(_create_gemini_cache(model, prefix, sha))
+    except Exception as e:
+        logger.debug(f"[prompt_cache] gemini cache lookup failed: {e}")
+    return None
+
+
+def invalidate_gemini_cached_content(model: str, prefix: str) -> None:
+    """핸들이 서버에서 만료/삭제된 경우(요청 실패) 다음 호출에서 다시 만들도록 지운다."""
+    sha = _gemini_sha(model, prefix)
+    _gemini_local.pop(sha, None)
+
+    async def _drop() -> None:
+        try:
+            from app.core.database import redis_client
+            await redis_client.delete(f"{_GEMINI_CACHE_KEY_PREFIX}{sha}")
+        except Exception:
+            pass
+
+    _spawn(_drop())
+
+
+# ---------------------------------------------------------------------------
+# 메트릭
+# ---------------------------------------------------------------------------
+def _usage_get(usage: Any, name: str) -> int:
+    try:
+        v = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        return int(v or 0)
+    except Exception:
+        return 0
+
+
+async def _record(provider: str, model: str, read: int, write: int, uncached: int) -> None:
+    from app.services.metrics_service import increment_counter
+
+    base = {"provider": provider, "model": model}
+    for kind, n in (("cache_read", read), ("cache_write", write), ("uncached", uncached)):
+        if n > 0:
+            await increment_counter("llm_prompt_tokens", labels={**base, "kind": kind}, amount=n, expire_seconds=86400 * 14)
+    await increment_counter(
+        "llm_prompt_cache_requests",
+        labels={**base, "hit": "1" if read > 0 else "0"},
+        expire_seconds=86400 * 14,
+    )
+
+
+def record_claude_usage(model: str, usage: Any) -> None:
+    """Anthropic usage: input_tokens(캐시 밖) / cache_read_input_tokens / cache_creation_input_tokens"""
+    if usage is None:
+        return
+    _spawn(_record(
+        "claude",
+        str(model or ""),
+        _usage_get(usage, "cache_read_input_tokens"),
+        _usage_get(usage, "cache_creation_input_tokens"),
+        _usage_get(usage, "input_tokens"),
+    ))
+
+
+def record_gemini_usage(model: str, usage_metadata: Any) -> None:
+    """Gemini usage_metadata: prompt_token_count(캐시 포함) / cached_content_token_count(암시적 캐시 포함)"""
+    if usage_metadata is None:
+        return
+    prompt = _usage_get(usage_metadata, "prompt_token_count")
+    cached = _usage_get(usage_metadata, "cached_content_token_count")
+    _spawn(_record("gemini", str(model or ""), cached, 0, max(0, prompt - cached)))
@@ -1,15 +1,23 @@
 """
 간단 메트릭 수집 유틸(베스트-에포트): Redis 카운터/타이밍 집계 + 로그 출력
 프로메테우스 등 외부 도입 전 임시 관측용
+
+저장 구조(일별 롤업 해시):
+- 카운터: metrics:rollup:counter:{name}:{YYYYMMDD}  field=라벨키 → 누적 횟수
+- 타이밍: metrics:rollup:timing:{name}:{YYYYMMDD}   field=라벨키|sum, 라벨키|cnt
+- 라벨키는 정렬된 "k=v:k=v" 형식(라벨 없으면 "_")
+- 조회는 HGETALL 1회 → 키스페이스 크기가 아니라 라벨 조합 수에 비례한다(SCAN 없음).
 """
 from __future__ import annotations
 
 import json
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 import logging
 
+_NO_LABELS = "_"
+
 
 def _labels_to_key(labels: Dict[str, Any]) -> str:
     try:
@@ -20,19 +28,56 @@ def _labels_to_key(labels: Dict[str, Any]) -> str:
         return ""
 
 
-async def increment_counter(name: str, *, labels: Dict[str, Any] | None = None, expire_seconds: int = 86400) -> None:
+def parse_label_key(label_key: str) -> Dict[str, str]:
+    """_labels_to_key의 역변환(값에 ':'가 없다는 전제; story_id/room_id/mode 등)."""
+    out: Dict[str, str] = {}
+    if not label_key or label_key == _NO_LABELS:
+        return out
+    for part in label_key.split(":"):
+        k, sep, v = part.partition("=")
+        if sep:
+            out[k] = v
+    return out
+
+
+def labels_match(label_key: str, filters: Dict[str, Optional[str]]) -> bool:
+    """라벨키가 filters(값이 있는 항목만)를 모두 만족하는지 정확 일치로 검사한다."""
+    wanted = {k: str(v) for k, v in (filters or {}).items() if v}
+    if not wanted:
+        return True
+    labels = parse_label_key(label_key)
+    return all(labels.get(k) == v for k, v in wanted.items())
+
+
+def _counter_rollup_key(name: str, day: str) -> str:
+    return f"metrics:rollup:counter:{name}:{day}"
+
+
+def _timing_rollup_key(name: str, day: str) -> str:
+    return f"metrics:rollup:timing:{name}:{day}"
+
+
+async def increment_counter(
+    name: str,
+    *,
+    labels: Dict[str, Any] | None = None,
+    expire_seconds: int = 86400,
+    amount: int = 1,
+) -> None:
+    """카운터 증가. amount로 토큰 수 같은 누적값도 더할 수 있다."""
     try:
         from app.core.database import redis_client
         day = time.strftime("%Y%m%d")
-        key_base = f"metrics:counter:{name}:{day}"
-        lk = _labels_to_key(labels or {})
-        key = f"{key_base}:{lk}" if lk else key_base
-        await redis_client.incr(key)
-        await redis_client.expire(key, expire_seconds)
+        key = _counter_rollup_key(name, day)
+        field = _labels_to_key(labels or {}) or _NO_LABELS
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hincrby(key, field, int(amount))
+        pipe.expire(key, expire_seconds)
+        await pipe.execute()
     except Exception:
         pass
     try:
-        logging.getLogger("metrics").info(json.dumps({"type": "counter", "name": name, "labels": labels or {}}))
+        logging.getLogger("metrics").info(json.dumps({"type": "counter", "name": name, "labels": labels or {}, "amount": int(amount)}))
     except Exception:
         pass
 
@@ -41,15 +86,14 @@ async def record_timing(name: str, value_ms: int | float, *, labels: Dict[str, A
     try:
         from app.core.database import redis_client
         day = time.strftime("%Y%m%d")
-        key_base = f"metrics:timing:{name}:{day}"
-        lk = _labels_to_key(labels or {})
+        key = _timing_rollup_key(name, day)
+        field = _labels_to_key(labels or {}) or _NO_LABELS
         # 간단히 sum/count로 집계(평균 계산용)
-        sum_key = f"{key_base}:{lk}:sum" if lk else f"{key_base}:sum"
-        cnt_key = f"{key_base}:{lk}:cnt" if lk else f"{key_base}:cnt"
-        await redis_client.incrbyfloat(sum_key, float(value_ms))
-        await redis_client.incr(cnt_key)
-        await redis_client.expire(sum_key, expire_seconds)
-        await redis_client.expire(cnt_key, expire_seconds)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hincrbyfloat(key, f"{field}|sum", float(value_ms))
+        pipe.hincrby(key, f"{field}|cnt", 1)
+        pipe.expire(key, expire_seconds)
+        await pipe.execute()
     except Exception:
         pass
     try:
@@ -58,6 +102,37 @@ async def record_timing(name: str, value_ms: int | float, *, labels: Dict[str, A
         pass
 
 
+def _to_str(v: Any) -> str:
+    return v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else str(v)
+
 
+async def read_counter_rollup(name: str, day: str) -> Dict[str, int]:
+    """{라벨키: 횟수}"""
+    from app.core.database import redis_client
+    raw = await redis_client.hgetall(_counter_rollup_key(name, day)) or {}
+    out: Dict[str, int] = {}
+    for f, v in raw.items():
+        try:
+            out[_to_str(f)] = int(float(_to_str(v)))
+        except Exception:
+            continue
+    return out
 
 
+async def read_timing_rollup(name: str, day: str) -> Dict[str, Tuple[float, int]]:
+    """{라벨키: (합계 ms, 횟수)}"""
+    from app.core.database import redis_client
+    raw = await redis_client.hgetall(_timing_rollup_key(name, day)) or {}
+    sums: Dict[str, float] = {}
+    cnts: Dict[str, int] = {}
+    for f, v in raw.items():
+        field = _to_str(f)
+        label_key, _, part = field.rpartition("|")
+        try:
+            if part == "sum":
+                sums[label_key] = float(_to_str(v))
+            elif part == "cnt":
+                cnts[label_key] = int(float(_to_str(v)))
+        except Exception:
+            continue
+    return {lk: (sums.get(lk, 0.0), cnts.get(lk, 0)) for lk in set(sums) | set(cnts)}
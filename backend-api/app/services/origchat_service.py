@@ -7,6 +7,7 @@ from app.core.config import settings
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, update
 import uuid
+import json
 
 from app.models.story import Story
 from app.models.story_chapter import StoryChapter
@@ -467,8 +468,16 @@ async def ensure_episode_summaries(
 ) -> int:
     """회차 구간에 대해 LLM 요약을 보장한다. 이미 있으면 건너뜀.
     반환: 새로 생성/갱신한 회차 수
+
+    배치 처리(app/services/batch_engine.py):
+    - 회차별 LLM 요약은 ORIGCHAT_BATCH_CONCURRENCY개까지 동시에 호출한다.
+    - 누적 요약은 앞 회차에 의존하므로, 앞에서부터 연속으로 끝난 회차까지만 순서대로 계산하고
+      ORIGCHAT_BATCH_COMMIT_SIZE개씩 묶어 커밋한다(앞 회차는 뒤 회차를 기다리지 않고 바로 쓸 수 있다).
+    - 끝난 회차 요약은 진행 커서(Redis)에 남겨, 중단 후 재실행하면 그 회차는 LLM을 다시 부르지 않는다.
     """
     try:
+        from app.services.batch_engine import ProgressCursor, item_key, run_batch
+
         if start_no is None or end_no is None:
             upto = int(upto_anchor or 1)
             # 기본: 최근 max_episodes 윈도우
@@ -477,12 +486,28 @@ async def ensure_episode_summaries(
         else:
             s = max(1, int(start_no))
             e = max(int(s), int(end_no))
-        # 미리 기존 요약 맵
-        rows = await db.execute(
-            select(StoryEpisodeSummary.no).where(StoryEpisodeSummary.story_id == story_id, StoryEpisodeSummary.no >= s, StoryEpisodeSummary.no <= e)
+        # 구간 본문 일괄 로드(본문 없는 회차는 제외)
+        ch_rows = await db.execute(
+            select(StoryChapter.no, StoryChapter.content)
+            .where(StoryChapter.story_id == story_id, StoryChapter.no >= s, StoryChapter.no <= e)
+            .order_by(StoryChapter.no.asc())
         )
-        existing = {int(n) for (n,) in rows.all()}
-        updated = 0
+        chapters: List[Tuple[int, str]] = []
+        for no, content in ch_rows.all():
+            content = (content or "").strip()
+            if content:
+                chapters.append((int(no), content))
+        if not chapters:
+            return 0
+
+        # 미리 기존 요약 맵
+        async def _load_existing() -> Dict[int, Any]:
+            rows = await db.execute(
+                select(StoryEpisodeSummary).where(StoryEpisodeSummary.story_id == story_id, StoryEpisodeSummary.no >= s, StoryEpisodeSummary.no <= e)
+            )
+            return {int(r.no): r for r in rows.scalars().all()}
+
+        existing = await _load_existing()
         # 이전 누적 요약 참조용 캐시
         prev_cum_map: dict[int, str] = {}
         if s > 1:
@@ -494,46 +519,90 @@ async def ensure_episode_summaries(
             for no, cum in row_prev.all():
                 prev_cum_map[int(no)] = (cum or "")
 
-        for no in range(s, e + 1):
-            # 본문 로드
-            r = await db.execute(select(StoryChapter.title, StoryChapter.content).where(StoryChapter.story_id == story_id, StoryChapter.no == no))
-            row = r.first()
-            content = ((row[1] if row else None) or "").strip()
-            if not content:
-                continue
-            brief = await _llm_summarize(content, max_chars=300)
-            anchor_excerpt = content[:600]
-            # 누적 요약 계산
-            prev_cum = prev_cum_map.get(no - 1, "")
-            merged = (prev_cum + ("\n" if prev_cum else "") + brief).strip()
-            if merged and len(merged) > 2000:
-                merged = merged[:2000]
-            # upsert
-            exist = await db.execute(select(StoryEpisodeSummary).where(StoryEpisodeSummary.story_id == story_id, StoryEpisodeSummary.no == no))
-            rec = exist.scalar_one_or_none()
-            if rec:
-                # 이미 있고 내용이 동일하면 스킵
-                if (rec.short_brief or "").strip() == brief.strip() and (rec.anchor_excerpt or "").strip() == anchor_excerpt.strip():
-                    prev_cum_map[no] = rec.cumulative_summary or merged
-                    continue
-                rec.short_brief = brief
-                rec.anchor_excerpt = anchor_excerpt
-                rec.cumulative_summary = merged
-            else:
-                rec = StoryEpisodeSummary(
-                    story_id=story_id,
-                    no=no,
-                    short_brief=brief,
-                    anchor_excerpt=anchor_excerpt,
-                    cumulative_summary=merged,
-                )
-                db.add(rec)
+        concurrency = max(1, int(getattr(settings, "ORIGCHAT_BATCH_CONCURRENCY", 6) or 1))
+        commit_size = max(1, int(getattr(settings, "ORIGCHAT_BATCH_COMMIT_SIZE", 25) or 1))
+        cursor = ProgressCursor(
+            f"origchat:sumcur:{story_id}:{s}-{e}",
+            ttl=int(getattr(settings, "ORIGCHAT_BATCH_CURSOR_TTL_SEC", 86400) or 86400),
+        )
+
+        updated = 0
+        pending = 0
+        commit_failed = False
+        done: Dict[int, Any] = {}
+        frontier = 0  # chapters[frontier]부터 아직 누적 요약 미반영
+
+        async def _flush() -> None:
+            nonlocal updated, pending, commit_failed, existing
+            if not pending:
+                return
             try:
                 await db.commit()
-                updated += 1
+                updated += pending
             except Exception:
+                commit_failed = True
                 await db.rollback()
-            prev_cum_map[no] = merged
+                # rollback으로 만료된 인스턴스를 다시 읽는다(이후 회차 비교/업서트용)
+                try:
+                    existing = await _load_existing()
+                except Exception:
+                    existing = {}
+            pending = 0
+
+        async def _advance(outcome) -> None:
+            nonlocal frontier, pending
+            done[outcome.index] = outcome
+            while frontier < len(chapters) and frontier in done:
+                out = done.pop(frontier)
+                no, content = chapters[frontier]
+                frontier += 1
+                brief = out.value if (out.ok and isinstance(out.value, str)) else content[:300]
+                anchor_excerpt = content[:600]
+                # 누적 요약 계산
+                prev_cum = prev_cum_map.get(no - 1, "")
+                merged = (prev_cum + ("\n" if prev_cum else "") + brief).strip()
+                if merged and len(merged) > 2000:
+                    merged = merged[:2000]
+                # upsert
+                rec = existing.get(no)
+                if rec:
+                    # 이미 있고 내용이 동일하면 스킵
+                    if (rec.short_brief or "").strip() == brief.strip() and (rec.anchor_excerpt or "").strip() == anchor_excerpt.strip():
+                        prev_cum_map[no] = rec.cumulative_summary or merged
+                        continue
+                    rec.short_brief = brief
+                    rec.anchor_excerpt = anchor_excerpt
+                    rec.cumulative_summary = merged
+                else:
+                    rec = StoryEpisodeSummary(
+                        story_id=story_id,
+                        no=no,
+                        short_brief=brief,
+                        anchor_excerpt=anchor_excerpt,
+                        cumulative_summary=merged,
+                    )
+                    db.add(rec)
+                    existing[no] = rec
+                prev_cum_map[no] = merged
+                pending += 1
+                if pending >= commit_size:
+                    await _flush()
+
+        async def _summarize(item: Tuple[int, str]) -> str:
+            return await _llm_summarize(item[1], max_chars=300)
+
+        await run_batch(
+            chapters,
+            _summarize,
+            concurrency=concurrency,
+            cursor=cursor,
+            keys=[item_key(no, content) for no, content in chapters],
+            on_outcome=_advance,
+            label=f"episode_summaries story={story_id} range={s}-{e}",
+        )
+        await _flush()
+        if not commit_failed:
+            await cursor.clear()
         return updated
     except Exception:
         return 0
@@ -998,6 +1067,86 @@ def _norm_name(name: str) -> str:
     return (name or "").strip().lower()
 
 
+def _parse_window_characters(raw: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """추출 윈도우 1개의 LLM 응답(JSON)을 후보 목록으로 정규화한다(map 단계).
+    - 주인공/핵심조연이 아닌 인물, 일반명, 1글자 이름('나' 제외)은 버린다.
+    - JSON 파싱 실패 시 None.
+    """
+    text = (raw or "").strip()
+    start = text.find('{')
+    end = text.rfind('}')
+    data = None
+    if start != -1 and end != -1 and end > start:
+        try:
+            data = json.loads(text[start:end+1])
+        except Exception:
+            data = None
+    if not data or not isinstance(data.get('characters'), list):
+        return None
+    # 금지된 일반명 필터링 (확장)
+    forbidden = {
+        "주인공", "동료", "동료 a", "동료 b", "라이벌", "적", "안타고니스트", "조연",
+        "엑스트라", "행인", "상점주인", "점원", "경비", "병사", "잡몹", "몹",
+        "npc", "배경인물", "단역", "촌장", "마을사람", "상인", "노인", "아이"
+    }
+    out: List[Dict[str, Any]] = []
+    for ch in data['characters'][:5]:
+        try:
+            name = str(ch.get('name') or '').strip()
+            if not name:
+                continue
+            key = _norm_name(name)
+            desc = str(ch.get('description') or '').strip()
+            importance = str(ch.get('importance') or '').strip().lower()
+            # importance가 주인공/핵심조연이 아니면 제외
+            if importance and importance not in {"주인공", "핵심조연"}:
+                continue
+            if key in forbidden:
+                continue
+            # 이름이 1글자이거나 너무 일반적인 경우 제외 (나 제외)
+            if key != "나" and len(name) <= 1:
+                continue
+            # aliases 파싱
+            aliases_raw = ch.get('aliases') or []
+            aliases = [str(a).strip().lower() for a in aliases_raw if a and str(a).strip()]
+            out.append({"name": name, "desc": desc, "importance": importance, "aliases": aliases})
+        except Exception:
+            continue
+    return out
+
+
+def _reduce_window_characters(partials: Iterable[Optional[List[Dict[str, Any]]]]) -> Dict[str, Dict[str, Any]]:
+    """윈도우별 후보 목록을 윈도우 순서대로 접어 이름(정규화) 단위로 집계한다(reduce 단계).
+    - count: 등장 윈도우 수(후보 수), order: 첫 등장 순서, desc: 가장 긴 설명, importance: 주인공 우선.
+    """
+    agg: Dict[str, Dict[str, Any]] = {}
+    order_counter = 0
+    for cands in partials:
+        for c in cands or []:
+            try:
+                name = c["name"]
+                key = _norm_name(name)
+                desc = c.get("desc") or ""
+                importance = c.get("importance") or ""
+                aliases = set(c.get("aliases") or [])
+                if key not in agg:
+                    agg[key] = {"name": name, "initial": name[:1], "desc": desc[:100], "count": 1, "order": order_counter, "importance": importance, "aliases": aliases}
+                    order_counter += 1
+                else:
+                    agg[key]["count"] += 1
+                    # 더 길거나 정보가 많은 설명으로 업데이트
+                    if desc and (len(desc) > len(agg[key]["desc"])):
+                        agg[key]["desc"] = desc[:100]
+                    # 중요도가 더 높으면 업데이트 (주인공 > 핵심조연)
+                    if importance == "주인공":
+                        agg[key]["importance"] = importance
+                    # aliases 병합
+                    agg[key]["aliases"] = agg[key].get("aliases", set()) | aliases
+            except Exception:
+                continue
+    return agg
+
+
 def extract_character_context_from_combined(
     combined_text: str,
     character_name: str,
@@ -1186,127 +1335,85 @@ async def extract_characters_from_story(
         "- importance: 반드시 \"주인공\" 또는 \"핵심조연\"만 사용.\n"
         "- aliases: 해당 인물의 다른 호칭/별명 목록 (없으면 빈 배열)"
     )
-    agg: Dict[str, Dict[str, Any]] = {}
-    order_counter = 0
+    # ✅ map: 윈도우별 후보 추출을 ORIGCHAT_BATCH_CONCURRENCY개까지 동시에 실행한다(app/services/batch_engine.py).
+    # - 끝난 윈도우 결과는 진행 커서(Redis)에 남겨, 중단/실패 후 재실행하면 그 윈도우는 LLM을 다시 부르지 않는다.
+    # - reduce는 완료 순서와 무관하게 윈도우 순서대로 접으므로 결과(언급 수/등장 순서)는 순차 처리와 같다.
+    from app.services.batch_engine import BatchCancelled, ProgressCursor, item_key, run_batch
+
+    cursor = ProgressCursor(
+        f"origchat:extcur:{story_id}",
+        ttl=int(getattr(settings, "ORIGCHAT_BATCH_CURSOR_TTL_SEC", 86400) or 86400),
+    )
     first_error: str | None = None
-    for win in windows:
-        # ✅ 취소 체크: LLM 호출 전에 확인(즉시성 최대화)
+
+    async def _map_window(win: str) -> Optional[List[Dict[str, Any]]]:
+        raw = await get_ai_chat_response(
+            character_prompt=director_prompt,
+            user_message=win,
+            history=[],
+            preferred_model="claude",
+            preferred_sub_model=CLAUDE_MODEL_PRIMARY,
+            response_length_pref="short",
+        )
+        return _parse_window_characters(raw)
+
+    async def _on_window_done(outcome) -> None:
+        nonlocal processed_windows, first_error
+        # 실패 윈도우도 처리된 것으로 간주하고 진행률은 전진시킨다
+        processed_windows += 1
+        patch: Dict[str, Any] = {
+            "total_windows": int(total_windows or 0),
+            "processed_windows": int(processed_windows or 0),
+        }
+        if outcome.error:
+            if not first_error:
+                first_error = outcome.error
+            patch["last_error"] = outcome.error
         if job_service and job_id:
             try:
-                st = await job_service.get_job(job_id)
-                if st and st.get("cancelled"):
-                    return -1
+                await job_service.update_job(job_id, patch)
             except Exception:
-                # 취소 체크 실패는 무시(추출 지속)
                 pass
+
+    async def _cancelled() -> bool:
+        # ✅ 취소 체크: LLM 호출 전에 확인(즉시성 최대화)
+        if not (job_service and job_id):
+            return False
         try:
-            raw = await get_ai_chat_response(
-                character_prompt=director_prompt,
-                user_message=win,
-                history=[],
-                preferred_model="claude",
-                preferred_sub_model=CLAUDE_MODEL_PRIMARY,
-                response_length_pref="short",
-            )
-        except Exception as e:
-            # ✅ 크레딧 부족은 더 시도해도 실패하므로 즉시 중단(UX/로그/시간 낭비 방지)
-            emsg = _safe_err_text(e)
-            if not first_error:
-                first_error = emsg
-            try:
-                if job_service and job_id:
-                    await job_service.update_job(job_id, {"last_error": emsg})
-            except Exception:
-                pass
-            if _is_low_credit_error(emsg):
-                raise RuntimeError("Claude(Anthropic) API 크레딧이 부족합니다. 결제/크레딧 충전 후 다시 시도해주세요.")
-            # 진행률은 전진시킨다(실패 윈도우도 처리된 것으로 간주)
-            processed_windows += 1
-            if job_service and job_id:
-                try:
-                    await job_service.update_job(job_id, {
-                        "total_windows": int(total_windows or 0),
-                        "processed_windows": int(processed_windows or 0),
-                    })
-                except Exception:
-                    pass
-            continue
-        text = (raw or "").strip()
-        start = text.find('{')
-        end = text.rfind('}')
-        data = None
-        if start != -1 and end != -1 and end > start:
-            try:
-                data = json.loads(text[start:end+1])
-            except Exception:
-                data = None
-        if not data or not isinstance(data.get('characters'), list):
-            processed_windows += 1
-            if job_service and job_id:
-                try:
-                    await job_service.update_job(job_id, {
-                        "total_windows": int(total_windows or 0),
-                        "processed_windows": int(processed_windows or 0),
-                    })
-                except Exception:
-                    pass
-            continue
-        for ch in data['characters'][:5]:
-            try:
-                name = str(ch.get('name') or '').strip()
-                if not name:
-                    continue
-                key = _norm_name(name)
-                desc = str(ch.get('description') or '').strip()
-                importance = str(ch.get('importance') or '').strip().lower()
-                
-                # importance가 주인공/핵심조연이 아니면 제외
-                if importance and importance not in {"주인공", "핵심조연"}:
-                    continue
-                
-                # 금지된 일반명 필터링 (확장)
-                forbidden = {
-                    "주인공", "동료", "동료 a", "동료 b", "라이벌", "적", "안타고니스트", "조연",
-                    "엑스트라", "행인", "상점주인", "점원", "경비", "병사", "잡몹", "몹",
-                    "npc", "배경인물", "단역", "촌장", "마을사람", "상인", "노인", "아이"
-                }
-                if key in forbidden:
-                    continue
-                
-                # 이름이 1글자이거나 너무 일반적인 경우 제외 (나 제외)
-                if key != "나" and len(name) <= 1:
-                    continue
-                
-                # aliases 파싱
-                aliases_raw = ch.get('aliases') or []
-                aliases = [str(a).strip().lower() for a in aliases_raw if a and str(a).strip()]
-                    
-                if key not in agg:
-                    agg[key] = {"name": name, "initial": name[:1], "desc": desc[:100], "count": 1, "order": order_counter, "importance": importance, "aliases": set(aliases)}
-                    order_counter += 1
-                else:
-                    agg[key]["count"] += 1
-                    # 더 길거나 정보가 많은 설명으로 업데이트
-                    if desc and (len(desc) > len(agg[key]["desc"])):
-                        agg[key]["desc"] = desc[:100]
-                    # 중요도가 더 높으면 업데이트 (주인공 > 핵심조연)
-                    if importance == "주인공":
-                        agg[key]["importance"] = importance
-                    # aliases 병합
-                    agg[key]["aliases"] = agg[key].get("aliases", set()) | set(aliases)
-            except Exception:
-                continue
+            st = await job_service.get_job(job_id)
+            return bool(st and st.get("cancelled"))
+        except Exception:
+            # 취소 체크 실패는 무시(추출 지속)
+            return False
 
-        # ✅ 진행률 업데이트(윈도우 1개 처리 완료)
-        processed_windows += 1
+    try:
+        outcomes = await run_batch(
+            windows,
+            _map_window,
+            concurrency=max(1, int(getattr(settings, "ORIGCHAT_BATCH_CONCURRENCY", 6) or 1)),
+            cursor=cursor,
+            keys=[item_key(i, w) for i, w in enumerate(windows)],
+            on_outcome=_on_window_done,
+            should_cancel=_cancelled,
+            # ✅ 크레딧 부족은 더 시도해도 실패하므로 남은 윈도우를 취소하고 즉시 중단(UX/로그/시간 낭비 방지)
+            is_fatal=lambda e: _is_low_credit_error(_safe_err_text(e)),
+            label=f"extract_characters story={story_id}",
+        )
+    except BatchCancelled:
+        return -1
+    except Exception as e:
+        emsg = _safe_err_text(e)
         if job_service and job_id:
             try:
-                await job_service.update_job(job_id, {
-                    "total_windows": int(total_windows or 0),
-                    "processed_windows": int(processed_windows or 0),
-                })
+                await job_service.update_job(job_id, {"last_error": emsg})
             except Exception:
                 pass
+        if _is_low_credit_error(emsg):
+            raise RuntimeError("Claude(Anthropic) API 크레딧이 부족합니다. 결제/크레딧 충전 후 다시 시도해주세요.")
+        raise
+
+    # reduce: 윈도우 순서대로 집계
+    agg = _reduce_window_characters(o.value for o in outcomes if o.ok)
 
     # ---- 별칭 기반 중복 캐릭터 병합 ----
     def _norm_name_for_cmp(name: str) -> str:
@@ -1476,6 +1583,8 @@ async def extract_characters_from_story(
         return k in bad
     top = [it for it in top if not is_generic(it['name'])]
     if not top:
+        # 끝까지 실행된 결과이므로 커서는 지운다(남겨두면 재실행이 같은 결과를 재사용한다)
+        await cursor.clear()
         return 0
 
     # ✅ 취소 체크(영속화 직전)
@@ -1605,6 +1714,8 @@ async def extract_characters_from_story(
                 await db.rollback()
             except Exception:
                 pass
+    # 실행이 끝까지 완료되면(생성 수와 무관) 커서를 지운다. 취소/실패로 중단된 경우에만 남겨 재실행 때 재사용한다.
+    await cursor.clear()
     
     # combined 텍스트 Redis 캐싱 (SSOT: 같은 키 사용)
     # combined는 이미 위에서 생성되었으므로 재사용
@@ -1664,8 +1775,7 @@ async def refresh_extracted_characters_for_story(
         director_prompt = (
             "등장인물의 최신 요약을 갱신합니다. JSON만 출력하세요. 스키마: {\"characters\": [{\"name\": string, \"description\": string}]}"
         )
-        agg: Dict[str, Dict[str, Any]] = {}
-        for win in windows:
+        async def _map_window(win: str) -> List[Dict[str, str]]:
             raw = await get_ai_chat_response(
                 character_prompt=director_prompt,
                 user_message=win,
@@ -1683,22 +1793,39 @@ async def refresh_extracted_characters_for_story(
                 except Exception:
                     data = None
             if not data or not isinstance(data.get('characters'), list):
-                continue
+                return []
+            out: List[Dict[str, str]] = []
             for ch in data['characters'][:8]:
                 try:
                     name = str(ch.get('name') or '').strip()
                     if not name:
                         continue
-                    key = _norm_name(name)
-                    desc = str(ch.get('description') or '').strip()
-                    if key not in agg:
-                        agg[key] = {"name": name, "desc": desc}
-                    else:
-                        # 더 긴 설명로 보강
-                        if desc and (len(desc) > len(agg[key]["desc"])):
-                            agg[key]["desc"] = desc
+                    out.append({"name": name, "desc": str(ch.get('description') or '').strip()})
                 except Exception:
                     continue
+            return out
+
+        # 윈도우는 동시에 요청하고(app/services/batch_engine.py), 집계는 윈도우 순서대로 한다.
+        # 한 윈도우라도 LLM 호출이 실패하면 전체를 포기한다(기존 동작 유지: 부분 정보로 덮어쓰지 않음).
+        from app.services.batch_engine import run_batch
+        outcomes = await run_batch(
+            windows,
+            _map_window,
+            concurrency=max(1, int(getattr(settings, "ORIGCHAT_BATCH_CONCURRENCY", 6) or 1)),
+            is_fatal=lambda e: True,
+            label=f"refresh_extracted_characters story={story_id}",
+        )
+        agg: Dict[str, Dict[str, Any]] = {}
+        for o in outcomes:
+            for c in o.value or []:
+                key = _norm_name(c["name"])
+                desc = c["desc"]
+                if key not in agg:
+                    agg[key] = {"name": c["name"], "desc": desc}
+                else:
+                    # 더 긴 설명로 보강
+                    if desc and (len(desc) > len(agg[key]["desc"])):
+                        agg[key]["desc"] = desc
 
         if not agg:
             return 0
@@ -0,0 +1,235 @@
+"""
+포인트 원장 write-behind writer
+
+의도/배경:
+- 유료 모델 채팅 턴마다 루비를 차감하는데, 차감 때마다 UserPoint UPDATE + PointTransaction INSERT + COMMIT을
+  하면 채팅 준비 단계에 DB 왕복이 여러 번 끼고, 작은 커넥션 풀(3+2)을 점유한다.
+- 차감은 PointService.use_points_atomic의 Lua 1회로 Redis 잔액을 줄이고 원장 스트림(`points:ledger`)에
+  항목을 남긴다. 이 writer가 스트림을 일정 주기(POINT_LEDGER_FLUSH_INTERVAL_MS)로 배치 반영한다.
+
+동작:
+- Redis Streams 컨슈머 그룹(`ledger-writer`)으로 읽는다. 워커(프로세스)마다 컨슈머 하나.
+- 배치 1회 = 트랜잭션 1회: PointTransaction bulk INSERT(이미 있는 tx id는 건너뜀) +
+  유저별 UserPoint 증분 UPDATE(balance -= 합계, total_used += 합계).
+- 커밋 후 settle 스크립트로 XACK/XDEL과 미반영 합계(`points:pending`) 차감을 원자적으로 한다.
+  미반영분이 0이 된 유저는 잔액 키에 다시 TTL을 건다(그 전까지는 만료되지 않는다).
+- 커밋 실패/워커 종료로 ACK되지 않은 항목은 POINT_LEDGER_CLAIM_IDLE_MS 뒤 XAUTOCLAIM으로 다시 가져간다.
+
+주의:
+- 내구성은 Redis 영속화(AOF 등)에 의존한다. DB 잔액/거래 내역은 최대 한 주기 늦게 반영된다.
+  잔액 조회는 Redis 기준값(PointService.get_balance)을 쓴다.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis.exceptions import ResponseError
+from sqlalchemy import func, insert, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, redis_client
+from app.core.db_pool_stats import pool_route
+from app.core.redis_scripts import register_script
+from app.models import PointTransaction, UserPoint
+from app.services.point_service import (
+    BALANCE_CACHE_TTL_SECONDS,
+    BALANCE_KEY_PREFIX,
+    LEDGER_PENDING_KEY,
+    LEDGER_STREAM_KEY,
+)
+
+logger = logging.getLogger(__name__)
+
+_GROUP = "ledger-writer"
+_CONSUMER = f"{socket.gethostname()}-{os.getpid()}"
+
+_flusher: Optional[asyncio.Task] = None
+_group_ready = False
+
+# KEYS: 원장 스트림, 미반영 해시 / ARGV: group, 잔액 키 접두어, ttl, (entry_id, user_id, amount) * n
+# XACK가 1인 항목만 미반영 합계에서 뺀다 → 같은 항목을 두 워커가 반영해도 이중 차감되지 않는다.
+_SETTLE = register_script("points:ledger_settle", """
+local settled = 0
+for i = 4, #ARGV, 3 do
+    if redis.call('XACK', KEYS[1], ARGV[1], ARGV[i]) == 1 then
+        redis.call('XDEL', KEYS[1], ARGV[i])
+        settled = settled + 1
+        if ARGV[i + 1] ~= '' then
+            local left = redis.call('HINCRBY', KEYS[2], ARGV[i + 1], -tonumber(ARGV[i + 2]))
+            if left <= 0 then
+                redis.call('HDEL', KEYS[2], ARGV[i + 1])
+                redis.call('EXPIRE', ARGV[2] .. ARGV[i + 1], tonumber(ARGV[3]))
+            end
+        end
+    end
+end
+return settled
+""")
+
+
+def _batch_size() -> int:
+    return max(1, int(getattr(settings, "POINT_LEDGER_BATCH_SIZE", 500) or 1))
+
+
+def _optional_uuid(value: Any) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value)) if value else None
+    except Exception:
+        # reference_id 컬럼은 UUID다. "story:chapter" 같은 값은 배치 전체를 막지 않도록 버린다.
+        return None
+
+
+def _parse_entry(entry_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    amount = int(fields["amount"])
+    ms = int(str(entry_id).split("-", 1)[0])
+    return {
+        "id": uuid.UUID(str(fields["tx"])),
+        "user_id": uuid.UUID(str(fields["user"])),
+        "type": "use",
+        "amount": -amount,
+        "balance_after": int(fields["balance_after"]),
+        "description": (fields.get("reason") or None) and str(fields["reason"])[:200],
+        "reference_type": (fields.get("ref_type") or None) and str(fields["ref_type"])[:50],
+        "reference_id": _optional_uuid(fields.get("ref_id")),
+        # 반영 시각이 아니라 차감 시각(스트림 ID의 ms)을 남긴다.
+        "created_at": datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc),
+    }
+
+
+async def _ensure_group() -> None:
+    global _group_ready
+    if _group_ready:
+        return
+    try:
+        await redis_client.xgroup_create(LEDGER_STREAM_KEY, _GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+    _group_ready = True
+
+
+async def _read_batch() -> List[Tuple[str, Dict[str, Any]]]:
+    """오래 ACK되지 않은 항목(회수) + 새 항목을 합쳐 최대 배치 크기만큼 읽는다."""
+    size = _batch_size()
+    entries: List[Tuple[str, Dict[str, Any]]] = []
+    idle_ms = int(getattr(settings, "POINT_LEDGER_CLAIM_IDLE_MS", 30000) or 0)
+    if idle_ms > 0:
+        try:
+            claimed = await redis_client.xautoclaim(
+                LEDGER_STREAM_KEY, _GROUP, _CONSUMER, min_idle_time=idle_ms, start_id="0-0", count=size
+            )
+            entries.extend((eid, f) for eid, f in (claimed[1] or []) if f)
+        except Exception as e:
+            logger.debug(f"[point_ledger] xautoclaim failed: {e}")
+    if len(entries) < size:
+        res = await redis_client.xreadgroup(
+            _GROUP, _CONSUMER, {LEDGER_STREAM_KEY: ">"}, count=size - len(entries)
+        )
+        for _stream, items in res or []:
+            entries.extend((eid, f) for eid, f in items if f)
+    return entries
+
+
+async def _write_batch(rows: List[Dict[str, Any]]) -> None:
+    """거래 INSERT + 유저별 잔액 증분 반영(한 트랜잭션)."""
+    async with AsyncSessionLocal() as db:
+        existing = set(
+            (await db.execute(
+                select(PointTransaction.id).where(PointTransaction.id.in_([r["id"] for r in rows]))
+            )).scalars().all()
+        )
+        fresh = [r for r in rows if r["id"] not in existing and str(r["id"]) not in existing]
+        if fresh:
+            await db.execute(insert(PointTransaction), fresh)
+            per_user: Dict[uuid.UUID, List[int]] = {}
+            for r in fresh:
+                acc = per_user.setdefault(r["user_id"], [0, 0])
+                acc[0] += -int(r["amount"])
+                acc[1] = int(r["balance_after"])  # 스트림 순서상 마지막 잔액
+            for user_id, (used, last_balance) in per_user.items():
+                res = await db.execute(
+                    update(UserPoint)
+                    .where(UserPoint.user_id == user_id)
+                    .values(
+                        balance=UserPoint.balance - used,
+                        total_used=func.coalesce(UserPoint.total_used, 0) + used,
+                    )
+                )
+                if not res.rowcount:
+                    db.add(UserPoint(user_id=user_id, balance=last_balance, total_charged=0, total_used=used))
+        await db.commit()
+
+
+async def flush_point_ledger() -> int:
+    """원장 스트림을 DB에 반영한다(배치가 빌 때까지). 반영한 항목 수를 반환한다."""
+    await _ensure_group()
+    written = 0
+    size = _batch_size()
+    while True:
+        entries = await _read_batch()
+        if not entries:
+            break
+        rows: List[Dict[str, Any]] = []
+        settle_args: List[Any] = []
+        for entry_id, fields in entries:
+            try:
+                row = _parse_entry(entry_id, fields)
+            except Exception as e:
+                # 형식이 깨진 항목은 ACK만 하고 버린다(계속 재시도되며 배치를 막지 않도록).
+                logger.warning(f"[point_ledger] malformed entry dropped id={entry_id}: {e}")
+                settle_args.extend([entry_id, "", 0])
+                continue
+            rows.append(row)
+            settle_args.extend([entry_id, str(fields["user"]), int(fields["amount"])])
+        if rows:
+            with pool_route("point_ledger"):
+                await _write_batch(rows)
+        await _SETTLE(
+            keys=[LEDGER_STREAM_KEY, LEDGER_PENDING_KEY],
+            args=[_GROUP, BALANCE_KEY_PREFIX, BALANCE_CACHE_TTL_SECONDS, *settle_args],
+        )
+        written += len(rows)
+        if len(entries) < size:
+            break
+    return written
+
+
+async def _flush_loop() -> None:
+    interval = max(0.05, float(getattr(settings, "POINT_LEDGER_FLUSH_INTERVAL_MS", 500) or 500) / 1000.0)
+    while True:
+        try:
+            await asyncio.sleep(interval)
+            await flush_point_ledger()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 커밋 실패한 배치는 ACK되지 않은 채 남아 CLAIM_IDLE_MS 뒤 다시 반영된다.
+            logger.warning(f"[point_ledger] flush loop error (continuing): {e}")
+
+
+async def start_point_ledger_writer() -> None:
+    """lifespan 시작 시 호출."""
+    global _flusher
+    if _flusher is not None and not _flusher.done():
+        return
+    await _ensure_group()
+    _flusher = asyncio.get_running_loop().create_task(_flush_loop())
+
+
+async def stop_point_ledger_writer() -> None:
+    """lifespan 종료 시 호출: 루프를 멈추고 남은 항목을 반영한다."""
+    global _flusher
+    task = _flusher
+    _flusher = None
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+    await flush_point_ledger()
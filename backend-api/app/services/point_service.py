@@ -1,15 +1,26 @@
 """
 포인트 서비스 - Redis를 활용한 원자적 처리
+
+잔액 모델(write-behind):
+- Redis `points:{user_id}`가 잔액의 기준값이다. 차감은 Lua 1회(EVALSHA)로 잔액 확인/차감과
+  원장 스트림(`points:ledger`) 기록을 함께 처리하고, DB에는 쓰지 않는다.
+- point_ledger writer가 스트림을 배치로 읽어 PointTransaction INSERT + UserPoint 증분 UPDATE를 한다.
+- 미반영 차감이 있는 유저(`points:pending`)의 잔액 키는 만료시키지 않는다(PERSIST).
+  반영이 끝나면 writer가 다시 TTL을 건다 → 키가 없으면 DB 잔액이 최신이라는 뜻.
+- 적립(충전/보너스/환불)은 DB에 증분 UPDATE로 커밋하고, Redis 키가 있으면 INCRBY로 맞춘다.
 """
 
 import json
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from sqlalchemy.exc import IntegrityError
 from redis.asyncio import Redis
+from app.core.redis_scripts import register_script
 from app.models import UserPoint, PointTransaction, User, UserRefillState
 from app.models.subscription import UserSubscription, SubscriptionPlan
 
@@ -32,6 +43,87 @@ MODEL_RUBY_COST: dict[str, int] = {
     "gpt-5.2": 7,
 }
 
+BALANCE_CACHE_TTL_SECONDS = 300
+LEDGER_STREAM_KEY = "points:ledger"
+LEDGER_PENDING_KEY = "points:pending"
+BALANCE_KEY_PREFIX = "points:"
+
+PLAN_PERKS_CACHE_TTL_SECONDS = 300
+PLAN_PERKS_LOCAL_TTL_SECONDS = 30
+_PLAN_PERKS_LOCAL_MAX = 4096
+_DEFAULT_PLAN_PERKS: Dict[str, int] = {"model_discount_pct": 0, "refill_speed_multiplier": 1}
+_plan_perks_local: "OrderedDict[str, Tuple[float, Dict[str, int]]]" = OrderedDict()
+
+
+def _balance_key(user_id: Any) -> str:
+    return f"{BALANCE_KEY_PREFIX}{user_id}"
+
+
+def _plan_perks_key(user_id: Any) -> str:
+    return f"points:plan:{user_id}"
+
+
+# KEYS: 잔액, 최근 로그, 원장 스트림, 미반영 해시
+# ARGV: amount, log_json, user_id, tx_id, reason, ref_type, ref_id
+# 반환: {-1, 0}(캐시 없음) / {0, 현재 잔액}(부족) / {1, 차감 후 잔액}
+_USE_POINTS = register_script("points:use", """
+local current = tonumber(redis.call('GET', KEYS[1]) or -1)
+if current == -1 then
+    return {-1, 0}
+end
+local amount = tonumber(ARGV[1])
+if current < amount then
+    return {0, current}
+end
+local new_balance = redis.call('DECRBY', KEYS[1], amount)
+redis.call('LPUSH', KEYS[2], ARGV[2])
+redis.call('LTRIM', KEYS[2], 0, 99)
+redis.call('XADD', KEYS[3], '*',
+    'tx', ARGV[4], 'user', ARGV[3], 'amount', amount, 'balance_after', new_balance,
+    'reason', ARGV[5], 'ref_type', ARGV[6], 'ref_id', ARGV[7])
+redis.call('HINCRBY', KEYS[4], ARGV[3], amount)
+redis.call('PERSIST', KEYS[1])
+return {1, new_balance}
+""")
+
+# KEYS: 잔액, 미반영 해시 / ARGV: delta, seed(키가 없을 때 채울 값, ''이면 채우지 않음), user_id, ttl
+# 반환: 적용 후 잔액(키가 없고 seed도 없으면 false)
+_CREDIT_POINTS = register_script("points:credit", """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    local v = redis.call('INCRBY', KEYS[1], tonumber(ARGV[1]))
+    if not redis.call('HGET', KEYS[2], ARGV[3]) then
+        redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+    end
+    return v
+end
+if ARGV[2] == '' then
+    return false
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', tonumber(ARGV[4]))
+return tonumber(ARGV[2])
+""")
+
+# KEYS: 락 / ARGV: 토큰
+_RELEASE_LOCK = register_script("points:release_lock", """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+
+async def invalidate_plan_cache(user_id: Any) -> None:
+    """
+    구독 플랜 혜택 캐시 무효화(구독 신청/변경/해지 직후 호출).
+    다른 워커의 L1은 PLAN_PERKS_LOCAL_TTL_SECONDS 이내에 만료된다.
+    """
+    _plan_perks_local.pop(str(user_id), None)
+    try:
+        from app.core.database import redis_client
+        await redis_client.delete(_plan_perks_key(user_id))
+    except Exception:
+        pass
+
 
 class PointService:
     def __init__(self, redis: Redis, db: AsyncSession):
@@ -53,6 +145,103 @@ class PointService:
             return None
         return await self.db.get(SubscriptionPlan, sub.plan_id)
 
+    async def _get_plan_perks(self, user_id: str) -> Dict[str, int]:
+        """
+        구독 플랜 혜택(모델 할인율/리필 배율) 조회 — 채팅 턴마다 호출되므로 캐시한다.
+        L1(프로세스, PLAN_PERKS_LOCAL_TTL_SECONDS) → L2(Redis `points:plan:{user_id}`) → DB
+        """
+        key = str(user_id)
+        hit = _plan_perks_local.get(key)
+        if hit is not None:
+            if hit[0] > time.monotonic():
+                return hit[1]
+            _plan_perks_local.pop(key, None)
+
+        perks: Optional[Dict[str, int]] = None
+        try:
+            raw = await self.redis.get(_plan_perks_key(user_id))
+            if raw:
+                perks = {k: int(v) for k, v in json.loads(raw).items()}
+        except Exception:
+            perks = None
+
+        if perks is None:
+            plan = await self._get_user_plan(user_id)
+            perks = dict(_DEFAULT_PLAN_PERKS)
+            if plan:
+                perks["model_discount_pct"] = int(plan.model_discount_pct or 0)
+                perks["refill_speed_multiplier"] = int(plan.refill_speed_multiplier or 1)
+            try:
+                await self.redis.setex(_plan_perks_key(user_id), PLAN_PERKS_CACHE_TTL_SECONDS, json.dumps(perks))
+            except Exception:
+                pass
+
+        _plan_perks_local[key] = (time.monotonic() + PLAN_PERKS_LOCAL_TTL_SECONDS, perks)
+        _plan_perks_local.move_to_end(key)
+        while len(_plan_perks_local) > _PLAN_PERKS_LOCAL_MAX:
+            _plan_perks_local.popitem(last=False)
+        return perks
+
+    async def _credit_balance(self, user_id: str, amount: int, *, touch_charged_at: bool = True) -> int:
+        """
+        잔액 적립(충전/보너스/환불)을 DB 세션과 Redis에 반영한다. commit은 호출자가 한다.
+
+        - DB는 증분 UPDATE(balance = balance + n)로 쓴다: 원장 writer의 차감 반영과 동시에 실행돼도 유실이 없다.
+        - Redis 키가 있으면 INCRBY(미반영 차감 포함한 기준값 유지), 없으면 DB 잔액으로 채운다.
+        - 반환: 적립 후 잔액(Redis 기준). 커밋 실패 시 _revert_credit으로 되돌린다.
+        """
+        current = (await self.db.execute(
+            select(UserPoint.balance).where(UserPoint.user_id == user_id)
+        )).scalar_one_or_none()
+        if current is None:
+            self.db.add(UserPoint(
+                user_id=user_id,
+                balance=amount,
+                total_charged=amount,
+                total_used=0,
+                last_charged_at=func.now() if touch_charged_at else None,
+            ))
+            db_after = int(amount)
+        else:
+            values: Dict[str, Any] = {
+                "balance": UserPoint.balance + amount,
+                "total_charged": func.coalesce(UserPoint.total_charged, 0) + amount,
+            }
+            if touch_charged_at:
+                values["last_charged_at"] = func.now()
+            await self.db.execute(
+                update(UserPoint).where(UserPoint.user_id == user_id).values(**values)
+            )
+            db_after = int(current) + int(amount)
+        try:
+            res = await _CREDIT_POINTS(
+                keys=[_balance_key(user_id), LEDGER_PENDING_KEY],
+                args=[int(amount), db_after, str(user_id), BALANCE_CACHE_TTL_SECONDS],
+                client=self.redis,
+            )
+            return int(res) if res is not None else db_after
+        except Exception:
+            return db_after
+
+    async def _revert_credit(self, user_id: str, amount: int) -> None:
+        """DB 커밋이 실패한 적립의 Redis 반영분을 되돌린다."""
+        try:
+            await _CREDIT_POINTS(
+                keys=[_balance_key(user_id), LEDGER_PENDING_KEY],
+                args=[-int(amount), "", str(user_id), BALANCE_CACHE_TTL_SECONDS],
+                client=self.redis,
+            )
+        except Exception:
+            pass
+
+    async def _commit_credit(self, user_id: str, amount: int) -> None:
+        try:
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            await self._revert_credit(user_id, amount)
+            raise
+
     async def _get_or_create_refill_state(self, user_id: str) -> UserRefillState:
         result = await self.db.execute(
             select(UserRefillState).where(UserRefillState.user_id == user_id)
@@ -103,8 +292,8 @@ class PointService:
             now = self._utcnow()
 
             # 구독 배율 반영
-            plan = await self._get_user_plan(user_id)
-            refill_multiplier = plan.refill_speed_multiplier if plan else 1
+            perks = await self._get_plan_perks(user_id)
+            refill_multiplier = int(perks.get("refill_speed_multiplier") or 1)
             effective_interval = TIMER_REFILL_INTERVAL_SECONDS // max(1, refill_multiplier)
 
             current = int(state.timer_bucket or 0)
@@ -121,30 +310,19 @@ class PointService:
                 state.timer_bucket = current + int(earned)
                 state.timer_last_refill_at = last_at + timedelta(seconds=int(earned) * effective_interval)
 
-                # 실제 잔액에 반영
-                result = await self.db.execute(
-                    select(UserPoint).where(UserPoint.user_id == user_id)
-                )
-                user_point = result.scalar_one_or_none()
-                if not user_point:
-                    user_point = UserPoint(user_id=user_id, balance=0, total_charged=0, total_used=0)
-                    self.db.add(user_point)
-                user_point.balance += int(earned)
-                user_point.total_charged += int(earned)
+                # 실제 잔액에 반영(DB + Redis 잔액)
+                balance_after = await self._credit_balance(user_id, int(earned), touch_charged_at=False)
 
                 self.db.add(PointTransaction(
                     user_id=user_id,
                     type="bonus",
                     amount=int(earned),
-                    balance_after=user_point.balance,
+                    balance_after=balance_after,
                     description=f"타이머 리필 +{earned}",
                     reference_type="timer_refill",
                 ))
 
-                await self.db.commit()
-
-                # Redis 잔액 캐시 갱신
-                await self.redis.setex(f"points:{user_id}", 300, user_point.balance)
+                await self._commit_credit(user_id, int(earned))
 
                 current = int(state.timer_bucket or 0)
                 last_at = state.timer_last_refill_at or now
@@ -172,35 +350,32 @@ class PointService:
         finally:
             if has_lock:
                 try:
-                    lua = """
-                    if redis.call('GET', KEYS[1]) == ARGV[1] then
-                      return redis.call('DEL', KEYS[1])
-                    end
-                    return 0
-                    """
-                    await self.redis.eval(lua, 1, lock_key, lock_token)
+                    await _RELEASE_LOCK(keys=[lock_key], args=[lock_token], client=self.redis)
                 except Exception:
                     pass
         
     async def get_balance(self, user_id: str) -> int:
         """사용자 포인트 잔액 조회"""
         # Redis에서 먼저 확인
-        redis_key = f"points:{user_id}"
+        redis_key = _balance_key(user_id)
         balance = await self.redis.get(redis_key)
         
         if balance is not None:
             return int(balance)
         
-        # DB에서 조회
+        # DB에서 조회(키가 없으면 미반영 차감도 없으므로 DB 잔액이 최신)
         result = await self.db.execute(
-            select(UserPoint).where(UserPoint.user_id == user_id)
+            select(UserPoint.balance).where(UserPoint.user_id == user_id)
         )
-        user_point = result.scalar_one_or_none()
+        db_balance = result.scalar_one_or_none()
         
-        if user_point:
-            # Redis에 캐시 (5분)
-            await self.redis.setex(redis_key, 300, user_point.balance)
-            return user_point.balance
+        if db_balance is not None:
+            # Redis에 캐시 (5분). NX: 그 사이 다른 요청이 채운/바꾼 값을 덮어쓰지 않는다.
+            if not await self.redis.set(redis_key, int(db_balance), ex=BALANCE_CACHE_TTL_SECONDS, nx=True):
+                cached = await self.redis.get(redis_key)
+                if cached is not None:
+                    return int(cached)
+            return int(db_balance)
         
         return 0
     
@@ -216,45 +391,24 @@ class PointService:
         if amount <= 0:
             raise ValueError("충전 금액은 0보다 커야 합니다")
         
-        # DB에 UserPoint 레코드가 없으면 생성
-        result = await self.db.execute(
-            select(UserPoint).where(UserPoint.user_id == user_id)
-        )
-        user_point = result.scalar_one_or_none()
-        
-        if not user_point:
-            user_point = UserPoint(
-                user_id=user_id,
-                balance=0,
-                total_charged=0,
-                total_used=0
-            )
-            self.db.add(user_point)
-        
-        # 포인트 충전
-        user_point.balance += amount
-        user_point.total_charged += amount
-        user_point.last_charged_at = func.now()
+        # 포인트 충전(UserPoint가 없으면 생성)
+        balance_after = await self._credit_balance(user_id, amount)
         
         # 거래 내역 추가
         transaction = PointTransaction(
             user_id=user_id,
             type="charge",
             amount=amount,
-            balance_after=user_point.balance,
+            balance_after=balance_after,
             description=description,
             reference_type=reference_type,
             reference_id=reference_id
         )
         self.db.add(transaction)
         
-        await self.db.commit()
+        await self._commit_credit(user_id, amount)
         
-        # Redis 캐시 업데이트
-        redis_key = f"points:{user_id}"
-        await self.redis.setex(redis_key, 300, user_point.balance)
-        
-        return True, user_point.balance
+        return True, balance_after
     
     async def use_points_atomic(
         self,
@@ -264,44 +418,16 @@ class PointService:
         reference_type: Optional[str] = None,
         reference_id: Optional[str] = None
     ) -> Tuple[bool, int, Optional[str]]:
-        """Redis Lua를 사용한 원자적 포인트 차감"""
+        """
+        Redis Lua를 사용한 원자적 포인트 차감
+
+        - 잔액 확인/차감/원장 스트림 기록이 Lua 1회(EVALSHA)로 끝난다. DB 왕복은 없다(캐시 미스 제외).
+        - PointTransaction/UserPoint 반영은 point_ledger writer가 배치로 한다.
+        """
         
         if amount <= 0:
             raise ValueError("사용 금액은 0보다 커야 합니다")
         
-        # Lua 스크립트: 원자적 포인트 차감
-        lua_script = """
-        local user_key = KEYS[1]
-        local log_key = KEYS[2]
-        local amount = tonumber(ARGV[1])
-        local transaction_data = ARGV[2]
-        
-        -- 현재 잔액 조회
-        local current = tonumber(redis.call('GET', user_key) or -1)
-        
-        -- 캐시가 없으면 DB 조회 필요
-        if current == -1 then
-            return {-1, 0}
-        end
-        
-        -- 잔액 부족 체크
-        if current < amount then
-            return {0, current}
-        end
-        
-        -- 포인트 차감
-        local new_balance = redis.call('DECRBY', user_key, amount)
-        
-        -- 거래 로그 추가 (최근 100개만 유지)
-        redis.call('LPUSH', log_key, transaction_data)
-        redis.call('LTRIM', log_key, 0, 99)
-        
-        -- TTL 재설정 (5분)
-        redis.call('EXPIRE', user_key, 300)
-        
-        return {1, new_balance}
-        """
-        
         # 거래 데이터
         transaction_id = str(uuid.uuid4())
         transaction_data = json.dumps({
@@ -314,100 +440,36 @@ class PointService:
         })
         
         # Redis 키
-        redis_key = f"points:{user_id}"
-        log_key = f"points:{user_id}:log"
+        redis_key = _balance_key(user_id)
+        keys = [redis_key, f"points:{user_id}:log", LEDGER_STREAM_KEY, LEDGER_PENDING_KEY]
+        args = [
+            amount,
+            transaction_data,
+            str(user_id),
+            transaction_id,
+            reason or "",
+            reference_type or "",
+            "" if reference_id is None else str(reference_id),
+        ]
         
-        # Lua 스크립트 실행
-        result = await self.redis.eval(
-            lua_script,
-            keys=[redis_key, log_key],
-            args=[amount, transaction_data]
-        )
+        result = await _USE_POINTS(keys=keys, args=args, client=self.redis)
+        status, balance = int(result[0]), int(result[1])
         
-        status, balance = result[0], result[1]
-        
-        # 캐시 미스 (-1): DB에서 잔액 조회 후 재시도
+        # 캐시 미스 (-1): DB 잔액으로 채운 뒤 재시도
         if status == -1:
-            db_balance = await self.get_balance(user_id)
-            await self.redis.setex(redis_key, 300, db_balance)
-            
-            # 재시도
-            result = await self.redis.eval(
-                lua_script,
-                keys=[redis_key, log_key],
-                args=[amount, transaction_data]
-            )
-            status, balance = result[0], result[1]
+            await self.get_balance(user_id)
+            result = await _USE_POINTS(keys=keys, args=args, client=self.redis)
+            status, balance = int(result[0]), int(result[1])
+            if status == -1:
+                # 잔액 행이 없는 유저
+                return False, 0, "포인트가 부족합니다"
         
         # 결과 처리
         if status == 0:
             return False, balance, "포인트가 부족합니다"
         
-        # DB에 거래 내역 저장 (비동기)
-        await self._save_transaction_to_db(
-            user_id=user_id,
-            transaction_id=transaction_id,
-            amount=-amount,  # 사용은 음수
-            balance_after=balance,
-            description=reason,
-            reference_type=reference_type,
-            reference_id=reference_id
-        )
-        
         return True, balance, transaction_id
     
-    async def _save_transaction_to_db(
-        self,
-        user_id: str,
-        transaction_id: str,
-        amount: int,
-        balance_after: int,
-        description: str,
-        reference_type: Optional[str] = None,
-        reference_id: Optional[str] = None
-    ):
-        """거래 내역을 DB에 저장"""
-        try:
-            # UserPoint 업데이트
-            result = await self.db.execute(
-                select(UserPoint).where(UserPoint.user_id == user_id)
-            )
-            user_point = result.scalar_one_or_none()
-            
-            if user_point:
-                user_point.balance = balance_after
-                if amount < 0:
-                    user_point.total_used += abs(amount)
-            else:
-                # UserPoint가 없으면 생성
-                user_point = UserPoint(
-                    user_id=user_id,
-                    balance=balance_after,
-                    total_charged=0,
-                    total_used=abs(amount) if amount < 0 else 0
-                )
-                self.db.add(user_point)
-            
-            # 거래 내역 추가
-            transaction = PointTransaction(
-                id=transaction_id,
-                user_id=user_id,
-                type="use" if amount < 0 else "charge",
-                amount=amount,
-                balance_after=balance_after,
-                description=description,
-                reference_type=reference_type,
-                reference_id=reference_id
-            )
-            self.db.add(transaction)
-            
-            await self.db.commit()
-            
-        except Exception as e:
-            # 로깅만 하고 에러는 발생시키지 않음 (비동기 처리)
-            print(f"Failed to save transaction to DB: {e}")
-            await self.db.rollback()
-    
     async def get_transactions(
         self,
         user_id: str,
@@ -436,37 +498,24 @@ class PointService:
         if not await self.redis.set(redis_key, "1", ex=ttl, nx=True):
             return {"success": False, "already_checked_in": True, "message": "오늘 이미 출석했습니다."}
 
-        # 보너스 포인트 지급
-        result = await self.db.execute(
-            select(UserPoint).where(UserPoint.user_id == user_id)
-        )
-        user_point = result.scalar_one_or_none()
-        if not user_point:
-            user_point = UserPoint(user_id=user_id, balance=0, total_charged=0, total_used=0)
-            self.db.add(user_point)
-
-        user_point.balance += CHECKIN_REWARD
-        user_point.total_charged += CHECKIN_REWARD
-        user_point.last_charged_at = func.now()
+        # 보너스 포인트 지급(DB + Redis 잔액)
+        balance_after = await self._credit_balance(user_id, CHECKIN_REWARD)
 
         transaction = PointTransaction(
             user_id=user_id,
             type="bonus",
             amount=CHECKIN_REWARD,
-            balance_after=user_point.balance,
+            balance_after=balance_after,
             description="출석체크 보상",
             reference_type="checkin",
         )
         self.db.add(transaction)
-        await self.db.commit()
-
-        # Redis 잔액 캐시 갱신
-        await self.redis.setex(f"points:{user_id}", 300, user_point.balance)
+        await self._commit_credit(user_id, CHECKIN_REWARD)
 
         return {
             "success": True,
             "already_checked_in": False,
-            "balance": user_point.balance,
+            "balance": balance_after,
             "reward": CHECKIN_REWARD,
             "message": f"출석체크 완료! +{CHECKIN_REWARD} 루비",
         }
@@ -482,9 +531,9 @@ class PointService:
         base_cost = MODEL_RUBY_COST.get(sub_model, 0)
         if base_cost <= 0:
             return 0
-        plan = await self._get_user_plan(user_id)
-        if plan and plan.model_discount_pct > 0:
-            return max(0, round(base_cost * (100 - plan.model_discount_pct) / 100))
+        discount_pct = int((await self._get_plan_perks(user_id)).get("model_discount_pct") or 0)
+        if discount_pct > 0:
+            return max(0, round(base_cost * (100 - discount_pct) / 100))
         return base_cost
 
     async def deduct_chat_turn(
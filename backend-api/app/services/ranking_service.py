@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
+import weakref
 from datetime import datetime, timedelta, timezone
-from typing import Literal, List, Dict, Any, Optional
+from typing import Literal, List, Dict, Any, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, delete, text
@@ -10,9 +14,12 @@ from sqlalchemy.orm import joinedload
 from app.models.story import Story
 from app.models.character import Character
 
+logger = logging.getLogger(__name__)
+
 KST = timezone(timedelta(hours=9))
 
 RankingKind = Literal["story", "origchat", "character"]
+RANKING_KINDS: Tuple[str, ...] = ("story", "origchat", "character")
 
 
 def today_kst() -> str:
@@ -107,6 +114,129 @@ async def persist_daily_ranking(db: AsyncSession, date_str: str, data: Dict[str,
     if rows:
         await db.execute(insert_daily_rankings_sql(), rows)
     await db.commit()
+    # 새 스냅샷이 생겼으니 해당 날짜의 응답 캐시를 비운다(다음 요청부터 스냅샷 기반으로 재구성).
+    await invalidate_daily_ranking_cache(date_str)
+
+
+async def load_daily_ranking_snapshot(db: AsyncSession, date_str: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    저장된 스냅샷(daily_rankings)을 읽는다.
+
+    - 반환 형태는 build_daily_ranking과 같다(단, 아이템은 id/metric만 포함).
+    - 해당 날짜 스냅샷이 없거나 테이블이 아직 없으면 None
+    """
+    try:
+        rows = (await db.execute(
+            text(
+                "SELECT kind, item_id, metric FROM daily_rankings "
+                "WHERE date = :date ORDER BY kind, rank"
+            ),
+            {"date": date_str},
+        )).all()
+    except Exception as e:
+        # 테이블 미생성(스냅샷을 한 번도 안 찍은 환경) 등: 트랜잭션을 정리하고 폴백하게 둔다.
+        try:
+            await db.rollback()
+        except Exception:
+            pass
+        logger.debug(f"[ranking] snapshot load failed (fallback to live): {e}")
+        return None
+    if not rows:
+        return None
+    data: Dict[str, List[Dict[str, Any]]] = {k: [] for k in RANKING_KINDS}
+    for kind, item_id, metric in rows:
+        data.setdefault(str(kind), []).append({"id": str(item_id), "metric": int(metric or 0)})
+    return data
+
+
+# ---- 응답 캐시 (L1: 프로세스 로컬, L2: Redis) ----
+# - 값은 직렬화가 끝난 JSON 문자열이다(캐시 히트 시 재인코딩 없이 그대로 응답).
+# - 스냅샷 저장 시 invalidate_daily_ranking_cache로 명시적으로 비운다.
+#   (다른 워커의 L1은 RANKING_LOCAL_CACHE_TTL_SEC 이내에 만료된다)
+# - 키에 요청 날짜가 들어가므로 두 맵 모두 무한히 자라지 않게 한다:
+#   락은 약한 참조(대기/보유 중인 요청이 없으면 사라짐), L1은 상한을 넘으면 만료분/오래된 것부터 버린다.
+_LOCAL_CACHE_MAX = 64
+_local_cache: Dict[str, Tuple[float, str]] = {}
+_build_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _cache_key(date_str: str, kind: Optional[str]) -> str:
+    return f"rankings:daily:{date_str}:{kind or 'all'}"
+
+
+def daily_ranking_build_lock(date_str: str, kind: Optional[str]) -> asyncio.Lock:
+    """같은 키의 동시 미스가 한꺼번에 큰 테이블을 조회하지 않도록 프로세스 내에서 직렬화한다."""
+    key = _cache_key(date_str, kind)
+    lock = _build_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _build_locks[key] = lock
+    return lock
+
+
+def _local_cache_set(key: str, expires_at: float, payload: str) -> None:
+    _local_cache.pop(key, None)
+    if len(_local_cache) >= _LOCAL_CACHE_MAX:
+        now = time.monotonic()
+        for k in [k for k, v in _local_cache.items() if v[0] <= now]:
+            _local_cache.pop(k, None)
+        while len(_local_cache) >= _LOCAL_CACHE_MAX:
+            # dict는 삽입 순서를 유지하므로 가장 먼저 넣은 항목부터 버린다
+            _local_cache.pop(next(iter(_local_cache)), None)
+    _local_cache[key] = (expires_at, payload)
+
+
+async def get_cached_daily_ranking(date_str: str, kind: Optional[str]) -> Optional[str]:
+    from app.core.config import settings
+
+    key = _cache_key(date_str, kind)
+    hit = _local_cache.get(key)
+    if hit is not None:
+        if hit[0] > time.monotonic():
+            return hit[1]
+        _local_cache.pop(key, None)
+    try:
+        from app.core.database import redis_client
+        raw = await redis_client.get(key)
+    except Exception:
+        raw = None
+    if raw:
+        local_ttl = int(getattr(settings, "RANKING_LOCAL_CACHE_TTL_SEC", 15) or 0)
+        if local_ttl > 0:
+            _local_cache_set(key, time.monotonic() + local_ttl, raw)
+        return raw
+    return None
+
+
+async def set_cached_daily_ranking(date_str: str, kind: Optional[str], payload: str, *, live: bool) -> None:
+    from app.core.config import settings
+
+    key = _cache_key(date_str, kind)
+    if live:
+        ttl = int(getattr(settings, "RANKING_LIVE_CACHE_TTL_SEC", 60) or 0)
+    else:
+        ttl = int(getattr(settings, "RANKING_CACHE_TTL_SEC", 600) or 0)
+    if ttl <= 0:
+        return
+    local_ttl = min(ttl, int(getattr(settings, "RANKING_LOCAL_CACHE_TTL_SEC", 15) or 0))
+    if local_ttl > 0:
+        _local_cache_set(key, time.monotonic() + local_ttl, payload)
+    try:
+        from app.core.database import redis_client
+        await redis_client.setex(key, ttl, payload)
+    except Exception:
+        pass
+
+
+async def invalidate_daily_ranking_cache(date_str: str) -> None:
+    keys = [_cache_key(date_str, k) for k in (None,) + RANKING_KINDS]
+    for key in keys:
+        _local_cache.pop(key, None)
+    try:
+        from app.core.database import redis_client
+        await redis_client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"[ranking] cache invalidate failed: date={date_str} err={e}")
 
 
 def insert_daily_rankings_sql():
@@ -0,0 +1,377 @@
+"""
+유저별 채팅방 인덱스 (Redis) — 사이드바 방 목록 / 최근 대화 캐릭터 전용
+
+의도/배경:
+- `GET /chat/read/rooms/with-unread`는 chat_room_read_status를 문자열 치환 조인
+  (replace(cast(ChatRoom.id)) == cast(room_id))으로 붙여 인덱스를 못 타고,
+  `get_recent_characters_for_user`는 방마다 "마지막 메시지" 상관 서브쿼리 2개 + EXISTS를 돈다.
+- 방 목록에 필요한 값(최근 활동 순서/안읽음 수/마지막 메시지 요약)을 유저별 Redis 키에 유지하고,
+  목록 API는 인덱스에서 방 id를 뽑은 뒤 PK 조회만 한다.
+
+키(유저별, 같은 TTL로 함께 만료):
+- room_index:{uid}:z        ZSET  room_id → 최근 활동 시각(ms). 메시지 저장/방 생성 시 갱신
+- room_index:{uid}:last     HASH  room_id → {"c": character_id, "at": 마지막 메시지 시각(iso), "t": 앞 100자}
+- room_index:{uid}:unread   HASH  room_id → 안읽음 수(0이면 필드 없음)
+- room_index:{uid}:engaged  SET   유저 메시지가 1개 이상 있는 방(원작챗 유령 방 숨김용)
+- room_index:{uid}:built    DB 재구축 완료 표시. 없으면 읽기 시 DB에서 재구축(rebuild_room_index)
+
+갱신 지점:
+- chat_service.save_message → record_message / 방 생성 → record_room_created / 방 삭제 → drop_rooms
+- 읽음 처리 → mark_read / 안읽음 증가(피드 반응 등) → incr_unread (DB 커밋 후)
+
+정합성:
+- 실시간 갱신은 인덱스가 없어도 항상 기록하고, 재구축은 "더 최근 활동이 이미 있으면 덮어쓰지 않는" 병합이라
+  재구축 중 들어온 메시지가 사라지지 않는다.
+- 다른 경로로 삭제된 방은 목록 조회 시 DB에 없으면 인덱스에서 지운다(지연 정리).
+- Redis 실패 시 호출부는 DB 경로로 폴백한다(읽기 함수는 None 반환).
+"""
+
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, func, exists
+
+from app.core.config import settings
+from app.core.database import redis_client
+from app.core.redis_scripts import register_script
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_CHARS = 100
+
+# room_id → (user_id, character_id): 방 소유자/캐릭터는 바뀌지 않는다.
+_OWNER_CACHE_MAX = 4096
+_owner_cache: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+# KEYS: z, last, engaged, unread, built / ARGV: room, score, meta(''=유지), engaged('1'/'0'), ttl
+_TOUCH = register_script("room_index:touch", """
+local cur = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if (not cur) or tonumber(cur) <= tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+    if ARGV[3] ~= '' then
+        redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+    end
+end
+if ARGV[4] == '1' then
+    redis.call('SADD', KEYS[3], ARGV[1])
+end
+for k = 1, #KEYS do
+    redis.call('EXPIRE', KEYS[k], ARGV[5])
+end
+return 1
+""")
+
+# KEYS: z, last, unread, engaged, built
+# ARGV: ttl, started_ms, (room, score, meta, engaged, unread) * n
+_REBUILD = register_script("room_index:rebuild", """
+local keep = {}
+local i = 3
+while i <= #ARGV do
+    local id, score = ARGV[i], tonumber(ARGV[i + 1])
+    keep[id] = true
+    local cur = redis.call('ZSCORE', KEYS[1], id)
+    if (not cur) or tonumber(cur) <= score then
+        redis.call('ZADD', KEYS[1], score, id)
+        redis.call('HSET', KEYS[2], id, ARGV[i + 2])
+    end
+    if ARGV[i + 3] == '1' then
+        redis.call('SADD', KEYS[4], id)
+    end
+    if tonumber(ARGV[i + 4]) > 0 then
+        redis.call('HSET', KEYS[3], id, ARGV[i + 4])
+    else
+        redis.call('HDEL', KEYS[3], id)
+    end
+    i = i + 5
+end
+-- DB에 없는 방(삭제/보관 한도 밖): 재구축 시작 전 활동분만 지운다(그 사이 생긴 방은 유지).
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[2])
+for _, id in ipairs(stale) do
+    if not keep[id] then
+        redis.call('ZREM', KEYS[1], id)
+        redis.call('HDEL', KEYS[2], id)
+        redis.call('HDEL', KEYS[3], id)
+        redis.call('SREM', KEYS[4], id)
+    end
+end
+redis.call('SET', KEYS[5], '1', 'EX', ARGV[1])
+for k = 1, 4 do
+    redis.call('EXPIRE', KEYS[k], ARGV[1])
+end
+return #stale
+""")
+
+
+def _keys(user_id: Any) -> Dict[str, str]:
+    base = f"room_index:{user_id}"
+    return {
+        "z": f"{base}:z",
+        "last": f"{base}:last",
+        "unread": f"{base}:unread",
+        "engaged": f"{base}:engaged",
+        "built": f"{base}:built",
+    }
+
+
+def _ttl() -> int:
+    return max(3600, int(getattr(settings, "ROOM_INDEX_TTL_SEC", 7 * 86400) or 7 * 86400))
+
+
+def _score(dt: Optional[datetime]) -> int:
+    if dt is None:
+        return int(time.time() * 1000)
+    try:
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp() * 1000)
+    except Exception:
+        return int(time.time() * 1000)
+
+
+def _meta(character_id: Any, at: Optional[datetime], content: Optional[str]) -> str:
+    return json.dumps(
+        {
+            "c": str(character_id) if character_id else "",
+            "at": at.isoformat() if at is not None else None,
+            "t": (content or "")[:SNIPPET_CHARS],
+        },
+        ensure_ascii=False,
+    )
+
+
+def _remember_owner(room_id: Any, user_id: Any, character_id: Any) -> None:
+    key = str(room_id)
+    _owner_cache[key] = (str(user_id), str(character_id))
+    _owner_cache.move_to_end(key)
+    while len(_owner_cache) > _OWNER_CACHE_MAX:
+        _owner_cache.popitem(last=False)
+
+
+async def _room_owner(db, room_id: Any) -> Optional[Tuple[str, str]]:
+    hit = _owner_cache.get(str(room_id))
+    if hit is not None:
+        _owner_cache.move_to_end(str(room_id))
+        return hit
+    from app.models.chat import ChatRoom
+
+    row = (await db.execute(
+        select(ChatRoom.user_id, ChatRoom.character_id).where(ChatRoom.id == room_id)
+    )).first()
+    if row is None:
+        return None
+    _remember_owner(room_id, row[0], row[1])
+    return str(row[0]), str(row[1])
+
+
+async def _touch(user_id: Any, room_id: Any, score: int, meta: str, engaged: bool) -> None:
+    k = _keys(user_id)
+    await _TOUCH(
+        keys=[k["z"], k["last"], k["engaged"], k["unread"], k["built"]],
+        args=[str(room_id), score, meta, "1" if engaged else "0", _ttl()],
+    )
+
+
+# ---------------------------------------------------------------------------
+# 쓰기(베스트-에포트: 실패해도 요청은 계속)
+# ---------------------------------------------------------------------------
+async def record_message(db, room_id: Any, sender_type: str, content: Optional[str], created_at: Optional[datetime]) -> None:
+    """메시지 저장 직후: 방을 맨 앞으로 올리고 마지막 메시지 요약을 갱신한다."""
+    try:
+        owner = await _room_owner(db, room_id)
+        if owner is None:
+            return
+        user_id, character_id = owner
+        await _touch(
+            user_id,
+            room_id,
+            _score(created_at),
+            _meta(character_id, created_at, content),
+            str(sender_type or "").lower() == "user",
+        )
+    except Exception as e:
+        logger.debug(f"[room_index] record_message failed room={room_id}: {e}")
+
+
+async def record_room_created(user_id: Any, room_id: Any, character_id: Any, created_at: Optional[datetime] = None) -> None:
+    """새 방: 메시지 없이 목록에 올린다(마지막 메시지 요약은 비어 있음)."""
+    _remember_owner(room_id, user_id, character_id)
+    try:
+        await _touch(user_id, room_id, _score(created_at), _meta(character_id, None, None), False)
+    except Exception as e:
+        logger.debug(f"[room_index] record_room_created failed room={room_id}: {e}")
+
+
+async def mark_read(user_id: Any, room_id: Any) -> None:
+    try:
+        await redis_client.hdel(_keys(user_id)["unread"], str(room_id))
+    except Exception as e:
+        logger.debug(f"[room_index] mark_read failed room={room_id}: {e}")
+
+
+async def incr_unread(user_id: Any, room_id: Any, amount: int = 1) -> None:
+    try:
+        k = _keys(user_id)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hincrby(k["unread"], str(room_id), int(amount))
+        pipe.expire(k["unread"], _ttl())
+        await pipe.execute()
+    except Exception as e:
+        logger.debug(f"[room_index] incr_unread failed room={room_id}: {e}")
+
+
+async def drop_rooms(user_id: Any, room_ids: Iterable[Any]) -> None:
+    ids = [str(r) for r in room_ids if r]
+    if not ids:
+        return
+    for rid in ids:
+        _owner_cache.pop(rid, None)
+    try:
+        k = _keys(user_id)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.zrem(k["z"], *ids)
+        pipe.hdel(k["last"], *ids)
+        pipe.hdel(k["unread"], *ids)
+        pipe.srem(k["engaged"], *ids)
+        await pipe.execute()
+    except Exception as e:
+        logger.debug(f"[room_index] drop_rooms failed user={user_id}: {e}")
+
+
+# ---------------------------------------------------------------------------
+# 재구축(DB → 인덱스)
+# ---------------------------------------------------------------------------
+async def rebuild_room_index(db, user_id: Any) -> int:
+    """
+    유저의 방 인덱스를 DB에서 다시 만든다(최근 ROOM_INDEX_MAX_ROOMS개).
+    - 마지막 메시지는 방별 상관 서브쿼리(ix_chat_messages_room_created_id 역순 1건)로 한 번만 계산한다.
+    반환: 인덱스에 넣은 방 수
+    """
+    from app.models.chat import ChatRoom, ChatMessage
+    from app.models.chat_read_status import ChatRoomReadStatus
+
+    started_ms = int(time.time() * 1000)
+    max_rooms = max(50, int(getattr(settings, "ROOM_INDEX_MAX_ROOMS", 2000) or 2000))
+
+    last_at = (
+        select(func.max(ChatMessage.created_at))
+        .where(ChatMessage.chat_room_id == ChatRoom.id)
+        .correlate(ChatRoom)
+        .scalar_subquery()
+    )
+    last_content = (
+        select(ChatMessage.content)
+        .where(ChatMessage.chat_room_id == ChatRoom.id)
+        .order_by(ChatMessage.created_at.desc())
+        .limit(1)
+        .correlate(ChatRoom)
+        .scalar_subquery()
+    )
+    has_user_message = exists(
+        select(1).where(
+            ChatMessage.chat_room_id == ChatRoom.id,
+            ChatMessage.sender_type == "user",
+        )
+    )
+    rows = (await db.execute(
+        select(
+            ChatRoom.id,
+            ChatRoom.character_id,
+            ChatRoom.updated_at,
+            last_at,
+            func.substr(last_content, 1, SNIPPET_CHARS),
+            has_user_message,
+        )
+        .where(ChatRoom.user_id == user_id)
+        .order_by(ChatRoom.updated_at.desc())
+        .limit(max_rooms)
+    )).all()
+
+    # 읽음 상태는 조인하지 않고 따로 읽어 Python에서 맞춘다(컬럼 타입별 바인딩으로 UUID 포맷 차이 없음).
+    unread: Dict[str, int] = {}
+    for rid, cnt in (await db.execute(
+        select(ChatRoomReadStatus.room_id, ChatRoomReadStatus.unread_count)
+        .where(ChatRoomReadStatus.user_id == user_id, ChatRoomReadStatus.unread_count > 0)
+    )).all():
+        unread[str(rid)] = int(cnt or 0)
+
+    args: List[Any] = [_ttl(), started_ms]
+    for rid, cid, updated_at, at, snippet, engaged in rows:
+        _remember_owner(rid, user_id, cid)
+        args.extend([
+            str(rid),
+            _score(at if at is not None else updated_at),
+            _meta(cid, at, snippet),
+            "1" if engaged else "0",
+            unread.get(str(rid), 0),
+        ])
+    k = _keys(user_id)
+    await _REBUILD(keys=[k["z"], k["last"], k["unread"], k["engaged"], k["built"]], args=args)
+    return len(rows)
+
+
+async def _ensure(db, user_id: Any) -> None:
+    if not await redis_client.exists(_keys(user_id)["built"]):
+        await rebuild_room_index(db, user_id)
+
+
+# ---------------------------------------------------------------------------
+# 읽기(실패 시 None → 호출부 DB 폴백)
+# ---------------------------------------------------------------------------
+async def recent_room_ids(db, user_id: Any, start: int, stop: int) -> Optional[List[str]]:
+    """최근 활동 순 방 id[start..stop] (인덱스가 없으면 재구축 후 조회)."""
+    try:
+        await _ensure(db, user_id)
+        return [str(x) for x in (await redis_client.zrevrange(_keys(user_id)["z"], start, stop) or [])]
+    except Exception as e:
+        logger.warning(f"[room_index] read failed user={user_id} (fallback to DB): {e}")
+        return None
+
+
+async def room_entries(user_id: Any, room_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """방별 {character_id, last_at(datetime|None), snippet, unread, engaged}."""
+    if not room_ids:
+        return {}
+    k = _keys(user_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hmget(k["last"], room_ids)
+    pipe.hmget(k["unread"], room_ids)
+    for rid in room_ids:
+        pipe.sismember(k["engaged"], rid)
+    res = await pipe.execute()
+    metas, unreads, engaged = res[0] or [], res[1] or [], res[2:]
+    out: Dict[str, Dict[str, Any]] = {}
+    for i, rid in enumerate(room_ids):
+        try:
+            meta = json.loads(metas[i]) if i < len(metas) and metas[i] else {}
+        except Exception:
+            meta = {}
+        at = None
+        if meta.get("at"):
+            try:
+                at = datetime.fromisoformat(str(meta["at"]))
+            except Exception:
+                at = None
+        try:
+            n = int(unreads[i] or 0) if i < len(unreads) else 0
+        except Exception:
+            n = 0
+        out[rid] = {
+            "character_id": meta.get("c") or None,
+            "last_at": at,
+            "snippet": meta.get("t") if at is not None else None,
+            "unread": max(0, n),
+            "engaged": bool(engaged[i]) if i < len(engaged) else False,
+        }
+    return out
+
+
+def to_uuid(room_id: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(room_id))
+    except Exception:
+        return None
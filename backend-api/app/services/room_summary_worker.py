@@ -0,0 +1,183 @@
+"""
+채팅방 요약 워커 (룸 단위 병합 + 동시성 제한)
+
+의도/배경:
+- 채팅 턴이 끝날 때마다 요청 프로세스가 방 전체 COUNT, overflow 구간 OFFSET 재조회, LLM 요약 호출을
+  직접(또는 즉석 create_task로) 하고 있었다. 요약은 응답과 무관하므로 채팅 경로에서 완전히 분리한다.
+
+구조:
+- 채팅 경로: enqueue_room_summary()만 호출한다(Redis 파이프라인 1회, DB/LLM 없음).
+  - 요청 HASH `summary:room:{room_id}`: 최신 파라미터(params)와 이벤트 시퀀스(seq)
+  - 대기 ZSET `summary:rooms`: member=room_id, score=실행 예정 ms.
+    ZADD NX라 이미 대기 중인 방에 이벤트가 더 와도 한 번으로 병합된다(SUMMARY_WORKER_DEBOUNCE_MS 만큼 모아서 실행).
+- 워커(lifespan에서 시작, 프로세스마다 1개):
+  - claim 스크립트가 실행 시각이 지난 방을 꺼내면서 score를 임대 만료 시각으로 미룬다
+    → 같은 방을 두 워커가 동시에 요약하지 않고, 워커가 죽으면 임대 만료 후 다른 워커가 가져간다.
+  - 프로세스당 최대 SUMMARY_WORKER_CONCURRENCY개 방을 동시에 처리한다.
+  - 처리 중에 새 이벤트가 오면(seq 변경) 끝난 뒤 곧바로 다시 실행한다. 아니면 대기열에서 뺀다.
+- 실제 요약(커서 기반 증분)은 핸들러가 한다: set_room_summary_handler(fn)
+  (fn(room_id, params) -> 남은 작업이 있으면 True)
+
+주의:
+- 핸들러가 실패하면 그 방은 대기열에서 빠진다(커서는 그대로라 다음 채팅 턴 이벤트에서 이어서 요약된다).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import redis_client
+from app.core.db_pool_stats import pool_route
+from app.core.redis_scripts import register_script
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "summary:rooms"
+_REQ_PREFIX = "summary:room:"
+_REQ_TTL_SECONDS = 86400
+
+RoomSummaryHandler = Callable[[str, Dict[str, Any]], Awaitable[bool]]
+
+_handler: Optional[RoomSummaryHandler] = None
+_worker: Optional[asyncio.Task] = None
+_running: Set[asyncio.Task] = set()
+
+# KEYS: 대기 ZSET / ARGV: now_ms, lease_ms, limit, 요청 키 접두어
+# 반환: {room_id, seq, params, ...}
+_CLAIM = register_script("summary:claim", """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[3]))
+local out = {}
+for _, room in ipairs(due) do
+    redis.call('ZADD', KEYS[1], 'XX', tonumber(ARGV[1]) + tonumber(ARGV[2]), room)
+    local req = redis.call('HMGET', ARGV[4] .. room, 'seq', 'params')
+    table.insert(out, room)
+    table.insert(out, req[1] or '0')
+    table.insert(out, req[2] or '')
+end
+return out
+""")
+
+# KEYS: 대기 ZSET / ARGV: room_id, 처리한 seq, 요청 키 접두어, 재실행 시각 ms, 강제 재실행(1/0)
+# 반환: 1(다시 예약) / 0(완료, 대기열에서 제거)
+_FINISH = register_script("summary:finish", """
+local key = ARGV[3] .. ARGV[1]
+local cur = redis.call('HGET', key, 'seq') or '0'
+if ARGV[5] == '1' or cur ~= ARGV[2] then
+    redis.call('ZADD', KEYS[1], tonumber(ARGV[4]), ARGV[1])
+    return 1
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('DEL', key)
+return 0
+""")
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _concurrency() -> int:
+    return max(1, int(getattr(settings, "SUMMARY_WORKER_CONCURRENCY", 2) or 1))
+
+
+def set_room_summary_handler(handler: RoomSummaryHandler) -> None:
+    """요약 핸들러 등록(app.api.chat 모듈 로드 시)."""
+    global _handler
+    _handler = handler
+
+
+async def enqueue_room_summary(room_id: Any, **params: Any) -> None:
+    """
+    메시지 추가 이벤트: 방을 요약 대기열에 넣는다(이미 대기 중이면 병합).
+    params: character_name, preferred_model, preferred_sub_model, recent_limit, min_delta_if_existing
+    """
+    try:
+        key = f"{_REQ_PREFIX}{room_id}"
+        delay_ms = max(0, int(getattr(settings, "SUMMARY_WORKER_DEBOUNCE_MS", 3000) or 0))
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(key, "params", json.dumps(params, ensure_ascii=False, default=str))
+        pipe.hincrby(key, "seq", 1)
+        pipe.expire(key, _REQ_TTL_SECONDS)
+        pipe.zadd(_PENDING_KEY, {str(room_id): _now_ms() + delay_ms}, nx=True)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"[summary_worker] enqueue failed room={room_id}: {e}")
+
+
+async def _claim(limit: int) -> List[Tuple[str, str, Dict[str, Any]]]:
+    lease_ms = max(1, int(getattr(settings, "SUMMARY_WORKER_LEASE_SEC", 180) or 180)) * 1000
+    res = await _CLAIM(keys=[_PENDING_KEY], args=[_now_ms(), lease_ms, int(limit), _REQ_PREFIX])
+    jobs: List[Tuple[str, str, Dict[str, Any]]] = []
+    res = list(res or [])
+    for i in range(0, len(res) - 2, 3):
+        try:
+            params = json.loads(res[i + 2]) if res[i + 2] else {}
+        except Exception:
+            params = {}
+        jobs.append((str(res[i]), str(res[i + 1]), params if isinstance(params, dict) else {}))
+    return jobs
+
+
+async def _run(room_id: str, seq: str, params: Dict[str, Any]) -> None:
+    more = False
+    try:
+        if _handler is not None:
+            with pool_route("room_summary_worker"):
+                more = bool(await _handler(room_id, params))
+    except Exception as e:
+        logger.warning(f"[summary_worker] failed room={room_id}: {e}")
+        more = False
+    try:
+        await _FINISH(
+            keys=[_PENDING_KEY],
+            args=[room_id, seq, _REQ_PREFIX, _now_ms(), "1" if more else "0"],
+        )
+    except Exception as e:
+        logger.warning(f"[summary_worker] finish failed room={room_id}: {e}")
+
+
+async def _worker_loop() -> None:
+    interval = max(0.1, float(getattr(settings, "SUMMARY_WORKER_POLL_MS", 1000) or 1000) / 1000.0)
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            free = _concurrency() - len(_running)
+            if free > 0 and _handler is not None:
+                for room_id, seq, params in await _claim(free):
+                    task = loop.create_task(_run(room_id, seq, params))
+                    _running.add(task)
+                    task.add_done_callback(_running.discard)
+            await asyncio.sleep(interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[summary_worker] loop error (continuing): {e}")
+            await asyncio.sleep(interval)
+
+
+async def start_room_summary_worker() -> None:
+    """lifespan 시작 시 호출."""
+    global _worker
+    if _worker is not None and not _worker.done():
+        return
+    _worker = asyncio.get_running_loop().create_task(_worker_loop())
+
+
+async def stop_room_summary_worker() -> None:
+    """lifespan 종료 시 호출: 새 작업을 받지 않고, 진행 중인 요약은 취소한다(임대 만료 후 재실행)."""
+    global _worker
+    task = _worker
+    _worker = None
+    for t in [task, *_running]:
+        if t is not None and not t.done():
+            t.cancel()
+    for t in [task, *list(_running)]:
+        if t is None:
+            continue
+        try:
+            await t
+        except (asyncio.CancelledError, Exception):
+            pass
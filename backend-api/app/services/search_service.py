@@ -0,0 +1,229 @@
+"""
+캐릭터/스토리 검색 서비스 (공개 목록, 크리에이터 목록, CMS 공통)
+
+의도/배경:
+- 기존 검색은 `%q%` ILIKE를 엔드포인트마다 직접 조립해 인덱스를 못 타고 매번 테이블 전체를 훑었다.
+- 검색 조건/랭킹 조립을 여기로 모으고, DB별 인덱스를 사용한다.
+  - PostgreSQL: pg_trgm GIN 인덱스(postgres_migration.py). ILIKE '%q%'가 그대로 인덱스를 타고,
+    similarity()로 관련도 랭킹을 만든다.
+  - SQLite: FTS5(trigram) 테이블 characters_fts/stories_fts(precise_migration.py).
+    FTS 행은 원본 UUID(id UNINDEXED 컬럼)로 원본과 잇는다(암묵 rowid는 VACUUM 등으로 바뀔 수 있음).
+    테이블이 없거나(구버전 SQLite/구 스키마) 검색어가 3자 미만이면 LIKE로 폴백한다.
+
+규칙(기존 동작 호환):
+- 이름/설명(스토리는 제목/본문)은 원문 그대로, 크리에이터는 '@', 태그는 '#' 접두어를 떼고 부분 일치
+- 관련도순 정렬은 sort=relevance를 요청했을 때만 쓴다(기존 클라이언트의 정렬은 그대로).
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.database import engine as _engine
+from app.models.character import Character
+from app.models.story import Story
+from app.models.tag import Tag
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# trigram 인덱스(pg_trgm/FTS5 trigram)가 동작하는 최소 검색어 길이
+MIN_INDEXED_TERM_LEN = 3
+
+SORT_RELEVANCE = "relevance"
+
+# FTS 테이블 준비 여부: 준비됨은 프로세스 동안 유지, 미준비는 TTL 뒤 다시 확인(마이그레이션 후 재시작 없이 반영)
+_FTS_RECHECK_SEC = 60.0
+_fts_ready: Dict[str, bool] = {}
+_fts_missing_until: Dict[str, float] = {}
+
+
+class SearchTerms:
+    """정규화된 검색어 묶음."""
+
+    __slots__ = ("raw", "text", "creator", "tag")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.text = raw
+        self.creator = raw.lstrip("@").strip() or raw
+        self.tag = raw.lstrip("#").strip() or raw
+
+
+def parse_search(search: Optional[str]) -> Optional[SearchTerms]:
+    raw = (search or "").strip()
+    if not raw:
+        return None
+    return SearchTerms(raw)
+
+
+def uses_relevance_order(search: Optional[str], sort: Optional[str]) -> bool:
+    """검색어가 있고 sort=relevance를 요청했을 때만 관련도순으로 정렬한다."""
+    return bool((search or "").strip()) and (sort or "").strip().lower() == SORT_RELEVANCE
+
+
+def _dialect_name() -> str:
+    try:
+        return str(getattr(getattr(_engine, "dialect", None), "name", "") or "")
+    except Exception:
+        return ""
+
+
+def _fts_phrase(term: str, columns: Optional[Iterable[str]] = None) -> str:
+    """FTS5 MATCH 식: 사용자 입력은 항상 phrase로 감싼다(연산자 주입 방지)."""
+    phrase = '"' + term.replace('"', '""') + '"'
+    cols = list(columns or [])
+    if cols:
+        return "{" + " ".join(cols) + "} : " + phrase
+    return phrase
+
+
+async def _sqlite_fts_ready(db: Any, fts_name: str) -> bool:
+    """FTS 테이블(id 컬럼 포함 스키마) 준비 여부. 성공은 계속 캐시, 실패는 _FTS_RECHECK_SEC 동안만 캐시."""
+    if _fts_ready.get(fts_name):
+        return True
+    if time.monotonic() < _fts_missing_until.get(fts_name, 0.0):
+        return False
+    ok = False
+    try:
+        row = (await db.execute(
+            text("SELECT 1 FROM pragma_table_info(:n) WHERE name = 'id'"), {"n": fts_name}
+        )).first()
+        ok = row is not None
+    except Exception as e:
+        logger.debug(f"[search] fts check failed ({fts_name}): {e}")
+    if ok:
+        _fts_ready[fts_name] = True
+        _fts_missing_until.pop(fts_name, None)
+    else:
+        _fts_missing_until[fts_name] = time.monotonic() + _FTS_RECHECK_SEC
+    return ok
+
+
+async def _use_fts(db: Any, fts_name: str, term: str) -> bool:
+    return (
+        _dialect_name() == "sqlite"
+        and len(term) >= MIN_INDEXED_TERM_LEN
+        and await _sqlite_fts_ready(db, fts_name)
+    )
+
+
+def _like(term: str) -> str:
+    return f"%{term}%"
+
+
+async def character_search_filter(
+    db: Any,
+    search: Optional[str],
+    *,
+    include_description: bool = True,
+    include_creator: bool = True,
+    include_tags: bool = True,
+) -> Tuple[Optional[ColumnElement], Optional[ColumnElement]]:
+    """
+    캐릭터 검색 조건과 관련도 식을 만든다.
+
+    반환: (where 절, 관련도 식) — 검색어가 없으면 (None, None)
+    """
+    terms = parse_search(search)
+    if terms is None:
+        return None, None
+    like = _like(terms.text)
+    conds = []
+    if await _use_fts(db, "characters_fts", terms.text):
+        cols = ["name", "description"] if include_description else ["name"]
+        conds.append(
+            text("characters.id IN (SELECT id FROM characters_fts WHERE characters_fts MATCH :character_fts_q)")
+            .bindparams(character_fts_q=_fts_phrase(terms.text, cols))
+        )
+    else:
+        conds.append(Character.name.ilike(like))
+        if include_description:
+            conds.append(Character.description.ilike(like))
+    if include_creator:
+        conds.append(Character.creator.has(User.username.ilike(_like(terms.creator))))
+    if include_tags:
+        tag_like = _like(terms.tag)
+        conds.append(Character.tags.any(or_(Tag.slug.ilike(tag_like), Tag.name.ilike(tag_like))))
+    return or_(*conds), _name_relevance(Character.name, terms.text)
+
+
+async def story_search_filter(
+    db: Any,
+    search: Optional[str],
+    *,
+    include_content: bool = True,
+    include_related: bool = False,
+) -> Tuple[Optional[ColumnElement], Optional[ColumnElement]]:
+    """
+    스토리 검색 조건과 관련도 식을 만든다.
+
+    - include_related: 크리에이터/대표 캐릭터 이름/태그까지 검색(크리에이터 목록 기존 동작)
+    """
+    terms = parse_search(search)
+    if terms is None:
+        return None, None
+    like = _like(terms.text)
+    conds = []
+    if await _use_fts(db, "stories_fts", terms.text):
+        cols = ["title", "content"] if include_content else ["title"]
+        conds.append(
+            text("stories.id IN (SELECT id FROM stories_fts WHERE stories_fts MATCH :story_fts_q)")
+            .bindparams(story_fts_q=_fts_phrase(terms.text, cols))
+        )
+    else:
+        conds.append(Story.title.ilike(like))
+        if include_content:
+            conds.append(Story.content.ilike(like))
+    if include_related:
+        conds.append(Story.creator.has(User.username.ilike(_like(terms.creator))))
+        conds.append(Story.character.has(Character.name.ilike(like)))
+        tag_like = _like(terms.tag)
+        conds.append(Story.tags.any(or_(Tag.slug.ilike(tag_like), Tag.name.ilike(tag_like))))
+    return or_(*conds), _name_relevance(Story.title, terms.text)
+
+
+def _name_relevance(column: Any, term: str) -> ColumnElement:
+    """
+    관련도 식.
+
+    - PostgreSQL: 정확 일치 > 접두 일치 > 포함, 동률은 trigram similarity
+    - 그 외: 정확/접두/포함 단계만 사용
+    """
+    tier = case(
+        (func.lower(column) == term.lower(), 3),
+        (column.ilike(f"{term}%"), 2),
+        (column.ilike(_like(term)), 1),
+        else_=0,
+    )
+    if _dialect_name() == "postgresql":
+        return tier + func.similarity(column, term)
+    return tier
+
+
+async def sql_name_match(db: Any, alias: str, entity: str, params: Dict[str, Any], search: Optional[str]) -> Optional[str]:
+    """
+    raw SQL(text) 쿼리용 이름/제목 일치 조건(CMS 통합 목록).
+
+    - entity: "character"(alias.name) | "story"(alias.title)
+    - params에 필요한 바인드 값을 채우고 WHERE 조각을 반환한다. 검색어가 없으면 None
+    """
+    terms = parse_search(search)
+    if terms is None:
+        return None
+    if entity == "character":
+        fts_name, column = "characters_fts", "name"
+    else:
+        fts_name, column = "stories_fts", "title"
+    key = f"{entity}_search"
+    if await _use_fts(db, fts_name, terms.text):
+        params[key] = _fts_phrase(terms.text, [column])
+        return f"{alias}.id IN (SELECT id FROM {fts_name} WHERE {fts_name} MATCH :{key})"
+    params[key] = _like(terms.text)
+    if _dialect_name() == "postgresql":
+        return f"{alias}.{column} ILIKE :{key}"
+    # SQLite LIKE는 ASCII 대소문자를 구분하지 않는다(ILIKE 없음).
+    return f"{alias}.{column} LIKE :{key}"
@@ -0,0 +1,248 @@
+"""
+단계 그래프 실행기 (퀵 캐릭터 생성 파이프라인용)
+
+의도/배경:
+- 30초 캐릭터 생성(quick-create-30s)과 그 백그라운드 후처리는 LLM 단계
+  (프롬프트 → 스탯 / 오프닝 → 턴 사건, 디테일 / 엔딩 초안 → 에필로그)를 한 줄로 순서대로 await 하고 있었다.
+  프롬프트(world_setting)가 나온 뒤에는 서로 독립인 단계가 많아, 전체 시간이 "합"이 아니라 "가장 긴 경로"가 될 수 있다.
+- 단계와 의존 관계를 선언하면, 의존이 끝난 단계부터 동시에 실행한다.
+
+단계(Stage):
+- run(results): 의존 단계 결과(dict: 이름 → 값)를 받아 값을 돌려주는 코루틴 함수
+- timeout: 시도 1회 제한(초), retries: 실패/타임아웃/accept 거부 시 추가 시도 횟수
+- accept: 결과 검증(False면 재시도). 마지막 시도까지 거부되면 그 값을 status="partial"로 남긴다.
+- required: 실패하면 그래프 전체를 중단하고 StageGraphError를 올린다. 아니면 값 None(status="failed")으로 계속.
+  실패한 단계에 의존하는 단계는 실행하지 않는다(status="skipped").
+
+체크포인트(선택):
+- checkpoint_key가 있으면 성공한 단계 값을 Redis 해시(field=단계 이름, JSON)에 저장한다.
+  같은 키로 다시 실행하면(예: 같은 request_id 재시도) 저장된 단계는 건너뛴다(status="cached").
+- JSON으로 직렬화되지 않는 값은 체크포인트하지 않는다.
+
+타이밍:
+- 단계별 소요(ms)/시도 횟수/상태를 StageRun으로 돌려주고, format_stage_timings()로 한 줄 로그를 만든다.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CHECKPOINT_TTL_SEC = 1800
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    timeout: float = 60.0
+    retries: int = 0
+    required: bool = True
+    accept: Optional[Callable[[Any], bool]] = None
+
+
+@dataclass
+class StageRun:
+    status: str = "pending"  # ok | partial | cached | failed | skipped
+    value: Any = None
+    ms: int = 0
+    attempts: int = 0
+    error: str = ""
+
+    @property
+    def usable(self) -> bool:
+        return self.status in ("ok", "partial", "cached")
+
+
+@dataclass
+class StageGraphResult:
+    runs: Dict[str, StageRun] = field(default_factory=dict)
+    total_ms: int = 0
+
+    def value(self, name: str, default: Any = None) -> Any:
+        r = self.runs.get(name)
+        if r is None or not r.usable or r.value is None:
+            return default
+        return r.value
+
+
+class StageGraphError(Exception):
+    """required 단계 실패."""
+
+    def __init__(self, stage: str, cause: BaseException, result: StageGraphResult):
+        super().__init__(f"stage '{stage}' failed: {type(cause).__name__}: {str(cause)[:200]}")
+        self.stage = stage
+        self.cause = cause
+        self.result = result
+
+
+def _toposort(stages: Sequence[Stage]) -> List[Stage]:
+    by_name: Dict[str, Stage] = {}
+    for s in stages:
+        if s.name in by_name:
+            raise ValueError(f"duplicate stage: {s.name}")
+        by_name[s.name] = s
+    for s in stages:
+        for d in s.deps:
+            if d not in by_name:
+                raise ValueError(f"stage '{s.name}' depends on unknown stage '{d}'")
+    order: List[Stage] = []
+    state: Dict[str, int] = {}
+
+    def visit(s: Stage) -> None:
+        st = state.get(s.name, 0)
+        if st == 2:
+            return
+        if st == 1:
+            raise ValueError(f"cycle at stage '{s.name}'")
+        state[s.name] = 1
+        for d in s.deps:
+            visit(by_name[d])
+        state[s.name] = 2
+        order.append(s)
+
+    for s in stages:
+        visit(s)
+    return order
+
+
+async def _load_checkpoints(key: str) -> Dict[str, Any]:
+    try:
+        from app.core.database import redis_client
+        raw = await redis_client.hgetall(key)
+    except Exception as e:
+        logger.debug(f"[stage_graph] checkpoint load failed key={key}: {e}")
+        return {}
+    out: Dict[str, Any] = {}
+    for name, payload in (raw or {}).items():
+        try:
+            out[str(name)] = json.loads(payload)
+        except Exception:
+            continue
+    return out
+
+
+async def _save_checkpoint(key: str, name: str, value: Any, ttl: int) -> None:
+    try:
+        payload = json.dumps(value, ensure_ascii=False)
+    except Exception:
+        return
+    try:
+        from app.core.database import redis_client
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hset(key, name, payload)
+        pipe.expire(key, ttl)
+        await pipe.execute()
+    except Exception as e:
+        logger.debug(f"[stage_graph] checkpoint save failed key={key} stage={name}: {e}")
+
+
+async def clear_checkpoints(key: str) -> None:
+    """파이프라인이 끝까지 성공해 체크포인트가 더 필요 없을 때 호출."""
+    if not key:
+        return
+    try:
+        from app.core.database import redis_client
+        await redis_client.delete(key)
+    except Exception:
+        pass
+
+
+async def _run_stage(stage: Stage, inputs: Dict[str, Any], run: StageRun) -> None:
+    attempts = max(1, int(stage.retries or 0) + 1)
+    t0 = time.perf_counter()
+    last_value: Any = None
+    rejected = False
+    for attempt in range(1, attempts + 1):
+        run.attempts = attempt
+        try:
+            value = await asyncio.wait_for(stage.run(inputs), timeout=stage.timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            run.error = f"timeout>{stage.timeout:g}s"
+        except Exception as e:
+            run.error = f"{type(e).__name__}: {str(e)[:200]}"
+        else:
+            if stage.accept is None or stage.accept(value):
+                run.status, run.value, run.error = "ok", value, ""
+                run.ms = int((time.perf_counter() - t0) * 1000)
+                return
+            last_value, rejected = value, True
+            run.error = "rejected"
+        if attempt < attempts:
+            await asyncio.sleep(min(2.0, 0.3 * attempt))
+    run.ms = int((time.perf_counter() - t0) * 1000)
+    if rejected:
+        run.status, run.value = "partial", last_value
+    else:
+        run.status = "failed"
+
+
+async def run_stage_graph(
+    stages: Sequence[Stage],
+    *,
+    checkpoint_key: str = "",
+    checkpoint_ttl: int = _CHECKPOINT_TTL_SEC,
+    label: str = "stage_graph",
+) -> StageGraphResult:
+    """
+    의존이 끝난 단계부터 동시에 실행한다.
+    - required 단계가 실패하면 남은 단계를 취소하고 StageGraphError를 올린다(부분 결과는 error.result).
+    """
+    order = _toposort(stages)
+    result = StageGraphResult(runs={s.name: StageRun() for s in order})
+    cached = await _load_checkpoints(checkpoint_key) if checkpoint_key else {}
+    done: Dict[str, asyncio.Future] = {}
+    t0 = time.perf_counter()
+
+    async def _node(stage: Stage) -> None:
+        run = result.runs[stage.name]
+        if stage.deps:
+            await asyncio.gather(*(done[d] for d in stage.deps))
+        if any(not result.runs[d].usable for d in stage.deps):
+            run.status = "skipped"
+            run.error = "dependency failed"
+            return
+        if stage.name in cached:
+            run.status, run.value = "cached", cached[stage.name]
+            return
+        inputs = {d: result.runs[d].value for d in stage.deps}
+        await _run_stage(stage, inputs, run)
+        if run.status == "ok" and checkpoint_key:
+            await _save_checkpoint(checkpoint_key, stage.name, run.value, checkpoint_ttl)
+        if run.status == "failed" and stage.required:
+            raise StageGraphError(stage.name, RuntimeError(run.error or "failed"), result)
+
+    for stage in order:
+        done[stage.name] = asyncio.ensure_future(_node(stage))
+
+    try:
+        await asyncio.gather(*done.values())
+    except BaseException:
+        for task in done.values():
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*done.values(), return_exceptions=True)
+        raise
+    finally:
+        result.total_ms = int((time.perf_counter() - t0) * 1000)
+        try:
+            logger.info(f"[perf] {label} {format_stage_timings(result)}")
+        except Exception:
+            pass
+    return result
+
+
+def format_stage_timings(result: StageGraphResult) -> str:
+    """'total=…ms world=…ms(ok) stats=…ms(ok,x2) …' 형태 한 줄."""
+    parts = [f"total={result.total_ms}ms"]
+    for name, r in result.runs.items():
+        tag = r.status if r.attempts <= 1 else f"{r.status},x{r.attempts}"
+        parts.append(f"{name}={r.ms}ms({tag})")
+    return " ".join(parts)
@@ -1,6 +1,43 @@
+import asyncio
 import os
+import threading
 import uuid
-from typing import Optional
+from typing import Any, AsyncIterator, Optional, Tuple
+
+
+class UploadTooLargeError(ValueError):
+    """업로드 본문이 허용 크기(STORAGE_UPLOAD_MAX_BYTES)를 넘었을 때."""
+
+
+def _upload_settings() -> Tuple[int, int, int]:
+    """(chunk_bytes, part_bytes, max_bytes) - settings 로드 실패 시 기본값."""
+    try:
+        from app.core.config import settings
+        chunk = int(getattr(settings, "STORAGE_UPLOAD_CHUNK_BYTES", 1024 * 1024))
+        part = int(getattr(settings, "STORAGE_MULTIPART_PART_BYTES", 8 * 1024 * 1024))
+        max_bytes = int(getattr(settings, "STORAGE_UPLOAD_MAX_BYTES", 20 * 1024 * 1024))
+    except Exception:
+        chunk, part, max_bytes = 1024 * 1024, 8 * 1024 * 1024, 20 * 1024 * 1024
+    # S3 멀티파트는 마지막 파트를 제외하고 최소 5MB
+    return max(64 * 1024, chunk), max(5 * 1024 * 1024, part), max(0, max_bytes)
+
+
+async def _iter_upload_chunks(upload: Any, chunk_size: int, max_bytes: int) -> AsyncIterator[bytes]:
+    """
+    UploadFile(또는 async read(n)을 가진 객체)을 청크 단위로 읽는다.
+
+    - 전체를 메모리에 올리지 않는다.
+    - max_bytes(>0)를 넘으면 UploadTooLargeError
+    """
+    total = 0
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if max_bytes > 0 and total > max_bytes:
+            raise UploadTooLargeError(f"upload too large (> {max_bytes} bytes)")
+        yield chunk
 
 
 class Storage:
@@ -9,6 +46,34 @@ class Storage:
     def generate_presigned_url(self, key: str, *, expires_in: int = 300) -> Optional[str]:
         return None
 
+    async def save_bytes_async(self, data: bytes, *, content_type: Optional[str] = None, key_hint: Optional[str] = None) -> str:
+        """save_bytes의 비동기 버전(파일 쓰기/boto3 호출을 스레드풀에서 실행)."""
+        return await asyncio.to_thread(self.save_bytes, data, content_type=content_type, key_hint=key_hint)
+
+    async def save_upload(self, upload: Any, *, content_type: Optional[str] = None, key_hint: Optional[str] = None, max_bytes: Optional[int] = None) -> str:
+        """
+        UploadFile을 청크 스트리밍으로 저장한다.
+
+        기본 구현은 청크를 모아 save_bytes_async로 넘긴다(하위 클래스에서 스트리밍으로 재정의).
+        """
+        chunk_size, _, default_max = _upload_settings()
+        limit = default_max if max_bytes is None else int(max_bytes)
+        chunks = [c async for c in _iter_upload_chunks(upload, chunk_size, limit)]
+        return await self.save_bytes_async(b"".join(chunks), content_type=content_type, key_hint=key_hint)
+
+    async def generate_presigned_url_async(self, key: str, *, expires_in: int = 300) -> Optional[str]:
+        return await asyncio.to_thread(self.generate_presigned_url, key, expires_in=expires_in)
+
+    def delete_url(self, url: str) -> bool:
+        """save_*가 돌려준 URL의 객체를 지운다(보상 정리용). 이 저장소의 URL이 아니면 False."""
+        return False
+
+    async def delete_url_async(self, url: str) -> bool:
+        try:
+            return await asyncio.to_thread(self.delete_url, url)
+        except Exception:
+            return False
+
 
 class LocalStorage(Storage):
     def __init__(self, base_dir: str, public_base: str = "/static") -> None:
@@ -16,16 +81,52 @@ class LocalStorage(Storage):
         self.public_base = public_base.rstrip("/")
         os.makedirs(self.base_dir, exist_ok=True)
 
-    def save_bytes(self, data: bytes, *, content_type: Optional[str] = None, key_hint: Optional[str] = None) -> str:
+    def _new_name(self, key_hint: Optional[str]) -> str:
         ext = ".png"
         if key_hint and "." in key_hint:
             ext = "." + key_hint.split(".")[-1]
-        name = f"{uuid.uuid4()}{ext}"
+        return f"{uuid.uuid4()}{ext}"
+
+    def save_bytes(self, data: bytes, *, content_type: Optional[str] = None, key_hint: Optional[str] = None) -> str:
+        name = self._new_name(key_hint)
         path = os.path.join(self.base_dir, name)
         with open(path, "wb") as f:
             f.write(data)
         return f"{self.public_base}/{name}"
 
+    async def save_upload(self, upload: Any, *, content_type: Optional[str] = None, key_hint: Optional[str] = None, max_bytes: Optional[int] = None) -> str:
+        """청크마다 스레드풀에서 파일에 쓴다. 실패/크기 초과 시 부분 파일은 지운다."""
+        chunk_size, _, default_max = _upload_settings()
+        limit = default_max if max_bytes is None else int(max_bytes)
+        name = self._new_name(key_hint)
+        path = os.path.join(self.base_dir, name)
+        f = await asyncio.to_thread(open, path, "wb")
+        try:
+            async for chunk in _iter_upload_chunks(upload, chunk_size, limit):
+                await asyncio.to_thread(f.write, chunk)
+        except BaseException:
+            try:
+                f.close()
+                os.remove(path)
+            except Exception:
+                pass
+            raise
+        await asyncio.to_thread(f.close)
+        return f"{self.public_base}/{name}"
+
+    def delete_url(self, url: str) -> bool:
+        prefix = f"{self.public_base}/"
+        if not url or not url.startswith(prefix):
+            return False
+        name = url[len(prefix):]
+        if not name or "/" in name or name in (".", ".."):
+            return False
+        try:
+            os.remove(os.path.join(self.base_dir, name))
+            return True
+        except FileNotFoundError:
+            return False
+
 
 class S3Storage(Storage):
     def __init__(self, *, endpoint_url: str, access_key: str, secret_key: str, bucket: str, region: Optional[str] = None, public_base_url: Optional[str] = None) -> None:
@@ -37,7 +138,8 @@ class S3Storage(Storage):
         self._boto3 = boto3
         addressing_style = (os.getenv("S3_ADDRESSING_STYLE") or os.getenv("R2_ADDRESSING_STYLE") or "path").lower()
         # R2는 프리사인에 SigV4 필요. 주소 스타일은 env로 선택(path/virtual)
-        cfg = Config(signature_version="s3v4", s3={"addressing_style": addressing_style})
+        # 싱글톤 클라이언트를 여러 업로드가 동시에 쓰므로 커넥션 풀을 동시성에 맞춰 넉넉히 둔다.
+        cfg = Config(signature_version="s3v4", s3={"addressing_style": addressing_style}, max_pool_connections=32)
         self.client = boto3.client(
             "s3",
             endpoint_url=endpoint_url,
@@ -62,21 +164,97 @@ class S3Storage(Storage):
             else:
                 raise RuntimeError(f"Storage bucket '{self.bucket}' not found. Create it in R2 dashboard and set R2_BUCKET correctly. Original: {e}")
 
-    def save_bytes(self, data: bytes, *, content_type: Optional[str] = None, key_hint: Optional[str] = None) -> str:
+    def _new_key(self, key_hint: Optional[str]) -> str:
         ext = ""
         if key_hint and "." in key_hint:
             ext = "." + key_hint.split(".")[-1]
-        key = f"uploads/{uuid.uuid4()}{ext}"
-        extra_args = {}
-        if content_type:
-            extra_args["ContentType"] = content_type
-        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra_args)
+        return f"uploads/{uuid.uuid4()}{ext}"
+
+    def _public_url(self, key: str) -> str:
         if self.public_base_url:
             return f"{self.public_base_url}/{key}"
         # 기본 S3 URL (path-style 권장: endpoint/bucket/key)
         endpoint = self.client.meta.endpoint_url.rstrip("/")
         return f"{endpoint}/{self.bucket}/{key}"
 
+    def save_bytes(self, data: bytes, *, content_type: Optional[str] = None, key_hint: Optional[str] = None) -> str:
+        key = self._new_key(key_hint)
+        extra_args = {}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra_args)
+        return self._public_url(key)
+
+    async def save_upload(self, upload: Any, *, content_type: Optional[str] = None, key_hint: Optional[str] = None, max_bytes: Optional[int] = None) -> str:
+        """
+        UploadFile을 스트리밍 업로드한다.
+
+        - 파트 크기(STORAGE_MULTIPART_PART_BYTES) 이하: put_object 1회
+        - 초과: 멀티파트 업로드(메모리에는 파트 1개 분량만 유지), 실패 시 abort
+        """
+        chunk_size, part_size, default_max = _upload_settings()
+        limit = default_max if max_bytes is None else int(max_bytes)
+        key = self._new_key(key_hint)
+        extra_args = {}
+        if content_type:
+            extra_args["ContentType"] = content_type
+
+        upload_id: Optional[str] = None
+        parts = []
+        buf = bytearray()
+
+        async def _flush_part() -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                created = await asyncio.to_thread(
+                    self.client.create_multipart_upload, Bucket=self.bucket, Key=key, **extra_args
+                )
+                upload_id = created["UploadId"]
+            part_no = len(parts) + 1
+            resp = await asyncio.to_thread(
+                self.client.upload_part,
+                Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_no, Body=bytes(buf),
+            )
+            parts.append({"ETag": resp["ETag"], "PartNumber": part_no})
+            buf.clear()
+
+        try:
+            async for chunk in _iter_upload_chunks(upload, chunk_size, limit):
+                buf.extend(chunk)
+                if len(buf) >= part_size:
+                    await _flush_part()
+            if upload_id is None:
+                await asyncio.to_thread(
+                    self.client.put_object, Bucket=self.bucket, Key=key, Body=bytes(buf), **extra_args
+                )
+            else:
+                if buf:
+                    await _flush_part()
+                await asyncio.to_thread(
+                    self.client.complete_multipart_upload,
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts},
+                )
+        except BaseException:
+            if upload_id is not None:
+                try:
+                    await asyncio.to_thread(
+                        self.client.abort_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id
+                    )
+                except Exception:
+                    pass
+            raise
+        return self._public_url(key)
+
+    def delete_url(self, url: str) -> bool:
+        prefix = self._public_url("")
+        if not url or not url.startswith(prefix):
+            return False
+        key = url[len(prefix):]
+        if not key:
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+
     def generate_presigned_url(self, key: str, *, expires_in: int = 300) -> Optional[str]:
         try:
             url = self.client.generate_presigned_url(
@@ -89,22 +267,61 @@ class S3Storage(Storage):
             return None
 
 
-def get_storage() -> Storage:
+# get_storage() 싱글톤 캐시
+# - 요청마다 boto3 클라이언트 생성 + head_bucket 왕복을 하지 않도록 프로세스당 1회만 만든다.
+# - 설정(env)이 바뀌면 키가 달라져 새로 만든다.
+_storage_lock = threading.Lock()
+_storage_cache: Optional[Tuple[tuple, Storage]] = None
+
+
+def _storage_config() -> tuple:
     backend = (os.getenv("STORAGE_BACKEND") or "local").lower()
     if backend == "s3":
-        endpoint = os.getenv("S3_ENDPOINT_URL") or os.getenv("R2_ENDPOINT_URL")
-        access_key = os.getenv("S3_ACCESS_KEY_ID") or os.getenv("R2_ACCESS_KEY_ID")
-        secret_key = os.getenv("S3_SECRET_ACCESS_KEY") or os.getenv("R2_SECRET_ACCESS_KEY")
-        bucket = os.getenv("S3_BUCKET") or os.getenv("R2_BUCKET")
-        region = os.getenv("S3_REGION") or os.getenv("R2_REGION")
-        public_base = os.getenv("S3_PUBLIC_BASE_URL") or os.getenv("R2_PUBLIC_BASE_URL")
+        return (
+            "s3",
+            os.getenv("S3_ENDPOINT_URL") or os.getenv("R2_ENDPOINT_URL"),
+            os.getenv("S3_ACCESS_KEY_ID") or os.getenv("R2_ACCESS_KEY_ID"),
+            os.getenv("S3_SECRET_ACCESS_KEY") or os.getenv("R2_SECRET_ACCESS_KEY"),
+            os.getenv("S3_BUCKET") or os.getenv("R2_BUCKET"),
+            os.getenv("S3_REGION") or os.getenv("R2_REGION"),
+            os.getenv("S3_PUBLIC_BASE_URL") or os.getenv("R2_PUBLIC_BASE_URL"),
+        )
+    from app.core.paths import get_upload_dir
+    return ("local", get_upload_dir())
+
+
+def _build_storage(config: tuple) -> Storage:
+    if config[0] == "s3":
+        _, endpoint, access_key, secret_key, bucket, region, public_base = config
         if not (endpoint and access_key and secret_key and bucket):
             raise RuntimeError("S3/R2 storage is not fully configured")
         return S3Storage(endpoint_url=endpoint, access_key=access_key, secret_key=secret_key, bucket=bucket, region=region, public_base_url=public_base)
-    else:
-        # local
-        from app.core.paths import get_upload_dir
-        base_dir = get_upload_dir()
-        return LocalStorage(base_dir=base_dir, public_base="/static")
+    # local
+    return LocalStorage(base_dir=config[1], public_base="/static")
+
+
+def get_storage() -> Storage:
+    global _storage_cache
+    config = _storage_config()
+    cached = _storage_cache
+    if cached is not None and cached[0] == config:
+        return cached[1]
+    with _storage_lock:
+        cached = _storage_cache
+        if cached is not None and cached[0] == config:
+            return cached[1]
+        storage = _build_storage(config)
+        _storage_cache = (config, storage)
+        return storage
+
 
+async def get_storage_async() -> Storage:
+    """
+    get_storage()의 비동기 버전.
 
+    최초 1회(S3 클라이언트 생성 + head_bucket)는 네트워크 왕복이 있으므로 스레드풀에서 만든다.
+    """
+    cached = _storage_cache
+    if cached is not None and cached[0] == _storage_config():
+        return cached[1]
+    return await asyncio.to_thread(get_storage)
@@ -21,6 +21,9 @@ from app.models.like import StoryLike
 from app.models.tag import Tag, StoryTag
 from app.schemas.story import StoryCreate, StoryUpdate, StoryGenerationRequest, StoryExtractedCharacterUpdate
 from app.services.ai_service import get_ai_completion, AIModel, get_ai_completion_stream
+from app.services.character_list_cache import invalidate_public_character_list_cache
+from app.services.counter_buffer import CHAPTER_VIEW_BY_STORY, STORY_VIEW, add_story_view, pending_counts
+from app.services.search_service import story_search_filter, uses_relevance_order
 
 
 class StoryGenerationService:
@@ -367,11 +370,8 @@ async def get_story_by_id(db: AsyncSession, story_id: uuid.UUID) -> Optional[Sto
 
 async def get_story_with_chapters(db: AsyncSession, story_id: uuid.UUID) -> Optional[Story]:
     """스토리 + 챕터/태그/추출캐릭터를 함께 조회하며 조회수를 1 증가"""
-    # 조회수 증가
-    await db.execute(
-        update(Story).where(Story.id == story_id).values(view_count=Story.view_count + 1)
-    )
-    await db.commit()
+    # 조회수 증가(카운터 버퍼)
+    await add_story_view(story_id)
 
     result = await db.execute(
         select(Story)
@@ -423,28 +423,9 @@ async def get_stories_by_creator(
         .where(Story.creator_id == creator_id)
     )
     
-    if search:
-        raw = search.strip()
-        if raw:
-            tag_search = raw.lstrip("#").strip() or raw
-            creator_search = raw.lstrip("@").strip() or raw
-            name_like = f"%{raw}%"
-            creator_like = f"%{creator_search}%"
-            tag_like = f"%{tag_search}%"
-            query = query.where(
-                or_(
-                    Story.title.ilike(name_like),
-                    Story.content.ilike(name_like),
-                    Story.creator.has(User.username.ilike(creator_like)),
-                    Story.character.has(Character.name.ilike(name_like)),
-                    Story.tags.any(
-                        or_(
-                            Tag.slug.ilike(tag_like),
-                            Tag.name.ilike(tag_like)
-                        )
-                    )
-                )
-            )
+    search_clause, _ = await story_search_filter(db, search, include_related=True)
+    if search_clause is not None:
+        query = query.where(search_clause)
     
     query = query.order_by(Story.created_at.desc()).offset(skip).limit(limit)
     
@@ -503,13 +484,9 @@ async def get_public_stories(
         .where(Story.is_public == True)
     )
     
-    if search:
-        query = query.where(
-            or_(
-                Story.title.ilike(f"%{search}%"),
-                Story.content.ilike(f"%{search}%")
-            )
-        )
+    search_clause, search_rank = await story_search_filter(db, search)
+    if search_clause is not None:
+        query = query.where(search_clause)
     
     if genre:
         query = query.where(Story.genre == genre)
@@ -530,9 +507,11 @@ async def get_public_stories(
             # NULL(미세팅)도 웹소설로 간주하여 누락 방지
             query = query.where(or_(Story.is_origchat == False, Story.is_origchat.is_(None)))
 
-    # 정렬: views|likes|recent
+    # 정렬: views|likes|recent|relevance (relevance는 검색어가 있을 때만 관련도순)
     order = (sort or '').strip().lower() if sort else None
-    if order in ['views', 'view', '조회수']:
+    if search_rank is not None and uses_relevance_order(search, sort):
+        query = query.order_by(search_rank.desc(), Story.like_count.desc(), Story.created_at.desc())
+    elif order in ['views', 'view', '조회수']:
         query = query.order_by(Story.view_count.desc(), Story.like_count.desc(), Story.created_at.desc())
     elif order in ['likes', 'like', '좋아요']:
         query = query.order_by(Story.like_count.desc(), Story.created_at.desc())
@@ -596,6 +575,8 @@ async def update_story(
             .values(**update_data)
         )
         await db.commit()
+        # 원작 스토리 공개 여부/제목은 공개 캐릭터 목록(원작챗 노출/표시)에 반영된다.
+        await invalidate_public_character_list_cache()
     
     return await get_story_by_id(db, story_id)
 
@@ -606,6 +587,7 @@ async def delete_story(db: AsyncSession, story_id: uuid.UUID) -> bool:
         delete(Story).where(Story.id == story_id)
     )
     await db.commit()
+    await invalidate_public_character_list_cache()
     return result.rowcount > 0
 
 
@@ -665,24 +647,24 @@ async def is_story_liked_by_user(db: AsyncSession, story_id: uuid.UUID, user_id:
 
 
 async def increment_story_view_count(db: AsyncSession, story_id: uuid.UUID) -> bool:
-    """스토리 조회수 증가"""
-    await db.execute(
-        update(Story)
-        .where(Story.id == story_id)
-        .values(view_count=Story.view_count + 1)
-    )
-    # 회차 목록 총합도 캐시용으로 계산해두고 싶다면 여기에서 별도 통계 테이블에 적재 가능(생략)
-    await db.commit()
+    """스토리 조회수 증가(카운터 버퍼에 누적, DB 반영은 counter_buffer flusher)"""
+    await add_story_view(story_id)
     return True
 
 
 async def get_story_total_views(db: AsyncSession, story_id: uuid.UUID) -> int:
-    """작품 전체조회수 = 상세 진입수(Story.view_count) + 모든 회차의 view_count 합"""
+    """
+    작품 전체조회수 = 상세 진입수(Story.view_count) + 모든 회차의 view_count 합
+    + 아직 DB에 반영되지 않은 카운터 버퍼 증가분(상세 진입/회차 열람)
+    """
     srow = await db.execute(select(Story.view_count).where(Story.id == story_id))
     base = (srow.first() or [0])[0] or 0
     crow = await db.execute(select(func.coalesce(func.sum(StoryChapter.view_count), 0)).where(StoryChapter.story_id == story_id))
     chsum = (crow.first() or [0])[0] or 0
-    return int(base) + int(chsum)
+    sid = str(story_id)
+    pending = (await pending_counts(STORY_VIEW, [sid])).get(sid, 0)
+    pending += (await pending_counts(CHAPTER_VIEW_BY_STORY, [sid])).get(sid, 0)
+    return int(base) + int(chsum) + int(pending)
 
 
 # 스토리 생성 서비스 인스턴스
@@ -0,0 +1,141 @@
+"""
+설정메모(setting_book) 트리거 매처 — Aho–Corasick 다중 패턴 매칭
+
+의도/배경:
+- 설정메모 트리거는 "메모마다, 트리거마다 lowercase substring 검사"로 평가되고 있었다.
+  (send_message / preview / preview-magic-choices)
+  메모가 수백 개가 되면 턴마다 (메모 수 × 트리거 수)번 문자열 전체를 훑는다.
+- 트리거 전체로 오토마톤을 한 번 만들어 두고, 유저 입력을 한 번만 훑어 걸린 메모 id를 모두 구한다.
+  매칭 비용은 입력 길이 + 걸린 수에 비례하고 트리거 수와 무관하다(구축 비용은 트리거 총 길이에 비례).
+
+캐시:
+- send_message: 캐릭터 프롬프트 컴파일 결과(CompiledCharacterPrompt.memo_matcher)에 넣어
+  캐릭터 버전 단위로 재사용한다.
+- 프리뷰 경로(저장 전 초안): get_memo_trigger_matcher()가 (memo id, triggers) 내용 기준 LRU로 재사용한다.
+
+규칙(기존 동작과 동일):
+- 트리거는 strip + lowercase, 빈 트리거는 무시, 메모당 앞 5개만 사용.
+- 입력은 lowercase만 한다(부분 문자열 매칭이라 공백/구두점은 그대로 둔다).
+"""
+
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# 메모당 사용하는 트리거 수(기존 정책)
+MAX_TRIGGERS_PER_MEMO = 5
+
+_CACHE_MAX = 256
+_EMPTY: frozenset = frozenset()
+
+
+class TriggerMatcher:
+    """(패턴, 키) 목록으로 만든 Aho–Corasick 오토마톤. 불변이라 여러 요청이 공유해도 안전하다."""
+
+    __slots__ = ("_goto", "_fail", "_out", "pattern_count")
+
+    def __init__(self, patterns: Iterable[Tuple[str, Hashable]]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Set[Hashable]] = [set()]
+        count = 0
+        for pattern, key in patterns:
+            p = str(pattern or "").strip().lower()
+            if not p:
+                continue
+            node = 0
+            for ch in p:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                node = nxt
+            out[node].add(key)
+            count += 1
+
+        # 실패 링크(BFS): 얕은 노드가 먼저 확정되므로 출력 집합을 바로 합칠 수 있다.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            r = queue.popleft()
+            for ch, s in goto[r].items():
+                queue.append(s)
+                f = fail[r]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                t = goto[f].get(ch, 0)
+                fail[s] = t if t != s else 0
+                if out[fail[s]]:
+                    out[s] |= out[fail[s]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [frozenset(o) if o else _EMPTY for o in out]
+        self.pattern_count = count
+
+    def matches(self, text: Any) -> Set[Hashable]:
+        """text에 부분 문자열로 등장하는 패턴의 키 집합(한 번 훑기)."""
+        found: Set[Hashable] = set()
+        if not self.pattern_count:
+            return found
+        try:
+            s = str(text or "").lower()
+        except Exception:
+            return found
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in s:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+def memo_trigger_patterns(memos: Iterable[Any]) -> List[Tuple[str, str]]:
+    """설정메모 목록 → (트리거, memo id) 목록. 원본 메모/정규화된 메모 모두 받는다."""
+    pairs: List[Tuple[str, str]] = []
+    for m in memos or []:
+        if not isinstance(m, dict):
+            continue
+        try:
+            mid = str(m.get("id") or "").strip()
+        except Exception:
+            continue
+        if not mid:
+            continue
+        trs = m.get("triggers")
+        trs = trs if isinstance(trs, list) else []
+        for t in trs[:MAX_TRIGGERS_PER_MEMO]:
+            tt = str(t or "").strip().lower()
+            if tt:
+                pairs.append((tt, mid))
+    return pairs
+
+
+def build_memo_trigger_matcher(memos: Iterable[Any]) -> TriggerMatcher:
+    return TriggerMatcher(memo_trigger_patterns(memos))
+
+
+_cache: "OrderedDict[Tuple[Tuple[str, str], ...], TriggerMatcher]" = OrderedDict()
+
+
+def get_memo_trigger_matcher(memos: Iterable[Any]) -> TriggerMatcher:
+    """내용(트리거, memo id) 기준으로 캐시된 매처. 저장 전 초안(프리뷰)처럼 버전이 없는 입력용."""
+    key = tuple(memo_trigger_patterns(memos))
+    hit = _cache.get(key)
+    if hit is not None:
+        _cache.move_to_end(key)
+        return hit
+    matcher = TriggerMatcher(key)
+    _cache[key] = matcher
+    while len(_cache) > _CACHE_MAX:
+        _cache.popitem(last=False)
+    return matcher
+
+
+def triggered_memo_ids(memos: Iterable[Any], text: Any, matcher: Optional[TriggerMatcher] = None) -> Set[str]:
+    """text로 트리거된 memo id 집합."""
+    m = matcher if matcher is not None else get_memo_trigger_matcher(memos)
+    return {str(x) for x in m.matches(text)}
@@ -0,0 +1,184 @@
+"""
+인증 사용자(principal) 캐시 — `get_current_user` / `get_current_user_optional` 전용
+
+의도/배경:
+- 인증이 필요한 거의 모든 요청이 JWT 검증 후 `SELECT users WHERE id=?`를 한 번씩 실행한다.
+  DB 커넥션 풀이 작아서(3+2) 이 조회만으로도 풀 대기가 생긴다.
+- 유저 컬럼 값을 짧은 TTL로 캐시한다(L1: 프로세스 LRU, L2: Redis `auth:user:{id}`).
+  캐시 히트 시 세션에 붙지 않은(transient) User 객체를 만들어 돌려준다 → DB 쿼리 0회.
+
+무효화:
+- user_service의 프로필/인증상태/비활성화/모델 설정 변경 직후 invalidate_cached_user(user_id)를 호출한다.
+- 다른 워커의 L1은 USER_PRINCIPAL_LOCAL_CACHE_TTL_SEC 이내에 만료된다(권한/비활성화 반영 지연 상한).
+
+주의:
+- 캐시에서 복원한 User는 세션에 없으므로 속성을 바꿔 commit해도 DB에 반영되지 않는다.
+  수정이 필요하면 반드시 db에서 다시 조회한다(기존 코드도 그렇게 하고 있음).
+- hashed_password는 캐시에 넣지 않는다(비밀번호 검증 경로는 항상 DB에서 조회).
+"""
+
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "auth:user:"
+
+# 캐시하는 컬럼(관계/비밀번호 해시 제외)
+_COLUMNS = (
+    "id",
+    "email",
+    "username",
+    "gender",
+    "is_active",
+    "is_verified",
+    "is_admin",
+    "avatar_url",
+    "bio",
+    "preferred_model",
+    "preferred_sub_model",
+    "response_length_pref",
+    "created_at",
+    "updated_at",
+)
+_DATETIME_COLUMNS = ("created_at", "updated_at")
+
+_local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+
+def _key(user_id: Union[str, uuid.UUID]) -> str:
+    return f"{_KEY_PREFIX}{str(user_id).lower()}"
+
+
+def _serialize(user: User) -> Dict[str, Any]:
+    data: Dict[str, Any] = {}
+    for col in _COLUMNS:
+        value = getattr(user, col, None)
+        if col == "id" and value is not None:
+            value = str(value)
+        elif col in _DATETIME_COLUMNS and isinstance(value, datetime):
+            value = value.isoformat()
+        data[col] = value
+    return data
+
+
+def _restore(data: Dict[str, Any]) -> Optional[User]:
+    try:
+        values = {col: data.get(col) for col in _COLUMNS}
+        values["id"] = uuid.UUID(str(values["id"]))
+        for col in _DATETIME_COLUMNS:
+            if values.get(col):
+                values[col] = datetime.fromisoformat(values[col])
+        return User(**values)
+    except Exception as e:
+        logger.debug(f"[auth] principal cache restore failed: {e}")
+        return None
+
+
+def _remember_local(key: str, data: Dict[str, Any]) -> None:
+    ttl = min(
+        int(getattr(settings, "USER_PRINCIPAL_LOCAL_CACHE_TTL_SEC", 5) or 0),
+        int(getattr(settings, "USER_PRINCIPAL_CACHE_TTL_SEC", 60) or 0),
+    )
+    if ttl <= 0:
+        return
+    _local[key] = (time.monotonic() + ttl, data)
+    _local.move_to_end(key)
+    max_items = int(getattr(settings, "USER_PRINCIPAL_LOCAL_CACHE_MAX", 2048) or 0)
+    while len(_local) > max(0, max_items):
+        _local.popitem(last=False)
+
+
+async def get_cached_user(user_id: Union[str, uuid.UUID]) -> Optional[User]:
+    """캐시 히트 시 transient User, 미스/장애 시 None"""
+    if int(getattr(settings, "USER_PRINCIPAL_CACHE_TTL_SEC", 60) or 0) <= 0:
+        return None
+    key = _key(user_id)
+    hit = _local.get(key)
+    if hit is not None:
+        if hit[0] > time.monotonic():
+            _local.move_to_end(key)
+            return _restore(hit[1])
+        _local.pop(key, None)
+    try:
+        from app.core.database import redis_client
+        raw = await redis_client.get(key)
+    except Exception:
+        raw = None
+    if not raw:
+        return None
+    try:
+        data = json.loads(raw)
+    except Exception:
+        return None
+    _remember_local(key, data)
+    return _restore(data)
+
+
+async def set_cached_user(user: User) -> None:
+    ttl = int(getattr(settings, "USER_PRINCIPAL_CACHE_TTL_SEC", 60) or 0)
+    if ttl <= 0 or user is None or getattr(user, "id", None) is None:
+        return
+    key = _key(user.id)
+    data = _serialize(user)
+    _remember_local(key, data)
+    try:
+        from app.core.database import redis_client
+        await redis_client.setex(key, ttl, json.dumps(data, ensure_ascii=False))
+    except Exception:
+        pass
+
+
+async def invalidate_cached_user(user_id: Union[str, uuid.UUID, None]) -> None:
+    """
+    유저 principal 캐시 무효화.
+
+    호출 지점: user_service의 프로필/인증상태/비활성화/모델 설정 변경, 관리자 플래그 변경.
+    실패해도 본 작업에는 영향이 없다(최대 USER_PRINCIPAL_CACHE_TTL_SEC 동안 이전 값이 보일 수 있음).
+    """
+    if user_id is None:
+        return
+    key = _key(user_id)
+    _local.pop(key, None)
+    try:
+        from app.core.database import redis_client
+        await redis_client.delete(key)
+    except Exception as e:
+        logger.warning(f"[auth] principal cache invalidate failed: {e}")
+
+
+async def _load_user(user_id: Union[str, uuid.UUID]) -> Optional[User]:
+    """
+    짧게 쓰고 바로 닫는 전용 세션으로 조회한다.
+
+    - 요청 스코프 세션(get_db)으로 조회하면, 인증 SELECT가 연 트랜잭션 때문에 응답이 끝날 때까지
+      (SSE 스트리밍이면 LLM 응답이 끝날 때까지) 커넥션이 풀로 돌아가지 않는다.
+    """
+    from app.core.database import AsyncSessionLocal
+    from app.services.user_service import get_user_by_id
+    async with AsyncSessionLocal() as db:
+        return await get_user_by_id(db, user_id)
+
+
+async def resolve_user(user_id: Union[str, uuid.UUID]) -> Optional[User]:
+    """캐시 → DB 순으로 유저를 찾고, DB에서 찾은 경우 캐시에 채운다."""
+    try:
+        uuid.UUID(str(user_id))
+    except Exception:
+        # 잘못된 sub는 캐시 키로 쓰지 않는다(기존처럼 DB 조회 결과에 맡김).
+        return await _load_user(user_id)
+    user = await get_cached_user(user_id)
+    if user is not None:
+        return user
+    user = await _load_user(user_id)
+    if user is not None:
+        await set_cached_user(user)
+    return user
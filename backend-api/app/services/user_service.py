@@ -26,6 +26,11 @@ from app.models.user import User
 from app.models.chat import ChatRoom, ChatMessage
 from app.schemas import StatsOverview, TimeSeriesResponse, TimeSeriesPoint, TopCharacterItem
 from app.schemas.user import AdminUserListResponse, AdminUserListItem
+from app.services.user_principal_cache import invalidate_cached_user
+from app.models.creator_stats import CharacterStatsRollup, GRAIN_DAY, GRAIN_HOUR
+from app.services.creator_stats_rollup import floor_day, floor_hour, read_creator_buckets
+from app.services.hll_sketch import merged_count
+from app.services import room_index
 
 logger = logging.getLogger(__name__)
 
@@ -150,6 +155,7 @@ async def update_user_verification_status(
         .values(is_verified=is_verified)
     )
     await db.commit()
+    await invalidate_cached_user(user_id)
     return await get_user_by_id(db, user_id)
 
 
@@ -179,6 +185,7 @@ async def update_user_profile(
             .values(**update_data)
         )
         await db.commit()
+        await invalidate_cached_user(user_id)
     
     return await get_user_by_id(db, user_id)
 
@@ -191,6 +198,7 @@ async def deactivate_user(db: AsyncSession, user_id: Union[str, uuid.UUID]) -> O
         .values(is_active=False)
     )
     await db.commit()
+    await invalidate_cached_user(user_id)
     return await get_user_by_id(db, user_id)
 
 async def get_user_profile(db: AsyncSession, user_id: str) -> UserProfileResponse | None:
@@ -357,6 +365,56 @@ async def admin_list_users(
         raise
 
 
+async def _recent_characters_from_room_index(db: AsyncSession, user_id: uuid.UUID, limit: int, skip: int):
+    """
+    유저별 방 인덱스(room_index)로 최근 대화 목록을 만든다. 인덱스를 못 읽으면 None(→ DB 경로).
+
+    - 순서/마지막 메시지 시각/요약/유저 메시지 유무는 인덱스에서, 캐릭터/원작 제목은 방 PK 조회로 가져온다.
+    - 원작챗 유령 방(유저 메시지 0개)을 건너뛰므로 skip+limit개가 찰 때까지 인덱스를 페이지 단위로 읽는다.
+    """
+    want = skip + limit
+    page = max(20, want * 2)
+    pos = 0
+    out = []
+    while len(out) < want:
+        room_ids = await room_index.recent_room_ids(db, user_id, pos, pos + page - 1)
+        if room_ids is None:
+            return None if pos == 0 else out[skip:skip + limit]
+        if not room_ids:
+            break
+        pos += len(room_ids)
+        try:
+            entries = await room_index.room_entries(user_id, room_ids)
+        except Exception as e:
+            logger.warning(f"[recent_characters] room index entries failed (fallback to DB): {e}")
+            return None
+        ids = [u for u in (room_index.to_uuid(r) for r in room_ids) if u is not None]
+        result = await db.execute(
+            select(ChatRoom.id, Character, Story.title)
+            .join(Character, Character.id == ChatRoom.character_id)
+            .outerjoin(Story, Character.origin_story_id == Story.id)
+            .where(ChatRoom.id.in_(ids), ChatRoom.user_id == user_id)
+            .options(selectinload(Character.creator))
+        )
+        by_room = {str(rid): (rid, char, title) for rid, char, title in result.all()}
+        stale = [r for r in room_ids if r not in by_room]
+        if stale:
+            await room_index.drop_rooms(user_id, stale)
+        for r in room_ids:
+            hit = by_room.get(r)
+            if hit is None:
+                continue
+            rid, char, title = hit
+            e = entries.get(r) or {}
+            # ✅ 원작챗 유령 방(인사말만 있고 유저 메시지 0개) 숨김
+            if getattr(char, "origin_story_id", None) and not e.get("engaged"):
+                continue
+            out.append((char, rid, e.get("last_at"), e.get("snippet"), title))
+        if len(room_ids) < page:
+            break
+    return out[skip:skip + limit]
+
+
 async def get_recent_characters_for_user(db: AsyncSession, user_id: uuid.UUID, limit: int = 10, skip: int = 0):
     """
     사용자가 최근에 대화한 캐릭터 목록(=채팅방 단위)을 반환합니다.
@@ -370,6 +428,11 @@ async def get_recent_characters_for_user(db: AsyncSession, user_id: uuid.UUID, l
     """
     if limit > 50:  # 최대 limit 제한으로 보안 강화
         limit = 50
+
+    # ✅ 유저별 방 인덱스(Redis)에서 먼저 서빙한다. 실패 시 아래 DB 경로(상관 서브쿼리)로 폴백.
+    rows = await _recent_characters_from_room_index(db, user_id, limit, skip)
+    if rows is not None:
+        return rows
     
     # ✅ last_chat_time / last_message_snippet 계산(치명 UX 방지)
     #
@@ -526,6 +589,7 @@ async def update_user_model_settings(
         )
     )
     await db.commit()
+    await invalidate_cached_user(user_id)
     return result.rowcount > 0
 
 
@@ -542,10 +606,14 @@ async def update_user_response_length_pref(
         .values(response_length_pref=response_length_pref)
     )
     await db.commit()
+    await invalidate_cached_user(user_id)
     return result.rowcount > 0
 
 
 # ----- 통계 서비스 (경량) -----
+# 메시지 수/고유 유저는 롤업 테이블(creator_stats_rollups / character_stats_rollups)만 읽는다.
+# - 롤업은 app/services/creator_stats_rollup.py 잡이 주기적으로 증분 반영한다(최대 1~2분 지연).
+# - 대시보드 응답 시간이 chat_messages 크기와 무관하도록 원본 메시지 조인은 하지 않는다.
 async def get_stats_overview(db: AsyncSession, user_id: uuid.UUID) -> StatsOverview:
     """
     통계 개요(집계)를 반환한다.
@@ -554,6 +622,7 @@ async def get_stats_overview(db: AsyncSession, user_id: uuid.UUID) -> StatsOverv
     - 운영에서 SQLite를 쓰거나, Postgres/asyncpg 환경이 바뀌어도 500이 나지 않도록
       DB-중립적인 방식(Python datetime 기준)으로 기간 필터를 수행한다.
     - 프론트 `ProfilePage`는 이 값을 KPI로 사용하므로, 실패 시에도 0으로 안전하게 반환한다.
+    - 최근 30일 유니크 유저는 일 롤업 HLL 스케치 30개를 병합한 근사값이다(오차 ≈2%).
     """
     # 캐릭터 수/공개 수/누적 대화/좋아요
     char_counts = await db.execute(
@@ -567,25 +636,14 @@ async def get_stats_overview(db: AsyncSession, user_id: uuid.UUID) -> StatsOverv
     row = char_counts.first()
     total, public, chats_total, likes_total = row if row else (0, 0, 0, 0)
 
-    # 최근 30일 유니크 유저: 메시지 발신자가 user이고, 해당 캐릭터 생성자가 user_id
-    # ChatRoom.character_id -> Character.creator_id == user_id
+    # 최근 30일 유니크 유저: 해당 크리에이터 캐릭터에 메시지를 보낸 유저(일 롤업 스케치 병합)
     try:
-        since = datetime.utcnow() - timedelta(days=30)
-        uniq_q = await db.execute(
-            select(func.count(func.distinct(ChatRoom.user_id)))
-            .select_from(ChatRoom)
-            .join(ChatMessage, ChatMessage.chat_room_id == ChatRoom.id)
-            .join(Character, Character.id == ChatRoom.character_id)
-            .where(
-                Character.creator_id == user_id,
-                ChatMessage.sender_type == 'user',
-                ChatMessage.created_at >= since,
-            )
-        )
-        unique_users_30d = uniq_q.scalar() or 0
+        since = floor_day(datetime.utcnow()) - timedelta(days=29)
+        buckets = await read_creator_buckets(db, user_id, GRAIN_DAY, since)
+        unique_users_30d = merged_count(h for _, _, h in buckets)
     except Exception as e:
         try:
-            logger.warning("[stats] overview.unique_users_30d query failed (fallback=0): %s", e)
+            logger.warning("[stats] overview.unique_users_30d rollup read failed (fallback=0): %s", e)
         except Exception:
             pass
         unique_users_30d = 0
@@ -609,8 +667,7 @@ async def get_stats_timeseries(
     기간별 메시지 수 시계열을 반환한다.
 
     의도/동작:
-    - Postgres는 date_trunc를 사용해 DB에서 그룹핑
-    - SQLite는 strftime로 그룹핑(별도 분기)
+    - 크리에이터 롤업(시간 버킷 'h' / 일 버킷 'd')을 그대로 읽는다(버킷 키는 DB 방언과 무관).
     - 어떤 DB든 프론트에서 바로 그릴 수 있도록 "빈 구간은 0"으로 채운 series를 반환한다.
     """
     # 24h(시간별) 또는 Nd(일별)
@@ -632,44 +689,30 @@ async def get_stats_timeseries(
     if not isinstance(count, int) or count <= 0:
         count = 24 if use_hour else 7
 
-    since = datetime.utcnow() - (timedelta(hours=count) if use_hour else timedelta(days=count))
-    dialect = _dialect_name()
-    if dialect == "sqlite":
-        bucket = func.strftime("%Y-%m-%d %H:00" if use_hour else "%Y-%m-%d", ChatMessage.created_at).label("t")
+    now = datetime.utcnow()
+    if use_hour:
+        since = floor_hour(now) - timedelta(hours=count - 1)
     else:
-        bucket = func.date_trunc("hour" if use_hour else "day", ChatMessage.created_at).label("t")
-
-    result = await db.execute(
-        select(bucket, func.count(ChatMessage.id))
-        .select_from(ChatMessage)
-        .join(ChatRoom, ChatMessage.chat_room_id == ChatRoom.id)
-        .join(Character, Character.id == ChatRoom.character_id)
-        .where(
-            Character.creator_id == user_id,
-            ChatMessage.created_at >= since,
-        )
-        .group_by(bucket)
-        .order_by(bucket)
-    )
-    rows = result.all() or []
+        since = floor_day(now) - timedelta(days=count - 1)
+    rows = await read_creator_buckets(db, user_id, GRAIN_HOUR if use_hour else GRAIN_DAY, since)
 
     series_map = {}
     if use_hour:
-        for t, cnt in rows:
+        for t, cnt, _ in rows:
             k = _format_hour_key(t)
             if k:
                 series_map[k] = int(cnt or 0)
-        now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        now = now.replace(minute=0, second=0, microsecond=0)
         points = []
         for i in range(count-1, -1, -1):
             ts = (now - timedelta(hours=i)).strftime("%Y-%m-%d %H:00")
             points.append(TimeSeriesPoint(date=ts, value=series_map.get(ts, 0)))
     else:
-        for t, cnt in rows:
+        for t, cnt, _ in rows:
             k = _format_day_key(t)
             if k:
                 series_map[k] = int(cnt or 0)
-        today = datetime.utcnow().date()
+        today = now.date()
         points = []
         for i in range(count-1, -1, -1):
             d = (today - timedelta(days=i)).isoformat()
@@ -689,8 +732,8 @@ async def get_stats_top_characters(
     기간 내 메시지 수 기준 상위 캐릭터 목록을 반환한다.
 
     의도/동작:
+    - 캐릭터 일 롤업(최근 N일 버킷, 오늘 포함)의 메시지 수를 합산한다.
     - interval() 같은 DB 전용 함수를 쓰지 않고, Python datetime으로 기간 필터를 수행한다.
-    - SQLite/Postgres 모두에서 안정적으로 동작하도록 한다.
     """
     days = 7
     if range_str.endswith('d'):
@@ -701,22 +744,25 @@ async def get_stats_top_characters(
     if not isinstance(days, int) or days <= 0:
         days = 7
 
-    # 캐릭터별 최근 N일 메시지 수
-    since = datetime.utcnow() - timedelta(days=days)
+    # 캐릭터별 최근 N일 메시지 수(일 롤업 합산)
+    since = floor_day(datetime.utcnow()) - timedelta(days=days - 1)
+    cnt = func.sum(CharacterStatsRollup.messages).label('cnt')
     res = await db.execute(
-        select(Character.id, Character.name, Character.avatar_url, func.count(ChatMessage.id).label('cnt'))
-        .join(ChatRoom, ChatRoom.character_id == Character.id)
-        .join(ChatMessage, ChatMessage.chat_room_id == ChatRoom.id)
+        select(Character.id, Character.name, Character.avatar_url, cnt)
+        .select_from(CharacterStatsRollup)
+        .join(Character, Character.id == CharacterStatsRollup.character_id)
         .where(
+            CharacterStatsRollup.creator_id == user_id,
             Character.creator_id == user_id,
-            ChatMessage.created_at >= since
+            CharacterStatsRollup.grain == GRAIN_DAY,
+            CharacterStatsRollup.bucket_start >= since,
         )
         .group_by(Character.id, Character.name, Character.avatar_url)
-        .order_by(func.count(ChatMessage.id).desc())
+        .order_by(cnt.desc())
         .limit(limit)
     )
     rows = res.all()
     items = []
     for cid, name, avatar, cnt in rows:
-        items.append(TopCharacterItem(id=str(cid), name=name, avatar_url=avatar, value_7d=int(cnt)))
+        items.append(TopCharacterItem(id=str(cid), name=name, avatar_url=avatar, value_7d=int(cnt or 0)))
     return items
\ No newline at end of file
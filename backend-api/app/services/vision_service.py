@@ -33,6 +33,12 @@ def _http_get_bytes(url: str, timeout: int = 10) -> bytes:
     r.raise_for_status()
     return r.content
 
+async def _http_get_bytes_async(url: str, timeout: int = 10) -> bytes:
+    """_http_get_bytes의 비동기 버전(공용 커넥션 풀, 크기 제한 스트리밍 읽기)."""
+    from app.core.http_fetch import fetch_bytes
+    res = await fetch_bytes(url, timeout=timeout)
+    return res.content
+
 def _hf_caption(image_bytes: bytes) -> str:
     headers = {"Accept": "application/json"}
     if HF_TOKEN:
@@ -40,6 +46,19 @@ def _hf_caption(image_bytes: bytes) -> str:
     r = requests.post(HF_MODEL_URL, headers=headers, data=image_bytes, timeout=25)
     if r.status_code >= 400:
         return ""
+    return _caption_from_hf_json(r)
+
+async def _hf_caption_async(image_bytes: bytes) -> str:
+    from app.core.http_fetch import post_bytes
+    headers = {"Accept": "application/json"}
+    if HF_TOKEN:
+        headers["Authorization"] = f"Bearer {HF_TOKEN}"
+    r = await post_bytes(HF_MODEL_URL, data=image_bytes, headers=headers, timeout=25)
+    if r.status_code >= 400:
+        return ""
+    return _caption_from_hf_json(r)
+
+def _caption_from_hf_json(r) -> str:
     try:
         data = r.json()
         if isinstance(data, list) and data and isinstance(data[0], dict):
@@ -79,5 +98,13 @@ def stage1_keywords_from_image_url(image_url: str) -> Tuple[List[str], str]:
     except Exception:
         return [], ""
 
-
-
+async def stage1_keywords_from_image_url_async(image_url: str) -> Tuple[List[str], str]:
+    """stage1_keywords_from_image_url의 비동기 버전(이벤트 루프를 막지 않는다)."""
+    try:
+        img = await _http_get_bytes_async(image_url)
+        cap = await _hf_caption_async(img)
+        if not cap:
+            return [], ""
+        return _snap_keywords_from_caption(cap), cap
+    except Exception:
+        return [], ""
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+설정메모 트리거 매칭 벤치마크
+- 기존 방식(메모마다/트리거마다 substring 검사) vs Aho–Corasick 매처(app/services/trigger_matcher.py)
+- 메모 수를 늘려가며(메모당 트리거 5개) 턴당 매칭 시간을 비교한다.
+- 두 방식의 결과(트리거된 memo id 집합)가 같은지도 함께 검증한다.
+
+실행: python benchmark_trigger_matcher.py
+"""
+import random
+import statistics
+import time
+
+from app.services.trigger_matcher import build_memo_trigger_matcher
+
+MEMO_COUNTS = [10, 100, 500, 1000, 2000, 5000]
+TRIGGERS_PER_MEMO = 5
+RUNS = 200
+SEED = 7
+
+SYLLABLES = "가나다라마바사아자차카타파하거너더러머버서어저처커터퍼허고노도로모보소오조초"
+
+
+def _word(rng, lo=2, hi=4):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(lo, hi)))
+
+
+def _make_memos(rng, n):
+    return [
+        {"id": f"memo_{i}", "detail": f"설정 {i}", "triggers": [_word(rng) for _ in range(TRIGGERS_PER_MEMO)]}
+        for i in range(n)
+    ]
+
+
+def _make_text(rng, memos, length=300, hits=3):
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(_word(rng, 1, 3))
+    for m in rng.sample(memos, min(hits, len(memos))):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(m["triggers"]))
+    return " ".join(words)
+
+
+def naive(memos, text):
+    """기존 send_message/preview 방식."""
+    text_norm = str(text or "").lower()
+    out = set()
+    for m in memos:
+        for t in (m.get("triggers") or [])[:5]:
+            tt = str(t or "").strip().lower()
+            if tt and tt in text_norm:
+                out.add(m["id"])
+                break
+    return out
+
+
+def _timeit(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    rng = random.Random(SEED)
+    print(f"{'memos':>6} {'triggers':>9} {'build(ms)':>10} {'naive(us)':>10} {'ac(us)':>9} {'speedup':>8}")
+    for n in MEMO_COUNTS:
+        memos = _make_memos(rng, n)
+        texts = [_make_text(rng, memos) for _ in range(20)]
+
+        t0 = time.perf_counter()
+        matcher = build_memo_trigger_matcher(memos)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        for text in texts:
+            got = {str(x) for x in matcher.matches(text)}
+            assert got == naive(memos, text), f"mismatch at n={n}"
+
+        naive_us = _timeit(lambda: [naive(memos, t) for t in texts], max(5, RUNS // max(1, n // 100))) / len(texts)
+        ac_us = _timeit(lambda: [matcher.matches(t) for t in texts], RUNS) / len(texts)
+        print(
+            f"{n:>6} {matcher.pattern_count:>9} {build_ms:>10.2f} {naive_us:>10.1f} {ac_us:>9.1f} "
+            f"{naive_us / ac_us if ac_us else 0:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
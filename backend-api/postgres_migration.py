@@ -123,6 +123,37 @@ TABLES_TO_CREATE = [
         CONSTRAINT uq_user_subscriptions_user_id UNIQUE (user_id)
     )
     """,
+    # 크리에이터 통계 롤업(app/services/creator_stats_rollup.py)
+    """
+    CREATE TABLE IF NOT EXISTS creator_stats_rollups (
+        creator_id UUID NOT NULL,
+        grain VARCHAR(1) NOT NULL,
+        bucket_start TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        messages INTEGER NOT NULL DEFAULT 0,
+        chatters_hll BYTEA,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        PRIMARY KEY (creator_id, grain, bucket_start)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS character_stats_rollups (
+        character_id UUID NOT NULL,
+        grain VARCHAR(1) NOT NULL,
+        bucket_start TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        creator_id UUID NOT NULL,
+        messages INTEGER NOT NULL DEFAULT 0,
+        chatters_hll BYTEA,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        PRIMARY KEY (character_id, grain, bucket_start)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats_rollup_state (
+        name VARCHAR(50) PRIMARY KEY,
+        watermark TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    )
+    """,
 ]
 
 # 테이블 생성 후 실행할 인덱스/시드
@@ -143,6 +174,65 @@ POST_TABLE_SQLS = [
         "label": "idx_user_subscriptions_plan",
         "critical": False,
     },
+    # 채팅 히스토리 키셋 조회(최근 N개/커서 이전) — 방 길이와 무관하게 인덱스 역순 스캔
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_chat_messages_room_created_id ON chat_messages(chat_room_id, created_at, id)",
+        "label": "ix_chat_messages_room_created_id",
+        "critical": False,
+    },
+    # 통계 롤업 잡의 created_at 구간 조회 / 크리에이터별 상위 캐릭터 조회
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_chat_messages_created_at ON chat_messages(created_at)",
+        "label": "ix_chat_messages_created_at",
+        "critical": False,
+    },
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_character_stats_rollups_creator ON character_stats_rollups(creator_id, grain, bucket_start)",
+        "label": "ix_character_stats_rollups_creator",
+        "critical": False,
+    },
+    # 검색(부분 문자열 ILIKE '%q%' / similarity 랭킹) — pg_trgm GIN 인덱스
+    # - app/services/search_service.py가 사용하는 컬럼들. 확장 설치 권한이 없으면 인덱스 없이 동작(ILIKE 스캔).
+    {
+        "sql": "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "label": "ext_pg_trgm",
+        "critical": False,
+    },
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_characters_name_trgm ON characters USING gin (name gin_trgm_ops)",
+        "label": "ix_characters_name_trgm",
+        "critical": False,
+    },
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_characters_description_trgm ON characters USING gin (description gin_trgm_ops)",
+        "label": "ix_characters_description_trgm",
+        "critical": False,
+    },
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_stories_title_trgm ON stories USING gin (title gin_trgm_ops)",
+        "label": "ix_stories_title_trgm",
+        "critical": False,
+    },
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_stories_content_trgm ON stories USING gin (content gin_trgm_ops)",
+        "label": "ix_stories_content_trgm",
+        "critical": False,
+    },
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (username gin_trgm_ops)",
+        "label": "ix_users_username_trgm",
+        "critical": False,
+    },
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_tags_name_trgm ON tags USING gin (name gin_trgm_ops)",
+        "label": "ix_tags_name_trgm",
+        "critical": False,
+    },
+    {
+        "sql": "CREATE INDEX IF NOT EXISTS ix_tags_slug_trgm ON tags USING gin (slug gin_trgm_ops)",
+        "label": "ix_tags_slug_trgm",
+        "critical": False,
+    },
     # 구독 플랜 시드 데이터
     {
         "sql": """
@@ -65,6 +65,31 @@ TABLES_TO_CREATE = {
         "UNIQUE(room_id, user_id)",
         "FOREIGN KEY(room_id) REFERENCES chat_rooms(id) ON DELETE CASCADE",
         "FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE"
+    ],
+    # 크리에이터 통계 롤업(app/services/creator_stats_rollup.py)
+    "creator_stats_rollups": [
+        "creator_id CHAR(36) NOT NULL",
+        "grain VARCHAR(1) NOT NULL",
+        "bucket_start DATETIME NOT NULL",
+        "messages INTEGER DEFAULT 0 NOT NULL",
+        "chatters_hll BLOB",
+        "updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP)",
+        "PRIMARY KEY(creator_id, grain, bucket_start)"
+    ],
+    "character_stats_rollups": [
+        "character_id CHAR(36) NOT NULL",
+        "grain VARCHAR(1) NOT NULL",
+        "bucket_start DATETIME NOT NULL",
+        "creator_id CHAR(36) NOT NULL",
+        "messages INTEGER DEFAULT 0 NOT NULL",
+        "chatters_hll BLOB",
+        "updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP)",
+        "PRIMARY KEY(character_id, grain, bucket_start)"
+    ],
+    "stats_rollup_state": [
+        "name VARCHAR(50) PRIMARY KEY",
+        "watermark DATETIME NOT NULL",
+        "updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP)"
     ]
 }
 
@@ -128,6 +153,25 @@ COLUMNS_TO_ADD = {
     ],
 }
 
+# --- 생성해야 할 인덱스 목록 ---
+# (인덱스 이름, 테이블 이름, 컬럼 목록) — CREATE INDEX IF NOT EXISTS로 멱등 생성
+INDEXES_TO_CREATE = [
+    ("ix_chat_messages_room_created_id", "chat_messages", "chat_room_id, created_at, id"),
+    ("ix_chat_messages_created_at", "chat_messages", "created_at"),
+    ("ix_character_stats_rollups_creator", "character_stats_rollups", "creator_id, grain, bucket_start"),
+]
+
+# --- 검색 인덱스(FTS5, trigram 토크나이저) ---
+# (FTS 테이블 이름, 원본 테이블, 인덱싱 컬럼 목록)
+# - 원본 UUID를 id(UNINDEXED) 컬럼에 저장해 잇는다(CHAR(36) PK 테이블의 암묵 rowid는 VACUUM 등으로 바뀔 수 있음).
+#   트리거로 INSERT/UPDATE/DELETE를 동기화하고, 구 스키마(rowid 연결)는 다시 만들어 백필한다.
+# - trigram 토크나이저는 SQLite 3.34+ 필요(미지원이면 건너뛰고 검색은 LIKE로 폴백).
+# - app/services/search_service.py가 이 테이블 이름을 사용한다.
+FTS_TABLES_TO_CREATE = [
+    ("characters_fts", "characters", ["name", "description"]),
+    ("stories_fts", "stories", ["title", "content"]),
+]
+
 def _resolve_db_path():
     """환경에 맞는 SQLite 경로를 탐지합니다."""
     # 1) 환경변수 우선
@@ -192,6 +236,57 @@ def run_precise_migration():
                         # 다른 오류는 전파하여 중단
                         raise e
         
+        # 2-1. 인덱스 생성
+        for index_name, table, columns_sql in INDEXES_TO_CREATE:
+            try:
+                print(f"🔄 '{table}' 테이블에 '{index_name}' 인덱스 생성 또는 확인 중...")
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns_sql})")
+                print(f"  -> ✅ 성공: '{index_name}' 인덱스가 준비되었습니다.")
+            except sqlite3.OperationalError as e:
+                print(f"  -> ❌ 실패: {index_name} 인덱스 생성 중 오류 발생 - {e}")
+
+        # 2-2. 검색 인덱스(FTS5 trigram) + 동기화 트리거
+        for fts_name, table, fts_cols in FTS_TABLES_TO_CREATE:
+            try:
+                print(f"🔄 '{table}' 검색 인덱스 '{fts_name}' 생성 또는 확인 중...")
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts_name,))
+                exists = cursor.fetchone() is not None
+                if exists:
+                    cursor.execute(f"PRAGMA table_info({fts_name})")
+                    if "id" not in [row[1] for row in cursor.fetchall()]:
+                        print(f"  -> 🔁 구 스키마(rowid 연결) '{fts_name}' 재생성")
+                        for suffix in ("ai", "au", "ad"):
+                            cursor.execute(f"DROP TRIGGER IF EXISTS {fts_name}_{suffix}")
+                        cursor.execute(f"DROP TABLE {fts_name}")
+                        exists = False
+                col_list = ", ".join(fts_cols)
+                new_vals = ", ".join(f"COALESCE(NEW.{c}, '')" for c in fts_cols)
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name} USING fts5(id UNINDEXED, {col_list}, tokenize='trigram')"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts_name}(id, {col_list}) VALUES (NEW.id, {new_vals}); END"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_name}_au AFTER UPDATE OF {col_list} ON {table} BEGIN "
+                    f"DELETE FROM {fts_name} WHERE id = OLD.id; "
+                    f"INSERT INTO {fts_name}(id, {col_list}) VALUES (NEW.id, {new_vals}); END"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {table} BEGIN "
+                    f"DELETE FROM {fts_name} WHERE id = OLD.id; END"
+                )
+                if not exists:
+                    src_vals = ", ".join(f"COALESCE({c}, '')" for c in fts_cols)
+                    cursor.execute(
+                        f"INSERT INTO {fts_name}(id, {col_list}) SELECT id, {src_vals} FROM {table}"
+                    )
+                    print(f"  -> 🧩 기존 '{table}' 행 백필 완료")
+                print(f"  -> ✅ 성공: '{fts_name}' 검색 인덱스가 준비되었습니다.")
+            except sqlite3.OperationalError as e:
+                print(f"  -> ⚠️  건너뜀: {fts_name} 검색 인덱스 생성 실패(LIKE 검색으로 폴백) - {e}")
+
         # 3. is_origchat 백필(스토리 테이블에 컬럼 존재 시)
         try:
             print("\n🔎 'stories' 테이블의 컬럼 확인 중...")